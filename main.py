@@ -3,6 +3,7 @@ Sally Love Real Estate Voice Agent System
 FastAPI application entry point
 """
 
+import time
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,6 +13,15 @@ from contextlib import asynccontextmanager
 from src.config.settings import settings
 from src.utils.logger import setup_logger, get_logger
 from src.utils.errors import VapiError, IntegrationError
+from src.utils.offload import shutdown_offload_pools
+from src.utils.cache import close_cache
+from src.utils.call_sessions import call_sessions
+from src.utils.sms_outbox import sms_outbox
+from src.integrations.broker_notifier import broker_notifier
+from src.integrations.boldtrail import close_http_client, hedging_stats
+from src.utils.lead_outbox import lead_outbox
+from src.utils.circuit_breaker import circuit_states
+from src.utils.deadline import deadline_scope, tool_budget
 
 # Import function handlers
 from src.functions.check_property import router as check_property_router
@@ -20,11 +30,13 @@ from src.functions.route_to_agent import router as route_to_agent_router
 from src.functions.create_buyer_lead import router as create_buyer_lead_router
 from src.functions.create_seller_lead import router as create_seller_lead_router
 from src.functions.send_notification import router as send_notification_router
+from src.functions.market_summary import router as market_summary_router
+from src.functions.more_properties import router as more_properties_router
 
 # Import webhook handlers
 from src.webhooks.vapi_webhooks import router as vapi_webhooks_router
 from src.webhooks.crm_webhooks import router as crm_webhooks_router
-from src.webhooks.ghl_webhooks import router as ghl_webhooks_router
+from src.webhooks.ghl_webhooks import router as ghl_webhooks_router, outbound_dials
 
 # Setup logging
 setup_logger()
@@ -42,11 +54,20 @@ async def lifespan(app: FastAPI):
     logger.info(f"Phone: {settings.BUSINESS_PHONE}")
     smtp_ok = bool(settings.SMTP_HOST and settings.SMTP_USERNAME and settings.SMTP_PASSWORD)
     logger.info(f"Email (SMTP) configured: {smtp_ok}")
+    outbound_dials.resume()  # Outbound calls queued before a restart
+    lead_outbox.resume()  # Lead writes not yet in the CRM (e.g. kvCore was down)
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Sally Love Voice Agent System")
+    await outbound_dials.stop()
+    await lead_outbox.stop()  # Unwritten leads stay in the outbox database for the next start
+    await broker_notifier.flush()  # Buffered broker copies go out before the SMS outbox drains
+    await sms_outbox.drain(settings.SMS_DRAIN_TIMEOUT_SECONDS)
+    shutdown_offload_pools()
+    await close_http_client()
+    await close_cache()
 
 
 # Initialize FastAPI app (disable docs in production)
@@ -74,6 +95,22 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def tool_deadline_and_timing(request: Request, call_next):
+    """Run each tool call under its latency budget; record its latency on the call session (X-Vapi-Call-Id header)"""
+    if not request.url.path.startswith("/functions/"):
+        return await call_next(request)
+    tool = request.url.path.rsplit("/", 1)[-1]
+    started = time.perf_counter()
+    with deadline_scope(tool_budget(tool)):
+        response = await call_next(request)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    async with call_sessions.update(request.headers.get("x-vapi-call-id")) as session:
+        if session:
+            session.record_tool(tool, elapsed_ms)
+    return response
+
+
 # Exception handlers
 @app.exception_handler(VapiError)
 async def vapi_error_handler(request: Request, exc: VapiError):
@@ -134,6 +171,12 @@ async def health_check():
             "twilio": "configured" if settings.TWILIO_ACCOUNT_SID else "not_configured",
             "smtp": "configured" if (settings.SMTP_HOST and settings.SMTP_USERNAME and settings.SMTP_PASSWORD) else "not_configured",
         },
+        "sms": sms_outbox.stats(),
+        "broker_digest": broker_notifier.stats(),
+        "circuits": circuit_states(),
+        "kvcore_hedging": hedging_stats(),
+        "lead_outbox": lead_outbox.stats(),
+        "outbound_dials": outbound_dials.stats(),
     }
 
 
@@ -144,6 +187,8 @@ app.include_router(route_to_agent_router, prefix="/functions", tags=["Functions"
 app.include_router(create_buyer_lead_router, prefix="/functions", tags=["Functions"])
 app.include_router(create_seller_lead_router, prefix="/functions", tags=["Functions"])
 app.include_router(send_notification_router, prefix="/functions", tags=["Functions"])
+app.include_router(market_summary_router, prefix="/functions", tags=["Functions"])
+app.include_router(more_properties_router, prefix="/functions", tags=["Functions"])
 
 # Include webhook routers
 app.include_router(vapi_webhooks_router, prefix="/webhooks/vapi", tags=["Webhooks"])
@@ -152,11 +197,13 @@ app.include_router(ghl_webhooks_router, prefix="/webhooks/ghl", tags=["Webhooks
 
 
 if __name__ == "__main__":
+    reload = settings.ENVIRONMENT == "development"
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.ENVIRONMENT == "development",
+        reload=reload,
+        workers=1 if reload else max(1, settings.WORKERS),  # reload supports a single worker only
         log_level=settings.LOG_LEVEL.lower(),
     )
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass address tokenizer (src/utils/address.py) against the
+previous chained str.replace normalizer + regex re-tokenization.
+
+Runs offline on synthetic feed-like addresses; no API keys needed beyond the
+usual .env (settings are imported by the package).
+
+Usage:
+    python scripts/benchmark_address_normalizer.py [--count 20000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.address import parse_address  # noqa: E402
+
+_STREET_NAMES = [
+    "Gallinule", "Auburn", "Bellavista", "Boss", "Palm", "Main", "Courtyard", "Magnolia",
+    "Buttonwood", "Heron", "Spanish Moss", "Lake Weir", "Belle Meade", "Osprey", "Cypress",
+]
+_SUFFIXES = ["Court", "Lane", "Circle", "Drive", "Street", "Avenue", "Way", "Loop", "Terrace", "Road"]
+_PREFIXES = ["", "", "", "SE ", "SW 80th ", "N. "]
+_UNITS = ["", "", "", "", " Unit 4", " Apt 12B", " #7"]
+
+
+def legacy_normalize(address: str) -> str:
+    """Previous BoldTrailClient._normalize_address."""
+    return (address.lower()
+            .replace(",", "")
+            .replace(".", "")
+            .replace("street", "st")
+            .replace("avenue", "ave")
+            .replace("boulevard", "blvd")
+            .replace("road", "rd")
+            .replace("drive", "dr")
+            .replace("lane", "ln")
+            .replace("court", "ct")
+            .replace("circle", "cir")
+            .replace("southeast", "se")
+            .replace("southwest", "sw")
+            .replace("northeast", "ne")
+            .replace("northwest", "nw")
+            .strip())
+
+
+def legacy_parse(norm_addr: str):
+    """Previous BoldTrailClient._parse_address_parts."""
+    tokens = [t for t in re.split(r"\W+", norm_addr) if t]
+    street_number = tokens[0] if tokens and tokens[0].isdigit() else None
+    name_start = 1 if street_number else 0
+    street_types = {"ct", "st", "ave", "dr", "ln", "cir", "rd", "blvd"}
+    street_type = None
+    name_end = len(tokens)
+    if len(tokens) > name_start and tokens[-1] in street_types:
+        street_type = tokens[-1]
+        name_end = len(tokens) - 1
+    name_words = [t for t in tokens[name_start:name_end] if len(t) >= 2]
+    return street_number, name_words, street_type
+
+
+def make_addresses(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        f"{rng.randint(100, 19999)} {rng.choice(_PREFIXES)}{rng.choice(_STREET_NAMES)} "
+        f"{rng.choice(_SUFFIXES)}{rng.choice(_UNITS)}"
+        for _ in range(count)
+    ]
+
+
+def bench(label: str, fn, addresses: list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for address in addresses:
+            fn(address)
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / (rounds * len(addresses)) * 1e6
+    print(f"  {label:<44} {elapsed * 1000:9.1f} ms total  {per_call_us:7.2f} us/address")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000, help="Synthetic addresses to parse")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the address list")
+    args = parser.parse_args()
+
+    addresses = make_addresses(args.count)
+    distinct = len(set(addresses))
+    print("=" * 80)
+    print(f"ADDRESS NORMALIZER BENCHMARK ({args.count} addresses, {distinct} distinct, {args.rounds} rounds)")
+    print("=" * 80)
+
+    legacy = bench("legacy replace chain + regex split", lambda a: legacy_parse(legacy_normalize(a)), addresses, args.rounds)
+
+    parse_address.cache_clear()
+    cold = bench("parse_address (cold, first pass uncached)", parse_address.__wrapped__, addresses, args.rounds)
+
+    parse_address.cache_clear()
+    warm = bench("parse_address (memoized, as in search)", parse_address, addresses, args.rounds)
+
+    print()
+    print(f"  speedup vs legacy: uncached {legacy / cold:.2f}x, memoized {legacy / warm:.2f}x")
+
+    rewritten = [a for a in addresses if "courtyard" in a.lower()][:1]
+    if rewritten:
+        print()
+        print(f"  legacy:  {rewritten[0]!r} -> {legacy_normalize(rewritten[0])!r}")
+        print(f"  new:     {rewritten[0]!r} -> {parse_address(rewritten[0]).normalized!r}")
+
+
+if __name__ == "__main__":
+    main()
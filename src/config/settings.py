@@ -20,6 +20,7 @@ class Settings(BaseSettings):
     # Server Configuration
     HOST: str  # Must be set in .env
     PORT: int  # Must be set in .env
+    WORKERS: int = 1  # uvicorn worker processes; >1 shares the listings feed via a mapped snapshot
     WEBHOOK_BASE_URL: str  # Must be set in .env
     
     # Vapi Configuration
@@ -41,6 +42,27 @@ class Settings(BaseSettings):
     BOLDTRAIL_API_URL: str = "https://api.kvcore.com/v2/public"  # Static - never changes
     BOLDTRAIL_ACCOUNT_ID: str  # Must be set in .env
     BOLDTRAIL_ZAPIER_KEY: str  # Must be set in .env
+    BOLDTRAIL_REQUESTS_PER_MINUTE: float = 60  # kvCore API requests per minute per token, shared by all workers; 0 = unlimited
+    BOLDTRAIL_RATE_BURST: int = 5  # Requests sent back to back after idling
+    BOLDTRAIL_MAX_RETRIES: int = 3  # Retries for 429/5xx/connection errors (when safe for the request)
+    BOLDTRAIL_RETRY_BASE_SECONDS: float = 0.5  # First retry delay (doubles per retry, jittered; Retry-After wins)
+    BOLDTRAIL_CALL_BUDGET_SECONDS: float = 8.0  # Rate-limit waits + retries allowed for tool-path requests
+    BOLDTRAIL_BACKGROUND_BUDGET_SECONDS: float = 60.0  # Same for background notes / call logs
+    BOLDTRAIL_HEDGE_ENABLED: bool = True  # Re-send slow tool-path GETs on a second connection, first answer wins
+    BOLDTRAIL_HEDGE_QUANTILE: float = 0.9  # Hedge after this quantile of recent GET latencies
+    BOLDTRAIL_HEDGE_MAX_RATIO: float = 0.05  # Hedges allowed per request (extra load cap)
+    BOLDTRAIL_HEDGE_MIN_DELAY_SECONDS: float = 0.2  # Never hedge sooner than this
+
+    # Circuit breakers for kvCore, Vapi, Stellar MLS, Twilio and SMTP (see src/utils/circuit_breaker.py)
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Outage failures (timeouts, connection errors, 5xx) that open a breaker; 0 disables
+    CIRCUIT_WINDOW_SECONDS: float = 60.0  # Failures older than this are not counted
+    CIRCUIT_RESET_SECONDS: float = 30.0  # Recovery probe interval while open
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0  # Connect timeout for kvCore / Vapi / MLS requests (read timeout stays 30s)
+
+    # Per-tool latency budgets (see src/utils/deadline.py); Vapi's default tool timeout is 20s
+    TOOL_DEADLINE_SECONDS: float = 12.0  # Deadline for a /functions/* request (0 disables)
+    TOOL_DEADLINE_OVERRIDES: str = ""  # Per-tool budgets: "check_property:10,route_to_agent:15"
+    TOOL_DEADLINE_RESERVE_SECONDS: float = 1.5  # Time kept back to answer with a partial result
     
     # Stellar MLS Configuration (Optional - not currently used)
     STELLAR_MLS_USERNAME: str = ""
@@ -68,6 +90,73 @@ class Settings(BaseSettings):
 
     # Agent Roster (source of truth for transfers, replaces BoldTrail for agent lookup)
     AGENT_ROSTER_PATH: str = "data/agent_roster.json"  # Path relative to project root
+
+    # Property search result cache (entries are dropped automatically when the XML feed refreshes)
+    PROPERTY_QUERY_CACHE_SIZE: int = 256  # Max cached searches; 0 disables the cache
+    PROPERTY_QUERY_CACHE_TTL_SECONDS: int = 300  # Bounds staleness of manual-listings fallback results
+
+    # Property search result sets (check_property returns a cursor; more_properties pages through it)
+    PROPERTY_RESULT_SET_MAX: int = 50  # Max listings kept per search
+    PROPERTY_RESULT_SET_MAX_SETS: int = 500  # Max result sets held in memory
+    PROPERTY_RESULT_SET_TTL_SECONDS: int = 1800  # Result sets expire after a call-length window
+
+    # CPU offload (XML feed parsing and wide fuzzy address scans run off the event loop)
+    OFFLOAD_FEED_PARSE_MODE: str = "process"  # "process", "thread" or "inline"
+    OFFLOAD_PROCESS_WORKERS: int = 1  # Feed parsing processes
+    OFFLOAD_THREAD_WORKERS: int = 2  # Index builds and wide searches
+    OFFLOAD_MAX_PENDING: int = 8  # Jobs admitted per pool; further callers wait for a slot
+    OFFLOAD_WIDE_SEARCH_ROWS: int = 2000  # Address scans over more candidate rows go to a thread
+
+    # Shared listings snapshot (one worker downloads the feed; all workers map the same file)
+    LISTINGS_SNAPSHOT_DIR: str = ""  # Snapshot mode is on when WORKERS > 1 or this is set; empty = private temp dir
+
+    # Shared cache (feed, manual listings, contact lookups, call result sets) across machines
+    CACHE_BACKEND: str = "memory"  # "memory" (per process) or "redis" (any Redis-protocol server)
+    REDIS_URL: str = ""  # redis://[:password@]host:port/db or rediss:// for TLS
+    CACHE_KEY_PREFIX: str = "sally_love:"  # Namespace for keys in a shared server
+    MANUAL_LISTINGS_CACHE_TTL_SECONDS: int = 300  # Manual listings API response and its index; 0 disables
+    CONTACT_SEARCH_CACHE_TTL_SECONDS: int = 300  # Non-empty contact search results; 0 disables
+    CONTACT_ID_CACHE_TTL_SECONDS: int = 86400  # Re-check the CRM for a caller after this long; 0 disables
+    LEAD_IDEMPOTENCY_WINDOW_SECONDS: int = 600  # Repeat lead requests for a caller/call replay the first result
+
+    # Call sessions (per-call state kept in the shared cache; see src/utils/call_sessions.py)
+    CALL_SESSION_TTL_SECONDS: int = 7200  # Drop a call's session after this long without updates; 0 disables
+    CALL_PREFETCH_WAIT_SECONDS: float = 1.5  # Max wait on an in-flight call-start caller lookup
+    CALL_SESSION_MAX_LISTINGS: int = 50  # Listings remembered as shown per call
+    CALL_SESSION_MAX_TOOL_CALLS: int = 100  # Tool timings kept per call
+
+    # Durable lead outbox: lead writes are committed locally, then replayed to kvCore (see src/utils/lead_outbox.py)
+    LEAD_OUTBOX_PATH: str = "data/lead_outbox.db"  # SQLite (WAL) file shared by all workers; empty = temp dir
+    LEAD_OUTBOX_MAX_ATTEMPTS: int = 20  # Replays before an entry is marked failed (it stays in the database)
+    LEAD_OUTBOX_RETRY_BASE_SECONDS: float = 5.0  # First retry delay (doubles per attempt, jittered)
+    LEAD_OUTBOX_RETRY_MAX_SECONDS: float = 300.0  # Longest retry delay
+    LEAD_OUTBOX_RETENTION_SECONDS: int = 604800  # Written entries kept this long (7 days)
+
+    # Outbound dialing for GHL form submissions (queued; see src/utils/dial_scheduler.py)
+    OUTBOUND_MAX_CONCURRENT_CALLS: int = 5  # Live outbound calls at once
+    OUTBOUND_CALLS_PER_MINUTE: float = 10  # Call starts per minute; 0 = unlimited
+    OUTBOUND_DEDUPE_WINDOW_SECONDS: int = 3600  # Ignore repeat submissions for a phone called this recently
+    OUTBOUND_DIAL_BUSINESS_HOURS_ONLY: bool = True  # Hold calls outside the dialing window
+    OUTBOUND_DIAL_HOURS_START: str = ""  # HH:MM in OFFICE_TIMEZONE; empty = OFFICE_HOURS_START
+    OUTBOUND_DIAL_HOURS_END: str = ""  # HH:MM in OFFICE_TIMEZONE; empty = OFFICE_HOURS_END
+    OUTBOUND_DIAL_DAYS: str = "mon,tue,wed,thu,fri,sat"  # Dialing weekdays
+    OUTBOUND_DIAL_MAX_ATTEMPTS: int = 3  # Dial attempts per submission before giving up
+    OUTBOUND_QUEUE_PATH: str = "data/outbound_dial_queue.db"  # SQLite queue shared by all workers; empty = memory only (one worker)
+
+    # Outbound SMS (paced per sending number; see src/utils/sms_outbox.py)
+    SMS_SEGMENTS_PER_SECOND: float = 1.0  # Per sending number (long code ~1; toll-free/short code higher); 0 = unlimited
+    SMS_BURST_SEGMENTS: float = 1  # Segments sent back to back after the lane idles
+    SMS_DEDUPE_WINDOW_SECONDS: int = 300  # Drop an identical message to the same recipient sent this recently
+    SMS_MAX_ATTEMPTS: int = 5  # Delivery attempts on 429/503 before a message is reported failed
+    SMS_RETRY_BASE_SECONDS: float = 2.0  # First retry delay (doubles per attempt, jittered)
+    SMS_BATCH_MAX_CHARS: int = 1600  # Pack queued messages to one recipient up to this length; 0 disables
+    SMS_DRAIN_TIMEOUT_SECONDS: float = 20.0  # Shutdown waits this long for queued SMS
+
+    # Broker/office copies (see src/integrations/broker_notifier.py)
+    BROKER_DIGEST_ENABLED: bool = False  # Collect non-urgent broker/office copies into periodic digests
+    BROKER_DIGEST_INTERVAL_SECONDS: int = 900  # Longest a copy waits for the next digest
+    BROKER_DIGEST_MAX_ENTRIES: int = 20  # Send the digest early once this many copies are waiting
+    BROKER_DIGEST_URGENT_CATEGORIES: str = "failed_transfer,no_answer,lead_write_failed,outbound_dial_failed"  # Always sent at once
     
     # Testing Configuration
     TEST_MODE: bool  # Must be set in .env
@@ -5,24 +5,232 @@ Searches both MLS listings (XML feed) and manual listings (API endpoint)
 Uses fallback strategy: XML feed first, then manual listings if no results found
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+import asyncio
+from fastapi import APIRouter, Header, HTTPException
+from typing import Annotated, Dict, Any, List, Optional, Tuple
 from src.models.vapi_models import VapiResponse, CheckPropertyRequest
 from src.config.settings import settings
 from src.integrations.boldtrail import BoldTrailClient
 from src.utils.logger import get_logger
 from src.utils.errors import BoldTrailError
-from src.utils.roster import find_agent_by_name, get_any_agent
-from src.utils.speech_format import format_spoken_address, format_spoken_price
+from src.utils.roster import annotate_listing_agents, get_roster_version
+from src.utils.listings_index import normalize_mls_number, price_bounds
+from src.utils.query_cache import QueryCache
+from src.utils.result_sets import ResultSetStore
+from src.utils.call_sessions import call_sessions
+from src.utils.deadline import detach, within_deadline
+from src.utils.speech_format import format_spoken_address, format_spoken_bed_bath, format_spoken_price
 
 logger = get_logger(__name__)
 router = APIRouter()
 
 crm_client = BoldTrailClient()
 
+# Search results keyed by canonical request + XML feed version (dropped on feed refresh)
+_search_cache = QueryCache(
+    max_entries=settings.PROPERTY_QUERY_CACHE_SIZE,
+    ttl_seconds=settings.PROPERTY_QUERY_CACHE_TTL_SECONDS,
+)
+
+# Full multi-result searches, paged through by cursor (see more_properties)
+result_sets = ResultSetStore(
+    max_sets=settings.PROPERTY_RESULT_SET_MAX_SETS,
+    ttl_seconds=settings.PROPERTY_RESULT_SET_TTL_SECONDS,
+)
+
+
+def _canonical_text(value: Optional[str]) -> Optional[str]:
+    """Trim, collapse internal whitespace and case-fold; empty becomes None."""
+    if value is None:
+        return None
+    value = " ".join(value.split()).casefold()
+    return value or None
+
+
+def _canonical_number(value: Optional[float]) -> Optional[float]:
+    """Numeric filter as float; 0 is treated like "not given", as the search does."""
+    return float(value) if value else None
+
+
+def _canonical_search_key(request: CheckPropertyRequest) -> Tuple:
+    """
+    Cache key for a property search
+    
+    Requests that differ only in whitespace, casing, defaulted state or numeric
+    representation (3 vs 3.0) produce the same key.
+    """
+    return (
+        _canonical_text(request.address),
+        _canonical_text(request.city),
+        _canonical_text(request.state) or "fl",
+        _canonical_text(request.zip_code),
+        normalize_mls_number(request.mls_number) or None,  # As the listings index matches it
+        _canonical_text(request.agent_name),
+        _canonical_text(request.property_type),
+        _canonical_number(request.min_price),
+        _canonical_number(request.max_price),
+        _canonical_number(request.bedrooms),
+        _canonical_number(request.bathrooms),
+    )
+
+
+def describe_property(prop: Dict[str, Any], intro: str = "I found a property at") -> str:
+    """
+    Spoken description of a single listing (address, beds/baths, price, status, MLS, agent)
+    
+    Args:
+        prop: Listing dict from the XML feed or manual listings
+        intro: Opening words before the address
+        
+    Returns:
+        Message for the voice agent
+    """
+    # Handle both possible field names from XML feed
+    mls_num = prop.get('mlsNumber') or prop.get('mls_number', 'N/A')
+    prop_type = prop.get('propertyType') or prop.get('property_type', 'home')
+    agent_name = prop.get('agentName', '').strip()
+    agent_phone = prop.get('agentPhone', '').strip()
+    
+    # Check status and include in message if not active
+    prop_status = prop.get('status', '').lower()
+    status_note = ""
+    if prop_status in ['pending', 'under contract']:
+        status_note = " This property is currently under contract, but they may be accepting backup offers. "
+    elif prop_status == 'sold':
+        status_note = " I should note that this property has been sold. "
+    
+    # Spoken strings are rendered at feed ingest; format on the fly only if missing
+    spoken_address = prop.get('spokenAddress') or format_spoken_address(prop.get('address', ''))
+    spoken_price = prop.get('spokenPrice') or format_spoken_price(prop.get('price'))
+    spoken_bed_bath = prop.get('spokenBedBath') or format_spoken_bed_bath(
+        prop.get('bedrooms'), prop.get('bathrooms')
+    )
+    
+    message = (
+        f"{intro} {spoken_address}, {prop.get('city')}. "
+        f"It's a {spoken_bed_bath} "
+        f"{prop_type} listed at {spoken_price}.{status_note}"
+    )
+    if mls_num and mls_num != 'N/A':
+        message += f"The MLS number is {mls_num}. "
+    
+    # Include agent information if available
+    if agent_name:
+        message += f"The listing agent is {agent_name}. "
+        if agent_phone:
+            message += f"Would you like me to connect you with {agent_name}?"
+        else:
+            message += "Would you like more details about this property?"
+    else:
+        message += "Would you like more details about this property?"
+    return message
+
+
+def listing_agent_data(prop: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Listing agent, transfer phone and broker info for a listing
+    
+    Roster resolution (roster phone when the agent matches; else any roster agent)
+    is stored on feed listings at ingest. Listings without it, or resolved against
+    an older roster, are resolved here first.
+    
+    Returns:
+        Dict with any of "listing_agent", "transfer_phone", "broker"
+    """
+    data: Dict[str, Any] = {}
+    roster_path = settings.AGENT_ROSTER_PATH or None
+    if prop.get('rosterVersion') != get_roster_version(roster_path):
+        annotate_listing_agents([prop], roster_path)
+
+    xml_agent_name = (prop.get('agentName') or '').strip()
+    xml_agent_phone = (prop.get('agentPhone') or '').strip()
+    agent_name = prop.get('transferAgentName') or ''
+    transfer_phone = prop.get('transferPhone') or ''
+    if xml_agent_name and not prop.get('rosterMatched') and agent_name != xml_agent_name:
+        logger.info(f"Listing agent '{xml_agent_name}' not in roster; using fallback: {agent_name}")
+
+    if agent_name:
+        data["listing_agent"] = {
+            "name": agent_name,
+            "phone": transfer_phone or xml_agent_phone,
+            "email": prop.get('transferAgentEmail') or '',
+            "kvcore_id": prop.get('agentKvcoreId', '')
+        }
+        if transfer_phone or xml_agent_phone:
+            data["transfer_phone"] = transfer_phone or xml_agent_phone
+
+    # Include broker/office info as fallback (Jeff's contact)
+    if prop.get('brokerPhone'):
+        data["broker"] = {
+            "name": prop.get('brokerageName', 'Sally Love Real Estate'),
+            "phone": prop.get('brokerPhone', ''),
+            "email": prop.get('brokerEmail', '')
+        }
+    return data
+
+
+async def _search_properties(request: CheckPropertyRequest, limit: int) -> List[Dict[str, Any]]:
+    """XML feed search with manual-listings fallback (the uncached path of check_property)"""
+    # Search listings from XML feed (includes all MLS listings)
+    properties = await crm_client.search_listings_from_xml(
+        address=request.address,
+        city=request.city,
+        state=request.state or "FL",
+        zip_code=request.zip_code,
+        mls_number=request.mls_number,
+        agent_name=request.agent_name,
+        property_type=request.property_type,
+        min_price=request.min_price,
+        max_price=request.max_price,
+        bedrooms=request.bedrooms,
+        bathrooms=request.bathrooms,
+        status="active",  # Only show active/available listings
+        limit=limit
+    )
+
+    # Fallback: If no results from XML feed, try manual listings
+    if not properties:
+        logger.info("No properties found in XML feed, trying manual listings...")
+        properties = await crm_client.search_manual_listings(
+            address=request.address,
+            city=request.city,
+            state=request.state or "FL",
+            zip_code=request.zip_code,
+            agent_name=request.agent_name,
+            property_type=request.property_type,
+            min_price=request.min_price,
+            max_price=request.max_price,
+            bedrooms=request.bedrooms,
+            bathrooms=request.bathrooms,
+            status="active",
+            limit=limit
+        )
+
+        if properties:
+            logger.info(f"Found {len(properties)} properties in manual listings")
+    
+    return properties
+
+
+async def _lookup_properties(request: CheckPropertyRequest, limit: int) -> List[Dict[str, Any]]:
+    """Cached search results, else a fresh search (cached for the current feed version)"""
+    # Repeat searches against the same feed version skip matching entirely
+    cache_key = _canonical_search_key(request)
+    feed_version = await crm_client.get_feed_version()
+    cached = _search_cache.get(cache_key, feed_version)
+    if cached is not None:
+        logger.info(f"Property search served from cache ({len(cached)} results)")
+        return cached.copy()
+    properties = await _search_properties(request, limit)
+    _search_cache.set(cache_key, properties.copy(), feed_version)
+    return properties
+
 
 @router.post("/check_property")
-async def check_property(request: CheckPropertyRequest) -> VapiResponse:
+async def check_property(
+    request: CheckPropertyRequest,
+    x_vapi_call_id: Annotated[Optional[str], Header()] = None,
+) -> VapiResponse:
     """
     Search for properties in BoldTrail CRM from multiple sources
     
@@ -36,6 +244,14 @@ async def check_property(request: CheckPropertyRequest) -> VapiResponse:
     - Property type, price range, bedrooms, bathrooms
     
     Returns property details including availability, price, and features.
+    Multi-result searches return the first page plus a cursor in data; the
+    more_properties tool reads later pages or a single result by position.
+    
+    With the X-Vapi-Call-Id header, the listings read out, the cursor and the
+    listing agent are remembered on the call's session.
+    
+    A search still running near the tool's deadline gets a "one moment" answer
+    (data.pending) and finishes in the background, so asking again is instant.
     
     Data sources:
     - XML Feed: https://api.kvcore.com/export/listings/{ZAPIER_KEY}/10
@@ -67,46 +283,23 @@ async def check_property(request: CheckPropertyRequest) -> VapiResponse:
                 data={"search_params": {}}
             )
         
-        # When searching by agent name only, return more listings; otherwise limit to 5
-        limit = 10 if request.agent_name and not any([request.address, request.city, request.zip_code, request.mls_number]) else 5
+        # When searching by agent name only, return more listings per page; otherwise 5
+        page_size = 10 if request.agent_name and not any([request.address, request.city, request.zip_code, request.mls_number]) else 5
+        limit = max(page_size, settings.PROPERTY_RESULT_SET_MAX)
 
-        # Search listings from XML feed (includes all MLS listings)
-        properties = await crm_client.search_listings_from_xml(
-            address=request.address,
-            city=request.city,
-            state=request.state or "FL",
-            zip_code=request.zip_code,
-            mls_number=request.mls_number,
-            agent_name=request.agent_name,
-            property_type=request.property_type,
-            min_price=request.min_price,
-            max_price=request.max_price,
-            bedrooms=request.bedrooms,
-            bathrooms=request.bathrooms,
-            status="active",  # Only show active/available listings
-            limit=limit
-        )
-        
-        # Fallback: If no results from XML feed, try manual listings
-        if not properties:
-            logger.info("No properties found in XML feed, trying manual listings...")
-            properties = await crm_client.search_manual_listings(
-                address=request.address,
-                city=request.city,
-                state=request.state or "FL",
-                zip_code=request.zip_code,
-                agent_name=request.agent_name,
-                property_type=request.property_type,
-                min_price=request.min_price,
-                max_price=request.max_price,
-                bedrooms=request.bedrooms,
-                bathrooms=request.bathrooms,
-                status="active",
-                limit=limit
+        # The lookup runs on its own: past the tool's deadline the caller is asked to hold on
+        # while it finishes and fills the search cache, so asking again answers at once
+        lookup = detach(_lookup_properties(request, limit))
+        try:
+            properties = await within_deadline(lookup, settings.TOOL_DEADLINE_RESERVE_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Property search still running at the tool deadline; finishing in background")
+            return VapiResponse(
+                success=True,
+                message="I'm still pulling up those listings. Give me just a moment, then ask me again.",
+                results=[],
+                data={"pending": True, "search_params": request.model_dump(exclude_none=True)}
             )
-            
-            if properties:
-                logger.info(f"Found {len(properties)} properties in manual listings")
         
         if not properties:
             # When searching by agent name only, offer to connect
@@ -123,118 +316,68 @@ async def check_property(request: CheckPropertyRequest) -> VapiResponse:
                 results=[]
             )
         
+        total = len(properties)
+        page = properties[:page_size]
+        
         # Format results for voice response
-        if len(properties) == 1:
-            prop = properties[0]
-            # Handle both possible field names from XML feed
-            mls_num = prop.get('mlsNumber') or prop.get('mls_number', 'N/A')
-            prop_type = prop.get('propertyType') or prop.get('property_type', 'home')
-            agent_name = prop.get('agentName', '').strip()
-            agent_phone = prop.get('agentPhone', '').strip()
-            
-            # Check status and include in message if not active
-            prop_status = prop.get('status', '').lower()
-            status_note = ""
-            if prop_status in ['pending', 'under contract']:
-                status_note = " This property is currently under contract, but they may be accepting backup offers. "
-            elif prop_status == 'sold':
-                status_note = " I should note that this property has been sold. "
-            
-            # Format address and price for speech
-            spoken_address = format_spoken_address(prop.get('address', ''))
-            spoken_price = format_spoken_price(prop.get('price'))
-            
-            message = (
-                f"I found a property at {spoken_address}, {prop.get('city')}. "
-                f"It's a {prop.get('bedrooms', 0)} bedroom, {prop.get('bathrooms', 0)} bathroom "
-                f"{prop_type} listed at {spoken_price}.{status_note}"
-            )
-            if mls_num and mls_num != 'N/A':
-                message += f"The MLS number is {mls_num}. "
-            
-            # Include agent information if available
-            if agent_name:
-                message += f"The listing agent is {agent_name}. "
-                if agent_phone:
-                    message += f"Would you like me to connect you with {agent_name}?"
-                else:
-                    message += "Would you like more details about this property?"
-            else:
-                message += "Would you like more details about this property?"
+        if total == 1:
+            message = describe_property(properties[0])
         else:
-            # Format price range for speech
-            min_price_spoken = format_spoken_price(min(p.get('price', 0) for p in properties))
-            max_price_spoken = format_spoken_price(max(p.get('price', 0) for p in properties))
+            # Format price range for speech (over the whole result set, not just this page)
+            low_price, high_price = price_bounds(properties)
+            min_price_spoken = format_spoken_price(low_price)
+            max_price_spoken = format_spoken_price(high_price)
+            more_note = f"I can go through them {page_size} at a time. " if total > page_size else ""
             
             if request.agent_name:
                 message = (
-                    f"I found {len(properties)} listings for {request.agent_name}. "
-                    f"The prices range from {min_price_spoken} to {max_price_spoken}. "
+                    f"I found {total} listings for {request.agent_name}. "
+                    f"The prices range from {min_price_spoken} to {max_price_spoken}. {more_note}"
                     f"Would you like me to tell you about each one, or connect you with {request.agent_name}?"
                 )
             else:
                 message = (
-                    f"I found {len(properties)} properties matching your criteria. "
+                    f"I found {total} properties matching your criteria. "
                     f"The prices range from {min_price_spoken} "
-                    f"to {max_price_spoken}. "
+                    f"to {max_price_spoken}. {more_note}"
                     f"Would you like me to tell you about each one?"
                 )
         
         # Include agent and transfer info in response data
         response_data = {
-            "count": len(properties),
+            "count": len(page),
+            "total": total,
             "search_params": request.model_dump(exclude_none=True)
         }
         
+        # Keep the full result set server-side; follow-ups page through it via more_properties
+        if total > 1:
+            cursor = result_sets.create(
+                properties,
+                page_size,
+                search_params=response_data["search_params"],
+                next_offset=len(page),
+            )
+            await result_sets.publish(cursor)
+            response_data["cursor"] = cursor
+            response_data["next_offset"] = len(page)
+            response_data["has_more"] = total > len(page)
+        
         # Add agent info for transfer capability (single property, or multiple when searching by agent)
-        # Validate against roster: use roster phone when agent matches; else fallback to any roster agent
-        prop_for_agent = properties[0] if properties else None
-        if prop_for_agent and (len(properties) == 1 or request.agent_name):
-            prop = prop_for_agent
-            xml_agent_name = (prop.get('agentName') or '').strip()
-            xml_agent_phone = (prop.get('agentPhone') or '').strip()
-            roster_path = settings.AGENT_ROSTER_PATH or None
-
-            roster_agent = find_agent_by_name(xml_agent_name, roster_path) if xml_agent_name else None
-            transfer_phone = None
-            agent_name = xml_agent_name
-            agent_email = prop.get('agentEmail', '')
-
-            if roster_agent:
-                agent_name = roster_agent.get('name') or xml_agent_name
-                transfer_phone = roster_agent.get('cell_phone') or roster_agent.get('phone') or ''
-                agent_email = roster_agent.get('email') or agent_email
-            else:
-                fallback = get_any_agent(roster_path)
-                if fallback:
-                    agent_name = fallback.get('name') or xml_agent_name or 'an agent'
-                    transfer_phone = fallback.get('cell_phone') or fallback.get('phone') or ''
-                    agent_email = fallback.get('email') or ''
-                    if xml_agent_name:
-                        logger.info(f"Listing agent '{xml_agent_name}' not in roster; using fallback: {agent_name}")
-
-            if agent_name:
-                response_data["listing_agent"] = {
-                    "name": agent_name,
-                    "phone": transfer_phone or xml_agent_phone,
-                    "email": agent_email,
-                    "kvcore_id": prop.get('agentKvcoreId', '')
-                }
-                if transfer_phone or xml_agent_phone:
-                    response_data["transfer_phone"] = transfer_phone or xml_agent_phone
-
-            # Include broker/office info as fallback (Jeff's contact)
-            if prop.get('brokerPhone'):
-                response_data["broker"] = {
-                    "name": prop.get('brokerageName', 'Sally Love Real Estate'),
-                    "phone": prop.get('brokerPhone', ''),
-                    "email": prop.get('brokerEmail', '')
-                }
+        if total == 1 or request.agent_name:
+            response_data.update(listing_agent_data(properties[0]))
+        
+        async with call_sessions.update(x_vapi_call_id) as session:
+            if session:
+                session.remember_listings(page)
+                session.last_cursor = response_data.get("cursor") or session.last_cursor
+                listing_agent = response_data.get("listing_agent") or {}
+                session.remember_agent(listing_agent.get("name"), listing_agent.get("phone"))
         
         return VapiResponse(
             success=True,
             message=message,
-            results=properties,
+            results=page,
             data=response_data
         )
         
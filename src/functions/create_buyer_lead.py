@@ -4,17 +4,23 @@ Captures and stores buyer lead information in CRM
 """
 
 import asyncio
-from fastapi import APIRouter
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, Header
+from typing import Annotated, Dict, Any, Optional, Tuple
 from src.models.vapi_models import VapiResponse, CreateBuyerLeadRequest
 from src.models.crm_models import Contact, BuyerLead, ContactType, LeadStatus
 from src.integrations.boldtrail import BoldTrailClient
 from src.integrations.twilio_client import TwilioClient
 from src.integrations.email_client import EmailClient
+from src.integrations.broker_notifier import notify_broker
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.errors import BoldTrailError
 from src.utils.validators import validate_phone, validate_email
+from src.utils.contact_cache import normalize_phone
+from src.utils.single_flight import IdempotentSingleFlight
+from src.utils.call_sessions import call_sessions
+from src.utils.deadline import detach, within_deadline
+from src.utils.lead_outbox import OutboxDeferred, lead_outbox
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -22,6 +28,12 @@ router = APIRouter()
 crm_client = BoldTrailClient()
 twilio_client = TwilioClient()
 
+# Vapi retries / double tool calls for one caller share a single lead creation
+_lead_creations = IdempotentSingleFlight(
+    window_seconds=settings.LEAD_IDEMPOTENCY_WINDOW_SECONDS,
+    is_success=lambda response: response.success,
+)
+
 
 async def _handle_buyer_lead_background_tasks(
     contact_id: str,
@@ -155,23 +167,17 @@ async def _handle_buyer_lead_background_tasks(
                     settings.JEFF_NOTIFICATION_PHONE or settings.OFFICE_NOTIFICATION_PHONE
                 )
                 
+                # Sent now, or collected into the broker digest (BROKER_DIGEST_ENABLED)
+                await notify_broker(
+                    "buyer_lead",
+                    subject=f"🏠 New Buyer Lead - {request.first_name} {request.last_name}",
+                    text=office_notification,
+                    phone=notification_phone,
+                    email=settings.OFFICE_NOTIFICATION_EMAIL or None,
+                )
                 if notification_phone:
-                    await twilio_client.send_sms(notification_phone, office_notification)
-                    logger.info(f"Office notification sent to: {notification_phone} (TEST_MODE: {settings.TEST_MODE})")
-                if settings.OFFICE_NOTIFICATION_EMAIL:
-                    try:
-                        email_client = EmailClient()
-                        if email_client.is_configured:
-                            await email_client.send_email(
-                                to_email=settings.OFFICE_NOTIFICATION_EMAIL,
-                                subject=f"🏠 New Buyer Lead - {request.first_name} {request.last_name}",
-                                body=office_notification,
-                                html_body=f"<pre>{office_notification}</pre>",
-                            )
-                            logger.info(f"Office notification email sent to: {settings.OFFICE_NOTIFICATION_EMAIL}")
-                    except Exception as e:
-                        logger.warning(f"Failed to send office notification email: {str(e)}")
-                if not notification_phone:
+                    logger.info(f"Office notification dispatched to: {notification_phone} (TEST_MODE: {settings.TEST_MODE})")
+                else:
                     logger.warning("No notification phone configured (JEFF_NOTIFICATION_PHONE or OFFICE_NOTIFICATION_PHONE)")
                     
             except Exception as e:
@@ -181,8 +187,187 @@ async def _handle_buyer_lead_background_tasks(
         logger.exception(f"Error in buyer lead background tasks: {str(e)}")
 
 
+async def _create_buyer_contact(buyer_lead: BuyerLead, phone: str, email: Optional[str], update_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create the buyer lead; a duplicate-contact rejection updates the existing contact instead"""
+    try:
+        return await crm_client.create_buyer_lead(buyer_lead)
+    except BoldTrailError as e:
+        if not e.is_duplicate_contact:
+            raise
+        existing_contact_id = await crm_client.resolve_contact_id(phone=phone, email=email)
+        if not existing_contact_id:
+            raise
+        logger.info(f"Contact already exists; updating existing contact: {existing_contact_id}")
+        await crm_client.update_contact(existing_contact_id, update_data)
+        return {"id": existing_contact_id}
+
+
+async def _save_buyer_lead(buyer_lead: BuyerLead, phone: str, email: Optional[str], call_id: Optional[str]) -> Optional[str]:
+    """Update the caller's existing contact or create the lead; returns the contact ID"""
+    # Check if contact already exists (optional duplicate check). The caller's own number
+    # was usually resolved at call start; repeat callers otherwise hit the cache
+    existing_contact_id = None
+    try:
+        existing_contact_id = (
+            await call_sessions.prefetched_contact_id(call_id, phone)
+            or await crm_client.resolve_contact_id(phone=phone, email=email)
+        )
+        if existing_contact_id:
+            logger.info(f"Will update existing contact ID: {existing_contact_id}")
+    except Exception as e:
+        logger.warning(f"Contact search failed, proceeding with lead creation: {str(e)}")
+    
+    # New preferences for an existing contact
+    update_data = {}
+    if buyer_lead.location_preference:
+        update_data['notes'] = f"Updated buyer preferences: Location: {buyer_lead.location_preference}, Price: ${buyer_lead.min_price or 0:,.0f}-${buyer_lead.max_price or 0:,.0f}, Timeline: {buyer_lead.timeframe}"
+    
+    # If contact exists, update it; otherwise create new
+    if existing_contact_id:
+        logger.info(f"Updating existing buyer contact: {existing_contact_id}")
+        # Update existing contact with new preferences
+        try:
+            await crm_client.update_contact(existing_contact_id, update_data)
+            result = {"id": existing_contact_id}
+            logger.info(f"Successfully updated existing contact: {existing_contact_id}")
+        except Exception as e:
+            logger.error(f"Failed to update existing contact: {str(e)}")
+            # Fall back to creating new lead
+            result = await _create_buyer_contact(buyer_lead, phone, email, update_data)
+    else:
+        # Save to CRM (creates contact with buyer lead info in one call)
+        result = await _create_buyer_contact(buyer_lead, phone, email, update_data)
+    
+    # Extract contact ID (handle different response formats)
+    # Try multiple paths independently to handle various API response formats
+    contact_id = result.get("id")
+    if not contact_id and isinstance(result.get("data"), dict):
+        contact_id = result.get("data", {}).get("id")
+    if not contact_id and isinstance(result.get("contact"), dict):
+        contact_id = result.get("contact", {}).get("id")
+    
+    if not contact_id:
+        logger.error(f"Failed to extract contact ID from API response: {result}")
+        # Try to continue anyway - note addition will fail gracefully
+    
+    return contact_id
+
+
+def _build_buyer_lead(request: CreateBuyerLeadRequest) -> Tuple[Contact, BuyerLead, str, Optional[str]]:
+    """Contact and buyer lead from the tool request; returns (contact, lead, phone, email)"""
+    # Normalize placeholder last names commonly produced by LLMs
+    normalized_last_name = (request.last_name or "").strip()
+    if normalized_last_name.lower() in {"-", "n/a", "na", "none", "null", "unknown"}:
+        normalized_last_name = ""
+    
+    # Validate and format phone
+    try:
+        phone = validate_phone(request.phone)
+    except Exception as e:
+        logger.warning(f"Phone validation failed: {str(e)}")
+        phone = request.phone
+    
+    # Validate email if provided
+    email = None
+    if request.email:
+        try:
+            email = validate_email(request.email)
+        except Exception as e:
+            logger.warning(f"Email validation failed: {str(e)}")
+            email = request.email
+    
+    # Create contact object
+    contact = Contact(
+        first_name=request.first_name,
+        last_name=normalized_last_name,  # Handle None/empty + normalize placeholders
+        phone=phone,
+        email=email,
+        contact_type=ContactType.BUYER,
+        tags=["voice_agent", "buyer_lead"],
+        source="AI Concierge",
+        notes=request.notes
+    )
+    
+    # Create buyer lead with all information
+    buyer_lead = BuyerLead(
+        contact=contact,
+        property_type=request.property_type,
+        location_preference=request.location_preference,
+        min_price=request.min_price,
+        max_price=request.max_price,
+        bedrooms=request.bedrooms,
+        bathrooms=request.bathrooms,
+        timeframe=request.timeframe,
+        pre_approved=request.pre_approved,
+        special_requirements=request.special_requirements,
+        buyer_experience=request.buyer_experience,
+        payment_method=request.payment_method,
+        status=LeadStatus.NEW
+    )
+    return contact, buyer_lead, phone, email
+
+
+async def _replay_buyer_lead(payload: Dict[str, Any]) -> Optional[str]:
+    """Outbox handler: write a committed buyer lead to the CRM, then start its follow-ups"""
+    request = CreateBuyerLeadRequest(**payload["request"])
+    call_id = payload.get("call_id")
+    _, buyer_lead, phone, email = _build_buyer_lead(request)
+    contact_id = await _save_buyer_lead(buyer_lead, phone, email, call_id)
+    logger.info(f"Buyer lead written with contact_id: {contact_id}")
+    if call_id and await call_sessions.get(call_id):
+        async with call_sessions.update(call_id) as session:
+            session.remember_caller(contact_id=contact_id)
+    
+    # Non-critical follow-ups run in the background
+    if contact_id:
+        detach(
+            _handle_buyer_lead_background_tasks(
+                contact_id=contact_id,
+                request=request,
+                buyer_lead=buyer_lead,
+                phone=phone,
+                email=email
+            )
+        )
+    return contact_id
+
+
+async def _alert_failed_buyer_lead(payload: Dict[str, Any], error: BaseException) -> None:
+    """Outbox failure hook: the caller was told we have their information, so the office must enter the lead"""
+    request = payload["request"]
+    if isinstance(error, BoldTrailError) and error.is_duplicate_contact:
+        # The contact is already in the CRM (the caller was told so); nothing for the office to enter
+        logger.info("Lead outbox: duplicate contact not resolved; no failure alert")
+        return
+    name = f"{request.get('first_name', '')} {request.get('last_name', '')}".strip()
+    text = (
+        f"⚠️ Buyer lead NOT saved to BoldTrail\n\n"
+        f"Name: {name}\n"
+        f"Phone: {request.get('phone')}\n"
+        f"Email: {request.get('email') or 'N/A'}\n"
+        f"Error: {str(error)[:200]}\n\n"
+        f"The caller was told we have their information. Please add the lead by hand and follow up."
+    )
+    notification_phone = settings.TEST_AGENT_PHONE if settings.TEST_MODE else (
+        settings.JEFF_NOTIFICATION_PHONE or settings.OFFICE_NOTIFICATION_PHONE
+    )
+    await notify_broker(
+        "lead_write_failed",
+        subject=f"⚠️ Buyer lead not saved - {name}",
+        text=text,
+        phone=notification_phone,
+        email=settings.OFFICE_NOTIFICATION_EMAIL or None,
+    )
+
+
+lead_outbox.register("buyer_lead", _replay_buyer_lead, on_failed=_alert_failed_buyer_lead)
+
+
 @router.post("/create_buyer_lead")
-async def create_buyer_lead(request: CreateBuyerLeadRequest) -> VapiResponse:
+async def create_buyer_lead(
+    request: CreateBuyerLeadRequest,
+    x_vapi_call_id: Annotated[Optional[str], Header()] = None,
+) -> VapiResponse:
     """
     Create a buyer lead in the CRM
     
@@ -194,104 +379,57 @@ async def create_buyer_lead(request: CreateBuyerLeadRequest) -> VapiResponse:
     
     The lead is automatically assigned to an appropriate agent and
     a confirmation SMS is sent to the buyer.
+    
+    Retried or concurrent requests for the same caller (phone, plus the Vapi call ID
+    when the X-Vapi-Call-Id header is configured) join the in-flight creation, and
+    repeats within LEAD_IDEMPOTENCY_WINDOW_SECONDS get the same contact_id back
+    without repeating CRM writes or SMS. The contact is remembered on the call's
+    session so route_to_agent and the end-of-call report can reference it.
+    
+    The write is committed to the durable lead outbox (lead_outbox.py) before the
+    CRM is called; if kvCore is down or slow the caller is still told we have
+    their information (data.deferred) and the outbox replays the write later.
     """
+    key = f"buyer:{normalize_phone(request.phone) or request.phone}:{x_vapi_call_id or ''}"
+    response = await _lead_creations.run(key, lambda: _create_buyer_lead(request, x_vapi_call_id))
+    if x_vapi_call_id and response.success:
+        contact_id = (response.data or {}).get("contact_id")
+        async with call_sessions.update(x_vapi_call_id) as session:
+            session.remember_caller(contact_id=contact_id, name=request.first_name, phone=request.phone)
+            session.lead_type = "buyer"
+    return response
+
+
+async def _create_buyer_lead(request: CreateBuyerLeadRequest, call_id: Optional[str] = None) -> VapiResponse:
+    """Create the buyer lead (runs once per idempotency key, see create_buyer_lead)"""
     try:
         logger.info(f"Creating buyer lead: {request.first_name} {request.last_name}")
 
-        # Normalize placeholder last names commonly produced by LLMs
-        normalized_last_name = (request.last_name or "").strip()
-        if normalized_last_name.lower() in {"-", "n/a", "na", "none", "null", "unknown"}:
-            normalized_last_name = ""
+        contact, buyer_lead, phone, email = _build_buyer_lead(request)
         
-        # Validate and format phone
-        try:
-            phone = validate_phone(request.phone)
-        except Exception as e:
-            logger.warning(f"Phone validation failed: {str(e)}")
-            phone = request.phone
-        
-        # Validate email if provided
-        email = None
-        if request.email:
-            try:
-                email = validate_email(request.email)
-            except Exception as e:
-                logger.warning(f"Email validation failed: {str(e)}")
-                email = request.email
-        
-        # Create contact object
-        contact = Contact(
-            first_name=request.first_name,
-            last_name=normalized_last_name,  # Handle None/empty + normalize placeholders
-            phone=phone,
-            email=email,
-            contact_type=ContactType.BUYER,
-            tags=["voice_agent", "buyer_lead"],
-            source="AI Concierge",
-            notes=request.notes
-        )
-        
-        # Create buyer lead with all information
-        buyer_lead = BuyerLead(
-            contact=contact,
-            property_type=request.property_type,
-            location_preference=request.location_preference,
-            min_price=request.min_price,
-            max_price=request.max_price,
-            bedrooms=request.bedrooms,
-            bathrooms=request.bathrooms,
-            timeframe=request.timeframe,
-            pre_approved=request.pre_approved,
-            special_requirements=request.special_requirements,
-            buyer_experience=request.buyer_experience,
-            payment_method=request.payment_method,
-            status=LeadStatus.NEW
+        # Committed to the local outbox first, so the lead survives a kvCore outage; the
+        # drain worker writes it to the CRM and runs the follow-ups (note, call log, texts)
+        entry_id = await lead_outbox.enqueue(
+            "buyer_lead",
+            contact_key=normalize_phone(phone) or phone,
+            payload={"request": request.model_dump(mode="json"), "call_id": call_id},
         )
-        
-        # Check if contact already exists (optional duplicate check)
-        existing_contacts = []
-        existing_contact_id = None
         try:
-            existing_contacts = await crm_client.search_contacts(phone=phone, email=email)
-            if existing_contacts:
-                logger.info(f"Found existing contact(s) for phone/email: {len(existing_contacts)}")
-                # Use the first existing contact
-                existing_contact_id = existing_contacts[0].get('id')
-                logger.info(f"Will update existing contact ID: {existing_contact_id}")
-        except Exception as e:
-            logger.warning(f"Contact search failed, proceeding with lead creation: {str(e)}")
-        
-        # If contact exists, update it; otherwise create new
-        if existing_contact_id:
-            logger.info(f"Updating existing buyer contact: {existing_contact_id}")
-            # Update existing contact with new preferences
-            try:
-                update_data = {}
-                if buyer_lead.location_preference:
-                    update_data['notes'] = f"Updated buyer preferences: Location: {buyer_lead.location_preference}, Price: ${buyer_lead.min_price or 0:,.0f}-${buyer_lead.max_price or 0:,.0f}, Timeline: {buyer_lead.timeframe}"
-                
-                await crm_client.update_contact(existing_contact_id, update_data)
-                result = {"id": existing_contact_id}
-                logger.info(f"Successfully updated existing contact: {existing_contact_id}")
-            except Exception as e:
-                logger.error(f"Failed to update existing contact: {str(e)}")
-                # Fall back to creating new lead
-                result = await crm_client.create_buyer_lead(buyer_lead)
-        else:
-            # Save to CRM (creates contact with buyer lead info in one call)
-            result = await crm_client.create_buyer_lead(buyer_lead)
-        
-        # Extract contact ID (handle different response formats)
-        # Try multiple paths independently to handle various API response formats
-        contact_id = result.get("id")
-        if not contact_id and isinstance(result.get("data"), dict):
-            contact_id = result.get("data", {}).get("id")
-        if not contact_id and isinstance(result.get("contact"), dict):
-            contact_id = result.get("contact", {}).get("id")
-        
-        if not contact_id:
-            logger.error(f"Failed to extract contact ID from API response: {result}")
-            # Try to continue anyway - note addition will fail gracefully
+            contact_id = await within_deadline(
+                lead_outbox.wait(entry_id), settings.TOOL_DEADLINE_RESERVE_SECONDS, shield=False
+            )
+        except (asyncio.TimeoutError, OutboxDeferred):
+            logger.warning(f"Buyer lead queued (outbox entry {entry_id}); CRM write continues in background")
+            return VapiResponse(
+                success=True,
+                message=f"Perfect, {request.first_name}! We have your information. Sally or one of our agents will call you to discuss available properties. You'll also get a text.",
+                data={
+                    "contact_id": None,
+                    "deferred": True,
+                    "contact": contact.model_dump(),
+                    "preferences": buyer_lead.model_dump(exclude={"contact"})
+                }
+            )
         
         logger.info(f"Buyer lead created successfully with contact_id: {contact_id}")
         
@@ -309,32 +447,19 @@ async def create_buyer_lead(request: CreateBuyerLeadRequest) -> VapiResponse:
             }
         )
         
-        # Fire off background tasks for non-critical operations (don't await)
-        if contact_id:
-            asyncio.create_task(
-                _handle_buyer_lead_background_tasks(
-                    contact_id=contact_id,
-                    request=request,
-                    buyer_lead=buyer_lead,
-                    phone=phone,
-                    email=email
-                )
-            )
-        
         return response
         
     except BoldTrailError as e:
         logger.error(f"CRM error in create_buyer_lead: {e.message}")
         
         # Handle duplicate email/phone gracefully
-        if "already exists" in e.message.lower() or "duplicate" in e.message.lower():
+        if e.is_duplicate_contact:
             logger.info("Duplicate contact detected, attempting to handle gracefully")
             # Attempt to retrieve the existing contact id so downstream tools can still reference it.
             existing_contact_id = None
             try:
-                existing_contacts = await crm_client.search_contacts(phone=phone, email=email)
-                if existing_contacts:
-                    existing_contact_id = existing_contacts[0].get("id")
+                existing_contact_id = await crm_client.resolve_contact_id(phone=phone, email=email)
+                if existing_contact_id:
                     logger.info(f"Resolved duplicate to existing contact_id: {existing_contact_id}")
             except Exception as lookup_error:
                 logger.warning(f"Failed to lookup existing contact after duplicate error: {str(lookup_error)}")
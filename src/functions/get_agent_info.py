@@ -3,10 +3,13 @@ Function: Get Agent Info
 Retrieves information about real estate agents from the agent roster.
 """
 
-from fastapi import APIRouter
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Header
 
 from src.config.settings import settings
 from src.models.vapi_models import GetAgentInfoRequest, VapiResponse
+from src.utils.call_sessions import call_sessions
 from src.utils.logger import get_logger
 from src.utils.roster import (
     find_agent_by_name,
@@ -41,12 +44,16 @@ def _roster_agent_to_response(agent: dict, roster_matched: bool = True) -> dict:
 
 
 @router.post("/get_agent_info")
-async def get_agent_info(request: GetAgentInfoRequest) -> VapiResponse:
+async def get_agent_info(
+    request: GetAgentInfoRequest,
+    x_vapi_call_id: Annotated[Optional[str], Header()] = None,
+) -> VapiResponse:
     """
     Get information about real estate agents from the roster.
 
     Source: data/agent_roster.json (agents + staff).
     Can search by agent name. If no match, returns a fallback agent.
+    A single resolved agent is remembered on the call's session for route_to_agent.
     """
     roster_path = settings.AGENT_ROSTER_PATH or None
 
@@ -86,6 +93,9 @@ async def get_agent_info(request: GetAgentInfoRequest) -> VapiResponse:
 
         if len(agents) == 1:
             agent = agents[0]
+            async with call_sessions.update(x_vapi_call_id) as session:
+                if session:
+                    session.remember_agent(agent.get("name"), agent.get("phone"))
             message = f"I have information about {agent.get('name', 'an agent')}. Would you like me to connect you with them?"
         else:
             message = "Let me connect you with one of our agents."
@@ -0,0 +1,116 @@
+"""
+Function: Market Summary
+Answers general market questions ("how many homes are for sale in Lady Lake?",
+"what's the typical price in 32162?") from facets precomputed at feed refresh.
+"""
+
+from fastapi import APIRouter
+from typing import Any, Dict, Optional
+from src.models.vapi_models import VapiResponse, MarketSummaryRequest
+from src.integrations.boldtrail import BoldTrailClient
+from src.utils.logger import get_logger
+from src.utils.errors import BoldTrailError
+from src.utils.speech_format import format_spoken_price
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+crm_client = BoldTrailClient()
+
+
+def _spoken_round_price(price: Optional[float]) -> Optional[str]:
+    """Round to the nearest thousand before speaking (percentiles are rarely round numbers)."""
+    if not price:
+        return None
+    return format_spoken_price(round(price / 1000) * 1000)
+
+
+def _describe_filters(request: MarketSummaryRequest, count: int) -> str:
+    """Short spoken description of the filters, e.g. 'pending condo listings in Lady Lake'."""
+    plural = "" if count == 1 else "s"
+    subject = f"{request.property_type} listing{plural}" if request.property_type else f"home{plural}"
+    if request.status:
+        subject = f"{request.status.lower()} {subject}"
+    else:
+        subject = f"{subject} for sale"
+    if request.zip_code:
+        return f"{subject} in ZIP code {request.zip_code}"
+    if request.city:
+        return f"{subject} in {request.city}"
+    return f"{subject} in our listings"
+
+
+def _most_common(distribution: Dict[str, int]) -> Optional[str]:
+    """Most common key of a distribution ('3' for bedrooms), None when empty."""
+    if not distribution:
+        return None
+    return max(distribution.items(), key=lambda item: item[1])[0]
+
+
+@router.post("/market_summary")
+async def market_summary(request: MarketSummaryRequest) -> VapiResponse:
+    """
+    Summarize the current market for a city, Villages municipality, ZIP, property type or status
+
+    Returns listing count, typical (median) price with the middle price range, and
+    the most common bedroom count. Facets are recomputed each time the XML feed
+    refreshes, so no listings are scanned per call.
+    """
+    try:
+        logger.info(f"Market summary with params: {request.model_dump(exclude_none=True)}")
+
+        summary: Dict[str, Any] = await crm_client.get_market_summary(
+            city=request.city,
+            zip_code=request.zip_code,
+            property_type=request.property_type,
+            status=request.status,
+        )
+
+        count = summary.get("count", 0)
+        described = _describe_filters(request, count)
+
+        if not count:
+            message = (
+                f"I don't see any {described} right now. "
+                "Would you like me to check a nearby area, or connect you with an agent?"
+            )
+        else:
+            price = summary.get("price") or {}
+            median = _spoken_round_price(price.get("median"))
+            low = _spoken_round_price(price.get("p25"))
+            high = _spoken_round_price(price.get("p75"))
+            beds = _most_common(summary.get("bedrooms", {}))
+
+            verb = "is" if count == 1 else "are"
+            message = f"There {verb} {count} {described}. "
+            if median:
+                message += f"The typical price is around {median}"
+                message += f", with most between {low} and {high}. " if count > 2 and low != high else ". "
+            if beds and beds != "0" and count > 1:
+                message += f"Most have {beds} bedrooms. "
+            message += "Would you like me to look for specific homes?"
+
+        return VapiResponse(
+            success=True,
+            message=message,
+            data={
+                "summary": summary,
+                "filters": request.model_dump(exclude_none=True),
+            },
+        )
+
+    except BoldTrailError as e:
+        logger.error(f"BoldTrail error in market_summary: {e.message}")
+        return VapiResponse(
+            success=False,
+            error="I'm having trouble accessing the market data right now. Could you try again in a moment?",
+            message=e.message
+        )
+
+    except Exception as e:
+        logger.exception(f"Error in market_summary: {str(e)}")
+        return VapiResponse(
+            success=False,
+            error="I couldn't pull up the market numbers. Let me connect you with an agent who can help.",
+            message=str(e)
+        )
@@ -0,0 +1,129 @@
+"""
+Function: More Properties
+Pages through a check_property result set by cursor ("tell me about the next
+ones", "what about number 6?") without re-running the search.
+"""
+
+from fastapi import APIRouter, Header
+from typing import Annotated, Any, Dict, List, Optional
+from src.models.vapi_models import VapiResponse, MorePropertiesRequest
+from src.functions.check_property import describe_property, listing_agent_data, result_sets
+from src.utils.call_sessions import CallSession, call_sessions
+from src.utils.logger import get_logger
+from src.utils.speech_format import format_spoken_address, format_spoken_price
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+
+def _describe_page(page: List[Dict[str, Any]], start: int, total: int) -> str:
+    """Short spoken rundown of a page: 'Number 6: <address>, <city>, <price>.'"""
+    end = start + len(page)
+    if len(page) == 1:
+        message = f"Here is listing {end} of {total}. "
+    else:
+        message = f"Here are listings {start + 1} through {end} of {total}. "
+    for number, prop in enumerate(page, start=start + 1):
+        spoken_address = prop.get('spokenAddress') or format_spoken_address(prop.get('address', ''))
+        spoken_price = prop.get('spokenPrice') or format_spoken_price(prop.get('price'))
+        message += f"Number {number}: {spoken_address}, {prop.get('city')}, {spoken_price}. "
+    if end < total:
+        message += "Would you like to hear more, or details on one of these?"
+    else:
+        message += "That's all of them. Would you like details on one of these?"
+    return message
+
+
+async def _read_results(request: MorePropertiesRequest, session: Optional[CallSession]) -> VapiResponse:
+    """more_properties body: read from the result set and record what was read out on the session"""
+    cursor = request.cursor or (session.last_cursor if session else None)
+    result_set = await result_sets.fetch(cursor) if cursor else None
+    if result_set is None:
+        return VapiResponse(
+            success=False,
+            message="I no longer have those search results. Let me run the search again.",
+            error="Unknown or expired cursor",
+            results=[]
+        )
+    if session:
+        session.last_cursor = cursor
+
+    base_data: Dict[str, Any] = {
+        "cursor": cursor,
+        "total": result_set.total,
+        "search_params": result_set.search_params,
+    }
+
+    if request.index is not None:
+        prop = result_set.get(request.index)
+        if prop is None:
+            return VapiResponse(
+                success=False,
+                message=f"I only have {result_set.total} listings from that search. Which number would you like?",
+                error="Index out of range",
+                results=[],
+                data=base_data
+            )
+        data = {**base_data, "index": request.index, **listing_agent_data(prop)}
+        if session:
+            session.remember_listings([prop])
+            listing_agent = data.get("listing_agent") or {}
+            session.remember_agent(listing_agent.get("name"), listing_agent.get("phone"))
+        return VapiResponse(
+            success=True,
+            message=describe_property(prop, intro=f"Number {request.index} is"),
+            results=[prop],
+            data=data
+        )
+
+    start = result_set.next_offset if request.offset is None else max(0, request.offset)
+    page = result_set.page(start)
+    await result_sets.publish(cursor)  # Paging position, for the other machines
+    if session:
+        session.remember_listings(page)
+    if not page:
+        return VapiResponse(
+            success=True,
+            message=f"That was all {result_set.total} listings from that search. Would you like details on one of them, or to try a different search?",
+            results=[],
+            data={**base_data, "next_offset": result_set.total, "has_more": False}
+        )
+
+    return VapiResponse(
+        success=True,
+        message=_describe_page(page, start, result_set.total),
+        results=page,
+        data={
+            **base_data,
+            "count": len(page),
+            "next_offset": result_set.next_offset,
+            "has_more": result_set.next_offset < result_set.total,
+        }
+    )
+
+
+@router.post("/more_properties")
+async def more_properties(
+    request: MorePropertiesRequest,
+    x_vapi_call_id: Annotated[Optional[str], Header()] = None,
+) -> VapiResponse:
+    """
+    Read the next page of a previous check_property search, or one result by number
+
+    The result set is held server-side under the cursor returned by check_property,
+    so this is a slice of a stored list rather than a new search. Without a cursor,
+    the call's latest search (X-Vapi-Call-Id header) is used.
+    """
+    try:
+        logger.info(f"More properties with params: {request.model_dump(exclude_none=True)}")
+
+        async with call_sessions.update(x_vapi_call_id) as session:
+            return await _read_results(request, session)
+
+    except Exception as e:
+        logger.exception(f"Error in more_properties: {str(e)}")
+        return VapiResponse(
+            success=False,
+            error="I had trouble pulling up the rest of those listings. Let me search again.",
+            message=str(e)
+        )
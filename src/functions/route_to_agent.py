@@ -10,17 +10,16 @@ from typing import Dict, Any, Optional, Union
 import httpx
 import json
 from src.models.vapi_models import VapiResponse
-from src.integrations.twilio_client import TwilioClient
-from src.integrations.email_client import EmailClient
+from src.integrations.broker_notifier import notify_broker
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.roster import get_any_agent, get_main_office_phone, is_agent_in_roster
+from src.utils.call_sessions import call_sessions
+from src.utils.deadline import timeout_for
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-twilio_client = TwilioClient()
-
 
 def _build_warm_transfer_plan(caller_name: str, reason: str) -> Optional[Dict[str, Any]]:
     """
@@ -102,24 +101,17 @@ async def send_failed_transfer_notification(
             settings.JEFF_NOTIFICATION_PHONE or settings.OFFICE_NOTIFICATION_PHONE
         )
         
-        if notification_phone:
-            await twilio_client.send_sms(notification_phone, notification_message)
-            logger.info(f"Failed transfer notification sent to: {notification_phone} (TEST_MODE: {settings.TEST_MODE})")
         notification_email = settings.JEFF_NOTIFICATION_EMAIL or settings.OFFICE_NOTIFICATION_EMAIL
-        if notification_email:
-            try:
-                email_client = EmailClient()
-                if email_client.is_configured:
-                    await email_client.send_email(
-                        to_email=notification_email,
-                        subject="⚠️ Failed Transfer Alert",
-                        body=notification_message,
-                        html_body=f"<pre>{notification_message}</pre>",
-                    )
-                    logger.info(f"Failed transfer notification email sent to: {notification_email}")
-            except Exception as e:
-                logger.warning(f"Failed to send failed transfer notification email: {str(e)}")
-        if not notification_phone:
+        await notify_broker(
+            "failed_transfer",
+            subject="⚠️ Failed Transfer Alert",
+            text=notification_message,
+            phone=notification_phone,
+            email=notification_email or None,
+        )
+        if notification_phone:
+            logger.info(f"Failed transfer notification dispatched to: {notification_phone} (TEST_MODE: {settings.TEST_MODE})")
+        else:
             logger.warning("No notification phone configured for failed transfer alert")
 
     except Exception as e:
@@ -151,26 +143,17 @@ async def send_no_answer_notification_to_jeff(
         notification_phone = settings.TEST_AGENT_PHONE if settings.TEST_MODE else (
             settings.JEFF_NOTIFICATION_PHONE or settings.OFFICE_NOTIFICATION_PHONE
         )
-        if notification_phone:
-            await twilio_client.send_sms(notification_phone, notification_message)
-            logger.info(f"No-answer notification SMS sent to: {notification_phone}")
-
         notification_email = settings.JEFF_NOTIFICATION_EMAIL or settings.OFFICE_NOTIFICATION_EMAIL
-        if notification_email:
-            try:
-                email_client = EmailClient()
-                if email_client.is_configured:
-                    await email_client.send_email(
-                        to_email=notification_email,
-                        subject="⚠️ Transfer No-Answer Alert",
-                        body=notification_message,
-                        html_body=f"<pre>{notification_message}</pre>",
-                    )
-                    logger.info(f"No-answer notification email sent to: {notification_email}")
-            except Exception as e:
-                logger.warning(f"Failed to send no-answer notification email: {str(e)}")
-
-        if not notification_phone:
+        await notify_broker(
+            "no_answer",
+            subject="⚠️ Transfer No-Answer Alert",
+            text=notification_message,
+            phone=notification_phone,
+            email=notification_email or None,
+        )
+        if notification_phone:
+            logger.info(f"No-answer notification dispatched to: {notification_phone}")
+        else:
             logger.warning("No notification phone configured for no-answer alert")
 
     except Exception as e:
@@ -184,9 +167,10 @@ async def route_to_agent(request: Request) -> Union[Dict[str, Any], VapiResponse
 
     This function handles dynamic call transfers by:
     1. Receiving Vapi webhook with controlUrl and function parameters
-    2. Validating agent against roster; if not in roster, uses fallback agent
-    3. Executing the transfer via POST to controlUrl
-    4. Returning success response
+    2. Filling caller/agent details the LLM omitted from the call's session
+    3. Validating agent against roster; if not in roster, uses fallback agent
+    4. Executing the transfer via POST to controlUrl
+    5. Returning success response
 
     Reference: https://docs.vapi.ai/calls/call-dynamic-transfers
     """
@@ -253,6 +237,19 @@ async def route_to_agent(request: Request) -> Union[Dict[str, Any], VapiResponse
         lead_id = arguments.get("lead_id")
         reason = arguments.get("reason")
 
+        # Fill caller and agent details the LLM left out from earlier in the call
+        call_id = message.get("call", {}).get("id")
+        session = await call_sessions.get(call_id)
+        if session:
+            caller_name = caller_name or session.caller_name
+            caller_phone = caller_phone or session.caller_phone
+            if not lead_id:
+                lead_id = await call_sessions.prefetched_contact_id(call_id, caller_phone)
+            if not agent_name and not agent_phone and session.agent:
+                agent_name = session.agent["name"]
+                agent_phone = session.agent["phone"]
+                logger.info(f"Using agent resolved earlier in the call: {agent_name}")
+
         roster_path = settings.AGENT_ROSTER_PATH or None
 
         # Roster validation: if agent not in roster, use fallback
@@ -343,7 +340,7 @@ async def route_to_agent(request: Request) -> Union[Dict[str, Any], VapiResponse
         # POST to controlUrl/control to execute the transfer
         # Official Vapi docs: POST to controlUrl/control
         control_endpoint = f"{control_url.rstrip('/')}/control"
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with httpx.AsyncClient(timeout=timeout_for(10.0)) as client:
             transfer_response = await client.post(
                 control_endpoint,
                 json={
@@ -356,6 +353,10 @@ async def route_to_agent(request: Request) -> Union[Dict[str, Any], VapiResponse
             
             if transfer_response.status_code == 200:
                 logger.info(f"✅ Transfer executed successfully to {agent_name} ({agent_phone})")
+                async with call_sessions.update(call_id) as session:
+                    if session:
+                        session.remember_caller(contact_id=lead_id, name=caller_name, phone=caller_phone)
+                        session.transferred_to = {"name": agent_name, "phone": agent_phone}
                 return VapiResponse(
                     success=True,
                     result="Transfer initiated",  # Vapi requires non-null result
@@ -408,7 +409,7 @@ async def route_to_agent(request: Request) -> Union[Dict[str, Any], VapiResponse
         if fallback_phone and control_url:
             logger.info(f"Attempting fallback transfer to office line: {fallback_phone}")
             try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
+                async with httpx.AsyncClient(timeout=timeout_for(10.0)) as client:
                     transfer_payload = {
                         "type": "transfer",
                         "destination": {
@@ -8,6 +8,7 @@ from typing import Dict, Any
 from src.models.vapi_models import VapiResponse, SendNotificationRequest
 from src.integrations.twilio_client import TwilioClient
 from src.integrations.email_client import EmailClient
+from src.integrations.broker_notifier import notify_broker
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.errors import TwilioError, EmailError
@@ -97,36 +98,36 @@ async def send_notification(request: SendNotificationRequest) -> VapiResponse:
                 logger.exception(f"Unexpected error sending email: {str(e)}")
                 errors.append(f"Email: {str(e)}")
 
-        # Broker copy: also send same SMS and email to Jeff so brokers are aware of every notification
+        # Broker copy: Jeff gets the same message by SMS and email (or in the next digest)
         if request.message:
             jeff_phone = (settings.JEFF_NOTIFICATION_PHONE or "").strip()
+            to_num = None
             if jeff_phone:
                 to_jeff = settings.TEST_AGENT_PHONE if settings.TEST_MODE else jeff_phone
                 try:
                     to_num = validate_phone(to_jeff)
                 except Exception:
                     to_num = to_jeff
-                try:
-                    await twilio_client.send_sms(to_number=to_num, message=request.message)
-                    logger.info(f"Broker copy SMS sent to Jeff: {to_num}")
-                except Exception as e:
-                    logger.warning(f"Broker copy SMS to Jeff failed: {e}")
-                    errors.append(f"Broker copy SMS: {str(e)}")
             jeff_email = (settings.JEFF_NOTIFICATION_EMAIL or "").strip()
+            jeff_email_valid = None
             if jeff_email and email_client.is_configured:
                 try:
                     jeff_email_valid = validate_email(jeff_email)
-                    subject = f"[Broker copy] Notification from {settings.BUSINESS_NAME}"
-                    await email_client.send_email(
-                        to_email=jeff_email_valid,
-                        subject=subject,
-                        body=request.message,
-                        html_body=f"<p>{request.message}</p>",
-                    )
-                    logger.info(f"Broker copy email sent to Jeff: {jeff_email_valid}")
                 except Exception as e:
-                    logger.warning(f"Broker copy email to Jeff failed: {e}")
+                    logger.warning(f"Broker copy email address invalid: {e}")
                     errors.append(f"Broker copy email: {str(e)}")
+            try:
+                await notify_broker(
+                    "broker_copy",
+                    subject=f"[Broker copy] Notification from {settings.BUSINESS_NAME}",
+                    text=request.message,
+                    phone=to_num,
+                    email=jeff_email_valid,
+                    summary=f"Sent to {phone}: {request.message[:80]}",
+                )
+            except Exception as e:
+                logger.warning(f"Broker copy to Jeff failed: {e}")
+                errors.append(f"Broker copy: {str(e)}")
         
         # Check if at least one channel succeeded
         if not sent_channels:
@@ -2,30 +2,237 @@
 BoldTrail CRM API client
 """
 
-import re
+import asyncio
+import hashlib
 import httpx
 import jellyfish
+import json
+import numpy as np
 import xml.etree.ElementTree as ET
+import random
 import time
-from typing import Dict, Any, Optional, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional, List, Sequence, Tuple
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.errors import BoldTrailError
+from src.utils.address import parse_address
+from src.utils.listings_index import ListingMatches, ListingsIndex
+from src.utils.agent_index import AgentNameIndex
+from src.utils.street_index import StreetIndex
+from src.utils.market_facets import FOR_SALE_STATUSES, compute_market_facets, summarize_rows
+from src.utils.speech_format import render_listing_speech
+from src.utils.roster import annotate_listing_agents
+from src.utils.cache import get_cache
+from src.utils.contact_cache import contact_ids
+from src.utils.rate_limit import PriorityTokenBucket
+from src.utils.circuit_breaker import circuit_breaker, http_probe
+from src.utils import deadline as tool_deadline
+from src.utils.hedging import HedgeBudget, LatencyTracker, hedged
+from src.utils.offload import feed_parse_mode, run_in_thread, run_offloaded
+from src.utils.listings_snapshot import (
+    RefreshLock, load_snapshot, read_header, snapshot_enabled, snapshot_path, write_snapshot,
+)
 from src.models.crm_models import Contact, BuyerLead, SellerLead
 
 logger = get_logger(__name__)
 
 # Cache for XML listings feed
-_listings_cache: Optional[List[Dict[str, Any]]] = None
+_listings_cache: Optional[Sequence[Dict[str, Any]]] = None  # list, or snapshot records (multi-worker)
 _cache_timestamp: Optional[float] = None
+_listings_index: Optional[ListingsIndex] = None
+_market_facets: Optional[Dict[str, Any]] = None
+_agent_index: Optional[AgentNameIndex] = None
+_street_index: Optional[StreetIndex] = None
+_feed_version: int = 0  # Bumped whenever the feed (and its index) is replaced
+_snapshot_generation: Optional[int] = None  # Shared snapshot currently mapped (multi-worker mode)
+# Manual listings index per status filter: (built at, index), reused for MANUAL_LISTINGS_CACHE_TTL_SECONDS
+_manual_listings_indexes: Dict[str, Tuple[float, ListingsIndex]] = {}
 CACHE_DURATION = 7200  # 2 hours in seconds
 
+# kvCore API request priorities: the caller is waiting on tool-path requests
+PRIORITY_CALL = 0
+PRIORITY_BACKGROUND = 10  # Notes and call logs written after the tool responded
+
+# Priority of requests that do not pass one (see request_priority)
+_default_priority: ContextVar[int] = ContextVar("boldtrail_priority", default=PRIORITY_CALL)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Send the block's kvCore requests (and tasks it starts) at priority, e.g. speculative lookups."""
+    token = _default_priority.set(priority)
+    try:
+        yield
+    finally:
+        _default_priority.reset(token)
+
+# 429/503: rejected before processing, so any request may be resent.
+# 500/502/504 and read errors may have been processed: resend idempotent requests only.
+_RETRY_ANY_REQUEST = frozenset({429, 503})
+_RETRY_IDEMPOTENT = frozenset({500, 502, 504})
+_RETRY_MAX_DELAY = 10.0
+
+# Per-token kvCore limit, split across worker processes
+_rate_limiter = PriorityTokenBucket.per_minute(
+    settings.BOLDTRAIL_REQUESTS_PER_MINUTE / max(1, settings.WORKERS),
+    burst=max(1, settings.BOLDTRAIL_RATE_BURST),
+)
+
+# Fail fast while kvCore is down (API and XML feed share the host)
+_circuit = circuit_breaker("kvcore", http_probe(settings.BOLDTRAIL_API_URL))
+
+
+# Tool-path GETs are hedged after the observed latency quantile (see src/utils/hedging.py)
+_latencies = LatencyTracker()
+_hedge_budget = HedgeBudget(max_ratio=settings.BOLDTRAIL_HEDGE_MAX_RATIO)
+
+# One pooled client per event loop: keep-alive connections are reused and a hedge
+# goes out on a second connection
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _http_client() -> httpx.AsyncClient:
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the pooled kvCore client (app shutdown)."""
+    global _client
+    client, _client = _client, None
+    if client is not None and _client_loop is asyncio.get_running_loop():
+        await client.aclose()
+
+
+def _hedge_slot_free() -> bool:
+    """A hedge may go out only with a spare rate-limit token (never ahead of queued requests)."""
+    return _rate_limiter.waiting() == 0 and _rate_limiter.try_acquire()
+
+
+def _hedge_delay() -> Optional[float]:
+    """Hedge delay from recent tool-path GET latencies (None: hedging off or too few samples)."""
+    if not settings.BOLDTRAIL_HEDGE_ENABLED:
+        return None
+    observed = _latencies.quantile(settings.BOLDTRAIL_HEDGE_QUANTILE)
+    return None if observed is None else max(observed, settings.BOLDTRAIL_HEDGE_MIN_DELAY_SECONDS)
+
+
+def hedging_stats() -> Dict[str, Any]:
+    """Hedge counters and the current hedge delay (health endpoint)."""
+    delay = _hedge_delay()
+    return {
+        **_hedge_budget.stats(),
+        "enabled": settings.BOLDTRAIL_HEDGE_ENABLED,
+        "delay_ms": None if delay is None else round(delay * 1000, 1),
+    }
+
+
+def _circuit_open_error(endpoint: str) -> BoldTrailError:
+    return BoldTrailError(
+        message="BoldTrail is unavailable (circuit open)",
+        status_code=503,
+        details={"circuit": "open", "endpoint": endpoint},
+    )
+
+
 # The Villages (FL) spans multiple municipalities; MLS may use any of these as city
 THE_VILLAGES_CITIES = frozenset({
     "the villages", "lady lake", "oxford", "summerfield", "wildwood",
     "fruitland park", "bushnell", "webster",
 })
+_VILLAGES_AREA_GROUPS = {"the villages": THE_VILLAGES_CITIES, "villages": THE_VILLAGES_CITIES}
+
+
+def _install_feed(
+    listings: Sequence[Dict[str, Any]],
+    index: ListingsIndex,
+    facets: Dict[str, Any],
+    agents: AgentNameIndex,
+    streets: StreetIndex,
+    timestamp: float,
+) -> None:
+    """Swap a new feed and its indexes into the module caches (on the event loop)."""
+    global _listings_cache, _cache_timestamp, _listings_index, _market_facets, _agent_index, _street_index, _feed_version
+    
+    # Columnar index is rebuilt alongside the listing dicts
+    _listings_cache = listings
+    _listings_index = index
+    _market_facets = facets
+    _agent_index = agents
+    _street_index = streets
+    _feed_version += 1
+    _cache_timestamp = timestamp
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta seconds or HTTP date), if present."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _pace_from_headers(response: httpx.Response) -> None:
+    """Hold the limiter back until the window resets when kvCore reports no requests left."""
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    reset = response.headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return
+    try:
+        if int(float(remaining)) > 0:
+            return
+        reset_value = float(reset)
+    except ValueError:
+        return
+    # Either an epoch timestamp or seconds until reset
+    seconds = reset_value - time.time() if reset_value > 1_000_000_000 else reset_value
+    _rate_limiter.pause(min(seconds, 60.0))
+
+
+def _backoff_seconds(attempt: int) -> float:
+    delay = min(_RETRY_MAX_DELAY, settings.BOLDTRAIL_RETRY_BASE_SECONDS * (2 ** (attempt - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _parse_listings_xml(xml_text: str) -> List[Dict[str, Any]]:
+    """
+    Parse the XML feed into listing dicts (module-level so it can run in a worker process)
+    
+    Args:
+        xml_text: Raw XML feed body
+        
+    Returns:
+        Listings with address and price (spoken fields rendered)
+    """
+    root = ET.fromstring(xml_text)
+    client = BoldTrailClient()
+    listings = []
+    
+    # Find all listing elements - BoldTrail uses <Listing> with capital L
+    # Try both lowercase and uppercase to be safe
+    for listing_elem in root.findall('.//Listing') + root.findall('.//listing'):
+        listing = client._extract_listing_from_xml(listing_elem)
+        if listing:
+            listings.append(listing)
+    return listings
 
 
 class BoldTrailClient:
@@ -47,52 +254,142 @@ class BoldTrailClient:
         endpoint: str,
         data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
+        priority: Optional[int] = None,
+        idempotent: Optional[bool] = None,
     ) -> Dict[str, Any]:
         """
         Make HTTP request to BoldTrail API
         
+        Requests wait for the client-side rate limiter (tool-path requests first) and
+        are retried with jittered backoff (Retry-After honoured) while the budget for
+        their priority lasts. While kvCore's circuit is open they fail at once.
+        Tool-path requests also stop at the tool's deadline (src/utils/deadline.py),
+        with timeouts capped at the time left. Tool-path GETs are hedged: with no
+        answer after the recent p90 latency a second request races the first
+        (BOLDTRAIL_HEDGE_* settings, at most BOLDTRAIL_HEDGE_MAX_RATIO extra requests).
+        
         Args:
             method: HTTP method
             endpoint: API endpoint
             data: Request body
             params: Query parameters
+            priority: PRIORITY_CALL (caller waiting) or PRIORITY_BACKGROUND
+                (default: set by request_priority, else PRIORITY_CALL)
+            idempotent: Safe to resend after an ambiguous failure (default: GET/PUT/DELETE)
             
         Returns:
             Response data
             
         Raises:
-            BoldTrailError: If request fails
+            BoldTrailError: If request fails (status 503 at once while the circuit is open,
+                504 once the tool's deadline has passed)
         """
         url = f"{self.base_url}/{endpoint}"
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.request(
+        if priority is None:
+            priority = _default_priority.get()
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "PUT", "DELETE")
+        budget = (
+            settings.BOLDTRAIL_CALL_BUDGET_SECONDS if priority <= PRIORITY_CALL
+            else settings.BOLDTRAIL_BACKGROUND_BUDGET_SECONDS
+        )
+        deadline = time.monotonic() + budget
+        on_call_path = priority <= PRIORITY_CALL
+        hedgeable = on_call_path and method.upper() == "GET"
+        left = tool_deadline.remaining() if on_call_path else None
+        if left is not None:
+            deadline = min(deadline, time.monotonic() + left)
+        attempt = 0
+        
+        while True:
+            attempt += 1
+            if on_call_path and tool_deadline.expired():
+                raise BoldTrailError(
+                    message="BoldTrail request not sent: tool deadline reached",
+                    status_code=504,
+                    details={"deadline": "exceeded", "endpoint": endpoint, "attempts": attempt - 1}
+                )
+            try:
+                await asyncio.wait_for(_rate_limiter.acquire(priority=priority), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise BoldTrailError(
+                    message="BoldTrail API rate limit: no request slot within the retry budget",
+                    status_code=429,
+                    details={"endpoint": endpoint, "attempts": attempt - 1}
+                )
+            
+            if not _circuit.allow():
+                raise _circuit_open_error(endpoint)
+            
+            capped = on_call_path and tool_deadline.capped(30.0)
+            timeout = tool_deadline.http_timeout() if on_call_path else httpx.Timeout(
+                30.0, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+            )
+            client = _http_client()
+            
+            def send():
+                return client.request(
                     method=method,
                     url=url,
                     headers=self.headers,
                     json=data,
                     params=params,
-                    timeout=30.0,
+                    timeout=timeout,
                 )
-                
-                if response.status_code >= 400:
-                    error_detail = response.text
-                    logger.error(f"BoldTrail API error: {response.status_code} - {error_detail}")
-                    raise BoldTrailError(
-                        message=f"BoldTrail API error: {error_detail}",
-                        status_code=response.status_code,
-                        details={"response": error_detail}
-                    )
-                
-                return response.json() if response.text else {}
-                
-        except httpx.RequestError as e:
-            logger.exception(f"BoldTrail request failed: {str(e)}")
-            raise BoldTrailError(
-                message=f"Failed to connect to BoldTrail: {str(e)}",
-                details={"error": str(e)}
-            )
+            
+            started = time.monotonic()
+            try:
+                if hedgeable:
+                    response = await hedged(send, _hedge_delay(), _hedge_budget, may_hedge=_hedge_slot_free)
+                    _latencies.record(time.monotonic() - started)
+                else:
+                    response = await send()
+            except httpx.RequestError as e:
+                # A read timeout shortened by the tool deadline says nothing about kvCore's health
+                _circuit.record(e, deadline_capped=capped)
+                # Connection never established: the request was not sent
+                not_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                delay = _backoff_seconds(attempt)
+                if (not_sent or idempotent) and self._may_retry(attempt, delay, deadline):
+                    logger.warning(f"BoldTrail {method} {endpoint} failed ({type(e).__name__}); retry {attempt} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                logger.exception(f"BoldTrail request failed: {str(e)}")
+                raise BoldTrailError(
+                    message=f"Failed to connect to BoldTrail: {str(e)}",
+                    details={"error": str(e)}
+                )
+            
+            _pace_from_headers(response)
+            status = response.status_code
+            if status >= 500:
+                _circuit.record_failure()
+            else:
+                _circuit.record_success()
+            if status >= 400:
+                if status in _RETRY_ANY_REQUEST or (idempotent and status in _RETRY_IDEMPOTENT):
+                    retry_after = _retry_after_seconds(response)
+                    delay = max(retry_after or 0.0, _backoff_seconds(attempt))
+                    if status == 429:
+                        _rate_limiter.pause(delay)  # every queued request backs off, not just this one
+                    if self._may_retry(attempt, delay, deadline):
+                        logger.warning(f"BoldTrail {status} on {method} {endpoint}; retry {attempt} in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                error_detail = response.text
+                logger.error(f"BoldTrail API error: {status} - {error_detail}")
+                raise BoldTrailError(
+                    message=f"BoldTrail API error: {error_detail}",
+                    status_code=status,
+                    details={"response": error_detail, "attempts": attempt}
+                )
+            
+            return response.json() if response.text else {}
+    
+    @staticmethod
+    def _may_retry(attempt: int, delay: float, deadline: float) -> bool:
+        """Another attempt is allowed and its delay fits in the remaining budget."""
+        return attempt <= settings.BOLDTRAIL_MAX_RETRIES and time.monotonic() + delay < deadline
     
     async def create_contact(self, contact: Contact) -> Dict[str, Any]:
         """
@@ -125,7 +422,10 @@ class BoldTrailClient:
         # Remove None values
         payload = {k: v for k, v in payload.items() if v is not None}
         
-        return await self._make_request("POST", "contact", data=payload)
+        result = await self._make_request("POST", "contact", data=payload)
+        if isinstance(result, dict):
+            await contact_ids.remember(result.get("id"), phone=contact.phone, email=contact.email)
+        return result
     
     async def get_contact(self, contact_id: str) -> Dict[str, Any]:
         """
@@ -194,8 +494,55 @@ class BoldTrailClient:
         if phone:
             logger.warning(f"Phone search not supported by BoldTrail API. Phone parameter ignored: {phone}")
         
+        # Non-empty results are cached (a miss may become a hit once the lead is created).
+        # The key is a hash so phone/email never appear in cache key names.
+        cache_key = None
+        if settings.CONTACT_SEARCH_CACHE_TTL_SECONDS > 0 and params:
+            digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+            cache_key = f"boldtrail:contacts:{digest}"
+            cached = await get_cache().get_json(cache_key)
+            if cached is not None:
+                return cached
+        
         result = await self._make_request("GET", "contacts", params=params)
-        return result.get("data", []) if isinstance(result, dict) else []
+        contacts = result.get("data", []) if isinstance(result, dict) else []
+        if cache_key and contacts:
+            await get_cache().set_json(cache_key, contacts, settings.CONTACT_SEARCH_CACHE_TTL_SECONDS)
+        return contacts
+    
+    async def resolve_contact_id(
+        self,
+        phone: Optional[str] = None,
+        email: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Existing contact ID for a caller, from the resolution cache or a contact search
+        
+        The API cannot filter contacts by phone, so a phone-only caller is only
+        resolved from the cache (never by an unfiltered contact listing).
+        
+        Args:
+            phone: Caller phone
+            email: Caller email
+            
+        Returns:
+            Contact ID, or None when the caller is not in the CRM
+        """
+        cached = await contact_ids.lookup(phone=phone, email=email)
+        if cached:
+            logger.info(f"Resolved contact from cache: {cached}")
+            return cached
+        if not email:
+            return None
+        
+        contacts = await self.search_contacts(email=email)
+        match = contacts[0] if contacts else None
+        if not match or not match.get("id"):
+            return None
+        
+        await contact_ids.remember_contact(match)
+        await contact_ids.remember(match["id"], phone=phone, email=email)
+        return str(match["id"])
     
     async def create_buyer_lead(self, buyer_lead: BuyerLead) -> Dict[str, Any]:
         """
@@ -292,6 +639,9 @@ class BoldTrailClient:
             # Ensure ID is in result for caller to use
             if saved_id and "id" not in result:
                 result["id"] = saved_id
+            
+            # Returning callers resolve to this contact without a search
+            await contact_ids.remember(saved_id, phone=buyer_lead.contact.phone, email=buyer_lead.contact.email)
         
         return result
     
@@ -383,6 +733,9 @@ class BoldTrailClient:
             # Ensure ID is in result for caller to use
             if saved_id and "id" not in result:
                 result["id"] = saved_id
+            
+            # Returning callers resolve to this contact without a search
+            await contact_ids.remember(saved_id, phone=seller_lead.contact.phone, email=seller_lead.contact.email)
         
         return result
     
@@ -601,7 +954,11 @@ class BoldTrailClient:
         if title:
             payload["title"] = title
         
-        return await self._make_request("PUT", f"contact/{contact_id}/action/note", data=payload)
+        # Each PUT adds a note: not idempotent, and nobody is waiting on it
+        return await self._make_request(
+            "PUT", f"contact/{contact_id}/action/note", data=payload,
+            priority=PRIORITY_BACKGROUND, idempotent=False,
+        )
     
     async def log_call(
         self,
@@ -670,7 +1027,10 @@ class BoldTrailClient:
         # Remove None values
         payload = {k: v for k, v in payload.items() if v is not None}
         
-        return await self._make_request("PUT", f"contact/{contact_id}/action/call", data=payload)
+        return await self._make_request(
+            "PUT", f"contact/{contact_id}/action/call", data=payload,
+            priority=PRIORITY_BACKGROUND, idempotent=False,
+        )
     
     async def _fetch_xml_listings_feed(self) -> List[Dict[str, Any]]:
         """
@@ -682,8 +1042,6 @@ class BoldTrailClient:
         Returns:
             List of all listings from the XML feed
         """
-        global _listings_cache, _cache_timestamp
-        
         current_time = time.time()
         
         # Return cached data if still valid
@@ -696,35 +1054,47 @@ class BoldTrailClient:
             logger.warning("BOLDTRAIL_ZAPIER_KEY not configured, cannot fetch XML feed")
             return []
         
-        logger.info("Fetching fresh listings from BoldTrail XML feed")
+        if snapshot_enabled():
+            return await self._fetch_listings_snapshot(current_time)
         
-        # XML feed URL format: https://api.kvcore.com/export/listings/{ZAPIER_KEY}/10
-        # The /10 means include sold listings from last 10 days
-        url = f"https://api.kvcore.com/export/listings/{settings.BOLDTRAIL_ZAPIER_KEY}/10"
+        try:
+            listings, (index, facets, agents, streets) = await self._download_listings_feed()
+        except BoldTrailError as e:
+            if not _listings_cache:
+                raise
+            # kvCore down: keep answering from the expired feed rather than failing the call
+            logger.warning(f"Listings refresh failed, serving cached feed ({len(_listings_cache)} listings): {e.message}")
+            return _listings_cache
+        _install_feed(listings, index, facets, agents, streets, current_time)
+        return listings
+    
+    async def _download_listings_feed(
+        self,
+    ) -> Tuple[List[Dict[str, Any]], Tuple[ListingsIndex, Dict[str, Any], AgentNameIndex, StreetIndex]]:
+        """
+        Download and parse the XML feed and build its indexes (no caching)
         
+        Returns:
+            (listings, (listings index, market facets, agent-name index, street index))
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=30.0)
-                response.raise_for_status()
-                
-                # Parse XML
-                root = ET.fromstring(response.text)
-                listings = []
-                
-                # Find all listing elements - BoldTrail uses <Listing> with capital L
-                # Try both lowercase and uppercase to be safe
-                for listing_elem in root.findall('.//Listing') + root.findall('.//listing'):
-                    listing = self._extract_listing_from_xml(listing_elem)
-                    if listing:
-                        listings.append(listing)
-                
-                logger.info(f"Fetched {len(listings)} listings from XML feed")
-                
-                # Update cache
-                _listings_cache = listings
-                _cache_timestamp = current_time
-                
-                return listings
+            # Machines sharing a cache download the feed once per refresh (single-flight)
+            cache = get_cache()
+            if cache.shared:
+                xml_text = await cache.get_or_load(
+                    "boldtrail:feed_xml", self._download_feed_xml, CACHE_DURATION, lock_ttl_seconds=120.0
+                )
+            else:
+                xml_text = await self._download_feed_xml()
+            
+            # Parse XML off the event loop (process pool by default), then build the
+            # roster join and indexes in a worker thread
+            listings = await run_offloaded(feed_parse_mode(), _parse_listings_xml, xml_text)
+            logger.info(f"Fetched {len(listings)} listings from XML feed")
+            
+            build_pool = "inline" if feed_parse_mode() == "inline" else "thread"
+            state = await run_offloaded(build_pool, self._build_feed_state, listings)
+            return listings, state
                 
         except httpx.RequestError as e:
             logger.exception(f"Failed to fetch XML feed: {str(e)}")
@@ -734,11 +1104,226 @@ class BoldTrailClient:
             )
         except ET.ParseError as e:
             logger.exception(f"Failed to parse XML feed: {str(e)}")
+            # Do not keep serving a broken body to other machines until it expires
+            await get_cache().delete_quietly("boldtrail:feed_xml")
             raise BoldTrailError(
                 message=f"Failed to parse property listings: {str(e)}",
                 details={"error": str(e)}
             )
     
+    async def _download_feed_xml(self) -> str:
+        """Download the raw XML feed body from kvCore."""
+        logger.info("Fetching fresh listings from BoldTrail XML feed")
+        
+        # XML feed URL format: https://api.kvcore.com/export/listings/{ZAPIER_KEY}/10
+        # The /10 means include sold listings from last 10 days
+        url = f"https://api.kvcore.com/export/listings/{settings.BOLDTRAIL_ZAPIER_KEY}/10"
+        
+        async def download() -> str:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    url, timeout=httpx.Timeout(30.0, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS)
+                )
+                response.raise_for_status()
+                return response.text
+        
+        return await _circuit.call(download, rejected=lambda: _circuit_open_error("export/listings"))
+    
+    async def _fetch_listings_snapshot(self, current_time: float) -> Sequence[Dict[str, Any]]:
+        """
+        Multi-worker feed cache: map the shared snapshot, refreshing it if this worker wins the lock
+        
+        Only the worker holding the refresh lock downloads the feed; the others keep
+        serving the previous snapshot meanwhile (or wait for the first one at startup).
+        
+        Args:
+            current_time: Time of this lookup
+            
+        Returns:
+            Listings of the current snapshot (decoded per row from the mapping)
+        """
+        global _snapshot_generation
+        
+        path = snapshot_path()
+        header = read_header(path)
+        if header is None or (current_time - header["created"]) >= CACHE_DURATION:
+            lock = RefreshLock(path.with_suffix(".lock"))
+            if lock.try_acquire():
+                try:
+                    # Another worker may have published while we were checking
+                    header = read_header(path)
+                    if header is None or (current_time - header["created"]) >= CACHE_DURATION:
+                        try:
+                            listings, (index, facets, agents, streets) = await self._download_listings_feed()
+                        except BoldTrailError as e:
+                            if header is None:
+                                raise
+                            # kvCore down: keep serving the expired snapshot
+                            logger.warning(f"Listings refresh failed, serving previous snapshot: {e.message}")
+                        else:
+                            extras = {"market_facets": facets, "agent_index": agents, "street_index": streets}
+                            await run_in_thread(write_snapshot, path, listings, index, extras, current_time)
+                finally:
+                    lock.release()
+            elif header is None:
+                # First start: wait for the worker that is downloading the feed
+                await run_in_thread(lock.acquire)
+                lock.release()
+        
+        if _listings_cache is not None and header is not None and header["generation"] == _snapshot_generation:
+            return _listings_cache
+        
+        snapshot = await run_in_thread(load_snapshot, path)
+        if snapshot is None:
+            return _listings_cache or []
+        _install_feed(
+            snapshot.listings,
+            snapshot.index,
+            snapshot.extras["market_facets"],
+            snapshot.extras["agent_index"],
+            snapshot.extras["street_index"],
+            snapshot.created,
+        )
+        _snapshot_generation = snapshot.generation
+        logger.info(f"Mapped listings snapshot generation {snapshot.generation} ({len(snapshot.listings)} listings)")
+        return snapshot.listings
+    
+    def _build_feed_state(
+        self, listings: List[Dict[str, Any]]
+    ) -> Tuple[ListingsIndex, Dict[str, Any], AgentNameIndex, StreetIndex]:
+        """
+        Roster join plus every per-refresh index for a freshly parsed feed (CPU only)
+        
+        Runs in a worker thread; the results are swapped in on the event loop.
+        
+        Returns:
+            (listings index, market facets, agent-name index, street index)
+        """
+        # Resolve listing agents against the roster once per refresh (transfer phone/email)
+        annotate_listing_agents(listings, settings.AGENT_ROSTER_PATH or None)
+        index = ListingsIndex(listings)
+        return (
+            index,
+            compute_market_facets(index, _VILLAGES_AREA_GROUPS),
+            AgentNameIndex(listings),
+            StreetIndex(listings, self._street_words),
+        )
+    
+    async def get_listings_index(self) -> ListingsIndex:
+        """
+        Get the columnar index over the cached XML feed, fetching the feed if needed
+        
+        Returns:
+            ListingsIndex mirroring the current feed (empty when the feed is unavailable)
+        """
+        global _listings_index, _market_facets, _agent_index, _street_index, _feed_version
+        
+        listings = await self._fetch_xml_listings_feed()
+        # An unavailable feed comes back as a fresh empty list each time; that is not a new feed
+        replaced = _listings_index is not None and _listings_index.listings is not listings and (
+            bool(listings) or bool(_listings_index.listings)
+        )
+        if _listings_index is None or replaced:
+            _listings_index = ListingsIndex(listings)
+            _market_facets = None
+            _agent_index = None
+            _street_index = None
+            _feed_version += 1
+        return _listings_index
+    
+    async def get_agent_index(self) -> AgentNameIndex:
+        """
+        Get the agent/co-agent name index over the cached XML feed
+        
+        Returns:
+            AgentNameIndex whose rows line up with get_listings_index()
+        """
+        global _agent_index
+        
+        index = await self.get_listings_index()
+        if _agent_index is None:
+            _agent_index = AgentNameIndex(index.listings)
+        return _agent_index
+    
+    async def get_street_index(self) -> StreetIndex:
+        """
+        Get the typo-tolerant street-name dictionary over the cached XML feed
+        
+        Returns:
+            StreetIndex whose rows line up with get_listings_index()
+        """
+        global _street_index
+        
+        index = await self.get_listings_index()
+        if _street_index is None:
+            _street_index = StreetIndex(index.listings, self._street_words)
+        return _street_index
+    
+    async def get_feed_version(self) -> int:
+        """
+        Current XML feed version, refreshing the feed first if the cache has expired
+        
+        The version increments every time the feed is replaced, so results cached
+        under an older version are known to be stale.
+        
+        Returns:
+            Monotonic feed version number
+        """
+        await self.get_listings_index()
+        return _feed_version
+    
+    async def get_market_summary(
+        self,
+        city: Optional[str] = None,
+        zip_code: Optional[str] = None,
+        property_type: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Market summary (count, price percentiles, bed/bath distribution) for the feed
+        
+        Single-filter questions are answered from facets precomputed at feed refresh.
+        Combined filters (e.g. condos in Lady Lake) are computed from a vectorized mask
+        over the columnar index.
+        
+        Args:
+            city: City or Villages-area name
+            zip_code: ZIP code
+            property_type: Property type (case-insensitive substring for combined filters)
+            status: Listing status; defaults to for-sale listings
+            
+        Returns:
+            Summary dict (see market_facets.summarize_rows)
+        """
+        global _market_facets
+        
+        index = await self.get_listings_index()
+        if _market_facets is None:
+            _market_facets = compute_market_facets(index, _VILLAGES_AREA_GROUPS)
+        
+        filters = {
+            "city": (city or "").strip().lower(),
+            "zip": (zip_code or "").strip(),
+            "property_type": (property_type or "").strip().lower(),
+            "status": (status or "").strip().lower(),
+        }
+        given = {name: value for name, value in filters.items() if value}
+        if not given:
+            return _market_facets["all"]
+        if len(given) == 1:
+            (facet, value), = given.items()
+            if value in _market_facets[facet]:
+                return _market_facets[facet][value]
+        
+        # Combined (or unusual) filters: one vectorized mask, no per-listing scan
+        mask = index.mask(
+            city_matches=(lambda c: self._city_matches(c, city)) if city else None,
+            zip_code=given.get("zip"),
+            property_type=given.get("property_type"),
+            statuses=(given["status"],) if "status" in given else FOR_SALE_STATUSES,
+        )
+        return summarize_rows(index, index.rows(mask))
+    
     def _extract_listing_from_xml(self, listing_elem: ET.Element) -> Optional[Dict[str, Any]]:
         """
         Extract property data from a single listing XML element
@@ -832,54 +1417,14 @@ class BoldTrailClient:
         
         # Only return if we have at least an address and price
         if listing["address"] and listing["price"] > 0:
-            return listing
+            # Spoken address/price/bed-bath are rendered once here, not per response
+            return render_listing_speech(listing)
         
         return None
     
-    def _normalize_address(self, address: str) -> str:
-        """
-        Normalize address for comparison
-        
-        Args:
-            address: Raw address string
-            
-        Returns:
-            Normalized address (lowercase, no punctuation)
-        """
-        return (address.lower()
-                .replace(",", "")
-                .replace(".", "")
-                .replace("street", "st")
-                .replace("avenue", "ave")
-                .replace("boulevard", "blvd")
-                .replace("road", "rd")
-                .replace("drive", "dr")
-                .replace("lane", "ln")
-                .replace("court", "ct")
-                .replace("circle", "cir")
-                .replace("southeast", "se")
-                .replace("southwest", "sw")
-                .replace("northeast", "ne")
-                .replace("northwest", "nw")
-                .strip())
-
-    def _parse_address_parts(self, norm_addr: str) -> tuple[Optional[str], List[str], Optional[str]]:
-        """
-        Parse normalized address into street number, street name words, and street type.
-        Handles formats like "3016 gallenoll ct" or "16642 bellavista cir".
-        """
-        tokens = [t for t in re.split(r"\W+", norm_addr) if t]
-        street_number = tokens[0] if tokens and tokens[0].isdigit() else None
-        name_start = 1 if street_number else 0
-        # Street type: last token if it's a known abbreviation
-        street_types = {"ct", "st", "ave", "dr", "ln", "cir", "rd", "blvd"}
-        street_type = None
-        name_end = len(tokens)
-        if len(tokens) > name_start and tokens[-1] in street_types:
-            street_type = tokens[-1]
-            name_end = len(tokens) - 1
-        name_words = [t for t in tokens[name_start:name_end] if len(t) >= 2]
-        return street_number, name_words, street_type
+    def _street_words(self, address: str) -> List[str]:
+        """Street-name words of a raw address (as compared by _address_matches)."""
+        return list(parse_address(address).name_words)
 
     def _word_matches_phonetic(self, search_word: str, listing_words: List[str]) -> bool:
         """
@@ -905,26 +1450,31 @@ class BoldTrailClient:
         - Handles compound street names: "Bella Vista" vs "Bellavista Circle"
         - Number-first: when street number matches (e.g. 3016), uses phonetic matching for
           street name so "3016 Gallenoll Court" matches "3016 Gallinule Court" (voice transcription errors)
+        Both addresses go through the memoized tokenizer in src/utils/address.py.
         """
         if not search_addr:
             return True
-        norm_listing = self._normalize_address(listing_addr)
-        norm_search = self._normalize_address(search_addr)
+        listing = parse_address(listing_addr or "")
+        search = parse_address(search_addr)
+        if not listing.normalized:
+            return False
         # Direct substring match (either direction)
-        if norm_search in norm_listing or norm_listing in norm_search:
+        if search.normalized in listing.normalized or listing.normalized in search.normalized:
             return True
-        # Parse address parts
-        search_num, search_words, search_type = self._parse_address_parts(norm_search)
-        list_num, list_words, list_type = self._parse_address_parts(norm_listing)
+        search_words = list(search.name_words)
+        list_words = list(listing.name_words)
         if not search_words:
             return False
         # When both have street numbers, they must match (reject 3017 vs 3016)
-        if search_num and list_num:
-            if search_num != list_num:
-                return False
-            # Numbers match: require street type match if both have it
-            if search_type and list_type and search_type != list_type:
+        if search.number and listing.number:
+            if search.number != listing.number:
                 return False
+            # Numbers match: require street type match if both have it. A suffix-looking
+            # word may really end the street name ("Bella Vista" vs "Bellavista Circle").
+            if search.suffix and listing.suffix and search.suffix != listing.suffix:
+                if not any(search.suffix_word in w for w in list_words):
+                    return False
+                return self._search_words_match_listing(search_words + [search.suffix_word], list_words)
             return self._search_words_match_listing(search_words, list_words)
         # Street-name-only or listing has no number
         return self._search_words_match_listing(search_words, list_words)
@@ -1016,42 +1566,38 @@ class BoldTrailClient:
         if status:
             params["status"] = status
         
-        # Get all manual listings (API has limited filtering options)
-        result = await self._make_request("GET", "manuallistings", params=params)
-        
-        # Extract listings from response
-        listings = result.get("data", []) if isinstance(result, dict) else []
+        index = await self._manual_listings_index(status, params)
         
-        if not listings:
+        if not len(index):
             logger.info("No manual listings found")
             return []
         
-        logger.info(f"Retrieved {len(listings)} manual listings, applying filters")
-        
-        # Apply filters in code (API has limited query parameter support)
+        logger.info(f"Retrieved {len(index)} manual listings, applying filters")
+        
+        # Apply filters in code (API has limited query parameter support).
+        # Numeric/categorical filters run as a vectorized mask over the columnar index;
+        # address and agent matching only run on the rows that survive it.
+        mask = index.mask(
+            city_matches=(lambda c: self._city_matches(c, city)) if city else None,
+            state=state,
+            zip_code=zip_code,
+            property_type=property_type,
+            min_price=min_price,
+            max_price=max_price,
+            min_bedrooms=bedrooms,
+            min_bathrooms=bathrooms,
+        )
         matches = []
+        match_rows = []
         
-        for listing in listings:
+        for row in index.rows(mask):
+            listing = index.listings[row]
+            price = float(index.price[row])
+            
             # Address filter (partial match, supports compound street names e.g. Bella Vista/Bellavista)
             if address and not self._address_matches(str(listing.get("address", "")), address):
                 continue
             
-            # City filter (The Villages area expands to multiple municipalities)
-            if city and not self._city_matches(listing.get("city", ""), city):
-                continue
-
-            # State filter (case-insensitive)
-            if state:
-                listing_state = str(listing.get("state", "")).lower()
-                if state.lower() != listing_state:
-                    continue
-            
-            # ZIP filter
-            if zip_code:
-                listing_zip = str(listing.get("zipCode", "")) or str(listing.get("zip_code", ""))
-                if zip_code != listing_zip:
-                    continue
-            
             # Agent name filter (listings by listing agent)
             if agent_name:
                 listing_agent = (
@@ -1061,31 +1607,6 @@ class BoldTrailClient:
                 if not self._agent_name_matches(listing_agent, agent_name):
                     continue
             
-            # Property type filter (case-insensitive partial match)
-            if property_type:
-                listing_type = str(listing.get("propertyType", "")).lower()
-                if property_type.lower() not in listing_type:
-                    continue
-            
-            # Price filters
-            price = float(listing.get("price", 0) or 0)
-            if min_price and price < min_price:
-                continue
-            if max_price and price > max_price:
-                continue
-            
-            # Bedrooms filter (minimum)
-            if bedrooms is not None:
-                listing_beds = int(listing.get("bedrooms", 0) or 0)
-                if listing_beds < bedrooms:
-                    continue
-            
-            # Bathrooms filter (minimum)
-            if bathrooms is not None:
-                listing_baths = float(listing.get("bathrooms", 0) or 0)
-                if listing_baths < bathrooms:
-                    continue
-            
             # Normalize listing data to match XML feed format
             normalized = {
                 "address": listing.get("address", ""),
@@ -1109,12 +1630,82 @@ class BoldTrailClient:
                 "source": "manual_listing"  # Flag to indicate this came from manual listings
             }
             
-            matches.append(normalized)
+            matches.append(render_listing_speech(normalized))
+            match_rows.append(row)
         
         logger.info(f"Found {len(matches)} manual listings matching criteria")
         
         # Limit results
-        return matches[:limit]
+        return ListingMatches.from_rows(index, match_rows, matches)[:limit]
+    
+    async def _manual_listings_index(self, status: Optional[str], params: Dict[str, Any]) -> ListingsIndex:
+        """
+        Columnar index over the manual listings for a status filter
+        
+        The API response is shared through the cache so repeat searches (and other
+        machines) skip the call; the index built over it is kept in this process for
+        the same TTL, so repeat searches also skip decoding and re-indexing.
+        """
+        ttl = settings.MANUAL_LISTINGS_CACHE_TTL_SECONDS
+        key = status or ""
+        cached = _manual_listings_indexes.get(key)
+        if cached is not None and (time.monotonic() - cached[0]) < ttl:
+            return cached[1]
+        
+        # Get all manual listings (API has limited filtering options)
+        async def load_manual_listings() -> Dict[str, Any]:
+            return await self._make_request("GET", "manuallistings", params=params)
+        
+        if ttl > 0:
+            result = await get_cache().get_or_load(f"boldtrail:manuallistings:{key}", load_manual_listings, ttl)
+        else:
+            result = await load_manual_listings()
+        
+        # Extract listings from response
+        listings = result.get("data", []) if isinstance(result, dict) else []
+        index = ListingsIndex(listings or [])
+        if ttl > 0:
+            _manual_listings_indexes[key] = (time.monotonic(), index)
+        return index
+    
+    def _filter_rows(
+        self,
+        index: ListingsIndex,
+        rows: np.ndarray,
+        address: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply the fuzzy address filter to candidate rows (CPU only)
+        
+        Only these rows are decoded (snapshot records are JSON), so every column
+        filter - including the MLS number - belongs in the mask first.
+        
+        Args:
+            index: Listings index the rows refer to
+            rows: Candidate row numbers in feed order
+            address: Address to match (partial / sound-alike)
+            limit: Maximum results to return
+            
+        Returns:
+            Matching listings, at most limit
+        """
+        matches = []
+        match_rows = []
+        
+        for row in rows:
+            listing = index.listings[row]
+            
+            # Address filter (partial match, supports compound street names e.g. Bella Vista/Bellavista)
+            if address and not self._address_matches(listing.get("address", ""), address):
+                continue
+            
+            matches.append(listing)
+            match_rows.append(row)
+            if len(matches) >= limit:
+                break
+        
+        return ListingMatches.from_rows(index, match_rows, matches)
     
     async def search_listings_from_xml(
         self,
@@ -1141,6 +1732,7 @@ class BoldTrailClient:
             state: State filter
             zip_code: ZIP code filter
             mls_number: MLS number filter
+            agent_name: Listing or co-listing agent (exact, partial or sound-alike name)
             property_type: Property type filter
             min_price: Minimum price
             max_price: Maximum price
@@ -1152,79 +1744,59 @@ class BoldTrailClient:
         Returns:
             List of matching listings
         """
-        # Fetch all listings from XML feed
-        all_listings = await self._fetch_xml_listings_feed()
+        # Fetch all listings from XML feed (columnar index is built alongside the cache)
+        index = await self.get_listings_index()
         
-        if not all_listings:
+        if not len(index):
             return []
         
-        # Filter listings
-        matches = []
-        
-        for listing in all_listings:
-            # Address filter (partial match, supports compound street names e.g. Bella Vista/Bellavista)
-            if address and not self._address_matches(listing.get("address", ""), address):
-                continue
-            
-            # City filter (The Villages area expands to multiple municipalities)
-            if city and not self._city_matches(listing.get("city", ""), city):
-                continue
-
-            # State filter (case-insensitive)
-            if state and listing.get("state", "").lower() != state.lower():
-                continue
-            
-            # ZIP filter
-            if zip_code and listing.get("zip", "") != zip_code and listing.get("zipCode", "") != zip_code:
-                continue
-            
-            # MLS number filter
-            if mls_number and listing.get("mlsNumber", "") != mls_number and listing.get("mls_number", "") != mls_number:
-                continue
-            
-            # Agent name filter (listings by listing agent)
-            if agent_name:
-                listing_agent = (
-                    listing.get("agentName") or
-                    f"{listing.get('agentFirstName', '')} {listing.get('agentLastName', '')}".strip()
-                )
-                if not self._agent_name_matches(listing_agent, agent_name):
-                    continue
-            
-            # Property type filter (case-insensitive partial match)
-            if property_type and property_type.lower() not in listing.get("propertyType", "").lower():
-                continue
-            
-            # Price filters
-            price = listing.get("price", 0)
-            if min_price and price < min_price:
-                continue
-            if max_price and price > max_price:
-                continue
-            
-            # Bedrooms filter (exact match)
-            if bedrooms is not None and listing.get("bedrooms", 0) != bedrooms:
-                continue
-            
-            # Bathrooms filter (exact match)
-            if bathrooms is not None and listing.get("bathrooms", 0) != bathrooms:
-                continue
-            
-            # Status filter (only show active listings by default)
-            # Exception: If searching by specific address or MLS number, include pending/sold properties too
-            if status and status.lower() == "active":
-                listing_status = listing.get("status", "").lower()
-                # If searching by specific address or MLS, be more lenient with status
-                if address or mls_number:
-                    # Include active, pending, and available properties when searching by address/MLS
-                    if listing_status not in ["active", "available", "pending", "sold", ""]:
-                        continue
-                else:
-                    # For general searches, only show active/available
-                    if listing_status not in ["active", "available", ""]:
-                        continue
-            
-            matches.append(listing)
+        # Status filter (only show active listings by default)
+        # Exception: If searching by specific address or MLS number, include pending/sold properties too
+        allowed_statuses = None
+        if status and status.lower() == "active":
+            if address or mls_number:
+                allowed_statuses = ("active", "available", "pending", "sold", "")
+            else:
+                allowed_statuses = ("active", "available", "")
+        
+        # Listings by agent: one lookup in the agent/co-agent name index
+        candidate_rows = None  # Rows the mask is restricted to (agent and/or street lookups)
+        if agent_name:
+            candidate_rows = (await self.get_agent_index()).rows(agent_name)
+            if not len(candidate_rows):
+                return []
+        
+        # Fuzzy address: resolve street words through the street dictionary first.
+        # No candidates (e.g. a spelling the dictionary cannot reach) falls back to the full scan.
+        if address:
+            street_rows = (await self.get_street_index()).candidate_rows(
+                self._street_words(address), self._word_matches_phonetic
+            )
+            if street_rows is not None and len(street_rows):
+                candidate_rows = street_rows if candidate_rows is None else np.intersect1d(candidate_rows, street_rows)
+        
+        # Numeric and categorical filters as one vectorized mask
+        mask = index.mask(
+            city_matches=(lambda c: self._city_matches(c, city)) if city else None,
+            state=state,
+            zip_code=zip_code,
+            property_type=property_type,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,  # Exact match
+            bathrooms=bathrooms,  # Exact match
+            statuses=allowed_statuses,
+            mls_number=mls_number,
+            rows=candidate_rows,
+        )
+        
+        # String filters only on surviving rows; a wide fuzzy address scan (full-feed
+        # fallback) runs in the offload thread pool so the loop keeps serving calls
+        rows = index.rows(mask)
+        if address and len(rows) > settings.OFFLOAD_WIDE_SEARCH_ROWS:
+            matches = await run_in_thread(self._filter_rows, index, rows, address, limit)
+        else:
+            matches = self._filter_rows(index, rows, address, limit)
         
         # Limit results
         return matches[:limit]
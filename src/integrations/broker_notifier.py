@@ -0,0 +1,115 @@
+"""
+Broker and office notifications (SMS + email), optionally collected into digests.
+
+Broker copies of customer notifications, new-lead office alerts and transfer
+alerts all go through `broker_notifier`. With BROKER_DIGEST_ENABLED the
+non-urgent ones are buffered and sent as one digest per recipient (see
+src/utils/broker_digest.py); otherwise each goes out on its own.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from src.integrations.email_client import EmailClient
+from src.integrations.twilio_client import TwilioClient
+from src.config.settings import settings
+from src.utils.broker_digest import BrokerDigest, DigestEntry, chunk_digest, format_digest
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+twilio_client = TwilioClient()
+
+
+def _group(entries: List[DigestEntry], field: str) -> Dict[str, List[DigestEntry]]:
+    groups: Dict[str, List[DigestEntry]] = OrderedDict()
+    for entry in entries:
+        target = getattr(entry, field)
+        if target:
+            groups.setdefault(target, []).append(entry)
+    return groups
+
+
+async def _send_email(to_email: str, subject: str, body: str) -> bool:
+    """Send one plain-text email; False when SMTP is not configured or sending failed."""
+    try:
+        email_client = EmailClient()
+        if not email_client.is_configured:
+            return False
+        await email_client.send_email(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            html_body=f"<pre>{body}</pre>",
+        )
+        logger.info(f"Broker notification email sent to: {to_email}")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to send broker notification email: {str(e)}")
+        return False
+
+
+def _queue_sms(phone: str, body: str) -> None:
+    try:
+        twilio_client.queue_sms(phone, body)
+        logger.info(f"Broker notification SMS queued for: {phone}")
+    except Exception as e:
+        logger.warning(f"Failed to queue broker notification SMS: {str(e)}")
+
+
+async def _send_entry(entry: DigestEntry) -> None:
+    if entry.phone:
+        _queue_sms(entry.phone, entry.text)
+    if entry.email:
+        await _send_email(entry.email, entry.subject, entry.text)
+
+
+async def _send_digest(entries: List[DigestEntry]) -> None:
+    """One email per address with full details; one SMS per phone (headlines only when emailed)."""
+    emailed = set()
+    for to_email, group in _group(entries, "email").items():
+        subject = f"📋 {len(group)} update(s) - {settings.BUSINESS_NAME}"
+        if await _send_email(to_email, subject, format_digest(group, full=True)):
+            emailed.update(id(entry) for entry in group)
+
+    for phone, group in _group(entries, "phone").items():
+        if all(id(entry) in emailed for entry in group):
+            _queue_sms(phone, format_digest(group, full=False) + "\n\nDetails by email.")
+            continue
+        for chunk in chunk_digest(group, settings.SMS_BATCH_MAX_CHARS or 1600):
+            _queue_sms(phone, format_digest(chunk, full=True))
+
+
+broker_notifier = BrokerDigest(
+    send_now=_send_entry,
+    send_digest=_send_digest,
+    enabled=settings.BROKER_DIGEST_ENABLED,
+    interval_seconds=settings.BROKER_DIGEST_INTERVAL_SECONDS,
+    max_entries=settings.BROKER_DIGEST_MAX_ENTRIES,
+    urgent_categories=[c.strip() for c in settings.BROKER_DIGEST_URGENT_CATEGORIES.split(",") if c.strip()],
+)
+
+
+async def notify_broker(
+    category: str,
+    subject: str,
+    text: str,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    summary: Optional[str] = None,
+) -> None:
+    """
+    Send (or buffer for the next digest) a notification for the broker/office.
+
+    Args:
+        category: "broker_copy", "buyer_lead", "seller_lead", "failed_transfer", "no_answer",
+            "lead_write_failed", "outbound_dial_failed"
+        subject: One-line summary (email subject / digest headline)
+        text: Full notification text
+        phone: SMS recipient (None: no SMS)
+        email: Email recipient (None: no email)
+        summary: Digest headline when the subject is too generic (default: subject)
+    """
+    if not phone and not email:
+        return
+    await broker_notifier.notify(DigestEntry(category, subject, text, phone=phone, email=email, summary=summary))
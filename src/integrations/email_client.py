@@ -11,9 +11,15 @@ from typing import Dict, Any, Optional
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.errors import EmailError
+from src.utils.circuit_breaker import circuit_breaker, tcp_probe
+from src.utils.deadline import timeout_for
 
 logger = get_logger(__name__)
 
+_circuit = circuit_breaker(
+    "smtp", tcp_probe(settings.SMTP_HOST, settings.SMTP_PORT) if settings.SMTP_HOST else None
+)
+
 
 def _send_email_sync(
     to_email: str,
@@ -49,7 +55,12 @@ def _send_email_sync(
 
     smtp_class = smtplib.SMTP_SSL if port == 465 else smtplib.SMTP
     try:
-        with smtp_class(host, port, timeout=30) as server:
+        try:
+            connection = smtp_class(host, port, timeout=timeout_for(30.0))  # to_thread carries the tool deadline over
+        except OSError as e:
+            # Marks connect timeouts for the circuit breaker (always an outage, whatever the deadline)
+            raise ConnectionError(f"Could not connect to {host}:{port}: {e}") from e
+        with connection as server:
             if use_tls and port != 465:
                 server.starttls()
             if username and password:
@@ -110,7 +121,7 @@ class EmailClient:
             Dict with status, to, subject
 
         Raises:
-            EmailError: If email fails to send
+            EmailError: If email fails to send (status 503 at once while the circuit is open)
         """
         if not self.is_configured:
             raise EmailError(
@@ -119,10 +130,18 @@ class EmailClient:
                 details={"host_set": bool(self.host), "username_set": bool(self.username)},
             )
 
-        return await asyncio.to_thread(
-            _send_email_sync,
-            to_email=to_email,
-            subject=subject,
-            body=body,
-            html_body=html_body,
+        return await _circuit.call(
+            lambda: asyncio.to_thread(
+                _send_email_sync,
+                to_email=to_email,
+                subject=subject,
+                body=body,
+                html_body=html_body,
+            ),
+            rejected=lambda: EmailError(
+                message="SMTP server unavailable (circuit open)",
+                status_code=503,
+                details={"circuit": "open"},
+            ),
+            timeout=30.0,
         )
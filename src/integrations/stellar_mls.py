@@ -7,10 +7,14 @@ from typing import Dict, Any, Optional, List
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.errors import StellarMLSError
+from src.utils.circuit_breaker import circuit_breaker, http_probe
+from src.utils.deadline import http_timeout
 from src.models.mls_models import Property, PropertySearchParams, PropertyDetails
 
 logger = get_logger(__name__)
 
+_circuit = circuit_breaker("stellar_mls", http_probe(settings.STELLAR_MLS_API_URL))
+
 
 class StellarMLSClient:
     """Client for Stellar MLS API"""
@@ -42,7 +46,7 @@ class StellarMLSClient:
                         "username": self.username,
                         "password": self.password,
                     },
-                    timeout=30.0,
+                    timeout=http_timeout(),
                 )
                 
                 if response.status_code >= 400:
@@ -82,8 +86,26 @@ class StellarMLSClient:
             Response data
             
         Raises:
-            StellarMLSError: If request fails
+            StellarMLSError: If request fails (status 503 at once while the circuit is open)
         """
+        return await _circuit.call(
+            lambda: self._send_request(method, endpoint, data, params),
+            rejected=lambda: StellarMLSError(
+                message="MLS API unavailable (circuit open)",
+                status_code=503,
+                details={"circuit": "open", "endpoint": endpoint},
+            ),
+            timeout=30.0,
+        )
+    
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Authenticate if needed and make one request (see _make_request)."""
         token = await self._authenticate()
         url = f"{self.base_url}/{endpoint}"
         headers = {
@@ -99,7 +121,7 @@ class StellarMLSClient:
                     headers=headers,
                     json=data,
                     params=params,
-                    timeout=30.0,
+                    timeout=http_timeout(),
                 )
                 
                 if response.status_code >= 400:
@@ -119,7 +141,7 @@ class StellarMLSClient:
                             headers=headers,
                             json=data,
                             params=params,
-                            timeout=30.0,
+                            timeout=http_timeout(),
                         )
                     
                     if response.status_code >= 400:
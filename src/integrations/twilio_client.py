@@ -2,15 +2,21 @@
 Twilio API client for SMS and call routing
 """
 
+import asyncio
+from functools import partial
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
 from typing import Dict, Any, Optional
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.errors import TwilioError
+from src.utils.sms_outbox import sms_outbox
+from src.utils.circuit_breaker import circuit_breaker, http_probe
 
 logger = get_logger(__name__)
 
+_circuit = circuit_breaker("twilio", http_probe("https://api.twilio.com/2010-04-01"))
+
 
 class TwilioClient:
     """Client for Twilio API"""
@@ -36,7 +42,10 @@ class TwilioClient:
         from_number: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
-        Send an SMS message
+        Send an SMS message and wait for Twilio to accept it
+        
+        Goes through the SMS outbox: paced per sending number, retried on 429,
+        and skipped when the same message reached the recipient recently.
         
         Args:
             to_number: Recipient phone number
@@ -49,6 +58,28 @@ class TwilioClient:
         Raises:
             TwilioError: If SMS fails to send
         """
+        from_number = self._sms_sender(from_number)
+        return await sms_outbox.send(from_number, to_number, message, partial(self._deliver_sms, from_number))
+    
+    def queue_sms(
+        self,
+        to_number: str,
+        message: str,
+        from_number: Optional[str] = None,
+    ) -> None:
+        """
+        Queue an SMS without waiting for delivery (alerts and confirmations)
+        
+        Delivery failures are logged by the outbox.
+        
+        Raises:
+            TwilioError: If Twilio is not configured
+        """
+        from_number = self._sms_sender(from_number)
+        sms_outbox.queue(from_number, to_number, message, partial(self._deliver_sms, from_number))
+    
+    def _sms_sender(self, from_number: Optional[str]) -> str:
+        """Sending number, after checking Twilio is configured"""
         from_number = from_number or self.phone_number
         
         # Validate configuration
@@ -72,11 +103,27 @@ class TwilioClient:
                 status_code=500,
                 details={}
             )
-        
+        return from_number
+    
+    async def _deliver_sms(self, from_number: str, to_number: str, message: str) -> Dict[str, Any]:
+        """Create one message now (called by the outbox when the lane allows it)"""
+        return await _circuit.call(
+            lambda: self._create_message(from_number, to_number, message),
+            rejected=lambda: TwilioError(
+                message="Twilio unavailable (circuit open)",
+                status_code=503,
+                details={"circuit": "open"},
+            ),
+        )
+    
+    async def _create_message(self, from_number: str, to_number: str, message: str) -> Dict[str, Any]:
+        """Twilio messages.create, with errors mapped to TwilioError"""
         try:
             logger.info(f"Sending SMS to {to_number} from {from_number}")
             
-            message_obj = self.client.messages.create(
+            # The Twilio SDK is blocking; keep it off the event loop
+            message_obj = await asyncio.to_thread(
+                self.client.messages.create,
                 to=to_number,
                 from_=from_number,
                 body=message,
@@ -92,10 +139,14 @@ class TwilioClient:
             
         except TwilioRestException as e:
             error_msg = getattr(e, 'msg', str(e))
-            logger.exception(f"Twilio SMS error: {error_msg}")
+            status = getattr(e, 'status', 500)
+            if status == 429:
+                logger.warning(f"Twilio SMS throttled: {error_msg}")
+            else:
+                logger.exception(f"Twilio SMS error: {error_msg}")
             raise TwilioError(
                 message=f"Failed to send SMS: {error_msg}",
-                status_code=getattr(e, 'status', 500),
+                status_code=status,
                 details={"code": getattr(e, 'code', None), "error": error_msg}
             )
         except Exception as e:
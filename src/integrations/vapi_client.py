@@ -7,9 +7,13 @@ from typing import Dict, Any, Optional, List
 from src.config.settings import settings
 from src.utils.logger import get_logger
 from src.utils.errors import VapiError
+from src.utils.circuit_breaker import circuit_breaker, http_probe
+from src.utils.deadline import http_timeout
 
 logger = get_logger(__name__)
 
+_circuit = circuit_breaker("vapi", http_probe(settings.VAPI_API_URL))
+
 
 class VapiClient:
     """Client for Vapi.ai API"""
@@ -42,8 +46,26 @@ class VapiClient:
             Response data
             
         Raises:
-            VapiError: If request fails
+            VapiError: If request fails (status 503 at once while the circuit is open)
         """
+        return await _circuit.call(
+            lambda: self._send_request(method, endpoint, data, params),
+            rejected=lambda: VapiError(
+                message="Vapi API unavailable (circuit open)",
+                status_code=503,
+                details={"circuit": "open", "endpoint": endpoint},
+            ),
+            timeout=30.0,
+        )
+    
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """One HTTP request to the Vapi API (see _make_request)."""
         url = f"{self.base_url}/{endpoint}"
         
         try:
@@ -54,7 +76,7 @@ class VapiClient:
                     headers=self.headers,
                     json=data,
                     params=params,
-                    timeout=30.0,
+                    timeout=http_timeout(),
                 )
                 
                 if response.status_code >= 400:
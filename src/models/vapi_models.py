@@ -109,6 +109,41 @@ class CheckPropertyRequest(BaseModel):
         return v
 
 
+class MorePropertiesRequest(BaseModel):
+    """Request model for more_properties function - pages through a check_property result set"""
+    cursor: Optional[str] = None  # data.cursor from the check_property response; defaults to the call's latest search
+    offset: Optional[int] = None  # 0-based start of the page; defaults to the next unread page
+    index: Optional[int] = None  # 1-based result number ("tell me about number 6")
+
+    @field_validator('cursor', 'offset', 'index', mode='before')
+    @classmethod
+    def empty_str_to_none(cls, v):
+        """Convert empty strings and whitespace to None before type validation"""
+        if isinstance(v, str):
+            v = v.strip()
+            if v == "":
+                return None
+        return v
+
+
+class MarketSummaryRequest(BaseModel):
+    """Request model for market_summary function - all filters optional"""
+    city: Optional[str] = None  # City or "The Villages" (covers all Villages municipalities)
+    zip_code: Optional[str] = None
+    property_type: Optional[str] = None
+    status: Optional[str] = None  # Defaults to homes currently for sale
+
+    @field_validator('city', 'zip_code', 'property_type', 'status', mode='before')
+    @classmethod
+    def strip_strings(cls, v):
+        """Strip whitespace and convert empty strings to None"""
+        if isinstance(v, str):
+            v = v.strip()
+            if v == "":
+                return None
+        return v
+
+
 class GetAgentInfoRequest(BaseModel):
     """Request model for get_agent_info function"""
     agent_name: Optional[str] = None
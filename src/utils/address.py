@@ -0,0 +1,330 @@
+"""
+Street address tokenizer - one pass from a raw address to structured parts.
+
+Addresses are lowercased and tokenized once with a compiled pattern; tokens are
+then classified against USPS Publication 28 tables (street suffixes, directionals,
+secondary unit designators). Whole tokens are mapped, so words that merely contain
+a suffix ("Courtyard", "Drivewood") are left alone.
+
+Results are memoized, so each distinct feed address is parsed once and shared by
+the XML feed and manual listings search paths.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"#?[a-z0-9]+|#")
+
+# USPS directionals (Publication 28, C2)
+DIRECTIONALS = {
+    "north": "n", "n": "n",
+    "south": "s", "s": "s",
+    "east": "e", "e": "e",
+    "west": "w", "w": "w",
+    "northeast": "ne", "ne": "ne",
+    "northwest": "nw", "nw": "nw",
+    "southeast": "se", "se": "se",
+    "southwest": "sw", "sw": "sw",
+}
+
+# USPS secondary unit designators (Publication 28, C2). "fl"/"floor" is left out:
+# callers often append the state ("..., Ocala FL").
+UNIT_DESIGNATORS = {
+    "apartment": "apt", "apt": "apt",
+    "basement": "bsmt", "bsmt": "bsmt",
+    "building": "bldg", "bldg": "bldg",
+    "department": "dept", "dept": "dept",
+    "hangar": "hngr", "hngr": "hngr",
+    "lot": "lot",
+    "office": "ofc", "ofc": "ofc",
+    "penthouse": "ph", "ph": "ph",
+    "pier": "pier",
+    "room": "rm", "rm": "rm",
+    "slip": "slip",
+    "space": "spc", "spc": "spc",
+    "stop": "stop",
+    "suite": "ste", "ste": "ste",
+    "trailer": "trlr", "trlr": "trlr",
+    "unit": "unit",
+}
+
+# USPS street suffixes (Publication 28, C1): common spellings -> standard abbreviation
+_SUFFIX_VARIANTS = {
+    "aly": ("alley", "allee", "ally", "aly"),
+    "anx": ("annex", "anex", "annx", "anx"),
+    "arc": ("arcade", "arc"),
+    "ave": ("avenue", "av", "aven", "avenu", "avn", "avnue", "ave"),
+    "byu": ("bayou", "bayoo", "byu"),
+    "bch": ("beach", "bch"),
+    "bnd": ("bend", "bnd"),
+    "blf": ("bluff", "bluf", "blf"),
+    "blfs": ("bluffs", "blfs"),
+    "btm": ("bottom", "bot", "bottm", "btm"),
+    "blvd": ("boulevard", "boul", "boulv", "blvd"),
+    "br": ("branch", "brnch", "br"),
+    "brg": ("bridge", "brdge", "brg"),
+    "brk": ("brook", "brk"),
+    "brks": ("brooks", "brks"),
+    "bg": ("burg", "bg"),
+    "byp": ("bypass", "bypa", "bypas", "byps", "byp"),
+    "cp": ("camp", "cmp", "cp"),
+    "cyn": ("canyon", "canyn", "cnyn", "cyn"),
+    "cpe": ("cape", "cpe"),
+    "cswy": ("causeway", "causwa", "cswy"),
+    "ctr": ("center", "cen", "cent", "centr", "centre", "cnter", "cntr", "ctr"),
+    "ctrs": ("centers", "ctrs"),
+    "cir": ("circle", "circ", "circl", "crcl", "crcle", "cir"),
+    "cirs": ("circles", "cirs"),
+    "clf": ("cliff", "clf"),
+    "clfs": ("cliffs", "clfs"),
+    "clb": ("club", "clb"),
+    "cmn": ("common", "cmn"),
+    "cor": ("corner", "cor"),
+    "cors": ("corners", "cors"),
+    "crse": ("course", "crse"),
+    "ct": ("court", "crt", "ct"),
+    "cts": ("courts", "cts"),
+    "cv": ("cove", "cv"),
+    "cvs": ("coves", "cvs"),
+    "crk": ("creek", "crk"),
+    "cres": ("crescent", "crsent", "crsnt", "cres"),
+    "crst": ("crest", "crst"),
+    "xing": ("crossing", "crssng", "xing"),
+    "xrd": ("crossroad", "xrd"),
+    "curv": ("curve", "curv"),
+    "dl": ("dale", "dl"),
+    "dm": ("dam", "dm"),
+    "dv": ("divide", "div", "dvd", "dv"),
+    "dr": ("drive", "driv", "drv", "dr"),
+    "drs": ("drives", "drs"),
+    "est": ("estate", "est"),
+    "ests": ("estates", "ests"),
+    "expy": ("expressway", "exp", "expr", "express", "expw", "expy"),
+    "ext": ("extension", "extn", "extnsn", "ext"),
+    "exts": ("extensions", "exts"),
+    "fls": ("falls", "fls"),
+    "fry": ("ferry", "frry", "fry"),
+    "fld": ("field", "fld"),
+    "flds": ("fields", "flds"),
+    "flt": ("flat", "flt"),
+    "flts": ("flats", "flts"),
+    "frd": ("ford", "frd"),
+    "frst": ("forest", "forests", "frst"),
+    "frg": ("forge", "forg", "frg"),
+    "frk": ("fork", "frk"),
+    "frks": ("forks", "frks"),
+    "ft": ("fort", "frt", "ft"),
+    "fwy": ("freeway", "freewy", "frway", "frwy", "fwy"),
+    "gdn": ("garden", "gardn", "grden", "grdn", "gdn"),
+    "gdns": ("gardens", "grdns", "gdns"),
+    "gtwy": ("gateway", "gatewy", "gatway", "gtway", "gtwy"),
+    "gln": ("glen", "gln"),
+    "grn": ("green", "grn"),
+    "grv": ("grove", "grov", "grv"),
+    "hbr": ("harbor", "harb", "harbr", "hrbor", "hbr"),
+    "hvn": ("haven", "hvn"),
+    "hts": ("heights", "ht", "hts"),
+    "hwy": ("highway", "highwy", "hiway", "hiwy", "hway", "hwy"),
+    "hl": ("hill", "hl"),
+    "hls": ("hills", "hls"),
+    "holw": ("hollow", "hllw", "hollows", "holws", "holw"),
+    "inlt": ("inlet", "inlt"),
+    "is": ("island", "islnd", "is"),
+    "iss": ("islands", "islnds", "iss"),
+    "jct": ("junction", "jction", "jctn", "junctn", "juncton", "jct"),
+    "ky": ("key", "ky"),
+    "kys": ("keys", "kys"),
+    "knl": ("knoll", "knol", "knl"),
+    "knls": ("knolls", "knls"),
+    "lk": ("lake", "lk"),
+    "lks": ("lakes", "lks"),
+    "lndg": ("landing", "lndng", "lndg"),
+    "ln": ("lane", "ln"),
+    "lgt": ("light", "lgt"),
+    "lf": ("loaf", "lf"),
+    "lck": ("lock", "lck"),
+    "lcks": ("locks", "lcks"),
+    "ldg": ("lodge", "ldge", "lodg", "ldg"),
+    "loop": ("loop", "loops"),
+    "mall": ("mall",),
+    "mnr": ("manor", "mnr"),
+    "mnrs": ("manors", "mnrs"),
+    "mdw": ("meadow", "mdw"),
+    "mdws": ("meadows", "medows", "mdws"),
+    "ml": ("mill", "ml"),
+    "mls": ("mills", "mls"),
+    "msn": ("mission", "missn", "mssn", "msn"),
+    "mtwy": ("motorway", "mtwy"),
+    "mt": ("mount", "mnt", "mt"),
+    "mtn": ("mountain", "mntain", "mntn", "mountin", "mtin", "mtn"),
+    "nck": ("neck", "nck"),
+    "orch": ("orchard", "orchrd", "orch"),
+    "oval": ("oval", "ovl"),
+    "opas": ("overpass", "opas"),
+    "park": ("park", "prk", "parks"),
+    "pkwy": ("parkway", "parkwy", "pkway", "pky", "parkways", "pkwys", "pkwy"),
+    "pass": ("pass",),
+    "psge": ("passage", "psge"),
+    "path": ("path", "paths"),
+    "pike": ("pike", "pikes"),
+    "pne": ("pine", "pne"),
+    "pnes": ("pines", "pnes"),
+    "pl": ("place", "pl"),
+    "pln": ("plain", "pln"),
+    "plns": ("plains", "plns"),
+    "plz": ("plaza", "plza", "plz"),
+    "pt": ("point", "pt"),
+    "pts": ("points", "pts"),
+    "prt": ("port", "prt"),
+    "prts": ("ports", "prts"),
+    "pr": ("prairie", "prr", "pr"),
+    "radl": ("radial", "rad", "radiel", "radl"),
+    "ranch": ("ranch", "ranches", "rnch", "rnchs"),
+    "rpd": ("rapid", "rpd"),
+    "rpds": ("rapids", "rpds"),
+    "rst": ("rest", "rst"),
+    "rdg": ("ridge", "rdge", "rdg"),
+    "rdgs": ("ridges", "rdgs"),
+    "riv": ("river", "rvr", "rivr", "riv"),
+    "rd": ("road", "rd"),
+    "rds": ("roads", "rds"),
+    "rte": ("route", "rte"),
+    "row": ("row",),
+    "rue": ("rue",),
+    "run": ("run",),
+    "shl": ("shoal", "shl"),
+    "shls": ("shoals", "shls"),
+    "shr": ("shore", "shoar", "shr"),
+    "shrs": ("shores", "shoars", "shrs"),
+    "skwy": ("skyway", "skwy"),
+    "spg": ("spring", "spng", "sprng", "spg"),
+    "spgs": ("springs", "spngs", "sprngs", "spgs"),
+    "spur": ("spur", "spurs"),
+    "sq": ("square", "sqr", "sqre", "squ", "sq"),
+    "sqs": ("squares", "sqrs", "sqs"),
+    "sta": ("station", "statn", "stn", "sta"),
+    "stra": ("stravenue", "strav", "straven", "stravn", "strvn", "strvnue", "stra"),
+    "strm": ("stream", "streme", "strm"),
+    "st": ("street", "strt", "str", "st"),
+    "sts": ("streets", "sts"),
+    "smt": ("summit", "sumit", "sumitt", "smt"),
+    "ter": ("terrace", "terr", "ter"),
+    "trwy": ("throughway", "trwy"),
+    "trce": ("trace", "traces", "trce"),
+    "trak": ("track", "tracks", "trk", "trks", "trak"),
+    "trfy": ("trafficway", "trfy"),
+    "trl": ("trail", "trails", "trls", "trl"),
+    "trlr": ("trailer", "trlrs"),
+    "tunl": ("tunnel", "tunel", "tunls", "tunnels", "tunnl", "tunl"),
+    "tpke": ("turnpike", "trnpk", "turnpk", "tpke"),
+    "upas": ("underpass", "upas"),
+    "un": ("union", "un"),
+    "vly": ("valley", "vally", "vlly", "vly"),
+    "vlys": ("valleys", "vlys"),
+    "via": ("viaduct", "vdct", "viadct", "via"),
+    "vw": ("view", "vw"),
+    "vws": ("views", "vws"),
+    "vlg": ("village", "vill", "villag", "villg", "villiage", "vlg"),
+    "vlgs": ("villages", "vlgs"),
+    "vl": ("ville", "vl"),
+    "vis": ("vista", "vist", "vst", "vsta", "vis"),
+    "walk": ("walk", "walks"),
+    "wall": ("wall",),
+    "way": ("way", "wy"),
+    "ways": ("ways",),
+    "wl": ("well", "wl"),
+    "wls": ("wells", "wls"),
+}
+
+_UNIT_WORDS = frozenset(UNIT_DESIGNATORS)
+
+STREET_SUFFIXES = {
+    variant: standard
+    for standard, variants in _SUFFIX_VARIANTS.items()
+    for variant in variants
+}
+
+
+class AddressParts(NamedTuple):
+    """Structured street address (all lowercase, suffix/directionals in USPS form)."""
+
+    number: Optional[str]
+    pre_directional: Optional[str]
+    name_words: Tuple[str, ...]
+    suffix: Optional[str]
+    suffix_word: Optional[str]  # Suffix as written ("vista" for "vis"); it may really be part of the name
+    post_directional: Optional[str]
+    unit: Optional[str]
+    normalized: str  # All canonical tokens joined by spaces, for substring comparison
+
+
+@lru_cache(maxsize=65536)
+def parse_address(address: str) -> AddressParts:
+    """
+    Tokenize and classify a street address in one pass.
+
+    "16642 SE 80th Bellavista Circle" ->
+        number="16642", pre_directional="se", name_words=("80th", "bellavista"),
+        suffix="cir"; "100 Main Street NW Apt 4B" -> post_directional="nw", unit="apt 4b".
+    A suffix or directional is only split off while at least one street-name word
+    remains ("100 North Street" keeps "north" as the name).
+
+    Args:
+        address: Raw address string
+
+    Returns:
+        AddressParts (name_words omits one-letter fragments)
+    """
+    text = (address or "").lower()
+    tokens = _TOKEN_RE.findall(text)
+
+    number = tokens[0] if tokens and tokens[0].isdigit() else None
+    start = 1 if number else 0
+
+    # Secondary unit: first designator ("apt", "lot", "#12") after the street name
+    unit = None
+    end = len(tokens)
+    if "#" in text or not _UNIT_WORDS.isdisjoint(tokens):
+        for i in range(start + 1, len(tokens)):
+            token = tokens[i]
+            if token[0] == "#":
+                unit = " ".join([token] + tokens[i + 1:])
+                end = i
+                break
+            if token in UNIT_DESIGNATORS and i + 1 < len(tokens):
+                unit = " ".join([UNIT_DESIGNATORS[token]] + tokens[i + 1:])
+                end = i
+                break
+
+    body = tokens[start:end]
+    post_directional = None
+    if len(body) >= 2 and body[-1] in DIRECTIONALS:
+        post_directional = DIRECTIONALS[body.pop()]
+    suffix = suffix_word = None
+    if len(body) >= 2 and body[-1] in STREET_SUFFIXES:
+        suffix_word = body.pop()
+        suffix = STREET_SUFFIXES[suffix_word]
+    pre_directional = None
+    if len(body) >= 2 and body[0] in DIRECTIONALS:
+        pre_directional = DIRECTIONALS[body[0]]
+        del body[0]
+
+    parts = [number] if number else []
+    if pre_directional:
+        parts.append(pre_directional)
+    parts.extend(body)
+    for part in (suffix, post_directional, unit):
+        if part:
+            parts.append(part)
+
+    return AddressParts(
+        number,
+        pre_directional,
+        tuple([t for t in body if len(t) >= 2]),
+        suffix,
+        suffix_word,
+        post_directional,
+        unit,
+        " ".join(parts),
+    )
@@ -0,0 +1,91 @@
+"""
+Agent-name inverted index - listing agent and co-agent names to feed rows.
+
+Built once per feed refresh so "what does Jeannie Ulmer have listed?" is a dictionary
+lookup instead of a name comparison on every listing. Co-listed properties are
+covered because coAgentName is indexed alongside agentName.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence, Set
+
+import jellyfish
+import numpy as np
+
+
+def _normalize_name(name: str) -> str:
+    """Lowercase and collapse whitespace (same normalization as the per-listing matcher)."""
+    return " ".join(str(name or "").strip().lower().split())
+
+
+def _phonetic(token: str) -> str:
+    """Metaphone key for a name token, empty when it cannot be computed."""
+    try:
+        return jellyfish.metaphone(token)
+    except (TypeError, ValueError):
+        return ""
+
+
+def _listing_agent_names(listing: Dict[str, Any]) -> Iterable[str]:
+    """Normalized listing agent and co-agent names for one listing."""
+    agent = listing.get("agentName") or (
+        f"{listing.get('agentFirstName', '')} {listing.get('agentLastName', '')}"
+    )
+    co_agent = listing.get("coAgentName") or (
+        f"{listing.get('coAgentFirstName', '')} {listing.get('coAgentLastName', '')}"
+    )
+    for name in (agent, co_agent):
+        normalized = _normalize_name(name)
+        if normalized:
+            yield normalized
+
+
+class AgentNameIndex:
+    """Maps normalized agent/co-agent names (and their metaphone tokens) to listing rows."""
+
+    def __init__(self, listings: Sequence[Dict[str, Any]]):
+        self._rows_by_name: Dict[str, List[int]] = {}
+        for row, listing in enumerate(listings):
+            for name in _listing_agent_names(listing):
+                rows = self._rows_by_name.setdefault(name, [])
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+
+        self._names_by_phonetic: Dict[str, Set[str]] = {}
+        for name in self._rows_by_name:
+            for token in name.split():
+                key = _phonetic(token)
+                if key:
+                    self._names_by_phonetic.setdefault(key, set()).add(name)
+
+    def matching_names(self, query: str) -> List[str]:
+        """
+        Indexed agent names matching a spoken/typed name.
+
+        Order of preference: exact name, then partial match (either name contains
+        the other, e.g. "Ulmer" or "Jeannie Ulmer"), then phonetic match where every
+        query word sounds like a word of the name ("Jeanie Ulmer").
+        """
+        normalized = _normalize_name(query)
+        if not normalized:
+            return []
+        if normalized in self._rows_by_name:
+            return [normalized]
+
+        partial = [name for name in self._rows_by_name if normalized in name or name in normalized]
+        if partial:
+            return partial
+
+        candidate_sets = [self._names_by_phonetic.get(_phonetic(token), set()) for token in normalized.split()]
+        if not all(candidate_sets):
+            return []
+        return sorted(set.intersection(*candidate_sets))
+
+    def rows(self, query: str) -> np.ndarray:
+        """Sorted feed rows listed or co-listed by agents matching query."""
+        rows: Set[int] = set()
+        for name in self.matching_names(query):
+            rows.update(self._rows_by_name[name])
+        return np.fromiter(sorted(rows), dtype=np.intp, count=len(rows))
+
+    def __len__(self) -> int:
+        return len(self._rows_by_name)
@@ -0,0 +1,163 @@
+"""
+Digest buffer for broker/office copies of notifications.
+
+Jeff (or the office line) gets a copy of every customer notification, every new
+lead alert and every transfer problem. With digest mode on, non-urgent copies are
+buffered and sent together as one SMS and one email per recipient every
+`interval_seconds` (sooner once `max_entries` are waiting). Urgent categories
+(failed transfers, no-answer) always go out at once. With digest mode off every
+copy goes out at once, as before.
+
+Formatting and buffering live here; the sending itself is injected (see
+src/integrations/broker_notifier.py).
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from src.config.settings import settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DigestEntry:
+    """One broker/office notification."""
+
+    def __init__(
+        self,
+        category: str,
+        subject: str,
+        text: str,
+        phone: Optional[str] = None,
+        email: Optional[str] = None,
+        summary: Optional[str] = None,
+    ):
+        self.category = category
+        self.subject = subject
+        self.text = text
+        self.phone = phone
+        self.email = email
+        self.summary = summary
+        self.created_at = time.time()
+
+    def headline(self) -> str:
+        """Summary (else subject) plus the office-local time it was raised (one digest line)."""
+        raised = datetime.fromtimestamp(self.created_at, ZoneInfo(settings.OFFICE_TIMEZONE))
+        return f"{raised.strftime('%H:%M')} {self.summary or self.subject}"
+
+
+def format_digest(entries: List[DigestEntry], full: bool) -> str:
+    """
+    Digest body: a count, then one headline per entry (full=True adds each entry's text).
+    """
+    lines = [f"📋 {len(entries)} update(s) from the AI concierge"]
+    for entry in entries:
+        lines.append("")
+        lines.append(f"• {entry.headline()}")
+        if full:
+            lines.append(entry.text.strip())
+    return "\n".join(lines)
+
+
+def chunk_digest(entries: List[DigestEntry], max_chars: int) -> List[List[DigestEntry]]:
+    """Split entries into groups whose full digest fits in max_chars (an oversized entry goes alone)."""
+    chunks: List[List[DigestEntry]] = []
+    for entry in entries:
+        if chunks and len(format_digest(chunks[-1] + [entry], full=True)) <= max_chars:
+            chunks[-1].append(entry)
+        else:
+            chunks.append([entry])
+    return chunks
+
+
+class BrokerDigest:
+    """Sends urgent entries immediately and buffers the rest into periodic digests."""
+
+    def __init__(
+        self,
+        send_now: Callable[[DigestEntry], Awaitable[None]],
+        send_digest: Callable[[List[DigestEntry]], Awaitable[None]],
+        enabled: bool = False,
+        interval_seconds: float = 900.0,
+        max_entries: int = 20,
+        urgent_categories: Iterable[str] = (),
+    ):
+        """
+        Args:
+            send_now: Delivers one entry on its own
+            send_digest: Delivers buffered entries together
+            enabled: Buffer non-urgent entries (False: everything goes out at once)
+            interval_seconds: Longest an entry waits in the buffer
+            max_entries: Flush as soon as this many entries are buffered
+            urgent_categories: Categories never buffered
+        """
+        self.send_now = send_now
+        self.send_digest = send_digest
+        self.enabled = enabled
+        self.interval_seconds = interval_seconds
+        self.max_entries = max_entries
+        self.urgent_categories = frozenset(urgent_categories)
+
+        self._entries: List[DigestEntry] = []
+        self._timer: Optional["asyncio.Task[None]"] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.sent_now = 0
+        self.digested = 0
+        self.digests = 0
+
+    async def notify(self, entry: DigestEntry) -> None:
+        """Send entry now (digest off or urgent category) or add it to the buffer."""
+        if not self.enabled or entry.category in self.urgent_categories:
+            self.sent_now += 1
+            await self.send_now(entry)
+            return
+
+        self._entries.append(entry)
+        if len(self._entries) >= self.max_entries:
+            await self.flush()
+        else:
+            self._ensure_timer()
+
+    async def flush(self) -> int:
+        """Send everything buffered as one digest; returns the number of entries sent."""
+        entries, self._entries = self._entries, []
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not asyncio.current_task() and not timer.done():
+            timer.cancel()
+        if not entries:
+            return 0
+        self.digested += len(entries)
+        self.digests += 1
+        try:
+            await self.send_digest(entries)
+            logger.info(f"Broker digest sent with {len(entries)} update(s)")
+        except Exception as e:
+            logger.warning(f"Failed to send broker digest: {str(e)}")
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self._entries),
+            "sent_now": self.sent_now,
+            "digested": self.digested,
+            "digests": self.digests,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _ensure_timer(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and not self._timer.done() and self._timer_loop is loop:
+            return
+        self._timer_loop = loop
+        self._timer = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval_seconds)
+        await self.flush()
@@ -0,0 +1,399 @@
+"""
+Pluggable shared cache (in-process or Redis protocol) with single-flight loading.
+
+State that should survive across Fly machines - the downloaded listings feed,
+manual listings, contact lookups and call-session result sets - goes through one
+small interface:
+
+- InMemoryCache: per-process dict with TTLs (default; single machine)
+- RedisCache: any Redis-protocol server (Redis, Upstash, KeyDB) at REDIS_URL,
+  spoken to over a minimal built-in RESP client, so no extra dependency
+
+get_or_load() is the single-flight entry point: concurrent misses for the same key
+(in this process, and across machines for shared backends) run the loader once,
+under a lock with a TTL, while the others wait for the stored value.
+
+The cache is an optimization only: backend errors are logged and treated as
+misses, never surfaced to tool calls.
+"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import secrets
+import ssl
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from src.config.settings import settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# How often waiters re-check for a value another machine is loading
+_LOCK_POLL_SECONDS = 0.1
+
+
+class CacheBackend(ABC):
+    """Byte-value cache with TTLs and expiring locks."""
+
+    #: True when other processes/machines see the same entries
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Stored bytes for key, None on miss."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Store value for ttl_seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove key (no error when missing)."""
+
+    @abstractmethod
+    async def acquire_lock(self, name: str, ttl_seconds: float) -> Optional[str]:
+        """Take the named lock if free; returns a release token, None when held elsewhere."""
+
+    @abstractmethod
+    async def release_lock(self, name: str, token: str) -> None:
+        """Release the lock if token still owns it (an expired lock is not released twice)."""
+
+    async def close(self) -> None:
+        return None
+
+    async def get_json(self, key: str) -> Optional[Any]:
+        """JSON value for key, None on miss (or backend error / undecodable value)."""
+        try:
+            raw = await self.get(key)
+        except (OSError, CacheProtocolError, asyncio.TimeoutError) as e:
+            logger.warning(f"Cache get failed for {key}: {str(e)}")
+            return None
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError as e:  # JSONDecodeError / UnicodeDecodeError: treat a corrupt entry as a miss
+            logger.warning(f"Cache value for {key} is not valid JSON: {str(e)}")
+            return None
+
+    async def set_json(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store a JSON-serializable value (backend errors are logged, not raised)."""
+        try:
+            await self.set(key, json.dumps(value, separators=(",", ":"), default=str).encode(), ttl_seconds)
+        except (OSError, CacheProtocolError, asyncio.TimeoutError) as e:
+            logger.warning(f"Cache set failed for {key}: {str(e)}")
+
+    async def delete_quietly(self, key: str) -> None:
+        try:
+            await self.delete(key)
+        except (OSError, CacheProtocolError, asyncio.TimeoutError) as e:
+            logger.warning(f"Cache delete failed for {key}: {str(e)}")
+
+    @asynccontextmanager
+    async def lock(self, name: str, ttl_seconds: float, wait_seconds: float) -> AsyncIterator[bool]:
+        """
+        Hold the named lock for the block, waiting up to wait_seconds for it.
+
+        Yields:
+            True when the lock is held, False when the wait ran out (or the backend
+            failed); callers then proceed without it
+        """
+        token = None
+        deadline = time.monotonic() + wait_seconds
+        try:
+            while True:
+                token = await self.acquire_lock(name, ttl_seconds)
+                if token is not None or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(_LOCK_POLL_SECONDS)
+        except (OSError, CacheProtocolError, asyncio.TimeoutError) as e:
+            logger.warning(f"Cache lock failed for {name}: {str(e)}")
+        try:
+            yield token is not None
+        finally:
+            if token is not None:
+                try:
+                    await self.release_lock(name, token)
+                except (OSError, CacheProtocolError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Cache unlock failed for {name}: {str(e)}")
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_seconds: float,
+        lock_ttl_seconds: float = 60.0,
+    ) -> Any:
+        """
+        Cached JSON value for key, running loader once on a miss (single-flight).
+
+        Args:
+            key: Cache key (the backend prefix is added by the backend)
+            loader: Coroutine function producing the JSON-serializable value
+            ttl_seconds: Lifetime of the stored value
+            lock_ttl_seconds: Upper bound on how long a loader may hold the lock
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = await self.get_json(key)
+        if value is not None:
+            return value
+
+        async with _local_flight(self, key):
+            # A waiter in this process (or another machine) may have filled it meanwhile
+            value = await self.get_json(key)
+            if value is not None:
+                return value
+            if not self.shared:
+                value = await loader()
+                await self.set_json(key, value, ttl_seconds)
+                return value
+
+            async with self.lock(f"lock:{key}", lock_ttl_seconds, wait_seconds=lock_ttl_seconds) as held:
+                if not held:
+                    # Another machine is still loading past the lock TTL; do our own load
+                    return await loader()
+                value = await self.get_json(key)
+                if value is None:
+                    value = await loader()
+                    await self.set_json(key, value, ttl_seconds)
+                return value
+
+
+# In-process single-flight: [loop, lock, users] per (backend, key)
+_flights: Dict[Tuple[int, str], list] = {}
+
+
+@asynccontextmanager
+async def _local_flight(backend: CacheBackend, key: str) -> AsyncIterator[None]:
+    loop = asyncio.get_running_loop()
+    flight_key = (id(backend), key)
+    entry = _flights.get(flight_key)
+    if entry is None or entry[0] is not loop:
+        entry = [loop, asyncio.Lock(), 0]
+        _flights[flight_key] = entry
+    entry[2] += 1
+    try:
+        async with entry[1]:
+            yield
+    finally:
+        entry[2] -= 1
+        if not entry[2] and _flights.get(flight_key) is entry:
+            del _flights[flight_key]
+
+
+class InMemoryCache(CacheBackend):
+    """Per-process backend (entries and locks are not shared between machines)."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, bytes]] = {}
+        self._locks: Dict[str, Tuple[float, str]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        now = time.monotonic()
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            # Drop expired entries first, then the oldest insertions
+            for stale in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                del self._entries[stale]
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (now + ttl_seconds, value)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def acquire_lock(self, name: str, ttl_seconds: float) -> Optional[str]:
+        now = time.monotonic()
+        held = self._locks.get(name)
+        if held is not None and held[0] > now:
+            return None
+        token = secrets.token_hex(8)
+        self._locks[name] = (now + ttl_seconds, token)
+        return token
+
+    async def release_lock(self, name: str, token: str) -> None:
+        held = self._locks.get(name)
+        if held is not None and held[1] == token:
+            del self._locks[name]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheProtocolError(Exception):
+    """Malformed reply or error reply from a Redis-protocol server."""
+
+
+class RedisCache(CacheBackend):
+    """
+    Redis-protocol backend (RESP2) shared by every machine pointing at REDIS_URL.
+
+    One connection per event loop, with commands serialized over it; it is
+    reopened transparently after a network error.
+    """
+
+    shared = True
+
+    # Compare-and-delete, so a lock that expired and was re-taken is left alone
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+    def __init__(self, url: str, prefix: str = "", timeout_seconds: float = 2.0):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError("REDIS_URL must start with redis:// or rediss://")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.tls = parsed.scheme == "rediss"
+        self.prefix = prefix
+        self.timeout_seconds = timeout_seconds
+        self._conn: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.StreamReader, asyncio.StreamWriter, asyncio.Lock]] = None
+
+    async def _connection(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, asyncio.Lock]:
+        loop = asyncio.get_running_loop()
+        if self._conn is not None and self._conn[0] is loop and not self._conn[2].is_closing():
+            return self._conn[1], self._conn[2], self._conn[3]
+
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context() if self.tls else None
+            ),
+            self.timeout_seconds,
+        )
+        try:
+            if self.password:
+                auth = [self.username, self.password] if self.username else [self.password]
+                await self._roundtrip(reader, writer, ("AUTH", *auth))
+            if self.db:
+                await self._roundtrip(reader, writer, ("SELECT", self.db))
+        except BaseException:
+            writer.close()
+            raise
+
+        if self._conn is not None and self._conn[0] is loop and not self._conn[2].is_closing():
+            # Another command connected while we were connecting; use that one
+            writer.close()
+        else:
+            self._conn = (loop, reader, writer, asyncio.Lock())
+        return self._conn[1], self._conn[2], self._conn[3]
+
+    @staticmethod
+    def _encode(args: Tuple[Any, ...]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    @classmethod
+    async def _read_reply(cls, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheProtocolError("Connection closed by cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise CacheProtocolError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [await cls._read_reply(reader) for _ in range(count)]
+        raise CacheProtocolError(f"Unexpected reply type {kind!r}")
+
+    async def _roundtrip(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, args: Tuple[Any, ...]) -> Any:
+        writer.write(self._encode(args))
+        await writer.drain()
+        return await asyncio.wait_for(self._read_reply(reader), self.timeout_seconds)
+
+    async def _command(self, *args: Any) -> Any:
+        """Send one command and read its reply (reconnecting once after a dropped connection)."""
+        for attempt in (1, 2):
+            try:
+                reader, writer, lock = await self._connection()
+                async with lock:
+                    return await self._roundtrip(reader, writer, args)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                # The reply stream may be out of step now; never reuse this connection
+                self._drop()
+                if attempt == 2:
+                    raise OSError(f"Cache server unavailable: {type(e).__name__}") from e
+
+    def _drop(self) -> None:
+        if self._conn is not None:
+            self._conn[2].close()
+            self._conn = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._command("GET", self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self._command("SET", self.prefix + key, value, "PX", max(1, int(ttl_seconds * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self._command("DEL", self.prefix + key)
+
+    async def acquire_lock(self, name: str, ttl_seconds: float) -> Optional[str]:
+        token = secrets.token_hex(8)
+        reply = await self._command("SET", self.prefix + name, token, "PX", max(1, int(ttl_seconds * 1000)), "NX")
+        return token if reply == "OK" else None
+
+    async def release_lock(self, name: str, token: str) -> None:
+        await self._command("EVAL", self.RELEASE_SCRIPT, 1, self.prefix + name, token)
+
+    async def close(self) -> None:
+        self._drop()
+
+
+_cache: Optional[CacheBackend] = None
+
+
+def get_cache() -> CacheBackend:
+    """The configured cache backend (CACHE_BACKEND=memory|redis), created on first use."""
+    global _cache
+    if _cache is None:
+        backend = (settings.CACHE_BACKEND or "memory").lower()
+        if backend == "redis" and settings.REDIS_URL:
+            _cache = RedisCache(settings.REDIS_URL, prefix=settings.CACHE_KEY_PREFIX)
+            logger.info("Using Redis-protocol shared cache")
+        else:
+            if backend == "redis":
+                logger.warning("CACHE_BACKEND=redis but REDIS_URL is not set; using in-process cache")
+            _cache = InMemoryCache()
+    return _cache
+
+
+def set_cache(backend: Optional[CacheBackend]) -> None:
+    """Replace the process-wide backend (tests; None re-reads settings on next use)."""
+    global _cache
+    _cache = backend
+
+
+async def close_cache() -> None:
+    """Close the backend's connections (app shutdown)."""
+    if _cache is not None:
+        await _cache.close()
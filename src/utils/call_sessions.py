@@ -0,0 +1,232 @@
+"""
+Call-scoped session store keyed by Vapi call ID.
+
+Function endpoints are stateless and the LLM re-supplies caller details on every
+tool call. The session ties one call together: the contact created or resolved for
+the caller, listings read out, the agent resolved for a transfer and per-tool
+timing. Tools read it to fill in what the LLM left out and write what they learned;
+the end-of-call report reads it last and closes it.
+
+When a call starts (assistant-request / status-update "in-progress" webhooks) the
+backend speculatively resolves the caller: normalizes the number, looks up the
+existing BoldTrail contact and warms the roster and listings feed. That work runs
+in the background and its results land on the call's session, so lead creation and
+transfers later in the conversation read them instead of repeating the lookups.
+
+Sessions live in the shared cache (get_cache()), so every worker and machine sees
+the same call; they expire after a TTL without updates and cap the listings and
+timings they keep.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.utils.cache import CacheBackend, get_cache
+from src.utils.contact_cache import normalize_phone
+
+
+class CallSession:
+    """What the backend has learned about one call so far."""
+
+    def __init__(self, call_id: str, caller_phone: Optional[str] = None):
+        self.call_id = call_id
+        self.caller_phone = normalize_phone(caller_phone)
+        self.caller_name: Optional[str] = None
+        self.contact_id: Optional[str] = None
+        self.lead_type: Optional[str] = None
+        self.listings_shown: List[str] = []
+        self.last_cursor: Optional[str] = None
+        self.agent: Optional[Dict[str, str]] = None
+        self.transferred_to: Optional[Dict[str, str]] = None
+        self.tool_timings: List[Tuple[str, float]] = []
+        self.prefetch_started = False
+        self.started_at = time.time()
+
+    def is_caller(self, phone: Optional[str]) -> bool:
+        """True when phone (any format) is the number this call came from."""
+        return bool(self.caller_phone) and normalize_phone(phone) == self.caller_phone
+
+    def remember_caller(self, contact_id: Any = None, name: Optional[str] = None, phone: Optional[str] = None) -> None:
+        """Record the caller's contact ID, name and number (empty values are ignored)."""
+        if contact_id:
+            self.contact_id = str(contact_id)
+        if name and name.strip():
+            self.caller_name = name.strip()
+        if phone and not self.caller_phone:
+            self.caller_phone = normalize_phone(phone)
+
+    def remember_listings(self, listings: Iterable[Dict[str, Any]]) -> None:
+        """Record listings read out to the caller (MLS number, else address), oldest dropped first."""
+        for listing in listings:
+            mls_number = listing.get("mls_number")
+            key = str(mls_number if mls_number not in (None, "", "N/A") else listing.get("address") or "").strip()
+            if key and key not in self.listings_shown:
+                self.listings_shown.append(key)
+        del self.listings_shown[:-settings.CALL_SESSION_MAX_LISTINGS]
+
+    def remember_agent(self, name: Optional[str], phone: Optional[str]) -> None:
+        """Record the agent resolved for this caller (listing agent or roster lookup)."""
+        if name and phone:
+            self.agent = {"name": name, "phone": phone}
+
+    def record_tool(self, tool: str, elapsed_ms: float) -> None:
+        """Record one tool call's server-side latency."""
+        self.tool_timings.append((tool, round(elapsed_ms, 1)))
+        del self.tool_timings[:-settings.CALL_SESSION_MAX_TOOL_CALLS]
+
+    def summary(self) -> Dict[str, Any]:
+        """Log-safe overview of the call (IDs and counts, no caller details)."""
+        return {
+            "call_id": self.call_id,
+            "contact_id": self.contact_id,
+            "lead_type": self.lead_type,
+            "listings_shown": len(self.listings_shown),
+            "transferred": self.transferred_to is not None,
+            "tool_calls": len(self.tool_timings),
+            "tool_ms": round(sum(ms for _, ms in self.tool_timings), 1),
+            "duration_seconds": round(time.time() - self.started_at, 1),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form for the shared cache."""
+        return {
+            "call_id": self.call_id,
+            "caller_phone": self.caller_phone,
+            "caller_name": self.caller_name,
+            "contact_id": self.contact_id,
+            "lead_type": self.lead_type,
+            "listings_shown": self.listings_shown,
+            "last_cursor": self.last_cursor,
+            "agent": self.agent,
+            "transferred_to": self.transferred_to,
+            "tool_timings": self.tool_timings,
+            "prefetch_started": self.prefetch_started,
+            "started_at": self.started_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CallSession":
+        session = cls(data["call_id"])
+        session.caller_phone = data.get("caller_phone")
+        session.caller_name = data.get("caller_name")
+        session.contact_id = data.get("contact_id")
+        session.lead_type = data.get("lead_type")
+        session.listings_shown = list(data.get("listings_shown") or [])
+        session.last_cursor = data.get("last_cursor")
+        session.agent = data.get("agent")
+        session.transferred_to = data.get("transferred_to")
+        session.tool_timings = [(tool, ms) for tool, ms in data.get("tool_timings") or []]
+        session.prefetch_started = bool(data.get("prefetch_started"))
+        session.started_at = data.get("started_at", session.started_at)
+        return session
+
+
+class CallSessionStore:
+    """
+    Call ID -> CallSession in the shared cache; sessions expire after a TTL without updates.
+
+    Sessions are stored through get_cache(), so with a shared backend a tool call
+    or webhook routed to another worker or machine sees what earlier ones learned.
+    Updates are read-modify-write under a short per-call lock. Call-start lookups
+    run as tasks in the process that received the event and write their results
+    to the session when they finish.
+    """
+
+    # Upper bound on how long one update may hold a call's lock / wait for it
+    LOCK_TTL_SECONDS = 10.0
+    LOCK_WAIT_SECONDS = 2.0
+
+    def __init__(self, ttl_seconds: float = 7200.0, backend: Optional[CacheBackend] = None):
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend  # None: the configured cache
+        self._prefetches: Dict[str, "asyncio.Task[None]"] = {}
+
+    def _cache(self) -> CacheBackend:
+        return self.backend or get_cache()
+
+    async def get(self, call_id: Optional[str]) -> Optional[CallSession]:
+        """Session for call_id, or None when unknown or expired."""
+        if not call_id or self.ttl_seconds <= 0:
+            return None
+        data = await self._cache().get_json(f"call_session:{call_id}")
+        return CallSession.from_dict(data) if data else None
+
+    async def save(self, session: CallSession) -> None:
+        """Store the session (restarting its TTL)."""
+        if self.ttl_seconds > 0:
+            await self._cache().set_json(f"call_session:{session.call_id}", session.to_dict(), self.ttl_seconds)
+
+    @asynccontextmanager
+    async def update(
+        self, call_id: Optional[str], caller_phone: Optional[str] = None
+    ) -> AsyncIterator[Optional[CallSession]]:
+        """
+        Session a tool call or webhook writes, saved when the block exits.
+
+        Opened on first use (with the caller's number, when known); yields None
+        without a call ID. Keep the block short: it holds the call's lock.
+        """
+        if not call_id:
+            yield None
+            return
+        async with self._cache().lock(
+            f"lock:call_session:{call_id}", self.LOCK_TTL_SECONDS, wait_seconds=self.LOCK_WAIT_SECONDS
+        ):
+            session = await self.get(call_id) or CallSession(call_id, caller_phone)
+            if caller_phone and not session.caller_phone:
+                session.caller_phone = normalize_phone(caller_phone)
+            yield session
+            await self.save(session)
+
+    async def end(self, call_id: Optional[str]) -> Optional[CallSession]:
+        """Remove and return the call's session (call ended)."""
+        session = await self.get(call_id)
+        if session is not None:
+            await self._cache().delete_quietly(f"call_session:{call_id}")
+        return session
+
+    def start_prefetch(self, call_id: str, work: Awaitable[None]) -> None:
+        """Run call-start lookups for call_id in the background (they save their own results)."""
+        task = asyncio.ensure_future(work)
+        self._prefetches[call_id] = task
+        task.add_done_callback(lambda _: self._prefetches.pop(call_id, None))
+
+    async def wait_for_prefetch(self, call_id: Optional[str], timeout_seconds: float) -> bool:
+        """
+        Give this process's call-start lookups up to timeout_seconds to finish (never cancels them).
+
+        Returns:
+            True when lookups were still running here (re-read the session for their results)
+        """
+        task = self._prefetches.get(call_id) if call_id else None
+        if task is None or task.done():
+            return False
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout_seconds)
+        except asyncio.TimeoutError:
+            pass
+        return True
+
+    async def prefetched_contact_id(self, call_id: Optional[str], phone: Optional[str]) -> Optional[str]:
+        """
+        Contact ID pre-resolved at call start, when phone is the caller's own number.
+
+        Waits up to CALL_PREFETCH_WAIT_SECONDS for a lookup still in flight.
+
+        Returns:
+            Contact ID, or None (no session, different phone, or not in the CRM)
+        """
+        session = await self.get(call_id)
+        if session is None or not session.is_caller(phone):
+            return None
+        if session.contact_id:
+            return session.contact_id
+        if await self.wait_for_prefetch(call_id, settings.CALL_PREFETCH_WAIT_SECONDS):
+            session = await self.get(call_id) or session
+        return session.contact_id
+
+
+call_sessions = CallSessionStore(ttl_seconds=settings.CALL_SESSION_TTL_SECONDS)
@@ -0,0 +1,271 @@
+"""
+Circuit breakers for external integrations (kvCore, Vapi, Stellar MLS, Twilio, SMTP).
+
+While a service is down every request used to wait out the full HTTP timeout
+before the tool could apologize, leaving the caller in silence. A breaker counts
+outage-type failures (connection errors, timeouts, 5xx); after
+`failure_threshold` of them within `window_seconds` it opens and requests fail
+immediately with the integration's own error type, so the existing degraded
+responses (apology message, cached data, SMS retry) happen at once.
+
+While open, a background probe checks the service every `reset_seconds` and
+closes the breaker when it answers. Without a running probe the breaker goes
+half-open after `reset_seconds`: requests are let through, the first success
+closes it and the first failure opens it again.
+
+A timeout that only happened because the tool deadline (deadline.py) shortened
+the client's usual timeout is not counted either way; connection failures,
+including connect timeouts, always count.
+"""
+
+import asyncio
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import httpx
+
+from src.config.settings import settings
+from src.utils import deadline
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+Probe = Callable[[], Awaitable[bool]]
+
+
+def is_outage(error: BaseException) -> bool:
+    """True for failures that say the service is unavailable (not bad input or rate limits)."""
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    return status is None or status >= 500
+
+
+_CONNECT_FAILURES = (httpx.ConnectError, httpx.ConnectTimeout, ConnectionError, socket.gaierror)
+_TIMEOUTS = (httpx.TimeoutException, TimeoutError, asyncio.TimeoutError)
+
+
+def _chain(error: BaseException) -> Iterator[BaseException]:
+    """error and the errors it was raised from (clients wrap httpx/socket errors)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def cut_short(error: BaseException, deadline_capped: bool) -> bool:
+    """True for a timeout (not a connect timeout) that only happened because the tool deadline capped it."""
+    if not deadline_capped:
+        return False
+    chain = list(_chain(error))
+    if any(isinstance(e, _CONNECT_FAILURES) for e in chain):
+        return False
+    return any(isinstance(e, _TIMEOUTS) for e in chain)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one integration."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        window_seconds: float = 60.0,
+        reset_seconds: float = 30.0,
+        probe: Optional[Probe] = None,
+    ):
+        """
+        Args:
+            name: Integration name (logs and health output)
+            failure_threshold: Failures within the window that open the breaker (<= 0 disables)
+            window_seconds: How far back failures are counted
+            reset_seconds: Probe interval while open (or delay before half-open)
+            probe: Returns True when the service answers again
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.reset_seconds = reset_seconds
+        self.probe = probe
+
+        self.state = CLOSED
+        self._failures: List[float] = []
+        self._opened_at = 0.0
+        self._probe_task: Optional["asyncio.Task[None]"] = None
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may go out now (counts a rejection when not)."""
+        if self.state == OPEN:
+            if not self._probing() and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name} half-open: letting requests through")
+            else:
+                self.rejected += 1
+                return False
+        return True
+
+    def record_success(self) -> None:
+        self._failures.clear()
+        if self.state != CLOSED:
+            self._close()
+
+    def record_failure(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._open(now)
+            return
+        self._failures = [at for at in self._failures if now - at < self.window_seconds]
+        self._failures.append(now)
+        if self.state == CLOSED and len(self._failures) >= self.failure_threshold:
+            self._open(now)
+
+    def record(self, error: Optional[BaseException], deadline_capped: bool = False) -> None:
+        """
+        Record an outcome: None or a non-outage error counts as the service answering.
+
+        With deadline_capped (the request's timeout was shortened by the tool deadline)
+        a timeout other than a connect timeout is not recorded.
+        """
+        if error is None or not is_outage(error):
+            self.record_success()
+        elif not cut_short(error, deadline_capped):
+            self.record_failure()
+
+    async def call(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        rejected: Callable[[], Exception],
+        timeout: Optional[float] = None,
+    ) -> T:
+        """
+        Run operation through the breaker.
+
+        Args:
+            operation: Coroutine function doing the request
+            rejected: Builds the error raised when the breaker is open
+            timeout: The operation's usual timeout, capped by the tool deadline
+                (its timeouts are not counted when the deadline shortened it)
+
+        Returns:
+            operation's result
+        """
+        if not self.allow():
+            raise rejected()
+        capped = timeout is not None and deadline.capped(timeout)
+        try:
+            result = await operation()
+        except Exception as e:
+            self.record(e, deadline_capped=capped)
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "recent_failures": len(self._failures),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+    def reset(self) -> None:
+        """Close the breaker and forget failures (tests)."""
+        self.state = CLOSED
+        self._failures.clear()
+        if self._probing():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._failures.clear()
+        self.opened += 1
+        logger.warning(f"Circuit {self.name} opened: failing fast for {self.reset_seconds:.0f}s while probing")
+        if self.probe is not None and not self._probing():
+            try:
+                self._probe_task = asyncio.get_running_loop().create_task(self._probe_until_closed())
+            except RuntimeError:
+                self._probe_task = None  # No running loop: fall back to half-open after reset_seconds
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        logger.info(f"Circuit {self.name} closed: service answering again")
+
+    def _probing(self) -> bool:
+        """A probe task is running (on an event loop that is still open)."""
+        task = self._probe_task
+        return task is not None and not task.done() and not task.get_loop().is_closed()
+
+    async def _probe_until_closed(self) -> None:
+        while self.state != CLOSED:
+            await asyncio.sleep(self.reset_seconds)
+            if self.state == CLOSED:
+                return
+            try:
+                healthy = await self.probe()
+            except Exception as e:
+                logger.debug(f"Circuit {self.name} probe failed: {str(e)}")
+                healthy = False
+            if healthy:
+                self._failures.clear()
+                self._close()
+            else:
+                self._opened_at = time.monotonic()
+
+
+def http_probe(url: str, timeout_seconds: float = 5.0) -> Probe:
+    """Probe that succeeds when url answers with any status below 500 (401/404 included)."""
+
+    async def probe() -> bool:
+        async with httpx.AsyncClient(timeout=timeout_seconds) as client:
+            response = await client.get(url)
+            return response.status_code < 500
+
+    return probe
+
+
+def tcp_probe(host: str, port: int, timeout_seconds: float = 5.0) -> Probe:
+    """Probe that succeeds when a TCP connection to host:port opens."""
+
+    async def probe() -> bool:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout_seconds)
+        writer.close()
+        return True
+
+    return probe
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit_breaker(name: str, probe: Optional[Probe] = None) -> CircuitBreaker:
+    """Process-wide breaker for an integration (created on first use with the CIRCUIT_* settings)."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            window_seconds=settings.CIRCUIT_WINDOW_SECONDS,
+            reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+            probe=probe,
+        )
+        _breakers[name] = breaker
+    return breaker
+
+
+def circuit_states() -> Dict[str, Dict[str, Any]]:
+    """Stats of every breaker created so far (health endpoint)."""
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
@@ -0,0 +1,129 @@
+"""
+Phone/email -> BoldTrail contact ID resolution cache.
+
+Lead creation checks for an existing contact before creating one. The contact ID
+for a caller is learned from every create/search result and from CRM
+contact.created webhooks, so a returning caller (or a duplicate-contact error)
+resolves without another search_contacts round trip. Entries are kept in the
+shared cache (so every machine benefits) and expire after a TTL, so merges or
+deletions in the CRM are picked up again.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import phonenumbers
+
+from src.config.settings import settings
+from src.utils.cache import CacheBackend, get_cache
+
+# Contact payload fields that may carry a phone number or email (API and webhook shapes)
+_PHONE_FIELDS = ("phone", "cell_phone", "cell_phone_1", "cellPhone", "home_phone", "work_phone", "primary_phone")
+_EMAIL_FIELDS = ("email", "primary_email", "secondary_email", "email_1")
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """E.164 form of a US/intl phone, falling back to its digits; None when empty."""
+    if not phone:
+        return None
+    try:
+        parsed = phonenumbers.parse(str(phone), "US")
+        if phonenumbers.is_valid_number(parsed):
+            return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+    except phonenumbers.NumberParseException:
+        pass
+    digits = "".join(ch for ch in str(phone) if ch.isdigit())
+    return digits or None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Lowercased, trimmed email; None when empty."""
+    email = (email or "").strip().lower()
+    return email or None
+
+
+def _keys(phone: Optional[str], email: Optional[str]) -> List[str]:
+    keys = []
+    normalized_phone = normalize_phone(phone)
+    if normalized_phone:
+        keys.append(f"phone:{normalized_phone}")
+    normalized_email = normalize_email(email)
+    if normalized_email:
+        keys.append(f"email:{normalized_email}")
+    return keys
+
+
+class ContactIdCache:
+    """
+    Normalized phone/email -> contact ID in the shared cache, with a TTL.
+
+    Entries live in the configured cache backend (get_cache()), so with a shared
+    backend every machine resolves a caller learned by any other one. A reverse
+    entry per contact ID lists its keys, so forget() works without scanning.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400.0, backend: Optional[CacheBackend] = None):
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend  # None: the configured cache
+        self.hits = 0
+        self.misses = 0
+
+    def _cache(self) -> CacheBackend:
+        return self.backend or get_cache()
+
+    async def lookup(self, phone: Optional[str] = None, email: Optional[str] = None) -> Optional[str]:
+        """
+        Cached contact ID for the caller (email first, then phone).
+
+        Returns:
+            Contact ID, or None when neither is cached (or both expired)
+        """
+        if self.ttl_seconds > 0:
+            cache = self._cache()
+            for key in reversed(_keys(phone, email)):
+                contact_id = await cache.get_json(f"contact_id:{key}")
+                if contact_id:
+                    self.hits += 1
+                    return contact_id
+        self.misses += 1
+        return None
+
+    async def remember(self, contact_id: Any, phone: Optional[str] = None, email: Optional[str] = None) -> None:
+        """Record contact_id under the caller's phone and email."""
+        keys = _keys(phone, email)
+        if not contact_id or not keys or self.ttl_seconds <= 0:
+            return
+        cache = self._cache()
+        contact_id = str(contact_id)
+        for key in keys:
+            await cache.set_json(f"contact_id:{key}", contact_id, self.ttl_seconds)
+        known = await cache.get_json(f"contact_keys:{contact_id}") or []
+        await cache.set_json(
+            f"contact_keys:{contact_id}", sorted(set(known) | set(keys)), self.ttl_seconds
+        )
+
+    async def remember_contact(self, contact: Dict[str, Any]) -> None:
+        """Record a BoldTrail contact payload (search result, create response or webhook)."""
+        contact_id = contact.get("id")
+        if not contact_id:
+            return
+        for phone in _values(contact, _PHONE_FIELDS):
+            await self.remember(contact_id, phone=phone)
+        for email in _values(contact, _EMAIL_FIELDS):
+            await self.remember(contact_id, email=email)
+
+    async def forget(self, contact_id: Any) -> None:
+        """Drop every entry pointing at contact_id (e.g. contact deleted or merged)."""
+        cache = self._cache()
+        contact_id = str(contact_id)
+        for key in await cache.get_json(f"contact_keys:{contact_id}") or []:
+            # The key may have been re-pointed at another contact since
+            if await cache.get_json(f"contact_id:{key}") == contact_id:
+                await cache.delete_quietly(f"contact_id:{key}")
+        await cache.delete_quietly(f"contact_keys:{contact_id}")
+
+
+def _values(contact: Dict[str, Any], fields: Iterable[str]) -> List[str]:
+    return [str(contact[field]) for field in fields if contact.get(field)]
+
+
+contact_ids = ContactIdCache(ttl_seconds=settings.CONTACT_ID_CACHE_TTL_SECONDS)
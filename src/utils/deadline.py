@@ -0,0 +1,158 @@
+"""
+Request-scoped deadlines for tool calls.
+
+Vapi gives every tool call a fixed response timeout, but one tool may chain
+several integration calls (contact search, then create, then a fallback update),
+each with its own 30s timeout. A tool request instead gets one deadline
+(TOOL_DEADLINE_SECONDS, overridable per tool) set by a main.py middleware and
+carried in a contextvar:
+
+- integration clients cap their timeouts with `timeout_for` and refuse to start
+  a request once the deadline has passed,
+- tools check `expired(reserve)` before the next step and, when the budget is
+  nearly spent, return their best partial answer, continuing the remaining work
+  in the background with `detach` (which runs without the deadline).
+
+Tasks created during a request inherit its deadline, so it is deactivated when
+the request ends; long-lived workers started from a request (SMS outbox lanes,
+probes) then see no deadline. Code outside a tool request has no deadline and
+keeps its usual timeouts.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Coroutine, Iterator, Optional, TypeVar
+
+import httpx
+
+from src.config.settings import settings
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """Monotonic expiry time of one tool request (inactive once the request ended)."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self.active = True
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("tool_deadline", default=None)
+
+
+def tool_budget(tool: str) -> float:
+    """Seconds allowed for a tool (TOOL_DEADLINE_OVERRIDES "tool:seconds,..." else TOOL_DEADLINE_SECONDS)."""
+    for entry in (settings.TOOL_DEADLINE_OVERRIDES or "").split(","):
+        name, _, seconds = entry.partition(":")
+        if name.strip() == tool and seconds.strip():
+            try:
+                return float(seconds)
+            except ValueError:
+                break
+    return settings.TOOL_DEADLINE_SECONDS
+
+
+def current() -> Optional[Deadline]:
+    deadline = _current.get()
+    return deadline if deadline is not None and deadline.active else None
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None: no deadline)."""
+    deadline = current()
+    return None if deadline is None else deadline.remaining()
+
+
+def expired(reserve: float = 0.0) -> bool:
+    """True when less than reserve seconds are left (never without a deadline)."""
+    left = remaining()
+    return left is not None and left <= reserve
+
+
+def timeout_for(default: float) -> float:
+    """default capped at the time left (never below 0.1s, so a request can still fail cleanly)."""
+    left = remaining()
+    return default if left is None else max(0.1, min(default, left))
+
+
+def capped(default: float) -> bool:
+    """Whether the deadline shortens a timeout of default seconds (timeout_for returns less)."""
+    left = remaining()
+    return left is not None and left < default
+
+
+def http_timeout(default: float = 30.0) -> httpx.Timeout:
+    """httpx timeout of default capped at the time left (connect: HTTP_CONNECT_TIMEOUT_SECONDS at most)."""
+    total = timeout_for(default)
+    return httpx.Timeout(total, connect=min(settings.HTTP_CONNECT_TIMEOUT_SECONDS, total))
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Run the block under a deadline of seconds from now (None or <= 0: no deadline).
+
+    A nested scope never extends an outer deadline.
+    """
+    if seconds is None or seconds <= 0:
+        yield current()
+        return
+    deadline = Deadline(seconds)
+    outer = current()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline.expires_at = outer.expires_at
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        deadline.active = False
+        _current.reset(token)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """Run the block without a deadline (background work started by a tool)."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def detach(coro: Coroutine[Any, Any, T]) -> "asyncio.Task[T]":
+    """Run coro as a task without the current deadline (its result is still awaitable)."""
+
+    async def run() -> T:
+        with no_deadline():
+            return await coro
+
+    task = asyncio.get_running_loop().create_task(run())
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+    return task
+
+
+async def within_deadline(awaitable: Awaitable[T], reserve: float = 0.0, shield: bool = True) -> T:
+    """
+    Await until reserve seconds before the deadline.
+
+    Args:
+        awaitable: Work to wait for
+        reserve: Seconds kept back for answering
+        shield: Keep the awaitable running when the budget runs out (False: cancel it,
+            for awaitables that only watch work running elsewhere)
+
+    Raises:
+        asyncio.TimeoutError: The budget ran out first
+    """
+    guarded = asyncio.shield(awaitable) if shield else awaitable
+    left = remaining()
+    if left is None:
+        return await guarded
+    return await asyncio.wait_for(guarded, max(0.0, left - reserve))
+
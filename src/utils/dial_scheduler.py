@@ -0,0 +1,441 @@
+"""
+Queued outbound-dial scheduler.
+
+GHL form submissions used to create a Vapi outbound call inside the webhook
+request, so a marketing blast became hundreds of simultaneous calls. Submissions
+are now queued and dialed in the background, which:
+
+- keeps at most `max_concurrent` calls live (a slot is held from dial until the
+  call's end-of-call-report, or `call_max_seconds` as a backstop),
+- starts at most `calls_per_minute` calls (evenly spaced),
+- dials only inside the business-hours window (office timezone),
+- drops repeat submissions for a phone that is queued, being dialed or was
+  dialed within the dedupe window,
+- retries failed dials with a growing delay.
+
+Queue, dedupe, pacing and live-call state live in one SQLite database (WAL), so
+a restart resumes where it left off and every worker process shares the same
+queue and limits: each process runs a dial loop that claims jobs in a
+transaction, and an end-of-call report received by any worker frees the slot.
+A claimed job carries a lease, so a job whose worker died is dialed again.
+Without a state path the database is in memory (one process).
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, time as clock_time, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from src.utils.contact_cache import normalize_phone
+from src.utils.logger import get_logger
+from src.utils.offload import run_in_thread
+
+logger = get_logger(__name__)
+
+_DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Longest sleep between claims: slots freed and jobs queued by other workers are
+# only seen by polling
+_POLL_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dial_jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    phone TEXT NOT NULL UNIQUE,
+    request TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    dialing_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dialed_phones (phone TEXT PRIMARY KEY, dialed_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS live_calls (call_id TEXT PRIMARY KEY, dialed_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS dial_pacing (id INTEGER PRIMARY KEY CHECK (id = 1), next_start_at REAL NOT NULL);
+"""
+
+
+def parse_days(days: str) -> FrozenSet[int]:
+    """Weekday numbers (Monday=0) from "mon,tue,..." (empty means every day)."""
+    names = [name.strip().lower()[:3] for name in days.split(",") if name.strip()]
+    if not names:
+        return frozenset(range(7))
+    unknown = [name for name in names if name not in _DAY_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown weekday(s): {', '.join(unknown)}")
+    return frozenset(_DAY_NAMES.index(name) for name in names)
+
+
+def _parse_clock(value: str) -> clock_time:
+    """HH:MM; "24:00" means end of day."""
+    if value.strip() == "24:00":
+        return clock_time.max
+    hours, minutes = value.strip().split(":")
+    return clock_time(int(hours), int(minutes))
+
+
+class DialJob:
+    """One queued outbound call: the dial arguments plus scheduling state."""
+
+    def __init__(
+        self,
+        phone: str,
+        request: Dict[str, Any],
+        job_id: Optional[str] = None,
+        enqueued_at: Optional[float] = None,
+        attempts: int = 0,
+        not_before: float = 0.0,
+    ):
+        self.phone = phone
+        self.request = request
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.enqueued_at = enqueued_at if enqueued_at is not None else time.time()
+        self.attempts = attempts
+        self.not_before = not_before
+
+    @classmethod
+    def from_row(cls, row: Tuple[Any, ...]) -> "DialJob":
+        job_id, phone, request, enqueued_at, attempts, not_before = row
+        return cls(phone, json.loads(request), job_id, enqueued_at, attempts, not_before)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, DialJob) and other.job_id == self.job_id
+
+    def __hash__(self) -> int:
+        return hash(self.job_id)
+
+
+_JOB_COLUMNS = "job_id, phone, request, enqueued_at, attempts, not_before"
+
+
+class OutboundDialScheduler:
+    """FIFO dial queue with concurrency, rate, business-hours and dedupe limits."""
+
+    def __init__(
+        self,
+        dial: Callable[[DialJob], Awaitable[Optional[str]]],
+        max_concurrent: int = 5,
+        calls_per_minute: float = 10,
+        dedupe_window_seconds: float = 3600,
+        hours: Optional[Tuple[str, str]] = None,
+        days: str = "",
+        timezone: str = "America/New_York",
+        state_path: Optional[str] = None,
+        max_attempts: int = 3,
+        retry_delay_seconds: float = 60,
+        call_max_seconds: float = 1800,
+        dial_lease_seconds: float = 120,
+        on_dropped: Optional[Callable[[DialJob], Awaitable[None]]] = None,
+    ):
+        """
+        Args:
+            dial: Places the call for a job; returns the Vapi call ID (raises on failure)
+            max_concurrent: Live outbound calls allowed at once (all workers together)
+            calls_per_minute: Call starts allowed per minute (<= 0: unlimited)
+            dedupe_window_seconds: Ignore a phone dialed this recently
+            hours: ("HH:MM", "HH:MM") local dialing window; None dials at any time
+            days: Dialing weekdays ("mon,tue,..."; empty: every day)
+            timezone: Timezone of the dialing window
+            state_path: SQLite file shared by all workers; None keeps it in memory only
+            max_attempts: Dial attempts per job before it is dropped
+            retry_delay_seconds: Delay before a retry (multiplied by the attempt number)
+            call_max_seconds: Release a live-call slot after this long without an end-of-call report
+            dial_lease_seconds: A job claimed this long ago by a worker that never finished is dialed again
+            on_dropped: Awaited with a job dropped after max_attempts failed dials
+        """
+        self.dial = dial
+        self.max_concurrent = max_concurrent
+        self.start_interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self.dedupe_window_seconds = dedupe_window_seconds
+        self.hours = (_parse_clock(hours[0]), _parse_clock(hours[1])) if hours else None
+        self.days = parse_days(days)
+        self.timezone = ZoneInfo(timezone)
+        self.state_path = state_path
+        self.max_attempts = max_attempts
+        self.retry_delay_seconds = retry_delay_seconds
+        self.call_max_seconds = call_max_seconds
+        self.dial_lease_seconds = dial_lease_seconds
+        self.on_dropped = on_dropped
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_path: Optional[str] = None
+        self._lock = threading.Lock()  # One connection, used from the loop thread(s)
+        self._dialing = 0
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._worker_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------ state
+
+    def _db(self) -> sqlite3.Connection:
+        path = self.state_path or ":memory:"
+        if self._conn is None or self._conn_path != path:
+            if self.state_path:
+                Path(self.state_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            if self.state_path:
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._conn_path = conn, path
+        return self._conn
+
+    def _transaction(self, work: Callable[[sqlite3.Connection, float], Any]) -> Any:
+        """Run work(conn, now) in one write transaction (other workers wait for it)."""
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(conn, time.time())
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    async def _write(self, work: Callable[[sqlite3.Connection, float], Any]) -> Any:
+        """_transaction off the event loop (BEGIN IMMEDIATE can wait on other workers)."""
+        return await run_in_thread(self._transaction, work)
+
+    def _query(self, sql: str, *args: Any) -> Any:
+        with self._lock:
+            return self._db().execute(sql, args).fetchone()
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM dialed_phones WHERE dialed_at <= ?", (now - self.dedupe_window_seconds,))
+        conn.execute("DELETE FROM live_calls WHERE dialed_at <= ?", (now - self.call_max_seconds,))
+
+    # ------------------------------------------------------------------ public
+
+    async def enqueue(self, phone: str, request: Dict[str, Any]) -> Tuple[Optional[DialJob], bool]:
+        """
+        Queue a call to phone unless it is already queued, being dialed or was dialed recently
+
+        Returns:
+            (job, True) for a new job; (queued job or None, False) for a duplicate
+        """
+        key = normalize_phone(phone) or phone
+
+        def insert(conn: sqlite3.Connection, now: float) -> Tuple[Optional[DialJob], bool]:
+            row = conn.execute(f"SELECT {_JOB_COLUMNS} FROM dial_jobs WHERE phone = ?", (key,)).fetchone()
+            if row:
+                return DialJob.from_row(row), False
+            self._prune(conn, now)
+            if conn.execute("SELECT 1 FROM dialed_phones WHERE phone = ?", (key,)).fetchone():
+                return None, False
+            job = DialJob(key, request, enqueued_at=now)
+            conn.execute(
+                "INSERT INTO dial_jobs (job_id, phone, request, enqueued_at) VALUES (?, ?, ?, ?)",
+                (job.job_id, key, json.dumps(request, default=str), now),
+            )
+            return job, True
+
+        job, created = await self._write(insert)
+        if created:
+            self._ensure_worker()
+        return job, created
+
+    def position(self, job: DialJob) -> int:
+        """1-based place of job in the queue (0 when no longer queued or being dialed)."""
+        row = self._query(
+            "SELECT (SELECT COUNT(*) FROM dial_jobs q WHERE q.seq <= j.seq AND q.dialing_until <= ?)"
+            " FROM dial_jobs j WHERE j.job_id = ? AND j.dialing_until <= ?",
+            time.time(), job.job_id, time.time(),
+        )
+        return row[0] if row else 0
+
+    async def call_ended(self, call_id: Optional[str]) -> None:
+        """Free the live-call slot held by an outbound call (end-of-call report, any worker)."""
+        if not call_id:
+            return
+        freed = await self._write(
+            lambda conn, now: conn.execute("DELETE FROM live_calls WHERE call_id = ?", (call_id,)).rowcount
+        )
+        if freed:
+            self._notify()
+
+    def resume(self) -> None:
+        """Start dialing jobs left from a previous run (call from the running event loop)."""
+        if self._query("SELECT 1 FROM dial_jobs LIMIT 1"):
+            self._ensure_worker()
+
+    async def join(self) -> None:
+        """Wait until the queue is empty and no dial is in progress."""
+        while self._dialing or self._query("SELECT 1 FROM dial_jobs LIMIT 1"):
+            await asyncio.sleep(0.01)
+
+    async def stop(self) -> None:
+        """Stop the worker (queued jobs stay in the database for the next start)."""
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+
+    def seconds_until_open(self, now: Optional[float] = None) -> float:
+        """0 inside the dialing window, else seconds until it next opens."""
+        if self.hours is None:
+            return 0.0
+        local = datetime.fromtimestamp(now if now is not None else time.time(), self.timezone)
+        opens_at, closes_at = self.hours
+        for day in range(8):
+            date = (local + timedelta(days=day)).date()
+            if date.weekday() not in self.days:
+                continue
+            opens = datetime.combine(date, opens_at, self.timezone)
+            closes = datetime.combine(date, closes_at, self.timezone)
+            if opens <= local < closes:
+                return 0.0
+            if local < opens:
+                return (opens - local).total_seconds()
+        return 3600.0
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        try:
+            row = self._query(
+                "SELECT (SELECT COUNT(*) FROM dial_jobs WHERE dialing_until <= ?),"
+                " (SELECT COUNT(*) FROM dial_jobs WHERE dialing_until > ?),"
+                " (SELECT COUNT(*) FROM live_calls WHERE dialed_at > ?)",
+                now, now, now - self.call_max_seconds,
+            )
+        except sqlite3.Error as e:
+            return {"error": str(e)}
+        return {"queued": row[0], "dialing": row[1], "live": row[2]}
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM dial_jobs WHERE dialing_until <= ?", time.time())[0]
+
+    # ------------------------------------------------------------------ worker
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._worker_loop is loop:
+            self._notify()
+            return
+        self._wake = asyncio.Event()
+        self._worker_loop = loop
+        self._worker = loop.create_task(self._run())
+
+    def _notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep up to seconds; enqueue / call_ended / dial completion wake it early."""
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+
+    def _claim(self, conn: sqlite3.Connection, now: float) -> Tuple[Optional[DialJob], Optional[float]]:
+        """
+        Take the next job if every limit allows it.
+
+        Returns:
+            (job, None) to dial now; (None, seconds) to wait; (None, None) when nothing is queued
+        """
+        waiting = conn.execute(
+            "SELECT MIN(not_before), COUNT(*) FROM dial_jobs WHERE dialing_until <= ?", (now,)
+        ).fetchone()
+        if not waiting[1]:
+            in_flight = conn.execute("SELECT 1 FROM dial_jobs LIMIT 1").fetchone()
+            return None, (_POLL_SECONDS if in_flight else None)
+        if waiting[0] > now:
+            return None, min(waiting[0] - now, 60.0)
+
+        self._prune(conn, now)
+        busy = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM live_calls) + (SELECT COUNT(*) FROM dial_jobs WHERE dialing_until > ?)",
+            (now,),
+        ).fetchone()[0]
+        if busy >= self.max_concurrent:
+            return None, _POLL_SECONDS
+
+        pacing = conn.execute("SELECT next_start_at FROM dial_pacing WHERE id = 1").fetchone()
+        if pacing and pacing[0] > now:
+            return None, pacing[0] - now
+
+        row = conn.execute(
+            f"SELECT {_JOB_COLUMNS} FROM dial_jobs WHERE dialing_until <= ? AND not_before <= ? ORDER BY seq LIMIT 1",
+            (now, now),
+        ).fetchone()
+        job = DialJob.from_row(row)
+        job.attempts += 1
+        conn.execute(
+            "UPDATE dial_jobs SET attempts = ?, dialing_until = ? WHERE job_id = ?",
+            (job.attempts, now + self.dial_lease_seconds, job.job_id),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO dial_pacing (id, next_start_at) VALUES (1, ?)", (now + self.start_interval,)
+        )
+        return job, None
+
+    async def _run(self) -> None:
+        while True:
+            closed_for = self.seconds_until_open()
+            if closed_for > 0:
+                if not len(self):
+                    return
+                logger.info(f"Outside dialing hours; {len(self)} call(s) wait {closed_for / 60:.0f} min")
+                await self._sleep(min(closed_for, 900.0))
+                continue
+
+            job, wait = await self._write(self._claim)
+            if job is None:
+                if wait is None and not self._dialing:
+                    return
+                await self._sleep(wait if wait is not None else _POLL_SECONDS)
+                continue
+
+            self._dialing += 1
+            task = asyncio.create_task(self._dial(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dial(self, job: DialJob) -> None:
+        try:
+            try:
+                call_id = await self.dial(job)
+            except Exception as e:
+                if job.attempts < self.max_attempts:
+                    delay = self.retry_delay_seconds * job.attempts
+                    await self._write(lambda conn, now: conn.execute(
+                        "UPDATE dial_jobs SET not_before = ?, dialing_until = 0 WHERE job_id = ?",
+                        (now + delay, job.job_id),
+                    ))
+                    logger.warning(f"Outbound dial for job {job.job_id} failed (attempt {job.attempts}), retrying: {str(e)}")
+                    return
+                await self._write(
+                    lambda conn, now: conn.execute("DELETE FROM dial_jobs WHERE job_id = ?", (job.job_id,))
+                )
+                logger.error(f"Outbound dial for job {job.job_id} failed {job.attempts} times, dropping: {str(e)}")
+                if self.on_dropped is not None:
+                    try:
+                        await self.on_dropped(job)
+                    except Exception as alert_error:
+                        logger.error(f"Dropped-dial hook failed for job {job.job_id}: {str(alert_error)}")
+                return
+
+            def finish(conn: sqlite3.Connection, now: float) -> None:
+                conn.execute("DELETE FROM dial_jobs WHERE job_id = ?", (job.job_id,))
+                conn.execute("INSERT OR REPLACE INTO dialed_phones (phone, dialed_at) VALUES (?, ?)", (job.phone, now))
+                if call_id:
+                    conn.execute("INSERT OR REPLACE INTO live_calls (call_id, dialed_at) VALUES (?, ?)", (call_id, now))
+
+            await self._write(finish)
+            logger.info(f"Outbound call {call_id} started for queued job {job.job_id}")
+        except sqlite3.Error as e:
+            logger.error(f"Outbound dial queue database error for job {job.job_id}: {str(e)}")
+        finally:
+            self._dialing -= 1
+            self._notify()
@@ -58,6 +58,12 @@ class BoldTrailError(IntegrationError):
     def __init__(self, message: str, status_code: int = 500, details: Optional[Dict[str, Any]] = None):
         super().__init__(message, service="BoldTrail CRM", status_code=status_code, details=details)
 
+    @property
+    def is_duplicate_contact(self) -> bool:
+        """True when a create was rejected because the contact already exists"""
+        message = self.message.lower()
+        return "already exists" in message or "duplicate" in message
+
 
 class StellarMLSError(IntegrationError):
     """Exception for Stellar MLS errors"""
@@ -0,0 +1,113 @@
+"""
+Hedged requests for idempotent reads.
+
+A slow kvCore response (the tail, not the median) is what a caller hears as dead
+air. A hedged read sends the request, and if no answer has arrived after the
+recently observed p90 latency, sends the same request again on another pooled
+connection and takes whichever answers first; the loser is cancelled.
+
+Hedges are capped by `HedgeBudget`: each request earns `max_ratio` of a hedge, so
+hedges add at most that fraction of extra load (plus a small burst), and no hedge
+is sent until enough latencies have been observed to know what "slow" is.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Recent request latencies (seconds) and their quantiles."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency below which q of recent requests answered (None until min_samples are seen)."""
+        if len(self._samples) < max(1, self.min_samples):
+            return None
+        ordered: List[float] = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class HedgeBudget:
+    """Allows at most max_ratio hedges per request (burst: hedges saved up while idle)."""
+
+    def __init__(self, max_ratio: float = 0.05, burst: float = 2.0):
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self._credit = 0.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def earn(self) -> None:
+        """Count one request (earns max_ratio of a hedge)."""
+        self.requests += 1
+        self._credit = min(self.burst, self._credit + self.max_ratio)
+
+    def try_spend(self) -> bool:
+        """Take one hedge if the budget allows."""
+        if self._credit < 1.0:
+            return False
+        self._credit -= 1.0
+        self.hedges += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+
+async def hedged(
+    send: Callable[[], Awaitable[T]],
+    delay: Optional[float],
+    budget: HedgeBudget,
+    may_hedge: Callable[[], bool] = lambda: True,
+) -> T:
+    """
+    Run send(); if it has not finished after delay seconds, run it again and return the first answer.
+
+    Args:
+        send: Starts one attempt (must be safe to run twice)
+        delay: Hedge delay (None: never hedge)
+        budget: Hedge budget (counts this request, pays for the hedge)
+        may_hedge: Last check before hedging (e.g. a rate-limit token is free)
+
+    Returns:
+        The first successful result (an error only once every attempt has failed)
+    """
+    budget.earn()
+    attempts = [asyncio.ensure_future(send())]
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and may_hedge() and budget.try_spend():
+                attempts.append(asyncio.ensure_future(send()))
+        if len(attempts) == 1:
+            return await attempts[0]
+
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    if attempt is attempts[1]:
+                        budget.hedge_wins += 1
+                    return attempt.result()
+                error = error or attempt.exception()
+        assert error is not None
+        raise error
+    finally:
+        for attempt in attempts:
+            if not attempt.done():
+                attempt.cancel()
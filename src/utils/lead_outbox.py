@@ -0,0 +1,426 @@
+"""
+Durable write-behind outbox for CRM lead writes.
+
+A lead the caller gave us must not depend on kvCore being up. create_buyer_lead
+and create_seller_lead commit each write to a local SQLite database (WAL mode,
+synchronous=FULL) before anything else, then a drain worker replays it to the
+CRM through the handler registered for its kind:
+
+- writes for one contact (normalized phone) are replayed in the order they were
+  committed; a write waiting for a retry holds back later writes for that contact,
+- an identical write already waiting (same dedupe key) is not queued twice,
+- kvCore outages (connection errors, 5xx, circuit open), rate limits and deadline
+  overruns are retried with jittered backoff; other errors mark the entry failed
+  (kept in the database for manual replay, the kind's on_failed hook alerts the
+  office), as does running out of attempts,
+- entries are claimed with a lease, so several worker processes can share the file
+  and an entry claimed by a process that died is picked up again.
+
+The tool waits for its entry (`wait`) only within its deadline; when the write is
+parked for a retry or still running, the caller is told we have their details.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.config.settings import settings
+from src.utils.deadline import no_deadline
+from src.utils.errors import BoldTrailError
+from src.utils.logger import get_logger
+from src.utils.offload import run_in_thread
+
+logger = get_logger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+FailureHandler = Callable[[Dict[str, Any], BaseException], Awaitable[None]]
+
+PENDING = "pending"
+SENDING = "sending"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lead_writes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    contact_key TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lead_writes_contact ON lead_writes (contact_key, state, id);
+CREATE UNIQUE INDEX IF NOT EXISTS lead_writes_open
+    ON lead_writes (dedupe_key) WHERE state IN ('pending', 'sending');
+"""
+
+
+class OutboxDeferred(Exception):
+    """The write could not be completed now and is queued for a retry."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    kvCore outages (connection errors, 5xx, circuit open, deadline overruns) and
+    408/429 are retried; anything else (rejected input, a bug in the handler) is final.
+    """
+    if not isinstance(error, BoldTrailError):
+        return False
+    return error.status_code >= 500 or error.status_code in (408, 429)
+
+
+class LeadOutbox:
+    """SQLite-backed outbox of CRM writes, replayed in order per contact."""
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 20,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 300.0,
+        retention_seconds: float = 7 * 86400,
+        lease_seconds: float = 120.0,
+        batch_size: int = 4,
+    ):
+        """
+        Args:
+            path: SQLite database file (created on first use)
+            max_attempts: Replay attempts before an entry is marked failed
+            retry_base_seconds: First retry delay (doubled per attempt, jittered)
+            retry_max_seconds: Longest retry delay
+            retention_seconds: How long written entries are kept
+            lease_seconds: How long a claimed entry is reserved for the claiming process
+            batch_size: Entries (for different contacts) replayed concurrently
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+
+        self._handlers: Dict[str, Handler] = {}
+        self._on_failed: Dict[str, FailureHandler] = {}
+        self._ready_path: Optional[str] = None
+        self._waiters: Dict[int, "asyncio.Future[Any]"] = {}
+        self._parked: Set[int] = set()
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._worker_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.replayed = 0
+        self.retried = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------ database
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._ready_path != self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA synchronous=FULL")
+        if self._ready_path != self.path:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._ready_path = self.path
+        return conn
+
+    def _insert(self, kind: str, contact_key: str, dedupe_key: str, payload: str) -> Tuple[int, bool]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            # One transaction: the waiting entry that blocked the insert cannot settle before it is read
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO lead_writes "
+                "(kind, contact_key, dedupe_key, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, contact_key, dedupe_key, payload, now, now),
+            )
+            if cursor.rowcount:
+                entry = int(cursor.lastrowid), True
+            else:
+                row = conn.execute(
+                    "SELECT id FROM lead_writes WHERE dedupe_key = ? AND state IN (?, ?)",
+                    (dedupe_key, PENDING, SENDING),
+                ).fetchone()
+                entry = int(row[0]), False
+            conn.execute("COMMIT")
+            return entry
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _claim_due(self) -> List[Tuple[int, str, str, int]]:
+        """Reserve the oldest due entry of each contact with nothing in flight."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE lead_writes SET state = ? WHERE state = ? AND lease_until < ?",
+                (PENDING, SENDING, now),
+            )
+            rows = conn.execute(
+                "SELECT id, kind, payload, attempts FROM lead_writes AS w "
+                "WHERE state = ? AND next_attempt_at <= ? AND id = ("
+                "  SELECT MIN(id) FROM lead_writes WHERE contact_key = w.contact_key AND state IN (?, ?)"
+                ") ORDER BY id LIMIT ?",
+                (PENDING, now, PENDING, SENDING, self.batch_size),
+            ).fetchall()
+            for row in rows:
+                conn.execute(
+                    "UPDATE lead_writes SET state = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                    (SENDING, now + self.lease_seconds, now, row[0]),
+                )
+            conn.execute("COMMIT")
+            return [(int(id_), kind, payload, int(attempts) + 1) for id_, kind, payload, attempts in rows]
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _next_due_in(self) -> Optional[float]:
+        """Seconds until the next pending entry is due (None: nothing pending or in flight)."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM lead_writes WHERE state = ? AND updated_at < ?", (DONE, now - self.retention_seconds))
+            row = conn.execute(
+                "SELECT MIN(CASE WHEN state = ? THEN next_attempt_at ELSE lease_until END) FROM lead_writes WHERE state IN (?, ?)",
+                (PENDING, PENDING, SENDING),
+            ).fetchone()
+            return None if row[0] is None else max(0.0, row[0] - now)
+        finally:
+            conn.close()
+
+    def _update(self, entry_id: int, state: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"UPDATE lead_writes SET state = ?, updated_at = ?{', ' if fields else ''}{assignments} WHERE id = ?",
+                (state, time.time(), *fields.values(), entry_id),
+            )
+        finally:
+            conn.close()
+
+    def _state(self, entry_id: int) -> Tuple[Optional[str], int, Optional[str], Optional[str]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT state, attempts, result, last_error FROM lead_writes WHERE id = ?", (entry_id,)
+            ).fetchone()
+            return (row[0], int(row[1]), row[2], row[3]) if row else (None, 0, None, None)
+        finally:
+            conn.close()
+
+    def _counts(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT state, COUNT(*) FROM lead_writes GROUP BY state").fetchall())
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------ public
+
+    def register(self, kind: str, handler: Handler, on_failed: Optional[FailureHandler] = None) -> None:
+        """
+        Set the coroutine that writes entries of kind to the CRM (returns the result to store).
+
+        on_failed(payload, error) runs when an entry fails for good; the caller was
+        already told we have their details, so someone has to follow up by hand.
+        """
+        self._handlers[kind] = handler
+        if on_failed is not None:
+            self._on_failed[kind] = on_failed
+
+    async def enqueue(self, kind: str, contact_key: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None) -> int:
+        """
+        Commit a write and wake the drain worker.
+
+        Args:
+            kind: Registered handler name
+            contact_key: Writes with the same key are replayed in order
+            payload: JSON-serializable handler input
+            dedupe_key: Identical writes still waiting share one entry (default: kind + payload)
+
+        Returns:
+            Entry ID (of the waiting entry when deduplicated)
+        """
+        body = json.dumps(payload, sort_keys=True, default=str)
+        entry_id, created = await run_in_thread(
+            self._insert, kind, contact_key, dedupe_key or f"{kind}:{contact_key}:{body}", body
+        )
+        if not created:
+            logger.info(f"Lead outbox entry {entry_id} ({kind}) already queued")
+        self._ensure_worker()
+        return entry_id
+
+    async def wait(self, entry_id: int, poll_seconds: float = 1.0) -> Any:
+        """
+        Wait for an entry's first outcome.
+
+        Entries replayed by this process settle at once; the database is polled
+        for entries claimed by another worker process. Cancelling the wait stops
+        the polling and leaves the write itself running.
+
+        Returns:
+            The handler's result
+
+        Raises:
+            OutboxDeferred: The write failed for now and waits for a retry
+            The handler's error (RuntimeError from another process) when the write failed for good
+        """
+        if entry_id in self._parked:
+            raise OutboxDeferred(f"Lead outbox entry {entry_id} is waiting for a retry")
+        loop = asyncio.get_running_loop()
+        future = self._waiters.get(entry_id)
+        if future is None or future.get_loop() is not loop:
+            future = loop.create_future()
+            self._waiters[entry_id] = future
+        while True:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), poll_seconds)
+            except asyncio.TimeoutError:
+                state, attempts, result, error = await run_in_thread(self._state, entry_id)
+                if state in (DONE, FAILED) and self._waiters.get(entry_id) is future:
+                    del self._waiters[entry_id]  # Settled by another process
+                if state == DONE:
+                    return json.loads(result) if result else None
+                if state == FAILED:
+                    raise RuntimeError(f"Lead write failed: {error}")
+                if state == PENDING and attempts:
+                    raise OutboxDeferred(f"Lead outbox entry {entry_id} is waiting for a retry")
+
+    def resume(self) -> None:
+        """Start replaying entries left from a previous run (call from the running event loop)."""
+        self._ensure_worker()
+
+    async def stop(self) -> None:
+        """Stop the worker (entries stay in the database for the next start)."""
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            counts = self._counts()
+        except sqlite3.Error as e:
+            return {"error": str(e)}
+        return {
+            "pending": counts.get(PENDING, 0) + counts.get(SENDING, 0),
+            "failed": counts.get(FAILED, 0),
+            "written": counts.get(DONE, 0),
+            "replayed": self.replayed,
+            "retried": self.retried,
+        }
+
+    # ------------------------------------------------------------------ worker
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._worker_loop is loop:
+            self._wake.set()
+            return
+        self._worker_loop = loop
+        self._wake = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        with no_deadline():  # Replays outlive the tool request that queued them
+            while True:
+                self._wake.clear()
+                try:
+                    batch = await run_in_thread(self._claim_due)
+                    if batch:
+                        await asyncio.gather(*(self._replay(*entry) for entry in batch))
+                        continue
+                    due_in = await run_in_thread(self._next_due_in)
+                except sqlite3.Error as e:
+                    logger.error(f"Lead outbox database error: {str(e)}")
+                    due_in = self.retry_base_seconds
+                if due_in is None:
+                    return
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(0.05, due_in))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _replay(self, entry_id: int, kind: str, payload: str, attempt: int) -> None:
+        handler = self._handlers.get(kind)
+        if handler is None:
+            logger.error(f"Lead outbox entry {entry_id}: no handler for {kind}")
+            await run_in_thread(self._update, entry_id, FAILED, last_error=f"no handler for {kind}")
+            return
+        try:
+            result = await handler(json.loads(payload))
+        except Exception as e:
+            if is_retryable(e) and attempt < self.max_attempts:
+                delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+                logger.warning(f"Lead outbox entry {entry_id} ({kind}) failed, retry {attempt} in {delay:.0f}s: {str(e)}")
+                await run_in_thread(
+                    self._update, entry_id, PENDING, next_attempt_at=time.time() + delay, lease_until=0, last_error=str(e)
+                )
+                self.retried += 1
+                self._parked.add(entry_id)
+                self._settle(entry_id, error=OutboxDeferred(str(e)))
+                return
+            logger.error(f"Lead outbox entry {entry_id} ({kind}) failed after {attempt} attempt(s): {str(e)}")
+            await run_in_thread(self._update, entry_id, FAILED, last_error=str(e))
+            self.failed += 1
+            self._parked.discard(entry_id)
+            self._settle(entry_id, error=e)
+            await self._alert_failed(entry_id, kind, payload, e)
+            return
+        await run_in_thread(self._update, entry_id, DONE, result=json.dumps(result, default=str))
+        self.replayed += 1
+        self._parked.discard(entry_id)
+        self._settle(entry_id, result=result)
+
+    async def _alert_failed(self, entry_id: int, kind: str, payload: str, error: BaseException) -> None:
+        on_failed = self._on_failed.get(kind)
+        if on_failed is None:
+            return
+        try:
+            await on_failed(json.loads(payload), error)
+        except Exception as e:
+            logger.error(f"Lead outbox entry {entry_id} ({kind}): failure alert not sent: {str(e)}")
+
+    def _settle(self, entry_id: int, result: Any = None, error: Optional[BaseException] = None) -> None:
+        future = self._waiters.pop(entry_id, None)
+        if future is None or future.done() or future.get_loop().is_closed():
+            return
+        if error is not None:
+            future.set_exception(error)
+            future.exception()  # Nobody may be waiting any more
+        else:
+            future.set_result(result)
+
+
+lead_outbox = LeadOutbox(
+    path=settings.LEAD_OUTBOX_PATH or os.path.join(tempfile.gettempdir(), "sally_love_lead_outbox.db"),
+    max_attempts=settings.LEAD_OUTBOX_MAX_ATTEMPTS,
+    retry_base_seconds=settings.LEAD_OUTBOX_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.LEAD_OUTBOX_RETRY_MAX_SECONDS,
+    retention_seconds=settings.LEAD_OUTBOX_RETENTION_SECONDS,
+)
@@ -0,0 +1,245 @@
+"""
+Columnar listings index - mirrors listing dicts into NumPy arrays.
+
+Numeric and categorical filters (price, bedrooms, bathrooms, square feet, status,
+city, state, ZIP, property type, MLS number) become vectorized boolean masks, and aggregates
+like the spoken price range become array reductions. String-heavy filters
+(address, agent name) still run per listing, but only on rows that survive the mask.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _as_float(value: Any) -> float:
+    """Coerce feed/API values (None, "", "329000") to float, 0.0 when missing or invalid."""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _zip_of(listing: Dict[str, Any]) -> str:
+    """ZIP as stored by the XML feed (zip/zipCode) or the manual listings API (zipCode/zip_code)."""
+    return str(listing.get("zip") or listing.get("zipCode") or listing.get("zip_code") or "")
+
+
+def normalize_mls_number(value: Any) -> str:
+    """MLS number without whitespace, upper-cased ("g 501 2345" -> "G5012345"); "" when empty."""
+    return "".join(str(value or "").split()).upper()
+
+
+def _mls_of(listing: Dict[str, Any]) -> str:
+    """MLS number as stored by the feed and manual listings (mlsNumber/mls_number), normalized."""
+    return normalize_mls_number(listing.get("mlsNumber") or listing.get("mls_number"))
+
+
+class _Vocabulary:
+    """Maps categorical strings to dense integer ids."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        if value not in self.ids:
+            self.ids[value] = len(self.ids)
+        return self.ids[value]
+
+    def matching(self, predicate: Callable[[str], bool]) -> np.ndarray:
+        """Ids of every vocabulary entry accepted by predicate (evaluated once per distinct value)."""
+        return np.fromiter(
+            (i for value, i in self.ids.items() if predicate(value)), dtype=np.int32
+        )
+
+
+class ListingsIndex:
+    """
+    Column-oriented view over a list of normalized listing dicts.
+
+    Row i of every column describes listings[i], so masks map straight back to the
+    original dicts and feed order is preserved.
+    """
+
+    def __init__(self, listings: Sequence[Dict[str, Any]]):
+        self.listings: List[Dict[str, Any]] = (
+            listings if isinstance(listings, list) else list(listings)
+        )
+        n = len(self.listings)
+
+        self.cities = _Vocabulary()
+        self.states = _Vocabulary()
+        self.zips = _Vocabulary()
+        self.statuses = _Vocabulary()
+        self.property_types = _Vocabulary()
+        self.mls_numbers = _Vocabulary()
+
+        self.price = np.empty(n, dtype=np.float64)
+        self.beds = np.empty(n, dtype=np.float64)
+        self.baths = np.empty(n, dtype=np.float64)
+        self.sqft = np.empty(n, dtype=np.float64)
+        self.city_id = np.empty(n, dtype=np.int32)
+        self.state_id = np.empty(n, dtype=np.int32)
+        self.zip_id = np.empty(n, dtype=np.int32)
+        self.status_code = np.empty(n, dtype=np.int32)
+        self.type_id = np.empty(n, dtype=np.int32)
+        self.mls_id = np.empty(n, dtype=np.int32)
+
+        for i, listing in enumerate(self.listings):
+            self.price[i] = _as_float(listing.get("price"))
+            self.beds[i] = _as_float(listing.get("bedrooms"))
+            self.baths[i] = _as_float(listing.get("bathrooms"))
+            self.sqft[i] = _as_float(listing.get("squareFeet") or listing.get("square_feet"))
+            self.city_id[i] = self.cities.encode(str(listing.get("city") or "").strip().lower())
+            self.state_id[i] = self.states.encode(str(listing.get("state") or "").lower())
+            self.zip_id[i] = self.zips.encode(_zip_of(listing))
+            self.status_code[i] = self.statuses.encode(str(listing.get("status") or "").lower())
+            property_type = listing.get("propertyType") or listing.get("property_type") or ""
+            self.type_id[i] = self.property_types.encode(str(property_type).lower())
+            self.mls_id[i] = self.mls_numbers.encode(_mls_of(listing))
+
+    @classmethod
+    def from_columns(
+        cls,
+        listings: Sequence[Dict[str, Any]],
+        columns: Dict[str, np.ndarray],
+        vocabularies: Dict[str, Dict[str, int]],
+    ) -> "ListingsIndex":
+        """
+        Rebuild an index from prebuilt columns (e.g. views onto a mapped snapshot).
+
+        Args:
+            listings: Listing records, row-aligned with the columns
+            columns: Column name (price, beds, city_id, ...) -> array
+            vocabularies: Vocabulary name (cities, states, ...) -> value-to-id map
+
+        Returns:
+            ListingsIndex sharing the given arrays (no copies)
+        """
+        index = cls.__new__(cls)
+        index.listings = listings
+        for name, ids in vocabularies.items():
+            vocabulary = _Vocabulary()
+            vocabulary.ids = ids
+            setattr(index, name, vocabulary)
+        for name, column in columns.items():
+            setattr(index, name, column)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def mask(
+        self,
+        city_matches: Optional[Callable[[str], bool]] = None,
+        state: Optional[str] = None,
+        zip_code: Optional[str] = None,
+        property_type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        bedrooms: Optional[int] = None,
+        bathrooms: Optional[float] = None,
+        min_bedrooms: Optional[int] = None,
+        min_bathrooms: Optional[float] = None,
+        statuses: Optional[Iterable[str]] = None,
+        mls_number: Optional[str] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Build a boolean row mask for the given filters.
+
+        Args:
+            city_matches: Predicate over lowercased city names (e.g. The Villages expansion)
+            state: State, compared case-insensitively
+            zip_code: ZIP, exact match
+            property_type: Case-insensitive substring of the listing's property type
+            min_price: Minimum price (ignored when falsy, matching the search semantics)
+            max_price: Maximum price (ignored when falsy)
+            bedrooms: Exact bedroom count
+            bathrooms: Exact bathroom count
+            min_bedrooms: Minimum bedroom count
+            min_bathrooms: Minimum bathroom count
+            statuses: Allowed lowercased statuses
+            mls_number: MLS number, ignoring case and whitespace
+            rows: Restrict to these row numbers (e.g. hits from the agent-name index)
+
+        Returns:
+            Boolean array with one entry per listing
+        """
+        if rows is not None:
+            mask = np.zeros(len(self.listings), dtype=bool)
+            mask[rows] = True
+        else:
+            mask = np.ones(len(self.listings), dtype=bool)
+
+        if city_matches is not None:
+            mask &= np.isin(self.city_id, self.cities.matching(city_matches))
+        if state:
+            mask &= self.state_id == self.states.ids.get(state.lower(), -1)
+        if zip_code:
+            mask &= self.zip_id == self.zips.ids.get(zip_code, -1)
+        if property_type:
+            wanted = property_type.lower()
+            mask &= np.isin(self.type_id, self.property_types.matching(lambda t: wanted in t))
+        if min_price:
+            mask &= self.price >= min_price
+        if max_price:
+            mask &= self.price <= max_price
+        if bedrooms is not None:
+            mask &= self.beds == bedrooms
+        if bathrooms is not None:
+            mask &= self.baths == bathrooms
+        if min_bedrooms is not None:
+            mask &= self.beds >= min_bedrooms
+        if min_bathrooms is not None:
+            mask &= self.baths >= min_bathrooms
+        if statuses is not None:
+            allowed = frozenset(statuses)
+            mask &= np.isin(self.status_code, self.statuses.matching(lambda s: s in allowed))
+        if mls_number:
+            mask &= self.mls_id == self.mls_numbers.ids.get(normalize_mls_number(mls_number), -1)
+
+        return mask
+
+    def rows(self, mask: np.ndarray) -> np.ndarray:
+        """Row numbers selected by mask, in feed order."""
+        return np.flatnonzero(mask)
+
+
+class ListingMatches(list):
+    """
+    Search results (listing dicts in feed order) carrying their rows of index.price,
+    so aggregates over the results reduce over the column instead of the dicts.
+    """
+
+    def __init__(self, listings: Iterable[Dict[str, Any]] = (), prices: Optional[np.ndarray] = None):
+        super().__init__(listings)
+        if prices is None:
+            prices = np.fromiter((_as_float(listing.get("price")) for listing in self), dtype=np.float64, count=len(self))
+        self.prices = prices
+
+    @classmethod
+    def from_rows(cls, index: "ListingsIndex", rows: Sequence[int], listings: Iterable[Dict[str, Any]]) -> "ListingMatches":
+        """Results for the given index rows (listings[i] is the record of rows[i])."""
+        return cls(listings, index.price[np.asarray(rows, dtype=np.int64)])
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return ListingMatches(list.__getitem__(self, item), self.prices[item])
+        return list.__getitem__(self, item)
+
+    def copy(self) -> "ListingMatches":
+        return ListingMatches(self, self.prices)
+
+
+def price_bounds(listings: Sequence[Dict[str, Any]]) -> Tuple[float, float]:
+    """
+    Min and max price across listings as an array reduction (over index.price for ListingMatches).
+
+    Returns:
+        (min_price, max_price); (0.0, 0.0) for an empty sequence
+    """
+    if not listings:
+        return 0.0, 0.0
+    prices = listings.prices if isinstance(listings, ListingMatches) else ListingMatches(listings).prices
+    return float(prices.min()), float(prices.max())
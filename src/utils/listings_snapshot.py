@@ -0,0 +1,292 @@
+"""
+Memory-mapped listings snapshot shared by all uvicorn workers.
+
+With WORKERS > 1 every process would otherwise download the XML feed and hold its
+own copy of the listing dicts and indexes. Instead, one worker (whoever wins a
+non-blocking flock on the refresh lock) downloads and parses the feed and
+publishes a read-only snapshot file; every worker maps that file:
+
+- the numeric/categorical columns of the ListingsIndex are NumPy views straight
+  onto the mapping (zero-copy, shared through the page cache),
+- listing records are stored as JSON and decoded per row on access, so workers
+  never materialize the whole feed as dicts,
+- the small derived structures (vocabularies, market facets, agent and street
+  indexes) are stored as one pickle and loaded per worker.
+
+Snapshots are written to a temp file and renamed into place, so readers see
+either the old or the new snapshot, never a partial one. Mappings of replaced
+snapshots stay valid until the last reference is dropped.
+
+File layout: MAGIC, 8-byte header length, JSON header, then 8-byte aligned
+sections whose offsets are recorded in the header.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.config.settings import settings
+from src.utils.listings_index import ListingsIndex
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"SLSNAP1\n"
+_LENGTH = struct.Struct("<Q")
+_ALIGN = 8
+
+# ListingsIndex columns mirrored into the snapshot
+_COLUMNS = (
+    "price", "beds", "baths", "sqft",
+    "city_id", "state_id", "zip_id", "status_code", "type_id", "mls_id",
+)
+_VOCABULARIES = ("cities", "states", "zips", "statuses", "property_types", "mls_numbers")
+
+
+def snapshot_enabled() -> bool:
+    """Shared snapshot mode: on when running several workers or a snapshot dir is set."""
+    return settings.WORKERS > 1 or bool(settings.LISTINGS_SNAPSHOT_DIR)
+
+
+def snapshot_path() -> Path:
+    """Snapshot file location (LISTINGS_SNAPSHOT_DIR, default a private temp dir)."""
+    directory = Path(settings.LISTINGS_SNAPSHOT_DIR or Path(tempfile.gettempdir()) / "sally_love_listings")
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return directory / "listings.snapshot"
+
+
+class SnapshotListings(Sequence):
+    """Read-only listing records decoded from the mapping on access."""
+
+    def __init__(self, buffer: mmap.mmap, offsets: np.ndarray):
+        self._buffer = buffer
+        self._offsets = offsets  # n + 1 byte offsets into buffer
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(self._buffer[start:end])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self[row]
+
+
+class ListingsSnapshot:
+    """A mapped snapshot: listings, index and derived structures for one feed generation."""
+
+    def __init__(
+        self,
+        generation: int,
+        created: float,
+        listings: SnapshotListings,
+        index: ListingsIndex,
+        extras: Dict[str, Any],
+    ):
+        self.generation = generation
+        self.created = created
+        self.listings = listings
+        self.index = index
+        self.extras = extras
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.created
+
+
+def _pad(handle, position: int) -> int:
+    """Write zero padding up to the next aligned offset; returns the new position."""
+    padding = -position % _ALIGN
+    handle.write(b"\0" * padding)
+    return position + padding
+
+
+def write_snapshot(
+    path: Path,
+    listings: List[Dict[str, Any]],
+    index: ListingsIndex,
+    extras: Dict[str, Any],
+    created: Optional[float] = None,
+) -> int:
+    """
+    Publish listings + index as a new snapshot (atomic rename).
+
+    Args:
+        path: Snapshot file
+        listings: Parsed feed listings (row i is listings[i])
+        index: ListingsIndex built over listings
+        extras: Derived structures to share (must be picklable)
+        created: Feed fetch time (default now)
+
+    Returns:
+        Generation number of the new snapshot
+    """
+    previous = read_header(path)
+    generation = (previous["generation"] + 1) if previous else 1
+
+    records = [json.dumps(listing, separators=(",", ":"), default=str).encode() for listing in listings]
+    blob = pickle.dumps(
+        {"vocabularies": {name: getattr(index, name).ids for name in _VOCABULARIES}, **extras},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+    # Lay out sections relative to the start of the body (after magic + length + header)
+    layout: Dict[str, Any] = {}
+    cursor = 0
+    for name in _COLUMNS:
+        column = getattr(index, name)
+        layout[name] = {"dtype": column.dtype.str, "offset": cursor, "count": len(column)}
+        cursor += column.nbytes
+        cursor += -cursor % _ALIGN
+    layout["offsets"] = {"dtype": "<i8", "offset": cursor, "count": len(records) + 1}
+    cursor += 8 * (len(records) + 1)
+    records_offset = cursor
+    lengths = np.fromiter((len(record) for record in records), dtype="<i8", count=len(records))
+    records_size = int(lengths.sum())
+    cursor += records_size
+    cursor += -cursor % _ALIGN
+    blob_offset = cursor
+
+    header = json.dumps({
+        "generation": generation,
+        "created": created if created is not None else time.time(),
+        "count": len(records),
+        "columns": layout,
+        "records_offset": records_offset,
+        "blob_offset": blob_offset,
+        "blob_length": len(blob),
+    }).encode()
+    body_start = len(MAGIC) + _LENGTH.size + len(header)
+    body_start += -body_start % _ALIGN
+
+    # Absolute byte offsets of each record (row i spans offsets[i]:offsets[i + 1])
+    offsets = np.empty(len(records) + 1, dtype="<i8")
+    offsets[0] = body_start + records_offset
+    offsets[1:] = offsets[0] + np.cumsum(lengths)
+
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".listings.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(MAGIC)
+            handle.write(_LENGTH.pack(len(header)))
+            handle.write(header)
+            _pad(handle, len(MAGIC) + _LENGTH.size + len(header))
+            position = 0
+            for name in _COLUMNS:
+                handle.write(np.ascontiguousarray(getattr(index, name)).tobytes())
+                position = _pad(handle, position + getattr(index, name).nbytes)
+            handle.write(offsets.tobytes())
+            for record in records:
+                handle.write(record)
+            _pad(handle, records_offset + records_size)
+            handle.write(blob)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
+
+    logger.info(f"Published listings snapshot generation {generation} ({len(records)} listings)")
+    return generation
+
+
+def read_header(path: Path) -> Optional[Dict[str, Any]]:
+    """Snapshot header, or None when the file is missing or not a snapshot."""
+    try:
+        with open(path, "rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = _LENGTH.unpack(handle.read(_LENGTH.size))
+            return json.loads(handle.read(length))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def load_snapshot(path: Path) -> Optional[ListingsSnapshot]:
+    """
+    Map a snapshot file read-only.
+
+    Returns:
+        ListingsSnapshot, or None when the file is missing or unreadable
+    """
+    try:
+        with open(path, "rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if buffer[:len(MAGIC)] != MAGIC:
+            return None
+        (length,) = _LENGTH.unpack_from(buffer, len(MAGIC))
+        header_start = len(MAGIC) + _LENGTH.size
+        header = json.loads(buffer[header_start:header_start + length])
+        body_start = header_start + length
+        body_start += -body_start % _ALIGN
+
+        def column(spec: Dict[str, Any]) -> np.ndarray:
+            return np.frombuffer(buffer, dtype=spec["dtype"], count=spec["count"], offset=body_start + spec["offset"])
+
+        blob_start = body_start + header["blob_offset"]
+        extras = pickle.loads(buffer[blob_start:blob_start + header["blob_length"]])
+        listings = SnapshotListings(buffer, column(header["columns"]["offsets"]))
+        index = ListingsIndex.from_columns(
+            listings,
+            {name: column(header["columns"][name]) for name in _COLUMNS},
+            extras.pop("vocabularies"),
+        )
+    except (ValueError, KeyError, struct.error, pickle.UnpicklingError, EOFError) as e:
+        logger.warning(f"Ignoring unreadable listings snapshot {path}: {str(e)}")
+        return None
+
+    return ListingsSnapshot(header["generation"], header["created"], listings, index, extras)
+
+
+class RefreshLock:
+    """Cross-process refresh lock (flock), so only one worker downloads the feed."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def _lock(self, flags: int) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, flags)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def try_acquire(self) -> bool:
+        """Take the lock if free; False when another worker is refreshing."""
+        return self._lock(fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def acquire(self) -> None:
+        """Block until the lock is free (run in a thread)."""
+        self._lock(fcntl.LOCK_EX)
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,110 @@
+"""
+Market facets - per-city, per-ZIP, per-property-type and per-status summaries.
+
+Facets are computed from the columnar listings index once per feed refresh, so
+general questions ("how many homes are for sale in 32162?", "what's the typical
+price in Lady Lake?") are answered with a dictionary lookup instead of a scan.
+"""
+
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+from src.utils.listings_index import ListingsIndex
+
+# Statuses that count as "for sale" (same set the general property search uses)
+FOR_SALE_STATUSES = ("active", "available", "")
+
+
+def summarize_rows(index: ListingsIndex, rows: np.ndarray) -> Dict[str, Any]:
+    """
+    Summary statistics for a set of index rows.
+
+    Returns:
+        Dict with count, price percentiles (None when empty) and bedroom/bathroom
+        distributions keyed by count ("3", "2.5")
+    """
+    if not len(rows):
+        return {"count": 0, "price": None, "bedrooms": {}, "bathrooms": {}}
+
+    prices = index.price[rows]
+    p25, median, p75 = np.percentile(prices, [25, 50, 75])
+
+    def distribution(values: np.ndarray) -> Dict[str, int]:
+        keys, counts = np.unique(values, return_counts=True)
+        return {f"{k:g}": int(c) for k, c in zip(keys, counts)}
+
+    return {
+        "count": int(len(rows)),
+        "price": {
+            "min": float(prices.min()),
+            "p25": float(p25),
+            "median": float(median),
+            "p75": float(p75),
+            "max": float(prices.max()),
+        },
+        "bedrooms": distribution(index.beds[rows]),
+        "bathrooms": distribution(index.baths[rows]),
+    }
+
+
+def _facet_by(
+    index: ListingsIndex,
+    column: np.ndarray,
+    vocab: Mapping[str, int],
+    rows: np.ndarray,
+) -> Dict[str, Any]:
+    """Group rows by a categorical column and summarize each group."""
+    if not len(rows):
+        return {}
+    names = {i: value for value, i in vocab.items()}
+    ids = column[rows]
+    order = np.argsort(ids, kind="stable")
+    sorted_rows, sorted_ids = rows[order], ids[order]
+    unique_ids, starts = np.unique(sorted_ids, return_index=True)
+    groups = np.split(sorted_rows, starts[1:])
+    return {
+        names[int(i)]: summarize_rows(index, group)
+        for i, group in zip(unique_ids, groups)
+        if names[int(i)]
+    }
+
+
+def compute_market_facets(
+    index: ListingsIndex,
+    area_groups: Optional[Mapping[str, Iterable[str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Compute all facets for the current feed.
+
+    City, ZIP and property-type facets cover for-sale listings only; the status
+    facet covers the whole feed so pending/sold counts are available too.
+
+    Args:
+        index: Columnar index over the feed
+        area_groups: Extra city facets that aggregate several municipalities,
+            e.g. {"the villages": {"the villages", "lady lake", ...}}
+
+    Returns:
+        {"all": summary, "city": {...}, "zip": {...}, "property_type": {...}, "status": {...}}
+        with lowercase keys for city, property type and status
+    """
+    all_rows = np.arange(len(index))
+    for_sale = index.rows(index.mask(statuses=FOR_SALE_STATUSES))
+
+    facets: Dict[str, Any] = {
+        "all": summarize_rows(index, for_sale),
+        "city": _facet_by(index, index.city_id, index.cities.ids, for_sale),
+        "zip": _facet_by(index, index.zip_id, index.zips.ids, for_sale),
+        "property_type": _facet_by(index, index.type_id, index.property_types.ids, for_sale),
+        "status": _facet_by(index, index.status_code, index.statuses.ids, all_rows),
+    }
+
+    for area, members in (area_groups or {}).items():
+        member_set = frozenset(members)
+        area_rows = index.rows(
+            index.mask(city_matches=lambda c: c in member_set, statuses=FOR_SALE_STATUSES)
+        )
+        facets["city"][area] = summarize_rows(index, area_rows)
+
+    return facets
@@ -0,0 +1,99 @@
+"""
+Bounded offload pools for CPU-heavy work (feed parsing, wide fuzzy searches).
+
+Anything that would hold the event loop for tens of milliseconds - parsing the
+XML feed, building the listing indexes, scanning thousands of addresses - runs in
+a worker pool instead, so other tool calls (notably route_to_agent transfers)
+keep being served. Each pool admits a bounded number of jobs; further callers
+wait asynchronously for a slot rather than piling work onto the executor queue.
+
+Pools are created lazily on first use, so importing this module (and tests that
+never offload) cost nothing.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+from src.config.settings import settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_executors: Dict[str, Executor] = {}
+_slots: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+
+def _executor(kind: str) -> Executor:
+    """Create (once) the executor for "process" or "thread" work."""
+    if kind not in _executors:
+        if kind == "process":
+            # forkserver: never fork the running event loop / its threads
+            _executors[kind] = ProcessPoolExecutor(
+                max_workers=max(1, settings.OFFLOAD_PROCESS_WORKERS),
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        else:
+            _executors[kind] = ThreadPoolExecutor(
+                max_workers=max(1, settings.OFFLOAD_THREAD_WORKERS),
+                thread_name_prefix="offload",
+            )
+        logger.info(f"Started {kind} offload pool")
+    return _executors[kind]
+
+
+def _slot(kind: str) -> asyncio.Semaphore:
+    """Admission semaphore bounding running + queued jobs per pool (one per event loop)."""
+    loop = asyncio.get_running_loop()
+    entry = _slots.get(kind)
+    if entry is None or entry[0] is not loop:
+        entry = (loop, asyncio.Semaphore(max(1, settings.OFFLOAD_MAX_PENDING)))
+        _slots[kind] = entry
+    return entry[1]
+
+
+async def run_offloaded(kind: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run fn(*args, **kwargs) in the "process" or "thread" pool without blocking the loop.
+
+    Process jobs must be picklable (module-level function and arguments).
+    "inline" runs fn directly on the loop (debugging / constrained environments).
+
+    Args:
+        kind: "process", "thread" or "inline"
+        fn: Function to run
+
+    Returns:
+        fn's return value (exceptions propagate)
+    """
+    if kind == "inline":
+        return fn(*args, **kwargs)
+
+    async with _slot(kind):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor(kind), functools.partial(fn, *args, **kwargs))
+
+
+async def run_in_thread(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Shorthand for run_offloaded("thread", ...)."""
+    return await run_offloaded("thread", fn, *args, **kwargs)
+
+
+def shutdown_offload_pools(wait: bool = False) -> None:
+    """Shut down all pools (app shutdown)."""
+    for kind, executor in list(_executors.items()):
+        executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info(f"Stopped {kind} offload pool")
+    _executors.clear()
+    _slots.clear()
+
+
+def feed_parse_mode() -> str:
+    """Pool used for XML feed parsing: "process", "thread" or "inline"."""
+    mode = (settings.OFFLOAD_FEED_PARSE_MODE or "process").lower()
+    return mode if mode in ("process", "thread", "inline") else "process"
+
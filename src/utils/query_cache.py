@@ -0,0 +1,69 @@
+"""
+Bounded, versioned LRU cache for search results.
+
+Entries are tagged with a data version (e.g. the XML feed version). The first
+lookup or store with a newer version drops everything cached for the old one, so
+a feed refresh invalidates results without the feed code knowing about the cache.
+Entries also expire after a TTL, which bounds staleness for sources that are not
+versioned (manual listings fallback).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class QueryCache:
+    """LRU cache keyed by a hashable query key plus a data version."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._version: Optional[Hashable] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, version: Hashable) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        """
+        Cached value for key at version, or None on miss/expiry.
+
+        Args:
+            key: Canonical query key
+            version: Current data version
+
+        Returns:
+            Cached value or None
+        """
+        self._sync_version(version)
+        entry = self._entries.get(key)
+        if entry is None or (time.monotonic() - entry[0]) > self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, version: Hashable) -> None:
+        """Store value for key at version, evicting the least recently used entry when full."""
+        if self.max_entries <= 0:
+            return
+        self._sync_version(version)
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
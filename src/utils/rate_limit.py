@@ -0,0 +1,120 @@
+"""
+Token-bucket rate limiting for outbound traffic (calls, SMS, CRM requests).
+
+A bucket refills continuously at `rate` tokens per second up to `capacity`, so
+short bursts are allowed while the long-run rate stays at or below `rate`.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional, Tuple
+
+
+class TokenBucket:
+    """Async token bucket; acquire() waits until a token is available."""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_second: Sustained rate (tokens added per second); <= 0 disables limiting
+            capacity: Burst size (default: one second's worth, at least 1)
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def per_minute(cls, count: float, burst: Optional[float] = None) -> "TokenBucket":
+        """Bucket allowing count per minute (burst defaults to 1)."""
+        return cls(count / 60.0, burst if burst is not None else 1.0)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` are available (0 when available now)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        missing = tokens - self._tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all tokens for at least seconds (server asked us to slow down)."""
+        if self.rate <= 0 or seconds <= 0:
+            return
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available now, without waiting."""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait for and take tokens (waiters are served in arrival order)."""
+        if self.rate <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep(self.delay(tokens))
+
+
+class PriorityTokenBucket(TokenBucket):
+    """Token bucket whose waiters are served by priority (lower first), FIFO within a priority."""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        super().__init__(rate_per_second, capacity)
+        self._waiters: List[Tuple[int, int, float, "asyncio.Future[None]"]] = []
+        self._order = itertools.count()
+        self._dispatcher: Optional["asyncio.Task[None]"] = None
+        self._dispatcher_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def acquire(self, tokens: float = 1.0, priority: int = 0) -> None:
+        """Wait for and take tokens; a waiting lower priority number is served first."""
+        if self.rate <= 0:
+            return
+        if not self._waiters and self.try_acquire(tokens):
+            return
+        loop = asyncio.get_running_loop()
+        if self._dispatcher_loop is not loop:
+            self._waiters = []  # waiters of a previous event loop can never be served
+        future: "asyncio.Future[None]" = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), tokens, future))
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher_loop is not loop:
+            self._dispatcher_loop = loop
+            self._dispatcher = loop.create_task(self._dispatch())
+        await future  # cancelled waiters are skipped by the dispatcher
+
+    def waiting(self) -> int:
+        """Number of callers waiting for a token."""
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = self.delay(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue  # a higher-priority waiter may have arrived meanwhile
+            if self.try_acquire(tokens):
+                heapq.heappop(self._waiters)
+                future.set_result(None)
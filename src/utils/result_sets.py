@@ -0,0 +1,164 @@
+"""
+Server-side result sets for multi-result searches.
+
+check_property keeps the full match list here and hands the caller an opaque
+cursor. Follow-ups ("tell me about the next ones", "what about number 6?") then
+read a slice of the stored list instead of re-running the search.
+
+With a shared cache backend (CACHE_BACKEND=redis) result sets are also published
+there, so a follow-up routed to another machine still finds the cursor.
+"""
+
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from src.utils.cache import CacheBackend, get_cache
+
+
+class ResultSet:
+    """Stored search results plus the paging position."""
+
+    def __init__(
+        self,
+        results: List[Dict[str, Any]],
+        page_size: int,
+        search_params: Optional[Dict[str, Any]] = None,
+        next_offset: int = 0,
+    ):
+        self.results = results
+        self.page_size = page_size
+        self.search_params = search_params or {}
+        self.next_offset = next_offset
+        self.created_at = time.monotonic()
+
+    @property
+    def total(self) -> int:
+        return len(self.results)
+
+    def page(self, offset: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return page_size results starting at offset (defaults to the stored position)
+        and advance the stored position past them.
+        """
+        start = self.next_offset if offset is None else max(0, offset)
+        page = self.results[start:start + self.page_size]
+        self.next_offset = min(start + len(page), self.total)
+        return page
+
+    def get(self, index: int) -> Optional[Dict[str, Any]]:
+        """Result by 1-based position as spoken ("number 6"), None when out of range."""
+        if 1 <= index <= self.total:
+            return self.results[index - 1]
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form for the shared cache (age carried as wall-clock creation time)."""
+        return {
+            "results": self.results,
+            "page_size": self.page_size,
+            "search_params": self.search_params,
+            "next_offset": self.next_offset,
+            "created": time.time() - (time.monotonic() - self.created_at),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResultSet":
+        result_set = cls(
+            results=data["results"],
+            page_size=data["page_size"],
+            search_params=data.get("search_params"),
+            next_offset=data.get("next_offset", 0),
+        )
+        result_set.created_at = time.monotonic() - max(0.0, time.time() - data.get("created", time.time()))
+        return result_set
+
+
+class ResultSetStore:
+    """Bounded, TTL-limited store of result sets keyed by opaque cursor."""
+
+    def __init__(
+        self,
+        max_sets: int = 500,
+        ttl_seconds: float = 1800.0,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.max_sets = max_sets
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend  # None: the configured cache (used only when shared)
+        self._sets: "OrderedDict[str, ResultSet]" = OrderedDict()
+
+    def create(
+        self,
+        results: List[Dict[str, Any]],
+        page_size: int,
+        search_params: Optional[Dict[str, Any]] = None,
+        next_offset: int = 0,
+    ) -> str:
+        """
+        Store a result set and return its cursor.
+
+        Args:
+            results: Full ordered result list
+            page_size: Results per page for follow-up requests
+            search_params: Original search (echoed back to the caller)
+            next_offset: Position of the next page (results already read out)
+
+        Returns:
+            Opaque cursor string
+        """
+        cursor = secrets.token_urlsafe(9)
+        self._sets[cursor] = ResultSet(
+            results=list(results),
+            page_size=page_size,
+            search_params=dict(search_params or {}),
+            next_offset=next_offset,
+        )
+        while len(self._sets) > self.max_sets:
+            self._sets.popitem(last=False)
+        return cursor
+
+    def get(self, cursor: str) -> Optional[ResultSet]:
+        """Result set for cursor, or None if unknown or expired."""
+        result_set = self._sets.get(cursor)
+        if result_set is None:
+            return None
+        if (time.monotonic() - result_set.created_at) > self.ttl_seconds:
+            del self._sets[cursor]
+            return None
+        self._sets.move_to_end(cursor)
+        return result_set
+
+    def _shared_backend(self) -> Optional[CacheBackend]:
+        backend = self.backend or get_cache()
+        return backend if backend.shared else None
+
+    async def publish(self, cursor: str) -> None:
+        """Write the cursor's current state (e.g. after paging) to the shared cache."""
+        backend = self._shared_backend()
+        result_set = self._sets.get(cursor)
+        if backend is None or result_set is None:
+            return
+        remaining = self.ttl_seconds - (time.monotonic() - result_set.created_at)
+        if remaining > 0:
+            await backend.set_json(f"result_set:{cursor}", result_set.to_dict(), remaining)
+
+    async def fetch(self, cursor: str) -> Optional[ResultSet]:
+        """Result set for cursor from this process, else from the shared cache."""
+        result_set = self.get(cursor)
+        if result_set is not None:
+            return result_set
+        backend = self._shared_backend()
+        if backend is None:
+            return None
+        data = await backend.get_json(f"result_set:{cursor}")
+        if data is None:
+            return None
+        self._sets[cursor] = ResultSet.from_dict(data)
+        while len(self._sets) > self.max_sets:
+            self._sets.popitem(last=False)
+        return self.get(cursor)
+
+    def __len__(self) -> int:
+        return len(self._sets)
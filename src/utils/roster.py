@@ -17,11 +17,15 @@ _DEFAULT_ROSTER_PATH = "data/agent_roster.json"
 # Cached roster data (loaded on first access)
 _cached_roster: Optional[Dict[str, Any]] = None
 
+# Bumped whenever the roster cache is cleared, so listings resolved earlier are re-resolved
+_roster_generation = 0
+
 
 def clear_roster_cache() -> None:
-    """Clear the roster cache (for testing)."""
-    global _cached_roster
+    """Clear the roster cache (for testing, or to pick up an edited roster)."""
+    global _cached_roster, _roster_generation
     _cached_roster = None
+    _roster_generation += 1
 
 
 def _normalize_phone(phone: str) -> str:
@@ -47,6 +51,28 @@ def _agent_has_valid_phone(agent: Dict[str, Any]) -> bool:
     return bool(phone and _normalize_phone(phone))
 
 
+def _resolve_roster_path(roster_path: Optional[str] = None) -> Path:
+    """Roster file path; relative paths resolve against the project root (parent of src)."""
+    path = Path(roster_path or _DEFAULT_ROSTER_PATH)
+    if not path.is_absolute():
+        project_root = Path(__file__).resolve().parent.parent.parent
+        path = project_root / path
+    return path
+
+
+def get_roster_version(roster_path: Optional[str] = None) -> str:
+    """
+    Identify the roster contents that listing agents were resolved against.
+    Changes when the roster file is modified or the roster cache is cleared.
+    """
+    path = _resolve_roster_path(roster_path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = 0
+    return f"{_roster_generation}:{mtime}:{path.name}"
+
+
 def load_roster(roster_path: Optional[str] = None) -> Dict[str, Any]:
     """
     Load agent roster from JSON file. Caches result for subsequent calls (when using default path).
@@ -57,11 +83,7 @@ def load_roster(roster_path: Optional[str] = None) -> Dict[str, Any]:
     if _cached_roster is not None and roster_path is None:
         return _cached_roster
 
-    path = Path(roster_path or _DEFAULT_ROSTER_PATH)
-    if not path.is_absolute():
-        # Resolve relative to project root (parent of src)
-        project_root = Path(__file__).resolve().parent.parent.parent
-        path = project_root / path
+    path = _resolve_roster_path(roster_path)
 
     if not path.exists():
         logger.warning(f"Roster file not found: {path}")
@@ -86,7 +108,11 @@ def load_roster(roster_path: Optional[str] = None) -> Dict[str, Any]:
 
 def _get_all_transferable_agents(roster_path: Optional[str] = None) -> List[Dict[str, Any]]:
     """Return agents + staff with valid phone numbers (no TPT staff)."""
-    roster = load_roster(roster_path)
+    return _transferable_agents(load_roster(roster_path))
+
+
+def _transferable_agents(roster: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Agents + staff with valid phone numbers from an already loaded roster."""
     agents = roster.get("agents", []) or []
     staff = roster.get("staff", []) or []
     combined = agents + staff
@@ -112,13 +138,15 @@ def find_agent_by_name(
     """
     if not name or not name.strip():
         return None
+    return _match_agent_by_name(name, _get_all_transferable_agents(roster_path))
+
 
+def _match_agent_by_name(name: str, all_agents: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """find_agent_by_name against an already loaded agent list."""
     normalized_query = _normalize_name(name)
     if not normalized_query:
         return None
 
-    all_agents = _get_all_transferable_agents(roster_path)
-
     # --- Pass 1: Exact / substring match (original logic) ---
     for agent in all_agents:
         agent_name = agent.get("name") or ""
@@ -224,6 +252,61 @@ def get_any_agent(roster_path: Optional[str] = None) -> Optional[Dict[str, Any]]
     return agents[0] if agents else None
 
 
+def _listing_agent_fields(
+    listing: Dict[str, Any],
+    roster_agent: Optional[Dict[str, Any]],
+    fallback: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Transfer fields for a listing given its roster match (or the fallback agent)."""
+    xml_agent_name = (listing.get("agentName") or "").strip()
+    if roster_agent:
+        return {
+            "rosterMatched": True,
+            "transferAgentName": roster_agent.get("name") or xml_agent_name,
+            "transferPhone": roster_agent.get("cell_phone") or roster_agent.get("phone") or "",
+            "transferAgentEmail": roster_agent.get("email") or listing.get("agentEmail", ""),
+        }
+    if fallback:
+        return {
+            "rosterMatched": False,
+            "transferAgentName": fallback.get("name") or xml_agent_name or "an agent",
+            "transferPhone": fallback.get("cell_phone") or fallback.get("phone") or "",
+            "transferAgentEmail": fallback.get("email") or "",
+        }
+    return {
+        "rosterMatched": False,
+        "transferAgentName": xml_agent_name,
+        "transferPhone": "",
+        "transferAgentEmail": listing.get("agentEmail", ""),
+    }
+
+
+def annotate_listing_agents(
+    listings: List[Dict[str, Any]],
+    roster_path: Optional[str] = None,
+) -> None:
+    """
+    Resolve each listing's agentName against the roster and store the result on the listing.
+
+    Sets rosterMatched, transferAgentName, transferPhone, transferAgentEmail and
+    rosterVersion. Unmatched agents get the fallback agent's transfer details
+    (same as get_any_agent). The roster is loaded once and each distinct agent
+    name is looked up once.
+    """
+    version = get_roster_version(roster_path)
+    agents = _transferable_agents(load_roster(roster_path))
+    fallback = agents[0] if agents else None
+    matches: Dict[str, Optional[Dict[str, Any]]] = {}
+    for listing in listings:
+        xml_agent_name = (listing.get("agentName") or "").strip()
+        if xml_agent_name not in matches:
+            matches[xml_agent_name] = (
+                _match_agent_by_name(xml_agent_name, agents) if xml_agent_name else None
+            )
+        listing.update(_listing_agent_fields(listing, matches[xml_agent_name], fallback))
+        listing["rosterVersion"] = version
+
+
 def get_roster_phone_for_name(
     name: str,
     roster_path: Optional[str] = None,
@@ -0,0 +1,101 @@
+"""
+Keyed single-flight with an idempotency window.
+
+Vapi retries tool calls, and the LLM sometimes calls a tool twice in quick
+succession. Operations with side effects (lead creation: CRM writes, SMS) run
+through IdempotentSingleFlight: a request whose key matches one in flight awaits
+that same operation, and a request arriving within the window after a successful
+one gets the stored result instead of repeating the work.
+
+The operation runs as its own task, so it completes even if the request that
+started it is cancelled (caller hung up, HTTP client disconnected).
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class IdempotentSingleFlight:
+    """In-flight join plus a bounded, time-limited store of successful results per key."""
+
+    def __init__(
+        self,
+        window_seconds: float = 600.0,
+        max_entries: int = 1000,
+        is_success: Optional[Callable[[Any], bool]] = None,
+    ):
+        """
+        Args:
+            window_seconds: How long a successful result is replayed for its key
+            max_entries: Completed results kept at most (oldest dropped first)
+            is_success: Whether a result may be replayed (default: any result);
+                exceptions and unsuccessful results are never replayed
+        """
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.is_success = is_success or (lambda result: True)
+        self._in_flight: Dict[str, Tuple[asyncio.AbstractEventLoop, "asyncio.Task[Any]"]] = {}
+        self._done: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.joined = 0
+        self.replayed = 0
+
+    def _completed(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._done.get(key)
+        if entry is not None and (time.monotonic() - entry[0]) > self.window_seconds:
+            del self._done[key]
+            return None
+        return entry
+
+    async def run(self, key: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run operation once per key: join it if in flight, replay it if recently done.
+
+        Args:
+            key: Idempotency key (e.g. "buyer:+13525550142:<call id>")
+            operation: Coroutine function performing the work
+
+        Returns:
+            The operation's result (shared by every joined request)
+        """
+        completed = self._completed(key)
+        if completed is not None:
+            self.replayed += 1
+            return completed[1]
+
+        loop = asyncio.get_running_loop()
+        entry = self._in_flight.get(key)
+        if entry is not None and entry[0] is loop and not entry[1].done():
+            self.joined += 1
+            return await asyncio.shield(entry[1])
+
+        task = loop.create_task(operation())
+        self._in_flight[key] = (loop, task)
+        task.add_done_callback(lambda finished: self._finish(key, finished))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: "asyncio.Task[Any]") -> None:
+        entry = self._in_flight.get(key)
+        if entry is not None and entry[1] is task:
+            del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if self.window_seconds > 0 and self.is_success(result):
+            self._done[key] = (time.monotonic(), result)
+            self._done.move_to_end(key)
+            while len(self._done) > self.max_entries:
+                self._done.popitem(last=False)
+
+    def forget(self, key: str) -> None:
+        """Drop a stored result so the next request for key runs again."""
+        self._done.pop(key, None)
+
+    def clear(self) -> None:
+        self._done.clear()
+
+    def __len__(self) -> int:
+        return len(self._done)
@@ -0,0 +1,389 @@
+"""
+Outbound SMS outbox with per-sender throughput shaping.
+
+Twilio accepts roughly one message segment per second from a long code; bursts
+above that come back as 429s. Every SMS now goes through the outbox, which keeps
+one FIFO lane per sending number and:
+
+- paces each lane with a token bucket charged per segment (a 300-character
+  message costs two or more tokens, not one),
+- packs messages queued for the same recipient into one SMS when that saves
+  segments (a burst of office alerts becomes one longer text),
+- retries throttled (429) and temporarily unavailable responses with jittered
+  exponential backoff, pausing the whole lane (while Twilio's circuit breaker
+  is open messages are held without using up attempts),
+- drops a message identical to one sent to the same recipient within the dedupe
+  window (or already queued), and
+- counts what it did (stats()) for the health endpoint.
+
+send() waits for delivery and returns Twilio's result; queue() returns at once
+for notifications whose caller does not need the outcome.
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.utils.contact_cache import normalize_phone
+from src.utils.deadline import within_deadline
+from src.utils.logger import get_logger
+from src.utils.rate_limit import TokenBucket
+
+logger = get_logger(__name__)
+
+Deliver = Callable[[str, str], Awaitable[Dict[str, Any]]]
+
+_GSM_7 = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+_GSM_7_EXTENDED = frozenset("^{}\\[~]|€")
+_THROTTLED_CODES = {20429, 14107}  # Twilio "Too Many Requests" / "SMS send rate limit exceeded"
+_RETRYABLE_STATUS = {429, 502, 503, 504}
+_BATCH_SEPARATOR = "\n\n"
+
+
+def sms_segments(body: str) -> int:
+    """Number of segments Twilio bills and paces for body (GSM-7 or UCS-2 encoding)."""
+    if all(char in _GSM_7 or char in _GSM_7_EXTENDED for char in body):
+        length = len(body) + sum(1 for char in body if char in _GSM_7_EXTENDED)
+        single, multi = 160, 153
+    else:
+        length = len(body.encode("utf-16-le")) // 2
+        single, multi = 70, 67
+    return 1 if length <= single else math.ceil(length / multi)
+
+
+def _status_and_code(error: Exception) -> Tuple[Optional[int], Optional[int]]:
+    details = getattr(error, "details", None) or {}
+    return getattr(error, "status_code", None), details.get("code")
+
+
+def _circuit_open(error: Exception) -> bool:
+    return (getattr(error, "details", None) or {}).get("circuit") == "open"
+
+
+def is_throttled(error: Exception) -> bool:
+    """True for a Twilio rate-limit response."""
+    status, code = _status_and_code(error)
+    return status == 429 or code in _THROTTLED_CODES
+
+
+class _OutgoingSms:
+    """One queued message and the future its sender waits on."""
+
+    def __init__(self, to: str, body: str, deliver: Deliver, key: Tuple[str, str], future: "asyncio.Future[Any]"):
+        self.to = to
+        self.body = body
+        self.deliver = deliver
+        self.key = key
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class _SenderLane:
+    """FIFO of messages from one sending number, drained by one worker task."""
+
+    def __init__(self, bucket: TokenBucket, loop: asyncio.AbstractEventLoop):
+        self.bucket = bucket
+        self.loop = loop
+        self.items: Deque[_OutgoingSms] = deque()
+        self.worker: Optional["asyncio.Task[None]"] = None
+        self.paused_until = 0.0
+        self.sending = 0  # messages taken off the queue, not yet settled
+
+
+class SmsOutbox:
+    """Paced, deduplicating, retrying SMS queue with one lane per sending number."""
+
+    def __init__(
+        self,
+        segments_per_second: float = 1.0,
+        burst_segments: float = 1.0,
+        dedupe_window_seconds: float = 300.0,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 2.0,
+        retry_max_seconds: float = 60.0,
+        batch_max_chars: int = 1600,
+        max_dedupe_entries: int = 2000,
+    ):
+        """
+        Args:
+            segments_per_second: Sustained segments per second per sending number (<= 0: unlimited)
+            burst_segments: Segments a lane may send back to back after idling
+            dedupe_window_seconds: Drop a message identical to one sent to the same recipient this recently
+            max_attempts: Delivery attempts per message before it is reported as failed
+            retry_base_seconds: First retry delay (doubled per attempt, jittered)
+            retry_max_seconds: Longest retry delay
+            batch_max_chars: Longest packed message (0 disables packing)
+            max_dedupe_entries: Sent messages remembered for dedupe
+        """
+        self.segments_per_second = segments_per_second
+        self.burst_segments = burst_segments
+        self.dedupe_window_seconds = dedupe_window_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.batch_max_chars = batch_max_chars
+        self.max_dedupe_entries = max_dedupe_entries
+
+        self._lanes: Dict[str, _SenderLane] = {}
+        self._pending: Dict[Tuple[str, str], "asyncio.Future[Any]"] = {}
+        self._recent: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self.sent = 0
+        self.segments = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.deduplicated = 0
+        self.throttled = 0
+        self.retried = 0
+        self.failed = 0
+        self._wait_total_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    # ------------------------------------------------------------------ public
+
+    async def send(self, sender: str, to: str, body: str, deliver: Deliver) -> Dict[str, Any]:
+        """
+        Queue a message and wait until it is delivered.
+
+        Args:
+            sender: Sending number (selects the lane and its rate limit)
+            to: Recipient number
+            body: Message text
+            deliver: Sends one message now: deliver(to, body) -> result dict
+
+        Returns:
+            deliver's result ("deduplicated": True when an identical message was sent recently;
+            "queued": True when the tool's deadline came first, the message still goes out)
+
+        Raises:
+            The last delivery error once retries are exhausted or the error is not retryable
+        """
+        recent = self._recently_sent(to, body)
+        if recent is not None:
+            return recent
+        future = self._enqueue(sender, to, body, deliver)
+        try:
+            return await within_deadline(future)
+        except asyncio.TimeoutError:
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            logger.info(f"SMS to {to} still queued at the tool deadline; delivering in background")
+            return {"status": "queued", "to": to, "queued": True}
+
+    def queue(self, sender: str, to: str, body: str, deliver: Deliver) -> Optional["asyncio.Future[Any]"]:
+        """
+        Queue a message without waiting (call from the running event loop).
+
+        Returns:
+            Future resolving to the delivery result, or None when deduplicated
+        """
+        if self._recently_sent(to, body) is not None:
+            return None
+        future = self._enqueue(sender, to, body, deliver)
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return future
+
+    async def drain(self, timeout_seconds: float) -> int:
+        """
+        Wait up to timeout_seconds for every lane to empty (app shutdown).
+
+        Returns:
+            Messages still queued when the timeout expired
+        """
+        deadline = time.monotonic() + timeout_seconds
+        while len(self) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        remaining = len(self)
+        if remaining:
+            logger.warning(f"SMS outbox stopped with {remaining} message(s) undelivered")
+        return remaining
+
+    def stats(self) -> Dict[str, Any]:
+        """Delivery counters since start (no recipients or message text)."""
+        return {
+            "queued": len(self),
+            "sent": self.sent,
+            "segments": self.segments,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "deduplicated": self.deduplicated,
+            "throttled": self.throttled,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_queue_wait_ms": round(self._wait_total_ms / self.sent, 1) if self.sent else 0.0,
+            "max_queue_wait_ms": round(self.max_wait_ms, 1),
+        }
+
+    def clear(self) -> None:
+        """Forget lanes, dedupe history and counters (tests)."""
+        self._lanes.clear()
+        self._pending.clear()
+        self._recent.clear()
+        self._reset_stats()
+
+    def __len__(self) -> int:
+        """Messages queued or being sent."""
+        return sum(len(lane.items) + lane.sending for lane in self._lanes.values())
+
+    # ------------------------------------------------------------------ queue
+
+    @staticmethod
+    def _key(to: str, body: str) -> Tuple[str, str]:
+        return normalize_phone(to) or to, body
+
+    def _recently_sent(self, to: str, body: str) -> Optional[Dict[str, Any]]:
+        key = self._key(to, body)
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        if (time.monotonic() - entry[0]) > self.dedupe_window_seconds:
+            del self._recent[key]
+            return None
+        self.deduplicated += 1
+        logger.info("Skipping SMS identical to one sent to the same recipient recently")
+        return {**entry[1], "deduplicated": True}
+
+    def _enqueue(self, sender: str, to: str, body: str, deliver: Deliver) -> "asyncio.Future[Any]":
+        key = self._key(to, body)
+        pending = self._pending.get(key)
+        loop = asyncio.get_running_loop()
+        if pending is not None and not pending.done() and pending.get_loop() is loop:
+            self.deduplicated += 1
+            return pending
+
+        lane = self._lane(sender, loop)
+        item = _OutgoingSms(to, body, deliver, key, loop.create_future())
+        lane.items.append(item)
+        self._pending[key] = item.future
+        if lane.worker is None or lane.worker.done():
+            lane.worker = loop.create_task(self._run(lane))
+        return item.future
+
+    def _lane(self, sender: str, loop: asyncio.AbstractEventLoop) -> _SenderLane:
+        lane = self._lanes.get(sender)
+        if lane is not None and lane.loop is loop:
+            return lane
+        bucket = TokenBucket(self.segments_per_second, max(1.0, self.burst_segments))
+        fresh = _SenderLane(bucket, loop)
+        if lane is not None:
+            # Messages left by a previous event loop move to this one
+            for item in lane.items:
+                item.future = loop.create_future()
+                self._pending[item.key] = item.future
+            fresh.items = lane.items
+        self._lanes[sender] = fresh
+        return fresh
+
+    # ------------------------------------------------------------------ worker
+
+    async def _run(self, lane: _SenderLane) -> None:
+        while lane.items:
+            paused_for = lane.paused_until - time.monotonic()
+            if paused_for > 0:
+                await asyncio.sleep(paused_for)
+                continue
+            batch, body = self._take_batch(lane)
+            lane.sending = len(batch)
+            try:
+                for _ in range(sms_segments(body)):
+                    await lane.bucket.acquire()
+                await self._deliver(lane, batch, body)
+            finally:
+                lane.sending = 0
+
+    def _take_batch(self, lane: _SenderLane) -> Tuple[List[_OutgoingSms], str]:
+        """Next message plus later ones for the same recipient that fit in fewer segments together."""
+        first = lane.items.popleft()
+        batch, body = [first], first.body
+        if self.batch_max_chars <= 0:
+            return batch, body
+        for item in list(lane.items):
+            if item.key[0] != first.key[0]:
+                continue
+            packed = f"{body}{_BATCH_SEPARATOR}{item.body}"
+            if len(packed) <= self.batch_max_chars and sms_segments(packed) < sms_segments(body) + sms_segments(item.body):
+                lane.items.remove(item)
+                batch.append(item)
+                body = packed
+        return batch, body
+
+    def _retry_delay(self, attempt: int) -> float:
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _deliver(self, lane: _SenderLane, batch: List[_OutgoingSms], body: str) -> None:
+        first = batch[0]
+        for item in batch:
+            item.attempts += 1
+        attempts = max(item.attempts for item in batch)
+        try:
+            result = await first.deliver(first.to, body)
+        except Exception as e:
+            status, _ = _status_and_code(e)
+            throttled = is_throttled(e)
+            self.throttled += int(throttled)
+            if _circuit_open(e):
+                # Twilio is known to be down: hold the messages without using up attempts
+                for item in batch:
+                    item.attempts -= 1
+                attempts = 0
+            if (throttled or status in _RETRYABLE_STATUS) and attempts < self.max_attempts:
+                delay = self._retry_delay(attempts) if attempts else self.retry_max_seconds / 4
+                lane.paused_until = time.monotonic() + delay
+                lane.items.extendleft(reversed(batch))
+                self.retried += 1
+                logger.warning(f"SMS send throttled/unavailable (attempt {attempts}); lane paused {delay:.1f}s")
+                return
+            self.failed += len(batch)
+            logger.error(f"SMS delivery failed after {attempts} attempt(s): {str(e)}")
+            for item in batch:
+                self._settle(item, error=e)
+            return
+
+        now = time.monotonic()
+        self.batches += 1
+        self.segments += sms_segments(body)
+        if len(batch) > 1:
+            self.coalesced += len(batch) - 1
+            result = {**result, "batched": len(batch)}
+        for item in batch:
+            waited_ms = (now - item.enqueued_at) * 1000
+            self.sent += 1
+            self._wait_total_ms += waited_ms
+            self.max_wait_ms = max(self.max_wait_ms, waited_ms)
+            if self.dedupe_window_seconds > 0:
+                self._recent[item.key] = (now, result)
+                self._recent.move_to_end(item.key)
+            self._settle(item, result=result)
+        while len(self._recent) > self.max_dedupe_entries:
+            self._recent.popitem(last=False)
+
+    def _settle(self, item: _OutgoingSms, result: Any = None, error: Optional[Exception] = None) -> None:
+        if self._pending.get(item.key) is item.future:
+            del self._pending[item.key]
+        if item.future.done():
+            return
+        if error is not None:
+            item.future.set_exception(error)
+        else:
+            item.future.set_result(result)
+
+
+sms_outbox = SmsOutbox(
+    # The limit is per sending number, shared by every worker process
+    segments_per_second=settings.SMS_SEGMENTS_PER_SECOND / max(1, settings.WORKERS),
+    burst_segments=settings.SMS_BURST_SEGMENTS,
+    dedupe_window_seconds=settings.SMS_DEDUPE_WINDOW_SECONDS,
+    max_attempts=settings.SMS_MAX_ATTEMPTS,
+    retry_base_seconds=settings.SMS_RETRY_BASE_SECONDS,
+    batch_max_chars=settings.SMS_BATCH_MAX_CHARS,
+)
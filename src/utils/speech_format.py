@@ -4,12 +4,20 @@ Helpers for formatting values into speech-friendly text for voice agents.
 These helpers are intentionally simple and optimized for common real-estate patterns:
 - Addresses like "6794 BOSS COURT" should be spoken like "sixty-seven ninety-four Boss Court"
 - Prices like 339000 should be spoken like "three thirty-nine thousand" (or "about three forty")
+
+Listings get their spoken strings once at feed ingest (render_listing_speech), so
+responses only concatenate stored text. The formatters are memoized for the
+remaining per-call uses (price ranges, manual listings).
 """
 
 from __future__ import annotations
 
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+_STREET_NUMBER_RE = re.compile(r"^(?P<num>\d{1,6})\s+(?P<rest>.+)$")
+_WHITESPACE_RE = re.compile(r"\s+")
 
 
 _ONES = {
@@ -91,6 +99,7 @@ def number_to_spoken_pair_style(n: int) -> str:
     return s
 
 
+@lru_cache(maxsize=8192)
 def format_spoken_address(address: str) -> str:
     """
     Convert an address string into a more speakable form.
@@ -100,7 +109,7 @@ def format_spoken_address(address: str) -> str:
         return address
     address = address.strip()
 
-    m = re.match(r"^(?P<num>\\d{1,6})\\s+(?P<rest>.+)$", address)
+    m = _STREET_NUMBER_RE.match(address)
     if not m:
         # title-case the non-numeric address lightly
         return _titleish(address)
@@ -129,6 +138,12 @@ def format_spoken_price(price: Optional[float]) -> Optional[str]:
     if p <= 0:
         return None
 
+    return _spoken_whole_price(p)
+
+
+@lru_cache(maxsize=4096)
+def _spoken_whole_price(p: int) -> str:
+    """format_spoken_price for a positive whole-dollar price (memoized)."""
     if p >= 1_000_000:
         millions = p / 1_000_000
         # Keep it simple: 1.25 -> "one point two five"
@@ -206,7 +221,7 @@ def _titleish(s: str) -> str:
     # Keep common ALL CAPS from MLS but don't over-format.
     # This makes "BOSS COURT" -> "Boss Court" while preserving acronyms.
     words = []
-    for w in re.split(r"\\s+", s.strip()):
+    for w in _WHITESPACE_RE.split(s.strip()):
         if not w:
             continue
         if len(w) <= 2 and w.isupper():
@@ -216,3 +231,33 @@ def _titleish(s: str) -> str:
     return " ".join(words)
 
 
+
+
+def format_spoken_bed_bath(bedrooms: Any, bathrooms: Any) -> str:
+    """
+    Bed/bath phrase as used in property descriptions:
+    (3, 2.0) -> "3 bedroom, 2 bathroom"; (3, 2.5) -> "3 bedroom, 2.5 bathroom"
+    """
+    def count(value: Any) -> str:
+        try:
+            return f"{float(value or 0):g}"
+        except (TypeError, ValueError):
+            return "0"
+
+    return f"{count(bedrooms)} bedroom, {count(bathrooms)} bathroom"
+
+
+def render_listing_speech(listing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Store spoken address, price and bed/bath phrase on a listing (in place).
+
+    Adds "spokenAddress", "spokenPrice" and "spokenBedBath"; called once per
+    listing when the feed is ingested.
+
+    Returns:
+        The same listing dict
+    """
+    listing["spokenAddress"] = format_spoken_address(listing.get("address") or "")
+    listing["spokenPrice"] = format_spoken_price(listing.get("price"))
+    listing["spokenBedBath"] = format_spoken_bed_bath(listing.get("bedrooms"), listing.get("bathrooms"))
+    return listing
@@ -0,0 +1,121 @@
+"""
+Street-name dictionary - typo-tolerant lookup from spoken street words to feed rows.
+
+Distinct street-name words from the feed are indexed by trigram and by metaphone
+key. A fuzzy address query ("3016 Gallenoll Court") first resolves each word to a
+handful of candidate dictionary words, verifies only those with the same word
+matcher the per-listing search uses, and then reads the rows for the surviving
+words. Cost depends on the number of distinct street words, not the feed size.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+import jellyfish
+import numpy as np
+
+# Words this short have almost no trigrams; they are always verified directly
+_SHORT_WORD_LEN = 3
+
+
+def _trigrams(word: str) -> Set[str]:
+    """Boundary-padded trigrams ("$ga", "gal", ..., "le$")."""
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _phonetic(word: str) -> str:
+    """Metaphone key for a word, empty when it cannot be computed."""
+    try:
+        return jellyfish.metaphone(word)
+    except (TypeError, ValueError):
+        return ""
+
+
+class StreetIndex:
+    """Trigram + metaphone index over the distinct street-name words of the feed."""
+
+    def __init__(
+        self,
+        listings: Sequence[Dict[str, Any]],
+        street_words: Callable[[str], List[str]],
+    ):
+        """
+        Args:
+            listings: Feed listings (row i is listings[i])
+            street_words: Extracts street-name words from a raw address, with the
+                same normalization the address matcher uses
+        """
+        self._rows_by_word: Dict[str, List[int]] = {}
+        for row, listing in enumerate(listings):
+            for word in set(street_words(str(listing.get("address") or ""))):
+                self._rows_by_word.setdefault(word, []).append(row)
+
+        self._words_by_trigram: Dict[str, Set[str]] = {}
+        self._words_by_phonetic: Dict[str, Set[str]] = {}
+        self._short_words: Set[str] = set()
+        for word in self._rows_by_word:
+            for gram in _trigrams(word):
+                self._words_by_trigram.setdefault(gram, set()).add(word)
+            key = _phonetic(word)
+            if key:
+                self._words_by_phonetic.setdefault(key, set()).add(word)
+            if len(word) <= _SHORT_WORD_LEN:
+                self._short_words.add(word)
+
+    def candidate_words(self, word: str) -> Set[str]:
+        """Dictionary words that could match word (shared trigram, same metaphone, or short)."""
+        candidates: Set[str] = set(self._short_words)
+        for gram in _trigrams(word):
+            candidates |= self._words_by_trigram.get(gram, set())
+        key = _phonetic(word)
+        if key:
+            candidates |= self._words_by_phonetic.get(key, set())
+        return candidates
+
+    def matching_words(self, word: str, word_matches: Callable[[str, List[str]], bool]) -> List[str]:
+        """Candidate dictionary words accepted by word_matches(word, [candidate])."""
+        return [w for w in self.candidate_words(word) if word_matches(word, [w])]
+
+    def _rows_for_words(self, words: Iterable[str]) -> Set[int]:
+        rows: Set[int] = set()
+        for word in words:
+            rows.update(self._rows_by_word[word])
+        return rows
+
+    def candidate_rows(
+        self,
+        search_words: List[str],
+        word_matches: Callable[[str, List[str]], bool],
+    ) -> Optional[np.ndarray]:
+        """
+        Rows whose street could match the search words.
+
+        Every search word must match a word of the row's street; a multi-word search
+        may instead match as one compound word ("bella vista" -> "bellavista").
+
+        Args:
+            search_words: Normalized street-name words from the query
+            word_matches: Word matcher (search_word, [listing_word]) -> bool
+
+        Returns:
+            Sorted row numbers, or None when the query has no street words to look up
+        """
+        if not search_words:
+            return None
+
+        rows: Optional[Set[int]] = None
+        for word in search_words:
+            word_rows = self._rows_for_words(self.matching_words(word, word_matches))
+            rows = word_rows if rows is None else rows & word_rows
+            if not rows:
+                break
+
+        if len(search_words) >= 2:
+            combined = "".join(search_words)
+            rows = (rows or set()) | self._rows_for_words(self.matching_words(combined, word_matches))
+
+        rows = rows or set()
+        return np.fromiter(sorted(rows), dtype=np.intp, count=len(rows))
+
+    def __len__(self) -> int:
+        return len(self._rows_by_word)
@@ -6,6 +6,7 @@ Handles events from BoldTrail including contact updates, appointments, etc.
 from fastapi import APIRouter, Request, HTTPException
 from typing import Dict, Any
 from src.utils.logger import get_logger
+from src.utils.contact_cache import contact_ids
 from src.integrations.twilio_client import TwilioClient
 from src.integrations.email_client import EmailClient
 from src.config.settings import settings
@@ -72,6 +73,9 @@ async def handle_contact_created(payload: Dict[str, Any]) -> Dict[str, Any]:
     
     logger.info(f"New contact created: {contact_id}")
     
+    # Lead tools resolve this caller's phone/email without a contact search
+    await contact_ids.remember_contact(contact)
+    
     # You can add logic here to:
     # - Send welcome message
     # - Assign to agent
@@ -87,6 +91,11 @@ async def handle_contact_updated(payload: Dict[str, Any]) -> Dict[str, Any]:
     
     logger.info(f"Contact updated: {contact_id}")
     
+    # Phone/email may have changed: re-key the resolution cache
+    if contact_id:
+        await contact_ids.forget(contact_id)
+        await contact_ids.remember_contact(contact)
+    
     return {"status": "processed", "contact_id": contact_id}
 
 
@@ -138,7 +147,7 @@ async def handle_appointment_created(payload: Dict[str, Any]) -> Dict[str, Any]:
     )
     if contact_phone:
         try:
-            await twilio_client.send_sms(contact_phone, message)
+            twilio_client.queue_sms(contact_phone, message)
         except Exception as e:
             logger.warning(f"Failed to send appointment confirmation SMS: {str(e)}")
     if contact_email:
@@ -175,8 +184,8 @@ async def handle_appointment_reminder(payload: Dict[str, Any]) -> Dict[str, Any]
     )
     if contact_phone:
         try:
-            await twilio_client.send_sms(contact_phone, message)
-            logger.info(f"Reminder SMS sent for appointment {appointment_id}")
+            twilio_client.queue_sms(contact_phone, message)
+            logger.info(f"Reminder SMS queued for appointment {appointment_id}")
         except Exception as e:
             logger.error(f"Failed to send appointment reminder SMS: {str(e)}")
             return {"status": "error", "message": str(e)}
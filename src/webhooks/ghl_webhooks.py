@@ -7,7 +7,15 @@ from fastapi import APIRouter, Request, HTTPException, Header
 from typing import Dict, Any, Optional
 from src.utils.logger import get_logger
 from src.integrations.vapi_client import VapiClient
+from src.integrations.boldtrail import PRIORITY_BACKGROUND, BoldTrailClient, request_priority
+from src.integrations.broker_notifier import notify_broker
+from src.functions.check_property import check_property
+from src.models.vapi_models import CheckPropertyRequest
+from src.utils.call_sessions import call_sessions
+from src.utils.contact_cache import contact_ids
+from src.utils.dial_scheduler import DialJob, OutboundDialScheduler
 from src.config.settings import settings
+import asyncio
 import hmac
 import hashlib
 import json
@@ -16,6 +24,141 @@ logger = get_logger(__name__)
 router = APIRouter()
 
 vapi_client = VapiClient()
+crm_client = BoldTrailClient()
+
+
+async def _prefetch_form_lead(
+    phone: str,
+    email: Optional[str],
+    property_interest: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Look up what the outbound call will need while Vapi is still dialing
+    
+    Resolves the CRM contact (by email; a phone-only caller is only looked up in
+    the contact-ID cache) and, when the form names a property, runs the
+    check_property search (warming its cache) and resolves the listing agent
+    against the roster. Every lookup is best-effort.
+    
+    Returns:
+        Dict with any of "contact_id" and "listing_agent"
+    """
+    async def contact_lookup() -> Optional[str]:
+        if not email:
+            return await contact_ids.lookup(phone=phone)  # kvCore cannot search contacts by phone
+        return await crm_client.resolve_contact_id(phone=phone, email=email)
+
+    async def property_lookup() -> Optional[Dict[str, Any]]:
+        if not property_interest:
+            return None
+        response = await check_property(CheckPropertyRequest(address=property_interest))
+        if response.success and response.data and response.data.get("total") == 1:
+            return response.data.get("listing_agent")
+        return None
+
+    contact_id, listing_agent = await asyncio.gather(contact_lookup(), property_lookup(), return_exceptions=True)
+    found: Dict[str, Any] = {}
+    if isinstance(contact_id, Exception):
+        logger.warning(f"Form lead contact lookup failed: {str(contact_id)}")
+    elif contact_id:
+        found["contact_id"] = contact_id
+    if isinstance(listing_agent, Exception):
+        logger.warning(f"Form lead property lookup failed: {str(listing_agent)}")
+    elif listing_agent:
+        found["listing_agent"] = listing_agent
+    return found
+
+
+async def _apply_form_prefetch(call_id: str, prefetch: "asyncio.Task[Dict[str, Any]]") -> None:
+    """Copy the form lead lookups onto the outbound call's session once they finish"""
+    found = await prefetch
+    listing_agent = found.get("listing_agent") or {}
+    async with call_sessions.update(call_id) as session:
+        session.remember_caller(contact_id=found.get("contact_id"))
+        session.remember_agent(listing_agent.get("name"), listing_agent.get("phone"))
+    logger.info(f"Call {call_id}: form lead pre-resolved ({sorted(found)})")
+
+
+def _start_form_prefetch(job: DialJob) -> "asyncio.Task[Dict[str, Any]]":
+    """Form lead lookups at background priority (paced with the dials, never ahead of live callers)"""
+    form_data = job.request.get("metadata", {}).get("form_data", {})
+    with request_priority(PRIORITY_BACKGROUND):
+        return asyncio.create_task(
+            _prefetch_form_lead(job.phone, job.request.get("customer_email"), form_data.get("property_interest"))
+        )
+
+
+async def _dial_form_lead(job: DialJob) -> Optional[str]:
+    """
+    Place a queued form-submission call and attach the form lead lookups to its session
+    
+    The lookups start when the job is dialed (not at submission), so they follow
+    the dial scheduler's pacing and are fresh when the call connects.
+    
+    Returns:
+        Vapi call ID
+    """
+    prefetch = _start_form_prefetch(job)
+    try:
+        vapi_response = await vapi_client.create_outbound_call(
+            assistant_id=settings.VAPI_ASSISTANT_ID,
+            **job.request,
+        )
+    except Exception:
+        prefetch.cancel()  # A retry looks up again when it is dialed
+        raise
+    
+    vapi_call_id = vapi_response.get("id")
+    if vapi_call_id:
+        customer_name = job.request.get("customer_name")
+        async with call_sessions.update(vapi_call_id, job.phone) as session:
+            session.remember_caller(name=customer_name if customer_name != "Unknown" else None)
+            session.prefetch_started = True
+        call_sessions.start_prefetch(vapi_call_id, _apply_form_prefetch(vapi_call_id, prefetch))
+    return vapi_call_id
+
+
+async def _alert_dropped_dial(job: DialJob) -> None:
+    """Dial scheduler hook: the form lead was never called, so the office must call them back"""
+    form_data = job.request.get("metadata", {}).get("form_data", {})
+    name = job.request.get("customer_name") or "Unknown"
+    text = (
+        f"⚠️ Form lead was NOT called back\n\n"
+        f"Name: {name}\n"
+        f"Phone: {job.phone}\n"
+        f"Email: {job.request.get('customer_email') or 'N/A'}\n"
+        f"Property: {form_data.get('property_interest') or 'N/A'}\n"
+        f"Dial attempts: {job.attempts}\n\n"
+        f"Every outbound call attempt failed. Please call the lead back by hand."
+    )
+    notification_phone = settings.TEST_AGENT_PHONE if settings.TEST_MODE else (
+        settings.JEFF_NOTIFICATION_PHONE or settings.OFFICE_NOTIFICATION_PHONE
+    )
+    await notify_broker(
+        "outbound_dial_failed",
+        subject=f"⚠️ Form lead not called back - {name}",
+        text=text,
+        phone=notification_phone,
+        email=settings.OFFICE_NOTIFICATION_EMAIL or None,
+    )
+
+
+outbound_dials = OutboundDialScheduler(
+    dial=_dial_form_lead,
+    max_concurrent=settings.OUTBOUND_MAX_CONCURRENT_CALLS,
+    calls_per_minute=settings.OUTBOUND_CALLS_PER_MINUTE,
+    dedupe_window_seconds=settings.OUTBOUND_DEDUPE_WINDOW_SECONDS,
+    hours=(
+        settings.OUTBOUND_DIAL_HOURS_START or settings.OFFICE_HOURS_START,
+        settings.OUTBOUND_DIAL_HOURS_END or settings.OFFICE_HOURS_END,
+    ) if settings.OUTBOUND_DIAL_BUSINESS_HOURS_ONLY else None,
+    days=settings.OUTBOUND_DIAL_DAYS,
+    timezone=settings.OFFICE_TIMEZONE,
+    # Shared by every worker process: one queue, one set of limits
+    state_path=settings.OUTBOUND_QUEUE_PATH or None,
+    max_attempts=settings.OUTBOUND_DIAL_MAX_ATTEMPTS,
+    on_dropped=_alert_dropped_dial,
+)
 
 
 def verify_ghl_signature(payload: bytes, signature: str, secret: str) -> bool:
@@ -53,8 +196,15 @@ async def handle_ghl_form_submission(
     When a user submits a form in GHL (e.g., property inquiry form):
     1. GHL sends form submission data to this webhook
     2. We extract the user's phone number and form data
-    3. We trigger Vapi to make an OUTBOUND call to the user
-    4. Vapi AI calls the user back and handles the conversation
+    3. We queue an OUTBOUND call to the user and acknowledge immediately; the
+       dial scheduler places it within the concurrency, calls-per-minute and
+       business-hours limits (repeat submissions for a queued or recently
+       called phone are ignored)
+    4. When the call is dialed, the CRM contact, the property of interest and its
+       listing agent are resolved (background priority) while Vapi connects; the
+       results go on the call's session, so the assistant's tools find them
+       already computed on the first turn
+    5. Vapi AI calls the user back and handles the conversation
     
     GHL Form Submission Payload Example:
     {
@@ -128,14 +278,14 @@ async def handle_ghl_form_submission(
         logger.info(f"Form submitted by {contact_name} ({user_phone})")
         logger.info(f"Form data: {form_data}")
         
-        # Trigger Vapi to make an OUTBOUND call to the user
-        try:
-            vapi_response = await vapi_client.create_outbound_call(
-                phone_number=user_phone,
-                assistant_id=settings.VAPI_ASSISTANT_ID,
-                customer_name=contact_name,
-                customer_email=contact_email,
-                metadata={
+        # Queue the OUTBOUND call; the dial scheduler paces it
+        job, queued = await outbound_dials.enqueue(
+            user_phone,
+            {
+                "phone_number": user_phone,
+                "customer_name": contact_name,
+                "customer_email": contact_email,
+                "metadata": {
                     "source": "ghl_form_submission",
                     "ghl_contact_id": contact_id,
                     "ghl_location_id": location_id,
@@ -143,32 +293,35 @@ async def handle_ghl_form_submission(
                     "form_data": form_data,
                     "call_type": "outbound",
                     "trigger": "form_submission"
-                }
-            )
-            vapi_call_id = vapi_response.get("id")
-            
-            logger.info(f"Successfully triggered Vapi outbound call: {vapi_call_id}")
-            logger.info(f"Vapi will call {user_phone} in a few seconds")
-            
+                },
+            },
+        )
+        
+        if not queued:
+            logger.info(f"Repeat form submission for {user_phone}; call already queued or placed recently")
             return {
-                "status": "success",
-                "message": "Outbound call initiated - user will receive a call shortly",
+                "status": "duplicate",
+                "message": "A call to this number is already queued or was placed recently",
                 "ghl_contact_id": contact_id,
-                "vapi_call_id": vapi_call_id,
-                "user": {
-                    "phone": user_phone,
-                    "name": contact_name,
-                    "email": contact_email
-                },
-                "form_data": form_data
+                "job_id": job.job_id if job else None,
             }
-            
-        except Exception as vapi_error:
-            logger.error(f"Failed to trigger Vapi call: {str(vapi_error)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to trigger Vapi agent: {str(vapi_error)}"
-            )
+        
+        position = outbound_dials.position(job)
+        logger.info(f"Queued outbound call job {job.job_id} (position {position})")
+        
+        return {
+            "status": "queued",
+            "message": "Outbound call queued - user will receive a call shortly",
+            "ghl_contact_id": contact_id,
+            "job_id": job.job_id,
+            "queue_position": position,
+            "user": {
+                "phone": user_phone,
+                "name": contact_name,
+                "email": contact_email
+            },
+            "form_data": form_data
+        }
         
     except HTTPException:
         raise
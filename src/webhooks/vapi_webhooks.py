@@ -4,14 +4,21 @@ Handles events from Vapi including call status updates, transcripts, etc.
 """
 
 from fastapi import APIRouter, Request, HTTPException
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from src.functions.route_to_agent import send_no_answer_notification_to_jeff
+from src.webhooks.ghl_webhooks import outbound_dials
+from src.integrations.boldtrail import BoldTrailClient
+from src.utils.call_sessions import CallSession, call_sessions
+from src.utils.contact_cache import contact_ids
 from src.utils.logger import get_logger
+from src.utils.roster import load_roster
 
 logger = get_logger(__name__)
 router = APIRouter()
 
+crm_client = BoldTrailClient()
+
 # End reasons indicating transfer was attempted but no one picked up
 NO_ANSWER_END_REASONS = frozenset({
     "call.forwarding.operator-busy",  # Agent was busy
@@ -64,8 +71,55 @@ async def handle_vapi_webhook(request: Request) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _caller_number(payload: Dict[str, Any]) -> Optional[str]:
+    """Caller's phone number from a Vapi event (call.customer or top-level customer)"""
+    customer = payload.get("call", {}).get("customer") or payload.get("customer") or {}
+    return customer.get("number")
+
+
+async def _prefetch_caller(session: CallSession) -> None:
+    """
+    Speculative call-start work: resolve the caller's contact and warm roster/feed.
+    
+    The caller is only looked up in the contact-ID cache: kvCore cannot filter
+    contacts by phone, so a search would be an unfiltered GET /contacts on every
+    inbound call that rarely matches. Every step is best-effort; tools fall back
+    to their own lookups.
+    """
+    if session.caller_phone:
+        contact_id = await contact_ids.lookup(phone=session.caller_phone)
+        if contact_id:
+            async with call_sessions.update(session.call_id) as current:
+                current.remember_caller(contact_id=contact_id)
+        logger.info(f"Call {session.call_id}: caller pre-resolved (existing contact: {bool(contact_id)})")
+    
+    try:
+        load_roster()
+        await crm_client.get_listings_index()
+    except Exception as e:
+        logger.warning(f"Call {session.call_id}: roster/feed warm-up failed: {str(e)}")
+
+
+async def start_call_prefetch(payload: Dict[str, Any]) -> Optional[CallSession]:
+    """
+    Open the call's session and start pre-resolution in the background (once per call)
+    
+    Returns:
+        The call session, or None when the event carries no call ID
+    """
+    call_id = payload.get("call", {}).get("id")
+    if not call_id:
+        return None
+    async with call_sessions.update(call_id, _caller_number(payload)) as session:
+        if session.prefetch_started:
+            return session
+        session.prefetch_started = True
+    call_sessions.start_prefetch(call_id, _prefetch_caller(session))
+    return session
+
+
 async def handle_assistant_request(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """Handle assistant request events"""
+    """Handle assistant request events (call is starting: kick off caller pre-resolution)"""
     logger.info("Processing assistant request")
     
     # Extract relevant information
@@ -75,6 +129,8 @@ async def handle_assistant_request(payload: Dict[str, Any]) -> Dict[str, Any]:
     # Log for monitoring
     logger.debug(f"Assistant request for call {call_id}: {message}")
     
+    await start_call_prefetch(payload)
+    
     return {"status": "processed"}
 
 
@@ -85,6 +141,9 @@ async def handle_status_update(payload: Dict[str, Any]) -> Dict[str, Any]:
     
     logger.info(f"Call {call_id} status update: {status}")
     
+    if status == "in-progress":
+        await start_call_prefetch(payload)
+    
     # You can add logic here to:
     # - Update CRM with call status
     # - Notify agents
@@ -119,6 +178,13 @@ async def handle_end_of_call(payload: Dict[str, Any]) -> Dict[str, Any]:
     logger.info(f"Call {call_id} ended: duration={duration}s, reason={end_reason}")
     logger.debug(f"End-of-call payload keys: {list(payload.keys())}")
 
+    await outbound_dials.call_ended(call_id)  # Frees the slot if this was a queued outbound call
+    
+    # What the tools learned during the call (closed here; expires on its own otherwise)
+    session = await call_sessions.end(call_id)
+    if session:
+        logger.info(f"Call session summary: {session.summary()}")
+
     # Detect transfer no-answer: send SMS and email to Jeff
     if end_reason and end_reason in NO_ANSWER_END_REASONS:
         logger.info(f"Transfer no-answer detected (endReason={end_reason}), sending notification to Jeff")
@@ -127,6 +193,12 @@ async def handle_end_of_call(payload: Dict[str, Any]) -> Dict[str, Any]:
             caller_phone = summary.get("customVariables", {}).get("caller_phone") if isinstance(summary.get("customVariables"), dict) else None
             attempted_agent = summary.get("customVariables", {}).get("attempted_agent_name") if isinstance(summary.get("customVariables"), dict) else None
             attempted_agent_phone = summary.get("customVariables", {}).get("attempted_agent_phone") if isinstance(summary.get("customVariables"), dict) else None
+            if session:
+                attempted = session.transferred_to or session.agent or {}
+                caller_name = caller_name or session.caller_name
+                caller_phone = caller_phone or session.caller_phone
+                attempted_agent = attempted_agent or attempted.get("name")
+                attempted_agent_phone = attempted_agent_phone or attempted.get("phone")
             await send_no_answer_notification_to_jeff(
                 caller_name=caller_name,
                 caller_phone=caller_phone,
@@ -0,0 +1,34 @@
+"""
+Shared test setup
+"""
+
+import pytest
+
+from src.integrations import boldtrail
+from src.utils.cache import InMemoryCache, set_cache
+from src.utils.lead_outbox import lead_outbox
+from src.webhooks.ghl_webhooks import outbound_dials
+
+
+@pytest.fixture(autouse=True)
+def _isolated_lead_outbox(tmp_path, monkeypatch):
+    """Each test gets an empty lead outbox database (never data/lead_outbox.db)."""
+    monkeypatch.setattr(lead_outbox, "path", str(tmp_path / "lead_outbox.db"))
+    monkeypatch.setattr(lead_outbox, "_parked", set())
+    monkeypatch.setattr(lead_outbox, "_waiters", {})
+    monkeypatch.setattr(lead_outbox, "_worker", None)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_outbound_queue(tmp_path, monkeypatch):
+    """Each test gets an empty outbound dial queue (never data/outbound_dial_queue.db)."""
+    monkeypatch.setattr(outbound_dials, "state_path", str(tmp_path / "outbound_dial_queue.db"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(monkeypatch):
+    """Each test gets an empty in-process cache (contact IDs, call sessions, feed, manual listings)."""
+    monkeypatch.setattr(boldtrail, "_manual_listings_indexes", {})
+    set_cache(InMemoryCache())
+    yield
+    set_cache(None)
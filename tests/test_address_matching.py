@@ -98,3 +98,36 @@ def test_city_exact_match(client):
 def test_city_villages_short_form(client):
     """Search city 'Villages' (short form) should match The Villages area."""
     assert client._city_matches("Summerfield", "Villages") is True
+
+
+def test_bella_vista_with_number_matches_bellavista_circle(client):
+    """'Vista' is a USPS suffix, but here it ends the street name."""
+    assert client._address_matches(
+        "16642 SE 80th Bellavista Circle",
+        "16642 Bella Vista"
+    ) is True
+
+
+def test_suffix_inside_word_is_not_rewritten(client):
+    """'Courtyard' is a name, not 'ct' + 'yard'; 'Court' vs 'Drive' still differ."""
+    assert client._address_matches("120 Courtyard Court", "120 Courtyard Ct") is True
+    assert client._address_matches("120 Courtyard Court", "120 Courtyard Drive") is False
+
+
+def test_unit_and_directionals_are_structured():
+    from src.utils.address import parse_address
+
+    parts = parse_address("100 N. Main Street NW, Apt 4B")
+    assert parts.number == "100"
+    assert parts.pre_directional == "n"
+    assert parts.name_words == ("main",)
+    assert parts.suffix == "st"
+    assert parts.post_directional == "nw"
+    assert parts.unit == "apt 4b"
+    assert parts.normalized == "100 n main st nw apt 4b"
+
+    # Directional or suffix words that are the whole street name stay as the name
+    assert parse_address("200 North Street").name_words == ("north",)
+    assert parse_address("16642 SE 80th Bellavista Circle").name_words == ("80th", "bellavista")
+    assert parse_address("55 Palm Way #12").unit == "#12"
+    assert parse_address(None).number is None
@@ -0,0 +1,92 @@
+"""
+Tests for broker-copy digests (src/utils/broker_digest.py)
+"""
+
+import asyncio
+
+from src.config.settings import settings
+from src.utils.broker_digest import BrokerDigest, DigestEntry, chunk_digest, format_digest
+
+
+class Recorder:
+    def __init__(self):
+        self.now = []
+        self.digests = []
+
+    async def send_now(self, entry):
+        self.now.append(entry)
+
+    async def send_digest(self, entries):
+        self.digests.append(entries)
+
+
+def _digest(recorder, **kwargs):
+    return BrokerDigest(recorder.send_now, recorder.send_digest, **kwargs)
+
+
+def _entry(category="broker_copy", text="Hello", subject="Copy"):
+    return DigestEntry(category, subject, text, phone="+13525550100")
+
+
+async def test_disabled_sends_every_entry_at_once():
+    recorder = Recorder()
+    digest = _digest(recorder, enabled=False)
+
+    await digest.notify(_entry())
+    await digest.notify(_entry())
+
+    assert len(recorder.now) == 2 and not recorder.digests and len(digest) == 0
+
+
+async def test_urgent_categories_bypass_the_buffer():
+    recorder = Recorder()
+    digest = _digest(recorder, enabled=True, interval_seconds=60, urgent_categories=["failed_transfer"])
+
+    await digest.notify(_entry())
+    await digest.notify(_entry("failed_transfer"))
+
+    assert [e.category for e in recorder.now] == ["failed_transfer"]
+    assert len(digest) == 1
+    assert await digest.flush() == 1
+
+
+async def test_buffer_flushes_after_interval():
+    recorder = Recorder()
+    digest = _digest(recorder, enabled=True, interval_seconds=0.05)
+
+    for _ in range(3):
+        await digest.notify(_entry())
+    assert not recorder.digests
+
+    await asyncio.sleep(0.15)
+
+    assert len(recorder.digests) == 1 and len(recorder.digests[0]) == 3
+    assert digest.stats()["digested"] == 3 and len(digest) == 0
+
+
+async def test_buffer_flushes_early_when_full():
+    recorder = Recorder()
+    digest = _digest(recorder, enabled=True, interval_seconds=60, max_entries=2)
+
+    await digest.notify(_entry())
+    await digest.notify(_entry())
+
+    assert len(recorder.digests) == 1 and len(digest) == 0
+
+
+def test_format_and_chunk_digest():
+    entries = [_entry(text="x" * 100, subject=f"Lead {i}") for i in range(5)]
+
+    headlines = format_digest(entries, full=False)
+    assert headlines.startswith("📋 5 update(s)") and "Lead 4" in headlines and "x" * 100 not in headlines
+
+    chunks = chunk_digest(entries, max_chars=300)
+    assert sum(len(chunk) for chunk in chunks) == 5
+    assert all(len(format_digest(chunk, full=True)) <= 300 for chunk in chunks)
+
+
+def test_headline_uses_office_time(monkeypatch):
+    monkeypatch.setattr(settings, "OFFICE_TIMEZONE", "America/New_York")
+    entry = _entry(subject="New lead")
+    entry.created_at = 1_700_000_000  # 2023-11-14 22:13 UTC
+    assert entry.headline() == "17:13 New lead"
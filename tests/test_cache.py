@@ -0,0 +1,261 @@
+"""
+Unit tests for the pluggable shared cache (src/utils/cache.py).
+
+RedisCache runs against REDIS_TEST_URL when set (a real local Redis), otherwise
+against a small in-process Redis-protocol server implementing the commands the
+backend uses.
+"""
+
+import asyncio
+import os
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.integrations import boldtrail
+from src.integrations.boldtrail import BoldTrailClient
+from src.utils import cache as cache_module
+from src.utils.cache import InMemoryCache, RedisCache, set_cache
+from src.utils.listings_index import price_bounds
+from src.utils.result_sets import ResultSetStore
+
+
+class MiniRespServer:
+    """GET / SET [PX] [NX] / DEL / EVAL(lock release) / AUTH / SELECT over RESP2."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _get(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry[0] if entry else None
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _execute(self, args):
+        command = args[0].decode().upper()
+        self.commands.append(command)
+        if command in ("AUTH", "SELECT", "PING"):
+            return b"+OK\r\n"
+        if command == "GET":
+            value = self._get(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == "SET":
+            options = [a.decode().upper() for a in args[3:]]
+            if "NX" in options and self._get(args[1]) is not None:
+                return b"$-1\r\n"
+            expires = None
+            if "PX" in options:
+                expires = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], expires)
+            return b"+OK\r\n"
+        if command == "DEL":
+            return b":%d\r\n" % int(self.data.pop(args[1], None) is not None)
+        if command == "EVAL" and args[1].decode() == RedisCache.RELEASE_SCRIPT:
+            if self._get(args[3]) == args[4]:
+                del self.data[args[3]]
+                return b":1\r\n"
+            return b":0\r\n"
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+async def redis_url():
+    if os.environ.get("REDIS_TEST_URL"):
+        yield os.environ["REDIS_TEST_URL"]
+        return
+    server = MiniRespServer()
+    url = await server.start()
+    yield url
+    await server.stop()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    set_cache(InMemoryCache())
+    yield
+    set_cache(None)
+
+
+def _prefix():
+    return f"test:{time.monotonic_ns()}:"
+
+
+class TestInMemoryCache:
+    async def test_set_get_expire_delete(self):
+        backend = InMemoryCache()
+        await backend.set_json("a", {"x": 1}, 60)
+        assert await backend.get_json("a") == {"x": 1}
+        await backend.set_json("b", 1, 0)
+        assert await backend.get_json("b") is None
+        await backend.delete("a")
+        assert await backend.get_json("a") is None
+
+    async def test_corrupt_entry_is_a_miss(self):
+        backend = InMemoryCache()
+        await backend.set("a", b"{not json", 60)
+        assert await backend.get_json("a") is None
+
+    async def test_bounded(self):
+        backend = InMemoryCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            await backend.set_json(key, key, 60)
+        assert len(backend) == 2
+        assert await backend.get_json("c") == "c"
+
+    async def test_get_or_load_is_single_flight(self):
+        backend = InMemoryCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"listings": 3}
+
+        values = await asyncio.gather(*(backend.get_or_load("feed", loader, 60) for _ in range(5)))
+        assert values == [{"listings": 3}] * 5
+        assert calls == [1]
+        assert not cache_module._flights
+
+    async def test_lock_is_exclusive_until_released(self):
+        backend = InMemoryCache()
+        token = await backend.acquire_lock("refresh", 60)
+        assert token and await backend.acquire_lock("refresh", 60) is None
+        await backend.release_lock("refresh", "not-the-token")
+        assert await backend.acquire_lock("refresh", 60) is None
+        await backend.release_lock("refresh", token)
+        assert await backend.acquire_lock("refresh", 60)
+
+
+class TestRedisCache:
+    async def test_round_trip_and_expiry(self, redis_url):
+        backend = RedisCache(redis_url, prefix=_prefix())
+        await backend.set_json("contacts", [{"id": "c1"}], 60)
+        assert await backend.get_json("contacts") == [{"id": "c1"}]
+        await backend.set_json("short", 1, 0.05)
+        await asyncio.sleep(0.1)
+        assert await backend.get_json("short") is None
+        await backend.delete("contacts")
+        assert await backend.get_json("contacts") is None
+        await backend.close()
+
+    async def test_lock_release_only_by_owner(self, redis_url):
+        prefix = _prefix()
+        machine_a, machine_b = RedisCache(redis_url, prefix=prefix), RedisCache(redis_url, prefix=prefix)
+        token = await machine_a.acquire_lock("lock:feed", 60)
+        assert token
+        assert await machine_b.acquire_lock("lock:feed", 60) is None
+        await machine_b.release_lock("lock:feed", "stolen")
+        assert await machine_b.acquire_lock("lock:feed", 60) is None
+        await machine_a.release_lock("lock:feed", token)
+        assert await machine_b.acquire_lock("lock:feed", 60)
+        await machine_a.close()
+        await machine_b.close()
+
+    async def test_single_flight_across_machines(self, redis_url):
+        prefix = _prefix()
+        machines = [RedisCache(redis_url, prefix=prefix) for _ in range(3)]
+        downloads = []
+
+        async def download():
+            downloads.append(1)
+            await asyncio.sleep(0.2)
+            return "<Listings/>"
+
+        values = await asyncio.gather(*(m.get_or_load("boldtrail:feed_xml", download, 60) for m in machines))
+        assert values == ["<Listings/>"] * 3
+        assert downloads == [1]
+        for machine in machines:
+            await machine.close()
+
+    async def test_unreachable_server_degrades_to_misses(self):
+        backend = RedisCache("redis://127.0.0.1:1/0", timeout_seconds=0.2)
+        assert await backend.get_json("anything") is None
+        await backend.set_json("anything", 1, 60)  # logged, not raised
+
+        async def loader():
+            return 42
+
+        assert await backend.get_or_load("anything", loader, 60, lock_ttl_seconds=0.2) == 42
+
+    def test_rejects_other_schemes(self):
+        with pytest.raises(ValueError):
+            RedisCache("http://localhost:6379")
+
+
+class TestSharedState:
+    async def test_result_set_cursor_follows_call_to_another_machine(self, redis_url):
+        prefix = _prefix()
+        machine_a = ResultSetStore(backend=RedisCache(redis_url, prefix=prefix))
+        machine_b = ResultSetStore(backend=RedisCache(redis_url, prefix=prefix))
+        listings = [{"address": f"{i} Main Street"} for i in range(12)]
+
+        cursor = machine_a.create(listings, page_size=5, next_offset=5)
+        await machine_a.publish(cursor)
+
+        result_set = await machine_b.fetch(cursor)
+        assert result_set.total == 12
+        assert result_set.page()[0]["address"] == "5 Main Street"
+        await machine_b.publish(cursor)
+
+        machine_c = ResultSetStore(backend=RedisCache(redis_url, prefix=prefix))
+        assert (await machine_c.fetch(cursor)).next_offset == 10
+        assert await machine_c.fetch("unknown") is None
+
+    async def test_local_store_does_not_publish(self):
+        store = ResultSetStore()
+        cursor = store.create([{"address": "1 Main Street"}], page_size=5)
+        await store.publish(cursor)
+        assert len(cache_module.get_cache()) == 0
+
+    async def test_manual_listings_response_is_cached(self):
+        client = BoldTrailClient()
+        response = {"data": [{"address": "12 Palm Way", "city": "Ocala", "price": 300000}]}
+        with patch.object(client, "_make_request", AsyncMock(return_value=response)) as request, \
+                patch("src.integrations.boldtrail.ListingsIndex", wraps=boldtrail.ListingsIndex) as build:
+            first = await client.search_manual_listings(city="Ocala")
+            second = await client.search_manual_listings(address="12 Palm Way")
+        assert request.await_count == 1
+        assert build.call_count == 1  # The index is reused too
+        assert len(first) == len(second) == 1
+        assert price_bounds(second) == (300000.0, 300000.0)
+
+    async def test_only_non_empty_contact_searches_are_cached(self):
+        client = BoldTrailClient()
+        with patch.object(client, "_make_request", AsyncMock(return_value={"data": []})) as request:
+            assert await client.search_contacts(email="buyer@example.com") == []
+            request.return_value = {"data": [{"id": "c1"}]}
+            assert await client.search_contacts(email="buyer@example.com") == [{"id": "c1"}]
+            assert await client.search_contacts(email="buyer@example.com") == [{"id": "c1"}]
+        assert request.await_count == 2
+        assert all("buyer@example.com" not in key for key in cache_module.get_cache()._entries)
@@ -0,0 +1,252 @@
+"""
+Unit tests for the call-scoped session cache (src/utils/call_sessions.py) and
+call-start caller pre-resolution in the Vapi webhooks.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.functions import check_property as check_property_module
+from src.functions import create_buyer_lead as buyer_module
+from src.functions import more_properties as more_module
+from src.models.vapi_models import CheckPropertyRequest, CreateBuyerLeadRequest, MorePropertiesRequest, VapiResponse
+from src.utils.cache import InMemoryCache
+from src.utils.call_sessions import CallSession, CallSessionStore, call_sessions
+from src.utils.query_cache import QueryCache
+from src.utils.result_sets import ResultSetStore
+from src.utils.contact_cache import contact_ids
+from src.utils.dial_scheduler import OutboundDialScheduler
+from src.functions.more_properties import more_properties
+from starlette.requests import Request
+
+from src.webhooks import ghl_webhooks, vapi_webhooks
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(call_sessions, "_prefetches", {})
+    buyer_module._lead_creations.clear()
+    yield
+    buyer_module._lead_creations.clear()
+
+
+def _call_event(event_type, **extra):
+    return {"type": event_type, "call": {"id": "call-1", "customer": {"number": "+13525550142"}}, **extra}
+
+
+class TestCallSessionStore:
+    async def test_shared_and_expiring(self):
+        backend = InMemoryCache()
+        async with CallSessionStore(backend=backend).update("a", "3525550142") as session:
+            session.remember_caller(contact_id="c1")
+            session.tool_timings.append(("check_property", 12.0))
+        elsewhere = await CallSessionStore(backend=backend).get("a")
+        assert elsewhere.is_caller("(352) 555-0142") and elsewhere.contact_id == "c1"
+        assert elsewhere.tool_timings == [("check_property", 12.0)]
+
+        short = CallSessionStore(ttl_seconds=0.05, backend=backend)
+        async with short.update("b"):
+            pass
+        await asyncio.sleep(0.1)
+        assert await short.get("b") is None
+
+    async def test_caller_number_added_later(self):
+        store = CallSessionStore()
+        async with store.update("a"):
+            pass
+        async with store.update("a", "352-555-0142") as session:
+            assert session.caller_phone == "+13525550142"
+        async with store.update(None) as session:
+            assert session is None
+        assert await store.end("a") is not None and await store.get("a") is None
+
+    def test_session_caps_and_log_safe_summary(self):
+        session = CallSession("a", "3525550142")
+        session.remember_listings([{"mls_number": "N/A", "address": "1 Main Street"}, {"mls_number": "G123"}] * 2)
+        assert session.listings_shown == ["1 Main Street", "G123"]
+        session.remember_listings({"mls_number": f"M{i}"} for i in range(100))
+        assert len(session.listings_shown) == 50 and session.listings_shown[-1] == "M99"
+        for _ in range(150):
+            session.record_tool("check_property", 12.0)
+        assert len(session.tool_timings) == 100
+        session.remember_caller(contact_id=7, name=" Ann ")
+        summary = session.summary()
+        assert summary["contact_id"] == "7" and summary["tool_ms"] == 1200.0
+        assert "3525550142" not in str(summary) and "Ann" not in str(summary)
+
+
+async def test_call_start_pre_resolves_caller_once_from_cache():
+    crm = vapi_webhooks.crm_client
+    await contact_ids.remember("c1", phone="+13525550142")
+    with patch.object(crm, "resolve_contact_id", AsyncMock()) as resolve, \
+            patch.object(crm, "get_listings_index", AsyncMock()) as warm:
+        await vapi_webhooks.handle_assistant_request(_call_event("assistant-request"))
+        await vapi_webhooks.handle_status_update(_call_event("status-update", status="in-progress"))
+        await call_sessions.wait_for_prefetch("call-1", 1.0)
+    resolve.assert_not_awaited()
+    warm.assert_awaited_once()
+    assert (await call_sessions.get("call-1")).contact_id == "c1"
+
+
+async def test_call_start_never_searches_the_crm():
+    crm = vapi_webhooks.crm_client
+    with patch.object(crm, "resolve_contact_id", AsyncMock()) as resolve, \
+            patch.object(crm, "search_contacts", AsyncMock()) as search, \
+            patch.object(crm, "get_listings_index", AsyncMock()):
+        await vapi_webhooks.start_call_prefetch(_call_event("assistant-request"))
+        await call_sessions.wait_for_prefetch("call-1", 1.0)
+    resolve.assert_not_awaited()
+    search.assert_not_awaited()
+    assert (await call_sessions.get("call-1")).contact_id is None
+
+
+async def test_lead_uses_caller_resolved_at_call_start():
+    crm = vapi_webhooks.crm_client
+
+    async def slow_warm_up():
+        await asyncio.sleep(0.05)
+
+    await contact_ids.remember("c1", phone="+13525550142")
+    request = CreateBuyerLeadRequest(first_name="Ann", last_name="Lee", phone="352-555-0142")
+    with patch.object(crm, "get_listings_index", AsyncMock(side_effect=slow_warm_up)), \
+            patch.object(buyer_module.crm_client, "resolve_contact_id", AsyncMock()) as lead_resolve, \
+            patch.object(buyer_module.crm_client, "update_contact", AsyncMock(return_value={})), \
+            patch.object(buyer_module, "_handle_buyer_lead_background_tasks", AsyncMock()):
+        await vapi_webhooks.start_call_prefetch(_call_event("assistant-request"))
+        response = await buyer_module.create_buyer_lead(request, x_vapi_call_id="call-1")
+    lead_resolve.assert_not_awaited()
+    assert response.data["contact_id"] == "c1"
+
+
+async def test_transfer_uses_session_caller_details():
+    async with call_sessions.update("call-1", "+13525550142") as session:
+        session.remember_caller(contact_id="c1", name="Ann")
+    arguments = {"reason": "buying"}
+    payload = {"message": {
+        "call": {"id": "call-1", "monitor": {"controlUrl": "https://control.example"}},
+        "toolWithToolCallList": [{"toolCall": {"function": {"arguments": json.dumps(arguments)}}}],
+    }}
+    ok = httpx.Response(200, request=httpx.Request("POST", "https://control.example/control"))
+    with patch("src.functions.route_to_agent.httpx.AsyncClient.post", AsyncMock(return_value=ok)) as post:
+        response = client.post("/functions/route_to_agent", json=payload)
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+    post.assert_awaited_once()
+    assert (await call_sessions.get("call-1")).transferred_to is not None
+
+
+async def test_search_tools_share_the_call_session(monkeypatch):
+    listings = [
+        {"address": f"{100 + i} Main Street", "city": "Ocala", "price": 300000 + i, "mls_number": f"G{i}"}
+        for i in range(12)
+    ]
+    monkeypatch.setattr(check_property_module, "_search_cache", QueryCache(max_entries=8))
+    monkeypatch.setattr(check_property_module, "result_sets", ResultSetStore())
+    monkeypatch.setattr(more_module, "result_sets", check_property_module.result_sets)
+    crm = check_property_module.crm_client
+    with patch.object(crm, "get_feed_version", AsyncMock(return_value=1)), \
+            patch.object(crm, "search_listings_from_xml", AsyncMock(return_value=listings)):
+        first = await check_property_module.check_property(CheckPropertyRequest(city="Ocala"), x_vapi_call_id="call-1")
+    assert (await call_sessions.get("call-1")).last_cursor == first.data["cursor"]
+
+    second = await more_properties(MorePropertiesRequest(), x_vapi_call_id="call-1")
+    assert second.success is True
+    assert second.results[0]["address"] == "105 Main Street"
+    assert (await call_sessions.get("call-1")).listings_shown == [f"G{i}" for i in range(10)]
+
+    no_session = await more_properties(MorePropertiesRequest())
+    assert no_session.success is False
+
+
+async def test_tool_timing_and_resolved_agent_recorded():
+    response = client.post(
+        "/functions/get_agent_info", json={"agent_name": "Jeff Beatty"}, headers={"X-Vapi-Call-Id": "call-1"}
+    )
+    assert response.status_code == 200
+    session = await call_sessions.get("call-1")
+    assert [tool for tool, _ in session.tool_timings] == ["get_agent_info"]
+    if response.json()["data"]["count"] == 1:
+        assert session.agent["name"] == response.json()["results"][0]["name"]
+
+
+async def test_end_of_call_uses_and_closes_session():
+    async with call_sessions.update("call-1", "+13525550142") as session:
+        session.remember_caller(contact_id="c1", name="Ann")
+        session.transferred_to = {"name": "Jeff Beatty", "phone": "+13525550100"}
+    with patch.object(vapi_webhooks, "send_no_answer_notification_to_jeff", AsyncMock()) as notify:
+        await vapi_webhooks.handle_end_of_call({"call": {"id": "call-1"}, "endedReason": "voicemail"})
+    notify.assert_awaited_once_with(
+        caller_name="Ann",
+        caller_phone="+13525550142",
+        attempted_agent_name="Jeff Beatty",
+        attempted_agent_phone="+13525550100",
+    )
+    assert await call_sessions.get("call-1") is None
+
+
+async def test_form_lead_prefetch_runs_alongside_call_creation(monkeypatch):
+    payload = {
+        "contact": {"name": "Ann Lee", "email": "ann@example.com", "phone": "+13525550142"},
+        "formData": {"property_interest": "1738 Augustine Drive"},
+    }
+    body = json.dumps(payload).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    request = Request({"type": "http", "method": "POST", "headers": []}, receive)
+    lookups_started = asyncio.Event()
+    lookups_may_finish = asyncio.Event()
+
+    async def resolve_contact(phone, email):
+        lookups_started.set()
+        await lookups_may_finish.wait()
+        return "c1"
+
+    async def create_call(**kwargs):
+        await lookups_started.wait()  # Lookups are already running while the call is created
+        return {"id": "call-9"}
+
+    listing_agent = {"name": "Jeff Beatty", "phone": "+13525550100"}
+    property_response = VapiResponse(
+        success=True, message="", data={"total": 1, "listing_agent": listing_agent}
+    )
+    monkeypatch.setattr(ghl_webhooks.settings, "VAPI_ASSISTANT_ID", "asst_test")
+    scheduler = OutboundDialScheduler(dial=ghl_webhooks._dial_form_lead, calls_per_minute=0)
+    monkeypatch.setattr(ghl_webhooks, "outbound_dials", scheduler)
+    with patch.object(ghl_webhooks.crm_client, "resolve_contact_id", AsyncMock(side_effect=resolve_contact)), \
+            patch.object(ghl_webhooks, "check_property", AsyncMock(return_value=property_response)), \
+            patch.object(ghl_webhooks.vapi_client, "create_outbound_call", AsyncMock(side_effect=create_call)):
+        response = await ghl_webhooks.handle_ghl_form_submission(request)
+        assert response["status"] == "queued"
+        await scheduler.join()
+        session = await call_sessions.get("call-9")
+        assert session.caller_name == "Ann Lee" and session.contact_id is None
+        lookups_may_finish.set()
+        await call_sessions.wait_for_prefetch("call-9", 1.0)
+    session = await call_sessions.get("call-9")
+    assert session.contact_id == "c1"
+    assert session.agent == listing_agent
+    assert await call_sessions.prefetched_contact_id("call-9", "(352) 555-0142") == "c1"
+
+
+async def test_dropped_form_lead_dial_alerts_the_office():
+    failing = AsyncMock(side_effect=RuntimeError("Vapi unavailable"))
+    scheduler = OutboundDialScheduler(dial=failing, calls_per_minute=0, retry_delay_seconds=0, max_attempts=1,
+                                      on_dropped=ghl_webhooks._alert_dropped_dial)
+    request = {"phone_number": "3525550142", "customer_name": "Ann Lee", "customer_email": "ann@example.com",
+               "metadata": {"form_data": {"property_interest": "1738 Augustine Drive"}}}
+    with patch.object(ghl_webhooks, "notify_broker", AsyncMock()) as alert:
+        await scheduler.enqueue("3525550142", request)
+        await scheduler.join()
+    assert ghl_webhooks.outbound_dials.on_dropped is ghl_webhooks._alert_dropped_dial
+    assert alert.await_args.args[0] == "outbound_dial_failed"
+    assert "Ann Lee" in alert.await_args.kwargs["text"] and "1738 Augustine Drive" in alert.await_args.kwargs["text"]
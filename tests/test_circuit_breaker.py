@@ -0,0 +1,129 @@
+"""
+Tests for integration circuit breakers (src/utils/circuit_breaker.py)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.utils import deadline
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from src.utils.errors import BoldTrailError
+
+
+class Unavailable(Exception):
+    pass
+
+
+def _rejected():
+    return BoldTrailError("circuit open", status_code=503)
+
+
+async def _fail():
+    raise Unavailable("connection refused")
+
+
+async def _ok():
+    return "ok"
+
+
+async def test_opens_after_threshold_and_rejects_without_calling():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=60)
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        return await _fail()
+
+    for _ in range(2):
+        with pytest.raises(Unavailable):
+            await breaker.call(operation, _rejected)
+    assert breaker.state == OPEN
+
+    with pytest.raises(BoldTrailError):
+        await breaker.call(operation, _rejected)
+
+    assert len(calls) == 2
+    assert breaker.stats()["rejected"] == 1 and breaker.stats()["opened"] == 1
+
+
+async def test_client_errors_do_not_count():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def not_found():
+        raise BoldTrailError("missing", status_code=404)
+
+    with pytest.raises(BoldTrailError):
+        await breaker.call(not_found, _rejected)
+
+    assert breaker.state == CLOSED
+
+
+async def test_half_open_after_reset_then_closes_on_success():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    await asyncio.sleep(0.06)
+
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert await breaker.call(_ok, _rejected) == "ok"
+    assert breaker.state == CLOSED
+
+
+async def test_half_open_failure_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    await asyncio.sleep(0.06)
+
+    with pytest.raises(Unavailable):
+        await breaker.call(_fail, _rejected)
+
+    assert breaker.state == OPEN
+
+
+async def test_probe_closes_breaker():
+    answers = [False, True]
+
+    async def probe():
+        return answers.pop(0)
+
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=0.02, probe=probe)
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    await asyncio.sleep(0.1)
+
+    assert breaker.state == CLOSED and not answers
+
+
+async def test_timeouts_cut_short_by_the_tool_deadline_do_not_count():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def read_timeout():
+        raise httpx.ReadTimeout("slow")
+
+    with deadline.deadline_scope(5.0):
+        with pytest.raises(httpx.ReadTimeout):
+            await breaker.call(read_timeout, _rejected, timeout=30.0)
+    assert breaker.state == CLOSED
+
+    with pytest.raises(httpx.ReadTimeout):
+        await breaker.call(read_timeout, _rejected, timeout=30.0)
+    assert breaker.state == OPEN
+
+
+async def test_connect_timeouts_always_count():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def unreachable():
+        try:
+            raise httpx.ConnectTimeout("no route")
+        except httpx.RequestError as e:
+            raise BoldTrailError(f"Failed to connect: {e}") from e
+
+    with deadline.deadline_scope(5.0):
+        with pytest.raises(BoldTrailError):
+            await breaker.call(unreachable, _rejected, timeout=30.0)
+    assert breaker.state == OPEN
@@ -0,0 +1,118 @@
+"""
+Unit tests for phone/email -> contact ID resolution (src/utils/contact_cache.py),
+BoldTrailClient.resolve_contact_id and the CRM contact webhooks that feed it.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.functions import create_buyer_lead as buyer_module
+from src.integrations.boldtrail import BoldTrailClient
+from src.models.crm_models import BuyerLead, Contact, ContactType
+from src.models.vapi_models import CreateBuyerLeadRequest
+from src.utils.cache import InMemoryCache
+from src.utils.contact_cache import ContactIdCache, contact_ids, normalize_phone
+
+client = TestClient(app)
+
+
+class TestContactIdCache:
+    async def test_phone_formats_share_an_entry(self):
+        assert normalize_phone("(352) 555-0142") == normalize_phone("+1 352 555 0142") == "+13525550142"
+        cache = ContactIdCache()
+        await cache.remember("c1", phone="352-555-0142", email=" Buyer@Example.com ")
+        assert await cache.lookup(phone="+13525550142") == "c1"
+        assert await cache.lookup(email="buyer@example.com") == "c1"
+        assert await cache.lookup(phone="3525550199") is None
+
+    async def test_expiry_and_forget(self):
+        short = ContactIdCache(ttl_seconds=0.05)
+        await short.remember("c0", phone="3525550100")
+        await asyncio.sleep(0.1)
+        assert await short.lookup(phone="3525550100") is None
+
+        cache = ContactIdCache(ttl_seconds=60)
+        await cache.remember("c1", phone="3525550142", email="a@example.com")
+        await cache.remember("c2", phone="3525550142", email="b@example.com")
+        await cache.forget("c2")
+        assert await cache.lookup(phone="3525550142") is None
+        assert await cache.lookup(email="b@example.com") is None
+        assert await cache.lookup(email="a@example.com") == "c1"
+
+    async def test_shared_between_instances_and_disabled(self):
+        backend = InMemoryCache()
+        await ContactIdCache(backend=backend).remember("c1", email="a@example.com")
+        assert await ContactIdCache(backend=backend).lookup(email="a@example.com") == "c1"
+        disabled = ContactIdCache(ttl_seconds=0)
+        await disabled.remember("c1", email="b@example.com")
+        assert await disabled.lookup(email="b@example.com") is None
+
+    async def test_remember_contact_payload(self):
+        cache = ContactIdCache()
+        await cache.remember_contact({"id": 42, "cell_phone_1": 3525550142, "email": "a@example.com"})
+        assert await cache.lookup(phone="+13525550142") == "42"
+        assert await cache.lookup(email="a@example.com") == "42"
+
+
+class TestResolveContactId:
+    async def test_cache_hit_skips_search(self):
+        crm = BoldTrailClient()
+        await contact_ids.remember("c1", phone="3525550142")
+        with patch.object(crm, "search_contacts", AsyncMock()) as search:
+            assert await crm.resolve_contact_id(phone="+13525550142") == "c1"
+        search.assert_not_awaited()
+
+    async def test_search_result_is_remembered(self):
+        crm = BoldTrailClient()
+        found = [{"id": "c7", "email": "a@example.com"}]
+        with patch.object(crm, "search_contacts", AsyncMock(return_value=found)) as search:
+            assert await crm.resolve_contact_id(phone="3525550142", email="a@example.com") == "c7"
+            assert await crm.resolve_contact_id(phone="3525550142") == "c7"
+        assert search.await_count == 1
+
+    async def test_phone_only_cache_miss_skips_search(self):
+        crm = BoldTrailClient()
+        with patch.object(crm, "search_contacts", AsyncMock()) as search:
+            assert await crm.resolve_contact_id(phone="(352) 555-0142") is None
+        search.assert_not_awaited()
+
+    async def test_only_the_matched_contact_is_remembered(self):
+        crm = BoldTrailClient()
+        found = [{"id": "c7", "email": "a@example.com"}, {"id": "c8", "email": "b@example.com"}]
+        with patch.object(crm, "search_contacts", AsyncMock(return_value=found)):
+            assert await crm.resolve_contact_id(email="a@example.com") == "c7"
+        assert await contact_ids.lookup(email="b@example.com") is None
+
+    async def test_created_lead_is_remembered(self):
+        crm = BoldTrailClient()
+        contact = Contact(first_name="Ann", last_name="Lee", phone="3525550142", contact_type=ContactType.BUYER)
+        with patch.object(crm, "_make_request", AsyncMock(return_value={"data": {"id": "new1"}})):
+            await crm.create_buyer_lead(BuyerLead(contact=contact))
+        assert await contact_ids.lookup(phone="+13525550142") == "new1"
+
+
+async def test_returning_buyer_skips_contact_search():
+    await contact_ids.remember("c1", phone="+13525550142", email="ann@example.com")
+    request = CreateBuyerLeadRequest(first_name="Ann", last_name="Lee", phone="352-555-0142", email="ann@example.com")
+    crm = buyer_module.crm_client
+    with patch.object(crm, "search_contacts", AsyncMock()) as search, \
+            patch.object(crm, "update_contact", AsyncMock(return_value={})), \
+            patch.object(buyer_module, "_handle_buyer_lead_background_tasks", AsyncMock()):
+        response = await buyer_module.create_buyer_lead(request)
+    search.assert_not_awaited()
+    assert response.success is True
+    assert response.data["contact_id"] == "c1"
+
+
+async def test_contact_webhooks_feed_the_cache():
+    created = {"event": "contact.created", "data": {"id": "w1", "phone": "3525550142", "email": "w@example.com"}}
+    assert client.post("/webhooks/crm/events", json=created).status_code == 200
+    assert await contact_ids.lookup(email="w@example.com") == "w1"
+
+    updated = {"event": "contact.updated", "data": {"id": "w1", "email": "new@example.com"}}
+    assert client.post("/webhooks/crm/events", json=updated).status_code == 200
+    assert await contact_ids.lookup(email="w@example.com") is None
+    assert await contact_ids.lookup(email="new@example.com") == "w1"
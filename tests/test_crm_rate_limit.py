@@ -0,0 +1,163 @@
+"""
+Tests for the BoldTrail request limiter and retry policy
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.config.settings import settings
+from src.integrations import boldtrail
+from src.integrations.boldtrail import PRIORITY_BACKGROUND, PRIORITY_CALL, BoldTrailClient
+from src.utils.errors import BoldTrailError
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.deadline import deadline_scope
+from src.utils.rate_limit import PriorityTokenBucket
+
+
+async def test_priority_bucket_serves_lower_priority_number_first():
+    bucket = PriorityTokenBucket(20, 1)
+    bucket.try_acquire()
+    served = []
+
+    async def take(name, priority):
+        await bucket.acquire(priority=priority)
+        served.append(name)
+
+    background = [asyncio.create_task(take(f"bg{i}", PRIORITY_BACKGROUND)) for i in range(2)]
+    await asyncio.sleep(0)
+    call = asyncio.create_task(take("call", PRIORITY_CALL))
+    await asyncio.gather(call, *background)
+
+    assert served == ["call", "bg0", "bg1"]
+
+
+async def test_cancelled_waiter_is_skipped():
+    bucket = PriorityTokenBucket(20, 1)
+    bucket.try_acquire()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(bucket.acquire(), 0.001)
+    await asyncio.wait_for(bucket.acquire(), 1.0)
+
+    assert bucket.waiting() == 0
+
+
+@pytest.fixture
+def kvcore(monkeypatch):
+    """Route BoldTrail HTTP calls to a scripted list of responses."""
+    responses = []
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(boldtrail.httpx, "AsyncClient", lambda *a, **k: real_client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(boldtrail, "_rate_limiter", PriorityTokenBucket(0))
+    monkeypatch.setattr(boldtrail, "_client", None)
+    monkeypatch.setattr(boldtrail, "_circuit", CircuitBreaker("kvcore", failure_threshold=3))
+    monkeypatch.setattr(settings, "BOLDTRAIL_RETRY_BASE_SECONDS", 0.01)
+    return responses, requests
+
+
+async def test_429_is_retried_after_retry_after(kvcore):
+    responses, requests = kvcore
+    responses += [
+        httpx.Response(429, headers={"Retry-After": "0.05"}, text="slow down"),
+        httpx.Response(200, json={"data": {"id": "c1"}}),
+    ]
+
+    result = await BoldTrailClient()._make_request("POST", "contact", data={"firstName": "Ann"})
+
+    assert result == {"data": {"id": "c1"}}
+    assert len(requests) == 2
+
+
+async def test_ambiguous_write_failure_is_not_retried(kvcore):
+    responses, requests = kvcore
+    responses += [httpx.Response(502, text="bad gateway"), httpx.Response(200, json={})]
+
+    with pytest.raises(BoldTrailError) as error:
+        await BoldTrailClient()._make_request("POST", "contact", data={"firstName": "Ann"})
+
+    assert error.value.status_code == 502
+    assert len(requests) == 1
+
+
+async def test_idempotent_get_is_retried_on_5xx_and_connect_errors(kvcore):
+    responses, requests = kvcore
+    responses += [
+        httpx.ConnectError("refused"),
+        httpx.Response(504, text="timeout"),
+        httpx.Response(200, json={"data": []}),
+    ]
+
+    result = await BoldTrailClient()._make_request("GET", "contacts")
+
+    assert result == {"data": []}
+    assert len(requests) == 3
+
+
+async def test_retries_stop_at_budget(kvcore, monkeypatch):
+    responses, requests = kvcore
+    monkeypatch.setattr(settings, "BOLDTRAIL_CALL_BUDGET_SECONDS", 0.5)
+    responses += [httpx.Response(429, headers={"Retry-After": "5"}, text="slow down")]
+
+    with pytest.raises(BoldTrailError) as error:
+        await BoldTrailClient()._make_request("GET", "contacts")
+
+    assert error.value.status_code == 429
+    assert len(requests) == 1
+
+
+async def test_open_circuit_fails_fast_without_calling_kvcore(kvcore):
+    responses, requests = kvcore
+    responses += [httpx.ConnectError("refused")] * 3
+
+    with pytest.raises(BoldTrailError):
+        await BoldTrailClient()._make_request("GET", "contacts")
+    assert boldtrail._circuit.state == "open"
+
+    with pytest.raises(BoldTrailError) as error:
+        await BoldTrailClient()._make_request("GET", "contacts")
+
+    assert error.value.status_code == 503 and error.value.details["circuit"] == "open"
+    assert len(requests) == 3
+
+
+async def test_tool_deadline_stops_retries(kvcore):
+    responses, requests = kvcore
+    responses += [httpx.Response(503, text="busy")] * 3
+
+    with deadline_scope(0.05):
+        await asyncio.sleep(0.06)
+        with pytest.raises(BoldTrailError) as error:
+            await BoldTrailClient()._make_request("GET", "contacts")
+
+    assert error.value.status_code == 504 and error.value.details["deadline"] == "exceeded"
+    assert not requests
+
+
+async def test_request_priority_applies_to_started_tasks(kvcore, monkeypatch):
+    responses, _ = kvcore
+    responses.extend([httpx.Response(200, json={}), httpx.Response(200, json={})])
+    priorities = []
+    acquire = boldtrail._rate_limiter.acquire
+
+    async def recording_acquire(tokens=1.0, priority=0):
+        priorities.append(priority)
+        await acquire(tokens, priority=priority)
+
+    monkeypatch.setattr(boldtrail._rate_limiter, "acquire", recording_acquire)
+    with boldtrail.request_priority(PRIORITY_BACKGROUND):
+        task = asyncio.create_task(BoldTrailClient()._make_request("GET", "contacts"))
+    await task
+    await BoldTrailClient()._make_request("GET", "contacts")
+
+    assert priorities == [PRIORITY_BACKGROUND, PRIORITY_CALL]
@@ -0,0 +1,92 @@
+"""
+Tests for per-tool deadlines (src/utils/deadline.py)
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+
+from main import app
+from src.config.settings import settings
+from src.functions import create_buyer_lead as buyer_module
+from src.models.vapi_models import CreateBuyerLeadRequest
+from src.utils import deadline
+
+
+def test_scope_caps_timeouts_and_never_extends_outer():
+    assert deadline.remaining() is None and deadline.timeout_for(30.0) == 30.0
+
+    with deadline.deadline_scope(2.0) as outer:
+        assert deadline.timeout_for(30.0) <= 2.0
+        with deadline.deadline_scope(10.0):
+            assert deadline.remaining() <= 2.0
+        with deadline.no_deadline():
+            assert deadline.remaining() is None
+
+    assert not outer.active and deadline.remaining() is None
+
+
+def test_tool_budget_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_DEADLINE_SECONDS", 12.0)
+    monkeypatch.setattr(settings, "TOOL_DEADLINE_OVERRIDES", "check_property:8, route_to_agent:15")
+
+    assert deadline.tool_budget("route_to_agent") == 15.0
+    assert deadline.tool_budget("create_buyer_lead") == 12.0
+
+
+async def test_detached_work_outlives_the_deadline():
+    async def slow():
+        await asyncio.sleep(0.1)
+        return deadline.remaining()
+
+    with deadline.deadline_scope(0.05):
+        task = deadline.detach(slow())
+        try:
+            await deadline.within_deadline(task)
+            assert False, "deadline should have passed first"
+        except asyncio.TimeoutError:
+            pass
+
+    assert await task is None
+
+
+def test_middleware_sets_the_tool_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_DEADLINE_OVERRIDES", "deadline_probe:3")
+    router = APIRouter()
+
+    @router.post("/functions/deadline_probe")
+    async def deadline_probe():
+        return {"remaining": deadline.remaining()}
+
+    app.include_router(router)
+    try:
+        remaining = TestClient(app).post("/functions/deadline_probe").json()["remaining"]
+    finally:
+        app.router.routes[:] = [r for r in app.router.routes if getattr(r, "path", "") != "/functions/deadline_probe"]
+
+    assert 0 < remaining <= 3
+
+
+async def test_slow_crm_write_is_deferred(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_DEADLINE_RESERVE_SECONDS", 0.05)
+    release = asyncio.Event()
+
+    async def slow_save(*args):
+        await release.wait()
+        return "c42"
+
+    request = CreateBuyerLeadRequest(first_name="Ann", last_name="Lee", phone="352-555-0177")
+    with patch.object(buyer_module, "_save_buyer_lead", slow_save), \
+            patch.object(buyer_module, "_handle_buyer_lead_background_tasks", AsyncMock()) as follow_up:
+        with deadline.deadline_scope(0.15):
+            response = await buyer_module._create_buyer_lead(request)
+
+        assert response.success is True and response.data["deferred"] is True
+        follow_up.assert_not_awaited()
+
+        release.set()
+        await asyncio.sleep(0.05)
+
+    assert follow_up.await_args.kwargs["contact_id"] == "c42"
@@ -0,0 +1,161 @@
+"""
+Unit tests for the outbound dial scheduler (src/utils/dial_scheduler.py) and the
+token bucket it paces calls with (src/utils/rate_limit.py).
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.utils.dial_scheduler import OutboundDialScheduler, parse_days
+from src.utils.rate_limit import TokenBucket
+
+EASTERN = ZoneInfo("America/New_York")
+
+
+class Dialer:
+    """Records dials; fails the first `failures` attempts; call IDs are call-1, call-2..."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.dialed = []
+
+    async def __call__(self, job):
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Vapi concurrency limit")
+        self.dialed.append(job.phone)
+        return f"call-{len(self.dialed)}"
+
+
+def _scheduler(dialer, **kwargs):
+    options = {"calls_per_minute": 0, "retry_delay_seconds": 0}
+    options.update(kwargs)
+    return OutboundDialScheduler(dial=dialer, **options)
+
+
+async def test_token_bucket_paces_acquires():
+    bucket = TokenBucket(rate_per_second=20, capacity=1)
+    started = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+    assert TokenBucket(0).try_acquire(100)
+
+
+async def test_repeat_submissions_are_deduped():
+    dialer = Dialer()
+    scheduler = _scheduler(dialer)
+    job, queued = await scheduler.enqueue("352-555-0142", {"phone_number": "352-555-0142"})
+    assert queued and scheduler.position(job) == 1
+    assert await scheduler.enqueue("(352) 555-0142", {}) == (job, False)
+    await scheduler.join()
+    assert dialer.dialed == ["+13525550142"]
+    assert await scheduler.enqueue("+1 352 555 0142", {}) == (None, False)
+    assert (await scheduler.enqueue("352-555-0199", {}))[1] is True
+    await scheduler.stop()
+
+
+async def test_concurrency_cap_holds_until_call_ends():
+    dialer = Dialer()
+    scheduler = _scheduler(dialer, max_concurrent=2)
+    for i in range(4):
+        await scheduler.enqueue(f"352555010{i}", {})
+    await asyncio.sleep(0.05)
+    assert len(dialer.dialed) == 2 and len(scheduler) == 2
+    await scheduler.call_ended("call-1")
+    await asyncio.sleep(0.05)
+    assert len(dialer.dialed) == 3
+    await scheduler.call_ended("call-2")
+    await scheduler.join()
+    assert len(dialer.dialed) == 4
+    await scheduler.stop()
+
+
+async def test_failed_dials_are_retried_then_dropped():
+    dialer = Dialer(failures=2)
+    scheduler = _scheduler(dialer, max_attempts=3)
+    await scheduler.enqueue("3525550142", {})
+    await scheduler.join()
+    assert dialer.dialed == ["+13525550142"]
+
+    always_failing = Dialer(failures=10)
+    dropped = []
+
+    async def on_dropped(job):
+        dropped.append((job.phone, job.attempts))
+
+    scheduler = _scheduler(always_failing, max_attempts=2, on_dropped=on_dropped)
+    await scheduler.enqueue("3525550142", {})
+    await scheduler.join()
+    assert always_failing.failures == 8 and not always_failing.dialed
+    assert dropped == [("+13525550142", 2)]
+    await scheduler.stop()
+
+
+def test_business_hours_window():
+    scheduler = _scheduler(Dialer(), hours=("09:00", "17:00"), days="mon,tue,wed,thu,fri", timezone="America/New_York")
+    tuesday_noon = datetime(2026, 10, 20, 12, 0, tzinfo=EASTERN).timestamp()
+    tuesday_evening = datetime(2026, 10, 20, 18, 0, tzinfo=EASTERN).timestamp()
+    friday_evening = datetime(2026, 10, 23, 18, 0, tzinfo=EASTERN).timestamp()
+    assert scheduler.seconds_until_open(tuesday_noon) == 0
+    assert scheduler.seconds_until_open(tuesday_evening) == 15 * 3600
+    assert scheduler.seconds_until_open(friday_evening) == (2 * 24 + 15) * 3600
+    assert parse_days("") == frozenset(range(7))
+    with pytest.raises(ValueError):
+        parse_days("mon,funday")
+
+
+async def test_queue_survives_restart(tmp_path):
+    state_path = str(tmp_path / "queue.json")
+    closed = _scheduler(Dialer(), state_path=state_path, hours=("00:00", "00:00"))
+    await closed.enqueue("3525550142", {"phone_number": "3525550142", "customer_name": "Ann"})
+    await closed.stop()
+
+    dialer = Dialer()
+    restarted = _scheduler(dialer, state_path=state_path)
+    assert len(restarted) == 1
+    restarted.resume()
+    await restarted.join()
+    assert dialer.dialed == ["+13525550142"]
+    await restarted.stop()
+
+    again = _scheduler(Dialer(), state_path=state_path)
+    assert len(again) == 0
+    assert await again.enqueue("3525550142", {}) == (None, False)  # Dedupe state persisted too
+
+
+async def test_phone_being_dialed_is_not_queued_again():
+    dialer = Dialer(delay=0.05)
+    scheduler = _scheduler(dialer)
+    job, _ = await scheduler.enqueue("3525550142", {})
+    await asyncio.sleep(0.01)
+    assert scheduler.position(job) == 0  # Claimed, dial in progress
+    assert await scheduler.enqueue("(352) 555-0142", {}) == (job, False)
+    await scheduler.join()
+    assert dialer.dialed == ["+13525550142"]
+    await scheduler.stop()
+
+
+async def test_workers_share_queue_limits_and_slots(tmp_path):
+    state_path = str(tmp_path / "queue.db")
+    first_dialer, second_dialer = Dialer(), Dialer()
+    first = _scheduler(first_dialer, state_path=state_path, max_concurrent=1)
+    second = _scheduler(second_dialer, state_path=state_path, max_concurrent=1)
+    await first.enqueue("3525550100", {})
+    await second.enqueue("3525550101", {})
+    await asyncio.sleep(0.05)
+    assert len(first_dialer.dialed) + len(second_dialer.dialed) == 1
+    assert (await second.enqueue("352-555-0100", {}))[1] is False  # Dedupe across workers
+
+    # The end-of-call report reaches the other worker
+    await (first if second_dialer.dialed else second).call_ended("call-1")
+    await asyncio.wait_for(asyncio.gather(first.join(), second.join()), 10)
+    assert len(first_dialer.dialed) + len(second_dialer.dialed) == 2
+    await first.stop()
+    await second.stop()
@@ -0,0 +1,113 @@
+"""
+Tests for hedged kvCore reads (src/utils/hedging.py)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.config.settings import settings
+from src.integrations import boldtrail
+from src.integrations.boldtrail import BoldTrailClient
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.hedging import HedgeBudget, LatencyTracker, hedged
+from src.utils.rate_limit import PriorityTokenBucket
+
+
+def test_latency_quantile_needs_samples():
+    tracker = LatencyTracker(min_samples=10)
+    for ms in range(1, 10):
+        tracker.record(ms / 1000)
+    assert tracker.quantile(0.9) is None
+
+    tracker.record(0.010)
+    assert tracker.quantile(0.9) == 0.010
+    assert tracker.quantile(0.5) == 0.006
+
+
+def test_budget_caps_hedges_per_request():
+    budget = HedgeBudget(max_ratio=0.05, burst=1.0)
+    allowed = 0
+    for _ in range(200):
+        budget.earn()
+        allowed += budget.try_spend()
+    assert allowed == 10
+
+
+def _attempts(*delays, fail=()):
+    started = []
+
+    def send():
+        index = len(started)
+        started.append(index)
+
+        async def run():
+            await asyncio.sleep(delays[index])
+            if index in fail:
+                raise httpx.ConnectError("refused")
+            return index
+
+        return run()
+
+    return send, started
+
+
+async def test_slow_primary_loses_to_hedge():
+    send, started = _attempts(1.0, 0.01)
+    budget = HedgeBudget(max_ratio=1.0)
+
+    assert await hedged(send, 0.02, budget) == 1
+    assert started == [0, 1] and budget.hedge_wins == 1
+
+
+async def test_fast_primary_is_not_hedged():
+    send, started = _attempts(0.001)
+
+    assert await hedged(send, 0.05, HedgeBudget(max_ratio=1.0)) == 0
+    assert started == [0]
+
+
+async def test_no_hedge_without_budget():
+    send, started = _attempts(0.05, 0.001)
+
+    assert await hedged(send, 0.01, HedgeBudget(max_ratio=0.0)) == 0
+    assert started == [0]
+
+
+async def test_failed_hedge_waits_for_primary():
+    send, started = _attempts(0.05, 0.001, fail={1})
+
+    assert await hedged(send, 0.01, HedgeBudget(max_ratio=1.0)) == 0
+
+
+async def test_both_failing_raises():
+    send, _ = _attempts(0.02, 0.001, fail={0, 1})
+
+    with pytest.raises(httpx.ConnectError):
+        await hedged(send, 0.01, HedgeBudget(max_ratio=1.0))
+
+
+async def test_kvcore_get_is_hedged_after_observed_p90(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json={"data": [len(calls)]})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(boldtrail.httpx, "AsyncClient", lambda *a, **k: real_client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(boldtrail, "_client", None)
+    monkeypatch.setattr(boldtrail, "_rate_limiter", PriorityTokenBucket(0))
+    monkeypatch.setattr(boldtrail, "_circuit", CircuitBreaker("kvcore"))
+    monkeypatch.setattr(boldtrail, "_hedge_budget", HedgeBudget(max_ratio=1.0))
+    monkeypatch.setattr(boldtrail, "_latencies", LatencyTracker(min_samples=1))
+    monkeypatch.setattr(settings, "BOLDTRAIL_HEDGE_MIN_DELAY_SECONDS", 0.02)
+    boldtrail._latencies.record(0.02)
+
+    result = await BoldTrailClient()._make_request("GET", "contacts")
+
+    assert result == {"data": [2]}
+    assert len(calls) == 2
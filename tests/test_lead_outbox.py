@@ -0,0 +1,170 @@
+"""
+Tests for the durable lead outbox (src/utils/lead_outbox.py)
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.utils import deadline
+from src.utils.errors import BoldTrailError
+from src.utils.lead_outbox import FAILED, LeadOutbox, OutboxDeferred
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return LeadOutbox(str(tmp_path / "data" / "outbox.db"), retry_base_seconds=0.05, retry_max_seconds=0.05)
+
+
+def _states(outbox):
+    with sqlite3.connect(outbox.path) as conn:
+        return [row[0] for row in conn.execute("SELECT state FROM lead_writes ORDER BY id")]
+
+
+async def test_write_is_committed_then_replayed(outbox):
+    written = []
+
+    async def handler(payload):
+        written.append(payload["name"])
+        return "c1"
+
+    outbox.register("buyer_lead", handler)
+    entry_id = await outbox.enqueue("buyer_lead", "+13525550100", {"name": "Ann"})
+
+    assert await outbox.wait(entry_id) == "c1"
+    assert written == ["Ann"] and _states(outbox) == ["done"]
+    assert sqlite3.connect(outbox.path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+async def test_identical_waiting_write_is_deduplicated(outbox):
+    release = asyncio.Event()
+    written = []
+
+    async def handler(payload):
+        await release.wait()
+        written.append(payload)
+        return "c1"
+
+    outbox.register("buyer_lead", handler)
+    first = await outbox.enqueue("buyer_lead", "+13525550100", {"name": "Ann"})
+    second = await outbox.enqueue("buyer_lead", "+13525550100", {"name": "Ann"})
+    release.set()
+
+    assert first == second and await outbox.wait(first) == "c1"
+    assert len(written) == 1
+
+
+async def test_outage_is_retried_in_order_per_contact(outbox):
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload["step"])
+        if len(calls) == 1:
+            raise BoldTrailError("connect failed", status_code=503)
+        return payload["step"]
+
+    outbox.register("buyer_lead", handler)
+    first = await outbox.enqueue("buyer_lead", "+13525550100", {"step": 1})
+    second = await outbox.enqueue("buyer_lead", "+13525550100", {"step": 2})
+
+    with pytest.raises(OutboxDeferred):
+        await outbox.wait(first)
+    assert await outbox.wait(second) == 2
+
+    assert calls == [1, 1, 2]
+    assert outbox.stats()["retried"] == 1 and outbox.stats()["pending"] == 0
+
+
+async def test_client_error_marks_entry_failed(outbox):
+    async def handler(payload):
+        raise BoldTrailError("invalid email", status_code=422)
+
+    outbox.register("buyer_lead", handler)
+    entry_id = await outbox.enqueue("buyer_lead", "+13525550100", {"name": "Ann"})
+
+    with pytest.raises(BoldTrailError):
+        await outbox.wait(entry_id)
+    assert _states(outbox) == [FAILED] and outbox.stats()["failed"] == 1
+
+
+async def test_entries_survive_a_restart(outbox):
+    await outbox.enqueue("seller_lead", "+13525550100", {"name": "Bo"})
+    await outbox.stop()
+
+    restarted = LeadOutbox(outbox.path)
+    done = asyncio.Event()
+
+    async def handler(payload):
+        done.set()
+        return "c2"
+
+    restarted.register("seller_lead", handler)
+    restarted.resume()
+    await asyncio.wait_for(done.wait(), 1.0)
+    await asyncio.sleep(0.05)
+
+    assert restarted.stats()["written"] == 1
+
+
+async def test_failed_entry_alerts_the_office(outbox):
+    alerts = []
+
+    async def handler(payload):
+        raise BoldTrailError("invalid email", status_code=422)
+
+    async def on_failed(payload, error):
+        alerts.append((payload["name"], error.status_code))
+
+    outbox.register("buyer_lead", handler, on_failed=on_failed)
+    entry_id = await outbox.enqueue("buyer_lead", "+13525550100", {"name": "Ann"})
+
+    with pytest.raises(BoldTrailError):
+        await outbox.wait(entry_id)
+    await asyncio.sleep(0.01)
+
+    assert alerts == [("Ann", 422)]
+
+
+async def test_handler_bugs_are_not_retried(outbox):
+    calls = []
+
+    async def handler(payload):
+        calls.append(1)
+        return payload["missing"]
+
+    outbox.register("buyer_lead", handler)
+    entry_id = await outbox.enqueue("buyer_lead", "+13525550100", {"name": "Ann"})
+
+    with pytest.raises(KeyError):
+        await outbox.wait(entry_id)
+    assert calls == [1] and _states(outbox) == [FAILED]
+
+
+async def test_abandoned_wait_stops_polling(outbox, monkeypatch):
+    release = asyncio.Event()
+    polls = []
+    state = outbox._state
+
+    async def handler(payload):
+        await release.wait()
+        return "c1"
+
+    def counting_state(entry_id):
+        polls.append(entry_id)
+        return state(entry_id)
+
+    monkeypatch.setattr(outbox, "_state", counting_state)
+    outbox.register("buyer_lead", handler)
+    entry_id = await outbox.enqueue("buyer_lead", "+13525550100", {"name": "Ann"})
+
+    with deadline.deadline_scope(0.05):
+        with pytest.raises(asyncio.TimeoutError):
+            await deadline.within_deadline(outbox.wait(entry_id, poll_seconds=0.01), shield=False)
+    seen = len(polls)
+    await asyncio.sleep(0.05)
+
+    assert seen and len(polls) == seen
+    release.set()
+    await asyncio.sleep(0.05)
+    assert _states(outbox) == ["done"]
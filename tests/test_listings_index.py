@@ -0,0 +1,230 @@
+"""
+Unit tests for the columnar listings index (src/utils/listings_index.py)
+and the XML feed search that runs on top of it.
+"""
+
+import pytest
+
+from src.integrations import boldtrail
+from src.integrations.boldtrail import BoldTrailClient
+from src.utils.agent_index import AgentNameIndex
+from src.utils.listings_index import ListingMatches, ListingsIndex, price_bounds
+from src.utils.street_index import StreetIndex
+
+
+def _listing(address, city, price, beds, baths, status="Active", **extra):
+    listing = {
+        "address": address,
+        "city": city,
+        "state": "FL",
+        "zip": extra.pop("zip", "32162"),
+        "zipCode": "",
+        "mlsNumber": extra.pop("mls", ""),
+        "price": float(price),
+        "status": status,
+        "bedrooms": beds,
+        "bathrooms": float(baths),
+        "squareFeet": extra.pop("sqft", 1500),
+        "propertyType": extra.pop("property_type", "Single Family"),
+        "agentName": extra.pop("agent", ""),
+    }
+    listing["zipCode"] = listing["zip"]
+    listing.update(extra)
+    return listing
+
+
+@pytest.fixture
+def sample_listings():
+    return [
+        _listing("3016 Gallinule Court", "The Villages", 389000, 3, 2, agent="Jeannie Ulmer"),
+        _listing("2121 Auburn Lane", "Lady Lake", 329000, 2, 2, zip="32159"),
+        _listing("16642 SE 80th Bellavista Circle", "Oxford", 415000, 3, 2.5, mls="G5012345"),
+        _listing("100 Main Street", "Ocala", 250000, 3, 2, zip="34470"),
+        _listing("6794 Boss Court", "Wildwood", 399000, 3, 2, status="Pending"),
+        _listing(
+            "12 Palm Way", "Summerfield", 1250000, 4, 3, property_type="Condo",
+            agent="Kim Coffer", coAgentName="Jeannie Ulmer",
+        ),
+    ]
+
+
+@pytest.fixture
+def seeded_feed(monkeypatch, sample_listings):
+    """Serve sample_listings as the cached XML feed."""
+
+    async def fake_fetch(self):
+        return sample_listings
+
+    monkeypatch.setattr(BoldTrailClient, "_fetch_xml_listings_feed", fake_fetch)
+    monkeypatch.setattr(boldtrail, "_listings_index", None)
+    monkeypatch.setattr(boldtrail, "_market_facets", None)
+    monkeypatch.setattr(boldtrail, "_agent_index", None)
+    monkeypatch.setattr(boldtrail, "_street_index", None)
+    return sample_listings
+
+
+class TestListingsIndex:
+    def test_columns_mirror_listings(self, sample_listings):
+        index = ListingsIndex(sample_listings)
+        assert len(index) == 6
+        assert index.price[0] == 389000
+        assert index.beds[3] == 3
+        assert index.baths[2] == 2.5
+        assert index.sqft[0] == 1500
+
+    def test_price_and_beds_mask(self, sample_listings):
+        index = ListingsIndex(sample_listings)
+        rows = index.rows(index.mask(max_price=400000, bedrooms=3))
+        assert [sample_listings[r]["address"] for r in rows] == [
+            "3016 Gallinule Court",
+            "100 Main Street",
+            "6794 Boss Court",
+        ]
+
+    def test_falsy_min_price_is_ignored(self, sample_listings):
+        index = ListingsIndex(sample_listings)
+        assert index.mask(min_price=0).all()
+
+    def test_minimum_semantics(self, sample_listings):
+        index = ListingsIndex(sample_listings)
+        rows = index.rows(index.mask(min_bedrooms=3, min_bathrooms=2.5))
+        assert [sample_listings[r]["address"] for r in rows] == [
+            "16642 SE 80th Bellavista Circle",
+            "12 Palm Way",
+        ]
+
+    def test_city_predicate_and_status(self, sample_listings):
+        index = ListingsIndex(sample_listings)
+        mask = index.mask(
+            city_matches=lambda c: c in {"wildwood", "oxford"},
+            statuses=("active", "available", ""),
+        )
+        assert [sample_listings[r]["city"] for r in index.rows(mask)] == ["Oxford"]
+
+    def test_unknown_zip_matches_nothing(self, sample_listings):
+        index = ListingsIndex(sample_listings)
+        assert not index.mask(zip_code="99999").any()
+
+    def test_price_bounds(self, sample_listings):
+        assert price_bounds(sample_listings[:2]) == (329000.0, 389000.0)
+        assert price_bounds([]) == (0.0, 0.0)
+        index = ListingsIndex(sample_listings)
+        matches = ListingMatches.from_rows(index, [1, 0], [{}, {}])  # Column values, not the dicts
+        assert price_bounds(matches) == (329000.0, 389000.0)
+        assert price_bounds(matches[:1]) == (329000.0, 329000.0)
+
+
+class TestAgentNameIndex:
+    def test_exact_partial_and_phonetic_lookup(self, sample_listings):
+        agents = AgentNameIndex(sample_listings)
+        assert list(agents.rows("Jeannie Ulmer")) == [0, 5]
+        assert list(agents.rows("  ULMER ")) == [0, 5]
+        assert agents.matching_names("Jeanie Ulmer") == ["jeannie ulmer"]
+        assert list(agents.rows("Kim Coffer")) == [5]
+        assert len(agents.rows("Nobody Here")) == 0
+        assert len(agents.rows("")) == 0
+
+    async def test_unknown_agent_returns_nothing(self, seeded_feed):
+        assert await BoldTrailClient().search_listings_from_xml(agent_name="Nobody Here") == []
+
+
+class TestStreetIndex:
+    def test_misheard_street_resolves_to_candidate_rows(self, sample_listings):
+        client = BoldTrailClient()
+        streets = StreetIndex(sample_listings, client._street_words)
+        rows = streets.candidate_rows(["gallenoll"], client._word_matches_phonetic)
+        assert list(rows) == [0]
+        assert streets.matching_words("gallonol", client._word_matches_phonetic) == ["gallinule"]
+
+    def test_compound_street_name(self, sample_listings):
+        client = BoldTrailClient()
+        streets = StreetIndex(sample_listings, client._street_words)
+        assert list(streets.candidate_rows(["belle", "vista"], client._word_matches_phonetic)) == [2]
+
+    def test_no_street_words(self, sample_listings):
+        client = BoldTrailClient()
+        streets = StreetIndex(sample_listings, client._street_words)
+        assert streets.candidate_rows([], client._word_matches_phonetic) is None
+
+    async def test_fuzzy_address_search(self, seeded_feed):
+        results = await BoldTrailClient().search_listings_from_xml(address="3016 Gallenoll Court")
+        assert [r["address"] for r in results] == ["3016 Gallinule Court"]
+
+
+class TestSearchListingsFromXml:
+    async def test_villages_three_bed_under_400k(self, seeded_feed):
+        results = await BoldTrailClient().search_listings_from_xml(
+            city="The Villages", state="FL", bedrooms=3, max_price=400000
+        )
+        # Wildwood listing is pending, Ocala is outside The Villages
+        assert [r["address"] for r in results] == ["3016 Gallinule Court"]
+
+    async def test_address_search_includes_pending(self, seeded_feed):
+        results = await BoldTrailClient().search_listings_from_xml(address="6794 Boss Court")
+        assert len(results) == 1
+        assert results[0]["status"] == "Pending"
+
+    async def test_limit_applies_in_feed_order(self, seeded_feed):
+        results = await BoldTrailClient().search_listings_from_xml(state="FL", limit=2)
+        assert [r["address"] for r in results] == ["3016 Gallinule Court", "2121 Auburn Lane"]
+
+    async def test_mls_and_agent_filters(self, seeded_feed):
+        client = BoldTrailClient()
+        by_mls = await client.search_listings_from_xml(mls_number="G5012345")
+        assert [r["address"] for r in by_mls] == ["16642 SE 80th Bellavista Circle"]
+        spoken = await client.search_listings_from_xml(mls_number=" g501 2345 ")
+        assert spoken == by_mls
+        by_agent = await client.search_listings_from_xml(agent_name="jeannie ulmer")
+        # Includes the listing she co-lists with Kim Coffer
+        assert [r["address"] for r in by_agent] == ["3016 Gallinule Court", "12 Palm Way"]
+
+
+class TestMarketSummary:
+    async def test_facets_cover_villages_area(self, seeded_feed):
+        summary = await BoldTrailClient().get_market_summary(city="The Villages")
+        # Pending Wildwood listing is excluded; Ocala is outside the area
+        assert summary["count"] == 4
+        assert summary["price"]["min"] == 329000
+        assert summary["price"]["max"] == 1250000
+        assert summary["bedrooms"] == {"2": 1, "3": 2, "4": 1}
+
+    async def test_single_filter_facets(self, seeded_feed):
+        client = BoldTrailClient()
+        assert (await client.get_market_summary(zip_code="34470"))["count"] == 1
+        assert (await client.get_market_summary(status="pending"))["count"] == 1
+        assert (await client.get_market_summary())["count"] == 5
+
+    async def test_combined_filters_use_mask(self, seeded_feed):
+        summary = await BoldTrailClient().get_market_summary(city="Villages", property_type="condo")
+        assert summary["count"] == 1
+        assert summary["price"]["median"] == 1250000
+
+    async def test_unknown_area_is_empty(self, seeded_feed):
+        summary = await BoldTrailClient().get_market_summary(city="Miami")
+        assert summary == {"count": 0, "price": None, "bedrooms": {}, "bathrooms": {}}
+
+
+class TestFeedVersion:
+    async def test_version_bumps_only_when_feed_replaced(self, seeded_feed, monkeypatch, sample_listings):
+        client = BoldTrailClient()
+        first = await client.get_feed_version()
+        assert await client.get_feed_version() == first
+
+        replacement = list(sample_listings)
+
+        async def refreshed(self):
+            return replacement
+
+        monkeypatch.setattr(BoldTrailClient, "_fetch_xml_listings_feed", refreshed)
+        assert await client.get_feed_version() == first + 1
+
+    async def test_unavailable_feed_does_not_bump_version(self, seeded_feed, monkeypatch):
+        async def unavailable(self):
+            return []  # A fresh empty list per call, as for an unconfigured feed
+
+        monkeypatch.setattr(BoldTrailClient, "_fetch_xml_listings_feed", unavailable)
+        client = BoldTrailClient()
+        first = await client.get_feed_version()
+        index = await client.get_listings_index()
+        assert await client.get_feed_version() == first
+        assert await client.get_listings_index() is index
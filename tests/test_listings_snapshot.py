@@ -0,0 +1,152 @@
+"""
+Unit tests for the shared, memory-mapped listings snapshot (src/utils/listings_snapshot.py)
+and the multi-worker feed cache in BoldTrailClient.
+"""
+
+import numpy as np
+import pytest
+
+from src.config.settings import settings
+from src.integrations import boldtrail
+from src.integrations.boldtrail import BoldTrailClient
+from src.utils.listings_index import ListingsIndex
+from src.utils.listings_snapshot import RefreshLock, SnapshotListings, load_snapshot, read_header, write_snapshot
+from src.utils.market_facets import compute_market_facets
+from tests.test_listings_index import _listing
+
+
+@pytest.fixture
+def listings():
+    return [
+        _listing("3016 Gallinule Court", "The Villages", 389000, 3, 2, agent="Jeannie Ulmer"),
+        _listing("2121 Auburn Lane", "Lady Lake", 329000, 2, 2, zip="32159"),
+        _listing("100 Main Street", "Ocala", 250000, 3, 2, zip="34470"),
+    ]
+
+
+def _publish(path, listings, created=None):
+    index = ListingsIndex(listings)
+    return write_snapshot(path, listings, index, {"market_facets": compute_market_facets(index)}, created)
+
+
+class TestSnapshotFile:
+    def test_round_trip(self, tmp_path, listings):
+        path = tmp_path / "listings.snapshot"
+        assert _publish(path, listings, created=1000.0) == 1
+
+        snapshot = load_snapshot(path)
+        assert snapshot.generation == 1
+        assert snapshot.created == 1000.0
+        assert len(snapshot.listings) == 3
+        assert snapshot.listings[1] == listings[1]
+        assert [l["address"] for l in snapshot.listings] == [l["address"] for l in listings]
+        assert snapshot.extras["market_facets"]["all"]["count"] == 3
+
+        rows = snapshot.index.rows(snapshot.index.mask(max_price=330000, zip_code="32159"))
+        assert rows.tolist() == [1]
+
+    def test_columns_are_read_only_views_of_the_mapping(self, tmp_path, listings):
+        path = tmp_path / "listings.snapshot"
+        _publish(path, listings)
+        index = load_snapshot(path).index
+        np.testing.assert_array_equal(index.price, [389000, 329000, 250000])
+        assert not index.price.flags.owndata
+        assert not index.price.flags.writeable
+
+    def test_replacement_bumps_generation_and_keeps_old_mapping_valid(self, tmp_path, listings):
+        path = tmp_path / "listings.snapshot"
+        _publish(path, listings)
+        old = load_snapshot(path)
+
+        assert _publish(path, listings[:1]) == 2
+        assert read_header(path)["count"] == 1
+        assert len(old.listings) == 3
+        assert old.listings[2]["address"] == "100 Main Street"
+
+    def test_missing_or_foreign_file(self, tmp_path):
+        assert load_snapshot(tmp_path / "missing") is None
+        junk = tmp_path / "junk"
+        junk.write_bytes(b"not a snapshot")
+        assert load_snapshot(junk) is None
+        assert read_header(junk) is None
+
+    def test_refresh_lock_is_exclusive(self, tmp_path):
+        first, second = RefreshLock(tmp_path / "lock"), RefreshLock(tmp_path / "lock")
+        assert first.try_acquire()
+        assert not second.try_acquire()
+        first.release()
+        assert second.try_acquire()
+        second.release()
+
+
+class TestSnapshotMode:
+    @pytest.fixture
+    def workers(self, monkeypatch, tmp_path, listings):
+        """Snapshot mode with a counted fake feed download."""
+        monkeypatch.setattr(settings, "LISTINGS_SNAPSHOT_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "BOLDTRAIL_ZAPIER_KEY", "test-key")
+        downloads = []
+
+        async def fake_download(self):
+            downloads.append(1)
+            return listings, self._build_feed_state(listings)
+
+        monkeypatch.setattr(BoldTrailClient, "_download_listings_feed", fake_download)
+        for name in ("_listings_cache", "_cache_timestamp", "_listings_index", "_market_facets",
+                     "_agent_index", "_street_index", "_snapshot_generation"):
+            monkeypatch.setattr(boldtrail, name, None)
+        return downloads
+
+    def _new_worker(self, monkeypatch):
+        """Drop this process's caches, as a freshly started worker would have none."""
+        monkeypatch.setattr(boldtrail, "_listings_cache", None)
+        monkeypatch.setattr(boldtrail, "_cache_timestamp", None)
+        monkeypatch.setattr(boldtrail, "_snapshot_generation", None)
+
+    async def test_one_download_shared_by_workers(self, workers, monkeypatch):
+        client = BoldTrailClient()
+        first = await client._fetch_xml_listings_feed()
+        assert len(first) == 3
+        assert workers == [1]
+
+        self._new_worker(monkeypatch)
+        second = await client._fetch_xml_listings_feed()
+        assert [l["address"] for l in second] == [l["address"] for l in first]
+        assert workers == [1]
+
+        results = await client.search_listings_from_xml(address="3016 Gallenoll Court")
+        assert [l["address"] for l in results] == ["3016 Gallinule Court"]
+        agent_hits = await client.search_listings_from_xml(agent_name="Jeannie Ulmer")
+        assert [l["address"] for l in agent_hits] == ["3016 Gallinule Court"]
+
+    async def test_stale_snapshot_is_refreshed_once(self, workers, monkeypatch):
+        client = BoldTrailClient()
+        await client._fetch_xml_listings_feed()
+        version = await client.get_feed_version()
+
+        monkeypatch.setattr(boldtrail, "CACHE_DURATION", 0)
+        self._new_worker(monkeypatch)
+        await client._fetch_xml_listings_feed()
+        assert workers == [1, 1]
+        assert boldtrail._snapshot_generation == 2
+        assert boldtrail._feed_version > version
+
+    async def test_mls_search_decodes_only_the_matching_listing(self, workers, monkeypatch, listings):
+        for number, listing in enumerate(listings):
+            listing["mlsNumber"] = f"G50{number}"
+        client = BoldTrailClient()
+        await client._fetch_xml_listings_feed()
+        self._new_worker(monkeypatch)
+        await client._fetch_xml_listings_feed()
+
+        decoded = []
+        original = SnapshotListings.__getitem__
+
+        def counting(self, row):
+            decoded.append(row)
+            return original(self, row)
+
+        monkeypatch.setattr(SnapshotListings, "__getitem__", counting)
+        results = await client.search_listings_from_xml(mls_number="G502")
+        assert [l["address"] for l in results] == ["100 Main Street"]
+        assert decoded == [2]
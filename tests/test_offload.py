@@ -0,0 +1,143 @@
+"""
+Unit tests for the CPU offload pools (src/utils/offload.py) and the BoldTrail
+feed parse / wide search paths that use them.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.config.settings import settings
+from src.integrations import boldtrail
+from src.integrations.boldtrail import BoldTrailClient, _parse_listings_xml
+from src.utils import offload
+from src.utils.offload import feed_parse_mode, run_in_thread, run_offloaded, shutdown_offload_pools
+
+_FEED_XML = """<?xml version="1.0"?>
+<Listings>
+  <Listing>
+    <Location><StreetAddress>3016 Gallinule Court</StreetAddress><City>The Villages</City>
+      <State>FL</State><Zip>32162</Zip></Location>
+    <ListingDetails><Price>389000</Price><Status>Active</Status><MlsId>G5000001</MlsId></ListingDetails>
+    <BasicDetails><Bedrooms>3</Bedrooms><Bathrooms>2</Bathrooms></BasicDetails>
+  </Listing>
+  <Listing>
+    <Location><StreetAddress>2121 Auburn Lane</StreetAddress><City>Lady Lake</City>
+      <State>FL</State><Zip>32159</Zip></Location>
+    <ListingDetails><Price>329000</Price><Status>Active</Status></ListingDetails>
+  </Listing>
+</Listings>
+"""
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    shutdown_offload_pools()
+    yield
+    shutdown_offload_pools(wait=True)
+
+
+class TestRunOffloaded:
+    async def test_thread_runs_off_the_loop_thread(self):
+        caller = threading.get_ident()
+        worker = await run_in_thread(threading.get_ident)
+        assert worker != caller
+
+    async def test_inline_runs_on_the_loop_thread(self):
+        assert await run_offloaded("inline", threading.get_ident) == threading.get_ident()
+
+    async def test_exceptions_propagate(self):
+        def boom():
+            raise ValueError("bad feed")
+
+        with pytest.raises(ValueError, match="bad feed"):
+            await run_in_thread(boom)
+
+    async def test_pending_jobs_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(settings, "OFFLOAD_MAX_PENDING", 2)
+        monkeypatch.setattr(settings, "OFFLOAD_THREAD_WORKERS", 4)
+        lock = threading.Lock()
+        running = [0, 0]  # current, peak
+        release = threading.Event()
+
+        def job():
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            release.wait(5)
+            with lock:
+                running[0] -= 1
+
+        tasks = [asyncio.create_task(run_in_thread(job)) for _ in range(5)]
+        await asyncio.sleep(0.1)
+        assert running[1] == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        assert running[1] == 2
+
+    def test_unknown_parse_mode_falls_back_to_process(self, monkeypatch):
+        monkeypatch.setattr(settings, "OFFLOAD_FEED_PARSE_MODE", "gpu")
+        assert feed_parse_mode() == "process"
+        monkeypatch.setattr(settings, "OFFLOAD_FEED_PARSE_MODE", "Thread")
+        assert feed_parse_mode() == "thread"
+
+    def test_shutdown_clears_pools(self):
+        asyncio.run(run_in_thread(int))
+        assert offload._executors
+        shutdown_offload_pools(wait=True)
+        assert not offload._executors
+
+
+class TestFeedParsing:
+    def test_parse_listings_xml(self):
+        listings = _parse_listings_xml(_FEED_XML)
+        assert [l["address"] for l in listings] == ["3016 Gallinule Court", "2121 Auburn Lane"]
+        assert listings[0]["price"] == 389000
+        assert listings[0]["spokenAddress"]
+
+    async def test_parse_in_process_pool(self):
+        listings = await run_offloaded("process", _parse_listings_xml, _FEED_XML)
+        assert len(listings) == 2
+        assert listings[1]["city"] == "Lady Lake"
+
+    async def test_build_feed_state_in_thread(self):
+        listings = _parse_listings_xml(_FEED_XML)
+        index, facets, agents, streets = await run_in_thread(BoldTrailClient()._build_feed_state, listings)
+        assert len(index) == 2
+        assert facets
+        assert len(streets) >= 2
+
+
+class TestWideSearchOffload:
+    @pytest.fixture
+    def feed(self, monkeypatch):
+        listings = _parse_listings_xml(_FEED_XML)
+
+        async def fake_fetch(self):
+            return listings
+
+        monkeypatch.setattr(BoldTrailClient, "_fetch_xml_listings_feed", fake_fetch)
+        monkeypatch.setattr(boldtrail, "_listings_index", None)
+        monkeypatch.setattr(boldtrail, "_market_facets", None)
+        monkeypatch.setattr(boldtrail, "_agent_index", None)
+        monkeypatch.setattr(boldtrail, "_street_index", None)
+        return listings
+
+    async def test_wide_address_scan_matches_inline(self, feed, monkeypatch):
+        client = BoldTrailClient()
+        inline = await client.search_listings_from_xml(address="3016 Gallenoll Court")
+
+        monkeypatch.setattr(settings, "OFFLOAD_WIDE_SEARCH_ROWS", 0)
+        calls = []
+        original = offload.run_offloaded
+
+        async def spy(kind, fn, *args, **kwargs):
+            calls.append(kind)
+            return await original(kind, fn, *args, **kwargs)
+
+        monkeypatch.setattr(offload, "run_offloaded", spy)
+        offloaded = await client.search_listings_from_xml(address="3016 Gallenoll Court")
+
+        assert calls == ["thread"]
+        assert [l["address"] for l in offloaded] == [l["address"] for l in inline] == ["3016 Gallinule Court"]
@@ -0,0 +1,84 @@
+"""
+Unit tests for the versioned search result cache (src/utils/query_cache.py)
+and its use in check_property.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.functions import check_property as check_property_module
+from src.models.vapi_models import CheckPropertyRequest
+from src.utils.query_cache import QueryCache
+
+
+class TestQueryCache:
+    def test_hit_and_miss(self):
+        cache = QueryCache(max_entries=4)
+        assert cache.get("a", 1) is None
+        cache.set("a", [1], 1)
+        assert cache.get("a", 1) == [1]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_new_version_drops_entries(self):
+        cache = QueryCache(max_entries=4)
+        cache.set("a", [1], 1)
+        assert cache.get("a", 2) is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = QueryCache(max_entries=2)
+        cache.set("a", 1, 1)
+        cache.set("b", 2, 1)
+        cache.get("a", 1)
+        cache.set("c", 3, 1)
+        assert cache.get("b", 1) is None
+        assert cache.get("a", 1) == 1
+
+    def test_ttl_expiry(self):
+        cache = QueryCache(max_entries=2, ttl_seconds=0)
+        cache.set("a", 1, 1)
+        with patch("src.utils.query_cache.time.monotonic", return_value=1e12):
+            assert cache.get("a", 1) is None
+
+    def test_zero_size_disables(self):
+        cache = QueryCache(max_entries=0)
+        cache.set("a", 1, 1)
+        assert len(cache) == 0
+
+
+def test_canonical_key_ignores_case_whitespace_and_defaults():
+    key = check_property_module._canonical_search_key
+    a = CheckPropertyRequest(city="  The   Villages ", bedrooms=3, max_price=400000)
+    b = CheckPropertyRequest(city="the villages", state="fl", bedrooms="3", max_price="400000.0")
+    assert key(a) == key(b)
+    assert key(a) != key(CheckPropertyRequest(city="The Villages", bedrooms=4))
+    assert key(CheckPropertyRequest(mls_number="g501 2345")) == key(CheckPropertyRequest(mls_number="G5012345"))
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(check_property_module, "_search_cache", QueryCache(max_entries=8))
+
+
+async def test_repeat_search_skips_matching(fresh_cache):
+    listing = {"address": "100 Main Street", "city": "Ocala", "price": 250000.0}
+    client = check_property_module.crm_client
+    with patch.object(client, "get_feed_version", AsyncMock(return_value=7)), patch.object(
+        client, "search_listings_from_xml", AsyncMock(return_value=[listing])
+    ) as search:
+        first = await check_property_module.check_property(CheckPropertyRequest(city="Ocala"))
+        second = await check_property_module.check_property(CheckPropertyRequest(city=" ocala "))
+    assert search.await_count == 1
+    assert first.results == second.results == [listing]
+
+
+async def test_feed_refresh_invalidates(fresh_cache):
+    listing = {"address": "100 Main Street", "city": "Ocala", "price": 250000.0}
+    client = check_property_module.crm_client
+    with patch.object(client, "get_feed_version", AsyncMock(side_effect=[1, 2])), patch.object(
+        client, "search_listings_from_xml", AsyncMock(return_value=[listing])
+    ) as search:
+        await check_property_module.check_property(CheckPropertyRequest(city="Ocala"))
+        await check_property_module.check_property(CheckPropertyRequest(city="Ocala"))
+    assert search.await_count == 2
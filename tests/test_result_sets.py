@@ -0,0 +1,100 @@
+"""
+Unit tests for cursor-based paging of check_property results
+(src/utils/result_sets.py and the more_properties function).
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.functions import check_property as check_property_module
+from src.functions.more_properties import more_properties
+from src.models.vapi_models import CheckPropertyRequest, MorePropertiesRequest
+from src.utils.query_cache import QueryCache
+from src.utils.result_sets import ResultSetStore
+
+
+def _listings(n):
+    return [
+        {"address": f"{100 + i} Main Street", "city": "Ocala", "price": 200000.0 + i * 1000}
+        for i in range(n)
+    ]
+
+
+class TestResultSetStore:
+    def test_pages_advance_and_index_is_one_based(self):
+        store = ResultSetStore()
+        cursor = store.create(_listings(12), page_size=5)
+        result_set = store.get(cursor)
+        assert [p["address"] for p in result_set.page()][0] == "100 Main Street"
+        assert result_set.page()[0]["address"] == "105 Main Street"
+        assert len(result_set.page()) == 2
+        assert result_set.page() == []
+        assert result_set.get(6)["address"] == "105 Main Street"
+        assert result_set.get(13) is None
+
+    def test_unknown_and_expired_cursors(self):
+        store = ResultSetStore(ttl_seconds=0)
+        cursor = store.create(_listings(2), page_size=5)
+        assert store.get("nope") is None
+        with patch("src.utils.result_sets.time.monotonic", return_value=1e12):
+            assert store.get(cursor) is None
+
+    def test_bounded(self):
+        store = ResultSetStore(max_sets=2)
+        first = store.create(_listings(2), page_size=5)
+        store.create(_listings(2), page_size=5)
+        store.create(_listings(2), page_size=5)
+        assert len(store) == 2
+        assert store.get(first) is None
+
+
+@pytest.fixture
+def twelve_results(monkeypatch):
+    monkeypatch.setattr(check_property_module, "_search_cache", QueryCache(max_entries=8))
+    monkeypatch.setattr(check_property_module, "result_sets", ResultSetStore())
+    client = check_property_module.crm_client
+    with patch.object(client, "get_feed_version", AsyncMock(return_value=1)), patch.object(
+        client, "search_listings_from_xml", AsyncMock(return_value=_listings(12))
+    ) as search:
+        yield search
+
+
+async def test_check_property_returns_first_page_and_cursor(twelve_results):
+    response = await check_property_module.check_property(CheckPropertyRequest(city="Ocala"))
+    assert len(response.results) == 5
+    assert response.data["total"] == 12
+    assert response.data["has_more"] is True
+    assert response.data["cursor"]
+    assert "12 properties" in response.message
+    # Full result set is requested, not just one page
+    assert twelve_results.await_args.kwargs["limit"] >= 12
+
+
+async def test_more_properties_pages_without_searching(twelve_results, monkeypatch):
+    import src.functions.more_properties as more_module
+
+    monkeypatch.setattr(more_module, "result_sets", check_property_module.result_sets)
+    first = await check_property_module.check_property(CheckPropertyRequest(city="Ocala"))
+    cursor = first.data["cursor"]
+
+    second = await more_properties(MorePropertiesRequest(cursor=cursor))
+    assert [p["address"] for p in second.results][0] == "105 Main Street"
+    assert second.data["has_more"] is True
+    assert "6 through 10 of 12" in second.message
+
+    third = await more_properties(MorePropertiesRequest(cursor=cursor))
+    assert len(third.results) == 2
+    assert third.data["has_more"] is False
+
+    single = await more_properties(MorePropertiesRequest(cursor=cursor, index="6"))
+    assert single.results[0]["address"] == "105 Main Street"
+    assert single.message.startswith("Number 6 is")
+
+    assert twelve_results.await_count == 1
+
+
+async def test_more_properties_unknown_cursor():
+    response = await more_properties(MorePropertiesRequest(cursor="missing"))
+    assert response.success is False
+    assert response.error == "Unknown or expired cursor"
@@ -5,15 +5,19 @@ Unit tests for the roster service (src/utils/roster.py).
 import json
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
 from src.utils.roster import (
+    annotate_listing_agents,
+    clear_roster_cache,
     find_agent_by_name,
     find_agent_by_phone,
     get_any_agent,
     get_main_office_phone,
     get_roster_phone_for_name,
+    get_roster_version,
     is_agent_in_roster,
     load_roster,
 )
@@ -136,3 +140,49 @@ class TestGetMainOfficePhone:
     def test_returns_office_phone(self, sample_roster_file):
         phone = get_main_office_phone(sample_roster_file)
         assert phone == "352-290-8023"
+
+
+class TestAnnotateListingAgents:
+    def test_matched_agent_gets_roster_details(self, sample_roster_file):
+        listing = {"agentName": "Sally Love", "agentEmail": "mls@test.com"}
+        annotate_listing_agents([listing], sample_roster_file)
+        assert listing["rosterMatched"] is True
+        assert listing["transferPhone"] == "352-430-6960"
+        assert listing["transferAgentEmail"] == "sally@test.com"
+        assert listing["rosterVersion"] == get_roster_version(sample_roster_file)
+
+    def test_unmatched_agent_gets_fallback(self, sample_roster_file):
+        listing = {"agentName": "Somebody Else", "agentEmail": "mls@test.com"}
+        annotate_listing_agents([listing], sample_roster_file)
+        fallback = get_any_agent(sample_roster_file)
+        assert listing["rosterMatched"] is False
+        assert listing["transferAgentName"] == fallback["name"]
+        assert listing["transferPhone"] == fallback["cell_phone"]
+
+    def test_roster_read_once_per_batch(self, sample_roster_file):
+        listings = [{"agentName": name} for name in ("Sally Love", "Kim Coffer", "Somebody Else", "Sally Love")]
+        with patch("src.utils.roster.json.load", wraps=json.load) as parse:
+            annotate_listing_agents(listings, sample_roster_file)
+        assert parse.call_count == 1
+        assert [listing["rosterMatched"] for listing in listings] == [True, True, False, True]
+
+    def test_version_changes_on_cache_clear(self, sample_roster_file):
+        before = get_roster_version(sample_roster_file)
+        clear_roster_cache()
+        assert get_roster_version(sample_roster_file) != before
+
+    def test_listing_agent_data_reads_stored_resolution(self, sample_roster_file, monkeypatch):
+        from src.functions import check_property as check_property_module
+
+        monkeypatch.setattr(check_property_module.settings, "AGENT_ROSTER_PATH", sample_roster_file)
+        listing = {"agentName": "Kim Coffer"}
+        annotate_listing_agents([listing], sample_roster_file)
+        with patch("src.utils.roster.find_agent_by_name") as lookup:
+            data = check_property_module.listing_agent_data(listing)
+        lookup.assert_not_called()
+        assert data["transfer_phone"] == "352-626-7671"
+
+        # Stale resolution (roster reloaded) is redone on read
+        listing["rosterVersion"] = "stale"
+        assert check_property_module.listing_agent_data(listing)["listing_agent"]["name"] == "Kim Coffer"
+        assert listing["rosterVersion"] == get_roster_version(sample_roster_file)
@@ -0,0 +1,138 @@
+"""
+Unit tests for keyed single-flight with an idempotency window
+(src/utils/single_flight.py) and its use by the lead creation tools.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.functions import create_buyer_lead as buyer_module
+from src.models.vapi_models import CreateBuyerLeadRequest
+from src.utils.errors import BoldTrailError
+from src.utils.single_flight import IdempotentSingleFlight
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    buyer_module._lead_creations.clear()
+    yield
+    buyer_module._lead_creations.clear()
+
+
+def _counting(result="done", delay=0.01):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return operation, calls
+
+
+async def test_concurrent_requests_run_once():
+    flight = IdempotentSingleFlight()
+    operation, calls = _counting()
+    results = await asyncio.gather(*(flight.run("buyer:+13525550142:", operation) for _ in range(4)))
+    assert results == ["done"] * 4
+    assert calls == [1]
+    assert flight.joined == 3
+
+
+async def test_success_is_replayed_within_window_only():
+    flight = IdempotentSingleFlight(window_seconds=0.1)
+    operation, calls = _counting()
+    await flight.run("k", operation)
+    assert await flight.run("k", operation) == "done"
+    assert calls == [1] and flight.replayed == 1
+    await asyncio.sleep(0.15)
+    await flight.run("k", operation)
+    assert calls == [1, 1]
+    flight.forget("k")
+    await flight.run("k", operation)
+    assert len(calls) == 3
+
+
+async def test_failures_are_not_replayed():
+    flight = IdempotentSingleFlight(is_success=lambda result: result == "ok")
+    operation, calls = _counting(result="failed")
+    await flight.run("k", operation)
+    await flight.run("k", operation)
+    assert len(calls) == 2
+
+    async def boom():
+        raise RuntimeError("crm down")
+
+    with pytest.raises(RuntimeError):
+        await flight.run("e", boom)
+    assert len(flight) == 0
+
+
+async def test_operation_survives_cancelled_caller():
+    flight = IdempotentSingleFlight()
+    operation, calls = _counting(delay=0.05)
+    caller = asyncio.ensure_future(flight.run("k", operation))
+    await asyncio.sleep(0.01)
+    caller.cancel()
+    await asyncio.sleep(0.1)
+    assert await flight.run("k", operation) == "done"
+    assert calls == [1]
+
+
+async def test_doubled_buyer_lead_calls_create_one_contact():
+    request = CreateBuyerLeadRequest(first_name="Ann", last_name="Lee", phone="352-555-0177", email="ann@example.com")
+    retry = CreateBuyerLeadRequest(first_name="Ann", last_name="Lee", phone="(352) 555-0177", email="ann@example.com")
+    crm = buyer_module.crm_client
+
+    async def create(_lead):
+        await asyncio.sleep(0.02)
+        return {"data": {"id": "new1"}}
+
+    with patch.object(crm, "resolve_contact_id", AsyncMock(return_value=None)), \
+            patch.object(crm, "create_buyer_lead", AsyncMock(side_effect=create)) as create_lead, \
+            patch.object(buyer_module, "_handle_buyer_lead_background_tasks", AsyncMock()) as background:
+        first, second = await asyncio.gather(
+            buyer_module.create_buyer_lead(request, x_vapi_call_id="call-1"),
+            buyer_module.create_buyer_lead(retry, x_vapi_call_id="call-1"),
+        )
+        await asyncio.sleep(0)
+    assert create_lead.await_count == 1
+    assert background.call_count == 1
+    assert first.data["contact_id"] == second.data["contact_id"] == "new1"
+
+
+async def test_duplicate_contact_on_create_updates_the_existing_contact():
+    request = CreateBuyerLeadRequest(first_name="Ann", last_name="Lee", phone="352-555-0178", email="ann@example.com",
+                                     location_preference="The Villages")
+    crm = buyer_module.crm_client
+    duplicate = BoldTrailError("Contact already exists", status_code=409)
+
+    with patch.object(crm, "resolve_contact_id", AsyncMock(side_effect=[None, "c1"])), \
+            patch.object(crm, "create_buyer_lead", AsyncMock(side_effect=duplicate)), \
+            patch.object(crm, "update_contact", AsyncMock(return_value={})) as update, \
+            patch.object(buyer_module, "notify_broker", AsyncMock()) as alert, \
+            patch.object(buyer_module, "_handle_buyer_lead_background_tasks", AsyncMock()) as background:
+        response = await buyer_module.create_buyer_lead(request, x_vapi_call_id="call-2")
+        await asyncio.sleep(0)
+
+    assert response.success
+    assert response.data["contact_id"] == "c1"
+    assert update.await_args.args[0] == "c1"
+    assert background.call_count == 1
+    alert.assert_not_called()
+
+
+async def test_unresolved_duplicate_contact_does_not_alert_the_office():
+    request = CreateBuyerLeadRequest(first_name="Ann", last_name="Lee", phone="352-555-0179")
+    crm = buyer_module.crm_client
+
+    with patch.object(crm, "resolve_contact_id", AsyncMock(return_value=None)), \
+            patch.object(crm, "create_buyer_lead", AsyncMock(side_effect=BoldTrailError("Duplicate contact", status_code=409))), \
+            patch.object(buyer_module, "notify_broker", AsyncMock()) as alert:
+        response = await buyer_module.create_buyer_lead(request, x_vapi_call_id="call-3")
+        await asyncio.sleep(0.01)
+
+    assert response.success
+    alert.assert_not_called()
@@ -0,0 +1,132 @@
+"""
+Tests for the paced SMS outbox (src/utils/sms_outbox.py)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.utils.errors import TwilioError
+from src.utils.sms_outbox import SmsOutbox, sms_segments
+
+
+class FakeTwilio:
+    """Records deliveries; raises queued errors first."""
+
+    def __init__(self, errors=None):
+        self.sent = []
+        self.times = []
+        self.errors = list(errors or [])
+
+    async def deliver(self, to, body):
+        self.times.append(time.monotonic())
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((to, body))
+        return {"sid": f"SM{len(self.sent)}", "status": "queued", "to": to, "message": body}
+
+
+def test_sms_segments_gsm_and_unicode():
+    assert sms_segments("a" * 160) == 1
+    assert sms_segments("a" * 161) == 2
+    assert sms_segments("[" * 80) == 1  # extended characters count double
+    assert sms_segments("🏠" + "a" * 60) == 1
+    assert sms_segments("🏠" + "a" * 70) == 2
+
+
+async def test_lane_paces_per_segment():
+    outbox = SmsOutbox(segments_per_second=20, burst_segments=1, batch_max_chars=0)
+    twilio = FakeTwilio()
+
+    await asyncio.gather(*(outbox.send("+13525550100", f"+1352555020{i}", "hello", twilio.deliver) for i in range(4)))
+
+    assert len(twilio.sent) == 4
+    assert twilio.times[-1] - twilio.times[0] >= 0.13  # 3 gaps at 20/s
+    assert outbox.stats()["sent"] == 4
+
+
+async def test_senders_have_independent_lanes():
+    outbox = SmsOutbox(segments_per_second=2, burst_segments=1)
+    twilio = FakeTwilio()
+
+    started = time.monotonic()
+    await asyncio.gather(
+        outbox.send("+13525550100", "+13525550201", "one", twilio.deliver),
+        outbox.send("+13525550101", "+13525550202", "two", twilio.deliver),
+    )
+
+    assert time.monotonic() - started < 0.3
+
+
+async def test_queued_messages_to_one_recipient_are_packed():
+    outbox = SmsOutbox(segments_per_second=20, burst_segments=1)
+    twilio = FakeTwilio()
+
+    results = await asyncio.gather(
+        outbox.send("+13525550100", "+13525550201", "first", twilio.deliver),
+        outbox.send("+13525550100", "+13525550201", "second", twilio.deliver),
+        outbox.send("+13525550100", "+13525550202", "other", twilio.deliver),
+    )
+
+    assert twilio.sent == [("+13525550201", "first\n\nsecond"), ("+13525550202", "other")]
+    assert results[0]["sid"] == results[1]["sid"] and results[0]["batched"] == 2
+    assert outbox.stats()["coalesced"] == 1
+
+
+async def test_throttled_send_is_retried():
+    outbox = SmsOutbox(segments_per_second=0, retry_base_seconds=0.01)
+    twilio = FakeTwilio(errors=[TwilioError("Too many requests", status_code=429, details={"code": 20429})])
+
+    result = await outbox.send("+13525550100", "+13525550201", "hello", twilio.deliver)
+
+    assert result["sid"] == "SM1"
+    stats = outbox.stats()
+    assert stats["throttled"] == 1 and stats["retried"] == 1 and stats["failed"] == 0
+
+
+async def test_non_retryable_error_is_raised():
+    outbox = SmsOutbox(segments_per_second=0, retry_base_seconds=0.01)
+    twilio = FakeTwilio(errors=[TwilioError("Invalid 'To' number", status_code=400, details={"code": 21211})])
+
+    with pytest.raises(TwilioError):
+        await outbox.send("+13525550100", "+13525550201", "hello", twilio.deliver)
+
+    assert outbox.stats()["failed"] == 1 and len(outbox) == 0
+
+
+async def test_retries_are_bounded():
+    outbox = SmsOutbox(segments_per_second=0, max_attempts=2, retry_base_seconds=0.01)
+    throttled = TwilioError("Too many requests", status_code=429)
+    twilio = FakeTwilio(errors=[throttled, throttled, throttled])
+
+    with pytest.raises(TwilioError):
+        await outbox.send("+13525550100", "+13525550201", "hello", twilio.deliver)
+
+    assert len(twilio.times) == 2
+
+
+async def test_identical_message_is_deduplicated():
+    outbox = SmsOutbox(segments_per_second=0, dedupe_window_seconds=60)
+    twilio = FakeTwilio()
+
+    first = await outbox.send("+13525550100", "(352) 555-0201", "hello", twilio.deliver)
+    second = await outbox.send("+13525550100", "+13525550201", "hello", twilio.deliver)
+    assert outbox.queue("+13525550100", "+13525550201", "hello", twilio.deliver) is None
+    await outbox.send("+13525550100", "+13525550201", "different", twilio.deliver)
+
+    assert len(twilio.sent) == 2
+    assert second["sid"] == first["sid"] and second["deduplicated"] is True
+    assert outbox.stats()["deduplicated"] == 2
+
+
+async def test_queue_returns_immediately_and_drains():
+    outbox = SmsOutbox(segments_per_second=20, burst_segments=1, batch_max_chars=0)
+    twilio = FakeTwilio()
+
+    for i in range(3):
+        outbox.queue("+13525550100", f"+1352555020{i}", "alert", twilio.deliver)
+    assert len(outbox) >= 2
+
+    assert await outbox.drain(2.0) == 0
+    assert len(twilio.sent) == 3
@@ -0,0 +1,71 @@
+"""
+Unit tests for speech formatting (src/utils/speech_format.py) and the
+pre-rendered spoken fields stored on listings.
+"""
+
+import xml.etree.ElementTree as ET
+
+from src.functions.check_property import describe_property
+from src.integrations.boldtrail import BoldTrailClient
+from src.utils.speech_format import (
+    format_spoken_address,
+    format_spoken_bed_bath,
+    format_spoken_price,
+    render_listing_speech,
+)
+
+
+def test_street_number_is_spoken_in_pairs():
+    assert format_spoken_address("6794 BOSS COURT") == "sixty-seven ninety-four Boss Court"
+    assert format_spoken_address("1205 Oak Lane") == "twelve oh five Oak Lane"
+
+
+def test_address_without_number_is_titled():
+    assert format_spoken_address("BOSS COURT SE") == "Boss Court SE"
+
+
+def test_prices():
+    assert format_spoken_price(249000) == "two forty-nine thousand"
+    assert format_spoken_price(1250000) == "one point two five million"
+    assert format_spoken_price(0) is None
+    assert format_spoken_price("n/a") is None
+
+
+def test_bed_bath_phrase():
+    assert format_spoken_bed_bath(3, 2.0) == "3 bedroom, 2 bathroom"
+    assert format_spoken_bed_bath(4, 2.5) == "4 bedroom, 2.5 bathroom"
+    assert format_spoken_bed_bath(None, "") == "0 bedroom, 0 bathroom"
+
+
+def test_render_listing_speech_stores_fields():
+    listing = render_listing_speech(
+        {"address": "6794 Boss Court", "price": 399000.0, "bedrooms": 3, "bathrooms": 2.0}
+    )
+    assert listing["spokenAddress"] == "sixty-seven ninety-four Boss Court"
+    assert listing["spokenPrice"] == "three ninety-nine thousand"
+    assert listing["spokenBedBath"] == "3 bedroom, 2 bathroom"
+
+
+def test_xml_ingest_renders_speech():
+    elem = ET.fromstring(
+        "<Listing><Location><StreetAddress>6794 BOSS COURT</StreetAddress></Location>"
+        "<ListingDetails><Price>399000</Price></ListingDetails></Listing>"
+    )
+    listing = BoldTrailClient()._extract_listing_from_xml(elem)
+    assert listing is not None
+    assert listing["spokenAddress"] == "sixty-seven ninety-four Boss Court"
+    assert listing["spokenPrice"] == "three ninety-nine thousand"
+
+
+def test_describe_property_uses_stored_strings():
+    prop = {
+        "address": "6794 Boss Court",
+        "city": "Wildwood",
+        "spokenAddress": "STORED ADDRESS",
+        "spokenPrice": "STORED PRICE",
+        "spokenBedBath": "STORED BEDBATH",
+    }
+    message = describe_property(prop)
+    assert "STORED ADDRESS, Wildwood" in message
+    assert "It's a STORED BEDBATH" in message
+    assert "listed at STORED PRICE" in message